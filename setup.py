@@ -126,7 +126,7 @@ FRAME_HEIGHT = 480
 # Detection parameters
 ALERT_THRESHOLD_SECONDS = 4.0
 THRESHOLD_VALUE = 50
-BLACK_PIXELS_MIN = 100
+DARK_RATIO_MIN = 0.02
 
 # Performance settings
 ENABLE_MEDIAN_BLUR = True
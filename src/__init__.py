@@ -15,16 +15,96 @@ __author__ = "Based on original work by Syed Sadi, Enhanced by [Your Name]"
 __description__ = "Real-time driver drowsiness detection using computer vision"
 
 from .drowsiness_detector import DrowsinessDetector
+from .analyzer import FrameAnalysis, FrameAnalyzer, ModelSet, StreamState
+from .stream_pool import StreamPool
+from .pipeline import PipelinedStream
+from .alerts import (AlertDispatcher, AlertSink, AudioSink, CallbackSink,
+                     FileSink, SocketSink)
+from .rendering import RenderPolicy
+from .evidence import EvidenceRecorder, EvidenceWriter, FrameRingBuffer
+from .pyramid import ImagePyramid, detect_on_levels
+from .tiling import TiledFaceDetector, non_max_suppression, tile_grid
+from .settings import ConfigWatcher, DetectorConfig, load_config
+from .motion_gate import MotionGate
+from .eye_state import EyeMeasurement, eye_open, measure_eye
+from .eye_cache import EyeStateCache
+from .eyelid_flow import EyelidFlowDetector
+from .latency_budget import LatencyBudget
+from .metrics import DetectorMetrics, MetricsRegistry, MetricsServer
+from .results import DetectionBuffer, FrameResult
+from .session_report import SessionSummary, load_report, merge_reports
+from .tuning import TuningProfile, load_or_tune
+from .face_selection import DriverSelector, FaceTrack
+from .capture import (BlinkTimeline, CaptureSource, FrameListSource, ImageDirectorySource,
+                      LiveSource, SyntheticFaceSource, VideoFileSource)
+from .frame_bus import FrameBusCapture, FrameBusReader, FrameBusWriter
 from .config import *
 from .utils import *
 
 __all__ = [
     'DrowsinessDetector',
+    'FrameAnalysis',
+    'FrameAnalyzer',
+    'ModelSet',
+    'StreamState',
+    'StreamPool',
+    'PipelinedStream',
+    'AlertDispatcher',
+    'AlertSink',
+    'AudioSink',
+    'CallbackSink',
+    'FileSink',
+    'SocketSink',
+    'RenderPolicy',
+    'EvidenceRecorder',
+    'EvidenceWriter',
+    'FrameRingBuffer',
+    'ImagePyramid',
+    'detect_on_levels',
+    'TiledFaceDetector',
+    'non_max_suppression',
+    'tile_grid',
+    'ConfigWatcher',
+    'DetectorConfig',
+    'load_config',
+    'MotionGate',
+    'EyeMeasurement',
+    'eye_open',
+    'measure_eye',
+    'EyeStateCache',
+    'EyelidFlowDetector',
+    'LatencyBudget',
+    'DetectorMetrics',
+    'MetricsRegistry',
+    'MetricsServer',
+    'DetectionBuffer',
+    'FrameResult',
+    'SessionSummary',
+    'load_report',
+    'merge_reports',
+    'TuningProfile',
+    'load_or_tune',
+    'DriverSelector',
+    'FaceTrack',
+    'BlinkTimeline',
+    'CaptureSource',
+    'FrameListSource',
+    'ImageDirectorySource',
+    'LiveSource',
+    'SyntheticFaceSource',
+    'VideoFileSource',
+    'FrameBusCapture',
+    'FrameBusReader',
+    'FrameBusWriter',
     'create_directories',
     'apply_preprocessing',
     'calculate_fps',
     'draw_text_with_background',
     'save_screenshot',
+    'extract_luma',
+    'is_bgr',
+    'packed_yuyv',
+    'unique_filename',
     'validate_cascade_file',
     'get_roi_coordinates',
     'normalize_coordinates',
@@ -0,0 +1,305 @@
+"""
+Alert dispatching for the Drowsiness Detection System
+=====================================================
+
+The detection loop only enqueues alerts; a background thread rate-limits
+them per stream and fans them out to pluggable sinks (audio, socket, file,
+callback) so sound playback and I/O never block frame processing.
+"""
+
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Alert levels, matching the ones understood by utils.create_alert_overlay
+ALERT_WARNING = "WARNING"
+ALERT_CRITICAL = "CRITICAL"
+ALERT_LEVELS = (ALERT_WARNING, ALERT_CRITICAL)
+
+
+def parse_socket_address(address: str) -> Union[Tuple[str, int], str]:
+    """
+    Parse a socket sink address.
+
+    ``"host:port"`` becomes a UDP (host, port) tuple; anything else is
+    taken as the path of a Unix datagram socket.
+    """
+    host, sep, port = address.rpartition(":")
+    if sep and host and port.isdigit() and "/" not in address:
+        return host, int(port)
+    return address
+
+
+class Alert:
+    """A single drowsiness alert delivered to the sinks."""
+
+    __slots__ = ("stream_id", "level", "closed_duration", "timestamp", "message")
+
+    def __init__(self, stream_id: str, level: str, closed_duration: float,
+                 timestamp: float, message: str = ""):
+        self.stream_id = stream_id
+        self.level = level
+        self.closed_duration = closed_duration
+        self.timestamp = timestamp
+        self.message = message or (
+            f"Eyes closed for {closed_duration:.1f}s on stream {stream_id}")
+
+    def to_dict(self) -> Dict:
+        """Return a JSON-serialisable representation of the alert."""
+        return {
+            "stream_id": self.stream_id,
+            "level": self.level,
+            "closed_duration": round(self.closed_duration, 3),
+            "timestamp": self.timestamp,
+            "message": self.message,
+        }
+
+
+class AlertSink:
+    """Base class for alert outputs. Sinks run on the dispatcher thread."""
+
+    def emit(self, alert: Alert) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release any resources held by the sink."""
+
+
+class AudioSink(AlertSink):
+    """Play a sound through pygame; silently disabled if audio is unavailable."""
+
+    def __init__(self, sound_path: str):
+        self.sound_path = sound_path
+        self._sound = None
+        self._mixer = None
+        self._initialized = False
+
+    def _init(self) -> None:
+        self._initialized = True
+        try:
+            import pygame
+            pygame.mixer.init()
+            self._mixer = pygame.mixer
+        except Exception as e:
+            logger.warning(f"Audio output unavailable, alerts will be visual only: {e}")
+            return
+
+        if not os.path.exists(self.sound_path):
+            logger.warning("Alert sound file not found, alerts will be visual only")
+            return
+
+        try:
+            self._sound = self._mixer.Sound(self.sound_path)
+        except Exception as e:
+            logger.warning(f"Could not load alert sound: {e}")
+
+    def emit(self, alert: Alert) -> None:
+        if not self._initialized:
+            self._init()
+        if self._sound is not None:
+            # Don't stack overlapping beeps if the previous one is still playing
+            if alert.level != ALERT_CRITICAL and self._mixer.get_busy():
+                return
+            self._sound.play()
+
+    def close(self) -> None:
+        if self._mixer is not None:
+            self._mixer.quit()
+            self._mixer = None
+
+
+class FileSink(AlertSink):
+    """Append alerts to a file as JSON lines."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def emit(self, alert: Alert) -> None:
+        self._file.write(json.dumps(alert.to_dict()) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class SocketSink(AlertSink):
+    """
+    Send alerts as JSON datagrams to a local listener.
+
+    The address is either a (host, port) tuple for UDP or a filesystem path
+    for a Unix datagram socket.
+    """
+
+    def __init__(self, address: Union[Tuple[str, int], str]):
+        self.address = address
+        if isinstance(address, str):
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        else:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def emit(self, alert: Alert) -> None:
+        self._sock.sendto(json.dumps(alert.to_dict()).encode("utf-8"), self.address)
+
+    def close(self) -> None:
+        self._sock.close()
+
+
+class CallbackSink(AlertSink):
+    """Forward alerts to an arbitrary callable."""
+
+    def __init__(self, callback: Callable[[Alert], None]):
+        self.callback = callback
+
+    def emit(self, alert: Alert) -> None:
+        self.callback(alert)
+
+
+class AlertDispatcher:
+    """
+    Queue-backed alert dispatcher running on its own thread.
+
+    ``submit`` is cheap and never blocks: it decides the alert level, drops
+    repeats of the same level within ``min_interval`` seconds for a stream
+    and hands the rest to the worker thread. A closure that lasts past
+    ``critical_after`` seconds escalates to CRITICAL immediately.
+    """
+
+    def __init__(self, sinks: Optional[List[AlertSink]] = None,
+                 min_interval: float = 2.0, critical_after: float = 8.0,
+                 max_queue: int = 64):
+        self.sinks = list(sinks) if sinks else []
+        self.min_interval = min_interval
+        self.critical_after = critical_after
+
+        self._queue: "queue.Queue[Optional[Alert]]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._last_sent: Dict[str, Tuple[str, float]] = {}
+        self._thread: Optional[threading.Thread] = None
+
+        # Statistics
+        self.dispatched = 0
+        self.suppressed = 0
+        self.dropped = 0
+
+    @classmethod
+    def from_settings(cls, alerts, sinks: Optional[List[AlertSink]] = None) -> "AlertDispatcher":
+        """Dispatcher with the timing and queue size of the alert settings."""
+        return cls(sinks=sinks, min_interval=alerts.min_interval_seconds,
+                   critical_after=alerts.critical_seconds, max_queue=alerts.queue_size)
+
+    def add_sink(self, sink: AlertSink) -> None:
+        """Register an additional sink."""
+        self.sinks.append(sink)
+
+    def start(self) -> None:
+        """Start the worker thread (idempotent)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._worker, name="alert-dispatcher",
+                                        daemon=True)
+        self._thread.start()
+
+    def level_for(self, closed_duration: float) -> str:
+        """Return the alert level for a closure of the given duration."""
+        if closed_duration >= self.critical_after:
+            return ALERT_CRITICAL
+        return ALERT_WARNING
+
+    def submit(self, stream_id: str, closed_duration: float,
+               timestamp: Optional[float] = None) -> bool:
+        """
+        Offer an alert for a stream.
+
+        Args:
+            stream_id: Identifier of the stream raising the alert
+            closed_duration: How long the eyes have been closed (seconds)
+            timestamp: Time of the alert, defaults to now
+
+        Returns:
+            True if the alert was queued, False if rate-limited or dropped
+        """
+        now = time.time() if timestamp is None else timestamp
+        level = self.level_for(closed_duration)
+
+        with self._lock:
+            last = self._last_sent.get(stream_id)
+            if last is not None:
+                last_level, last_time = last
+                escalated = ALERT_LEVELS.index(level) > ALERT_LEVELS.index(last_level)
+                if not escalated and now - last_time < self.min_interval:
+                    self.suppressed += 1
+                    return False
+            # A dropped alert must not count for rate limiting, or the next
+            # one would be suppressed as well
+            try:
+                self._queue.put_nowait(Alert(stream_id, level, closed_duration, now))
+            except queue.Full:
+                self.dropped += 1
+                return False
+            self._last_sent[stream_id] = (level, now)
+        return True
+
+    def take_over(self, other: "AlertDispatcher") -> None:
+        """
+        Continue where a dispatcher this one replaces left off: its rate
+        limits per stream and its statistics. Call before ``start``.
+        """
+        with other._lock:
+            last_sent = dict(other._last_sent)
+        with self._lock:
+            self._last_sent.update(last_sent)
+            self.dispatched += other.dispatched
+            self.suppressed += other.suppressed
+            self.dropped += other.dropped
+
+    def reset(self, stream_id: str) -> None:
+        """Forget the alert history of a stream, e.g. once the eyes reopen."""
+        with self._lock:
+            self._last_sent.pop(stream_id, None)
+
+    def _worker(self) -> None:
+        while True:
+            alert = self._queue.get()
+            if alert is None:
+                break
+            self._deliver(alert)
+
+    def _deliver(self, alert: Alert) -> None:
+        if alert.level == ALERT_CRITICAL:
+            logger.critical(f"DROWSINESS ALERT ({alert.level}): {alert.message}")
+        else:
+            logger.warning(f"DROWSINESS ALERT ({alert.level}): {alert.message}")
+
+        for sink in self.sinks:
+            try:
+                sink.emit(alert)
+            except Exception as e:
+                logger.error(f"Alert sink {type(sink).__name__} failed: {e}")
+        self.dispatched += 1
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Flush pending alerts, stop the worker thread and close the sinks."""
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                logger.warning("Alert queue full on shutdown, pending alerts discarded")
+            self._thread.join(timeout)
+        self._thread = None
+
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                logger.error(f"Failed to close alert sink {type(sink).__name__}: {e}")
@@ -0,0 +1,517 @@
+"""
+Frame analysis for the Drowsiness Detection System
+==================================================
+
+Detection split from stream state so one set of models can serve several
+streams on a thread pool. ``FrameAnalyzer`` runs preprocessing, the face
+and eye cascades and the eye-state checks on a frame and keeps no state
+between frames; ``StreamState`` holds the blink, closure and alert state
+of one stream, the same for the detector, the stream pool and the
+pipeline. OpenCV releases the GIL inside ``detectMultiScale``, so
+analysing frames on several threads uses several cores.
+
+A ``cv2.CascadeClassifier`` keeps per-image state while it scans and must
+not be used by two threads at once. ``ModelSet`` therefore loads the
+cascade files once to validate them and gives every thread its own
+classifier instances; scratch buffers (pyramid levels, the canonical eye
+buffer) are per thread as well.
+"""
+
+import logging
+import os
+import threading
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    from .alerts import AlertDispatcher
+    from .eye_state import LIGHTING_ADAPTIVE, METHOD_COMBINED, method_open, normalize_roi
+    from .face_selection import DriverSelector
+    from .pyramid import ImagePyramid, detect_on_levels
+    from .results import NO_BOXES, FrameResult, as_boxes, offset_boxes, scale_boxes
+    from .settings import DETECTION_PYRAMID, DETECTION_TILED, DetectorConfig, FaceSelectionSettings
+    from .tiling import TiledFaceDetector
+    from .utils import apply_preprocessing
+except ImportError:
+    from alerts import AlertDispatcher
+    from eye_state import LIGHTING_ADAPTIVE, METHOD_COMBINED, method_open, normalize_roi
+    from face_selection import DriverSelector
+    from pyramid import ImagePyramid, detect_on_levels
+    from results import NO_BOXES, FrameResult, as_boxes, offset_boxes, scale_boxes
+    from settings import DETECTION_PYRAMID, DETECTION_TILED, DetectorConfig, FaceSelectionSettings
+    from tiling import TiledFaceDetector
+    from utils import apply_preprocessing
+
+logger = logging.getLogger(__name__)
+
+
+def load_cascade(model_path: str) -> cv2.CascadeClassifier:
+    """
+    Load a Haar cascade classifier.
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        RuntimeError: If OpenCV cannot parse it
+    """
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Cascade file not found: {model_path}")
+
+    cascade = cv2.CascadeClassifier(model_path)
+    if cascade.empty():
+        raise RuntimeError(f"Failed to load cascade: {os.path.basename(model_path)}")
+
+    return cascade
+
+
+def create_driver_selector(faces: FaceSelectionSettings) -> DriverSelector:
+    """Create a driver selector from the face selection settings."""
+    return DriverSelector(strategy=faces.strategy,
+                          seat_region=faces.seat_region,
+                          iou_threshold=faces.track_iou,
+                          max_missed=faces.track_max_missed,
+                          secondary_interval=faces.secondary_interval,
+                          max_secondary=faces.max_secondary)
+
+
+class ModelSet:
+    """
+    Face and eye cascades, with one classifier instance per thread.
+
+    Args:
+        face_cascade_path: Face cascade XML file
+        eye_cascade_path: Eye cascade XML file
+
+    Raises:
+        FileNotFoundError, RuntimeError: If a cascade cannot be loaded
+    """
+
+    def __init__(self, face_cascade_path: str, eye_cascade_path: str):
+        self.face_cascade_path = face_cascade_path
+        self.eye_cascade_path = eye_cascade_path
+        self._local = threading.local()
+
+        # Load on the creating thread so broken files fail here, not in a worker
+        self.face_window = self.face_cascade.getOriginalWindowSize()
+        self.eye_window = self.eye_cascade.getOriginalWindowSize()
+
+    @classmethod
+    def from_settings(cls, settings: DetectorConfig) -> "ModelSet":
+        return cls(settings.paths.model_path('face_cascade'),
+                   settings.paths.model_path('eye_cascade'))
+
+    @property
+    def face_cascade(self) -> cv2.CascadeClassifier:
+        """The calling thread's face cascade."""
+        cascade = getattr(self._local, "face", None)
+        if cascade is None:
+            cascade = self._local.face = load_cascade(self.face_cascade_path)
+        return cascade
+
+    @property
+    def eye_cascade(self) -> cv2.CascadeClassifier:
+        """The calling thread's eye cascade."""
+        cascade = getattr(self._local, "eye", None)
+        if cascade is None:
+            cascade = self._local.eye = load_cascade(self.eye_cascade_path)
+        return cascade
+
+
+class FrameAnalysis:
+    """
+    Detections and eye state of one frame.
+
+    Args:
+        faces: All face boxes, shape (N, 4)
+        driver_face: Driver's face box, or None when no face was picked
+        eyes: Driver's eye boxes, shape (M, 4)
+        eyes_open: Open eyes among the first two, or None when fewer than
+            two eyes were found
+    """
+
+    __slots__ = ("faces", "driver_face", "eyes", "eyes_open")
+
+    def __init__(self, faces: np.ndarray, driver_face: Optional[Tuple[int, int, int, int]],
+                 eyes: np.ndarray, eyes_open: Optional[int]):
+        self.faces = faces
+        self.driver_face = driver_face
+        self.eyes = eyes
+        self.eyes_open = eyes_open
+
+    @property
+    def tracked(self) -> bool:
+        """Whether both of the driver's eyes were found."""
+        return self.eyes_open is not None
+
+    @property
+    def closed(self) -> bool:
+        """Both eyes closed unless both are open (only meaningful when tracked)."""
+        return self.tracked and self.eyes_open < 2
+
+
+class FrameAnalyzer:
+    """
+    Stateless, thread-safe detection and eye-state analysis.
+
+    The settings are treated as immutable; to change them create a new
+    analyzer, passing the existing ``models`` to keep the loaded cascades,
+    and close the old one.
+
+    Args:
+        settings: Detector configuration (detection, eye and preprocessing
+            sections are used)
+        models: Cascades to share; loaded from ``settings.paths`` if omitted
+    """
+
+    def __init__(self, settings: DetectorConfig, models: Optional[ModelSet] = None):
+        self.settings = settings
+        self.models = models or ModelSet.from_settings(settings)
+        self._local = threading.local()
+
+        # Tile workers for high-resolution frames; each worker uses its own cascade
+        self.tiler: Optional[TiledFaceDetector] = None
+        if settings.detection.mode == DETECTION_TILED:
+            self.tiler = TiledFaceDetector.from_settings(
+                settings.detection, lambda: self.models.face_cascade, self.models.face_window)
+
+    def _pyramid(self) -> ImagePyramid:
+        """The calling thread's detection pyramid."""
+        pyramid = getattr(self._local, "pyramid", None)
+        if pyramid is None:
+            detection = self.settings.detection
+            pyramid = self._local.pyramid = ImagePyramid(
+                scale_factor=detection.face_scale_factor,
+                max_levels=detection.pyramid_max_levels,
+                min_size=self.models.eye_window
+            )
+        return pyramid
+
+    def _eye_buffer(self) -> np.ndarray:
+        """The calling thread's canonical eye region buffer."""
+        buffer = getattr(self._local, "eye_buffer", None)
+        if buffer is None:
+            width, height = self.settings.eye.canonical_size
+            buffer = self._local.eye_buffer = np.empty((height, width), dtype=np.uint8)
+        return buffer
+
+    def _cascade_input(self, gray: np.ndarray):
+        """The image handed to a cascade: a UMat when OpenCL is enabled and available."""
+        if self.settings.tuning.opencl and cv2.ocl.useOpenCL():
+            return cv2.UMat(gray)
+        return gray
+
+    def preprocess(self, luma: np.ndarray) -> np.ndarray:
+        """Filter the luma plane (a third of the work of blurring BGR)."""
+        pre = self.settings.preprocessing
+        return apply_preprocessing(
+            luma,
+            enable_median_blur=pre.enable_median_blur,
+            median_kernel_size=pre.median_kernel_size,
+            enable_gaussian_blur=pre.enable_gaussian_blur,
+            gaussian_kernel_size=pre.gaussian_kernel_size
+        )
+
+    def detect_faces(self, gray: np.ndarray, low_resolution_scale: float = 1.0) -> np.ndarray:
+        """
+        Detect all faces in a preprocessed grayscale frame.
+
+        Args:
+            gray: Preprocessed frame
+            low_resolution_scale: Below 1, search on a frame downscaled by
+                this factor (cascade and tiled modes) or skip the pyramid
+                levels that only find faces smaller than the minimum size
+                divided by it
+
+        Returns:
+            Face boxes in frame coordinates, shape (N, 4)
+        """
+        detection = self.settings.detection
+        scale = low_resolution_scale
+        if detection.mode == DETECTION_PYRAMID:
+            # Both cascades scan the shared pyramid at their native window size
+            pyramid = self._pyramid()
+            pyramid.build(gray)
+            min_size = detection.face_min_size
+            if scale < 1.0:
+                min_size = (int(min_size[0] / scale), int(min_size[1] / scale))
+            return detect_on_levels(
+                self.models.face_cascade, pyramid,
+                pyramid.level_range(self.models.face_window, min_size),
+                min_neighbors=detection.face_min_neighbors
+            )
+
+        if scale < 1.0:
+            return self._detect_faces_low_resolution(gray, scale)
+        if self.tiler is not None:
+            return self.tiler.detect(gray)
+
+        return as_boxes(self.models.face_cascade.detectMultiScale(
+            self._cascade_input(gray),
+            scaleFactor=detection.face_scale_factor,
+            minNeighbors=detection.face_min_neighbors,
+            minSize=detection.face_min_size
+        ))
+
+    def _detect_faces_low_resolution(self, gray: np.ndarray, scale: float) -> np.ndarray:
+        """Detect faces on a downscaled copy of the frame, in full frame coordinates."""
+        detection = self.settings.detection
+        height, width = gray.shape[:2]
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        small = getattr(self._local, "low_res", None)
+        if small is None or small.shape != (size[1], size[0]):
+            small = self._local.low_res = np.empty((size[1], size[0]), dtype=np.uint8)
+        cv2.resize(gray, size, dst=small, interpolation=cv2.INTER_AREA)
+
+        window = self.models.face_window
+        min_size = tuple(max(w, int(m * scale)) for m, w in zip(detection.face_min_size, window))
+        faces = self.models.face_cascade.detectMultiScale(
+            small,
+            scaleFactor=detection.face_scale_factor,
+            minNeighbors=detection.face_min_neighbors,
+            minSize=min_size
+        )
+        return scale_boxes(faces, 1.0 / scale)
+
+    def detect_eyes(self, gray: np.ndarray, face: Tuple[int, int, int, int]) -> np.ndarray:
+        """
+        Detect eyes in the upper half of one face.
+
+        In pyramid mode the eyes are searched in views of the levels built
+        by detect_faces covering eye sizes up to half the face width, so
+        the face ROI is never resampled (the pyramid is built here if the
+        calling thread has not built it for this frame). In cascade mode
+        with adaptive lighting the face ROI is contrast-equalised before
+        the search.
+
+        Returns:
+            Eye boxes in full frame coordinates, shape (N, 4)
+        """
+        detection = self.settings.detection
+        x, y, w, h = (int(v) for v in face)
+
+        if detection.mode == DETECTION_PYRAMID:
+            pyramid = self._pyramid()
+            if not pyramid.levels or pyramid.levels[0] is not gray:
+                pyramid.build(gray)
+            levels = pyramid.level_range(self.models.eye_window,
+                                         detection.eye_min_size, (w // 2, h // 2))
+            return detect_on_levels(self.models.eye_cascade, pyramid, levels,
+                                    min_neighbors=detection.eye_min_neighbors,
+                                    roi=(x, y, w, int(h/2)))
+
+        # Region of interest for the face (upper half where eyes are)
+        roi_gray = gray[y:y + int(h/2), x:x + w]
+        if self.settings.eye.lighting == LIGHTING_ADAPTIVE and roi_gray.size:
+            roi_gray = normalize_roi(roi_gray, self.settings.eye)
+        eyes_in_face = self.models.eye_cascade.detectMultiScale(
+            self._cascade_input(roi_gray),
+            scaleFactor=detection.eye_scale_factor,
+            minNeighbors=detection.eye_min_neighbors,
+            minSize=detection.eye_min_size
+        )
+
+        # Convert eye coordinates to full frame coordinates
+        return offset_boxes(eyes_in_face, x, y)
+
+    def roi_open(self, eye_roi: np.ndarray, method: str = METHOD_COMBINED) -> bool:
+        """Whether an eye region looks open, using the calling thread's eye buffer."""
+        return method_open(eye_roi, self.settings.eye, method, self._eye_buffer())
+
+    def eye_open(self, gray: np.ndarray, eye: Tuple[int, int, int, int],
+                 method: str = METHOD_COMBINED) -> bool:
+        """Whether an eye box in the frame looks open; an empty box counts as open."""
+        ex, ey, ew, eh = (int(v) for v in eye)
+        eye_roi = gray[ey:ey + eh, ex:ex + ew]
+        if eye_roi.size == 0:
+            return True
+        return self.roi_open(eye_roi, method)
+
+    def analyze(self, luma: np.ndarray, selector: DriverSelector) -> FrameAnalysis:
+        """
+        Run the full detection pipeline on a frame.
+
+        Args:
+            luma: Grayscale (luma) frame
+            selector: The stream's driver selector; it carries the face
+                tracks, so it must not be shared by concurrent calls
+
+        Returns:
+            The frame's detections and the driver's eye state
+        """
+        gray = self.preprocess(luma)
+        return self.analyze_faces(gray, self.detect_faces(gray), selector)
+
+    def analyze_faces(self, gray: np.ndarray, faces: np.ndarray,
+                      selector: DriverSelector) -> FrameAnalysis:
+        """
+        Second half of ``analyze``: pick the driver among the detected faces
+        and find and judge the driver's eyes.
+
+        Args:
+            gray: Preprocessed frame
+            faces: Faces detected on it
+            selector: The stream's driver selector
+
+        Returns:
+            The frame's detections and the driver's eye state
+        """
+        height, width = gray.shape[:2]
+        driver = selector.select(faces, (width, height))
+        if driver is None:
+            return FrameAnalysis(faces, None, NO_BOXES, None)
+
+        face = tuple(int(v) for v in faces[driver])
+        eyes = self.detect_eyes(gray, face)
+        eyes_open = None
+        if len(eyes) >= 2:
+            eyes_open = sum(self.eye_open(gray, eye) for eye in eyes[:2])
+        return FrameAnalysis(faces, face, eyes, eyes_open)
+
+    def close(self) -> None:
+        """Stop the tile workers, if any; the models stay loaded."""
+        if self.tiler is not None:
+            self.tiler.close()
+
+
+class StreamState:
+    """
+    Blink, closure and alert state of one stream.
+
+    The closed state is held while the eyes are not observed and each
+    closure counts as one blink. On every observed frame of a closure
+    longer than ``alert_threshold`` an alert is offered to the dispatcher,
+    whose rate limiting and escalation decide what goes out. Lid movements
+    (eyelid flow) enter the state through ``apply_flow_event`` and outrank
+    contradicting static verdicts for ``hold_frames`` frames.
+
+    Args:
+        stream_id: Name of the stream
+        selector: Driver selector of the stream
+        alert_threshold: Seconds of closure after which an alert is due
+        dispatcher: Dispatcher alerts are offered to; without one no
+            alerts are raised
+        hold_frames: Frames a lid movement outranks static verdicts
+    """
+
+    def __init__(self, stream_id: str, selector: DriverSelector, alert_threshold: float,
+                 dispatcher: Optional[AlertDispatcher] = None, hold_frames: int = 0):
+        self.stream_id = stream_id
+        self.selector = selector
+        self.alert_threshold = alert_threshold
+        self.dispatcher = dispatcher
+        self.hold_frames = hold_frames
+
+        self.frame_index = 0
+        self.eyes_closed = False
+        self.eyes_closed_start = 0.0
+        self.eyes_tracked = False
+        self.flow_tracking = False
+        self._flow_event_frame: Optional[int] = None
+
+        # Statistics
+        self.blink_count = 0
+        self.alert_count = 0
+
+    @classmethod
+    def from_settings(cls, stream_id: str, settings: DetectorConfig,
+                      dispatcher: Optional[AlertDispatcher] = None) -> "StreamState":
+        return cls(stream_id, create_driver_selector(settings.faces),
+                   settings.alerts.threshold_seconds, dispatcher,
+                   settings.eyelid_flow.hold_frames)
+
+    @property
+    def monitored(self) -> bool:
+        """Whether the eye state is observed, by detection or by lid motion."""
+        return self.eyes_tracked or self.flow_tracking
+
+    def set_eyes_closed(self, closed: bool, now: float) -> bool:
+        """
+        Enter or leave the closed state.
+
+        Returns:
+            True if a closure (blink) started
+        """
+        if not closed:
+            if self.eyes_closed and self.dispatcher is not None:
+                self.dispatcher.reset(self.stream_id)
+            self.eyes_closed = False
+            return False
+        if self.eyes_closed:
+            return False
+        self.eyes_closed = True
+        self.eyes_closed_start = now
+        self.blink_count += 1
+        return True
+
+    def observe(self, tracked: bool, closed: Optional[bool], now: float) -> bool:
+        """
+        Fold in the static verdict of a full detection.
+
+        Args:
+            tracked: Whether both eyes were found
+            closed: Whether they look closed (ignored when not tracked)
+            now: Time of the frame in seconds
+
+        Returns:
+            True if a closure (blink) started
+        """
+        self.eyes_tracked = tracked
+        if not tracked:
+            return False
+        if closed != self.eyes_closed and self._flow_holds_state():
+            return False
+        return self.set_eyes_closed(closed, now)
+
+    def apply_flow_event(self, closing: bool, now: float) -> bool:
+        """Fold in a lid movement; returns True if a closure (blink) started."""
+        self._flow_event_frame = self.frame_index
+        return self.set_eyes_closed(closing, now)
+
+    def _flow_holds_state(self) -> bool:
+        # Static checks on a half-closed eye are unreliable, so right after
+        # the lid moved they would undo the closure or reopening just seen
+        return (self._flow_event_frame is not None
+                and self.frame_index - self._flow_event_frame < self.hold_frames)
+
+    def check_alert(self, now: float) -> Optional[str]:
+        """
+        Offer an alert to the dispatcher if one is due.
+
+        Returns:
+            The level of the alert if the dispatcher accepted it, else None
+        """
+        if self.dispatcher is None or not (self.monitored and self.eyes_closed):
+            return None
+        closed_duration = now - self.eyes_closed_start
+        if closed_duration <= self.alert_threshold:
+            return None
+        if not self.dispatcher.submit(self.stream_id, closed_duration, now):
+            return None
+        self.alert_count += 1
+        return self.dispatcher.level_for(closed_duration)
+
+    def end_frame(self, now: float, faces: np.ndarray,
+                  driver_face: Optional[Tuple[int, int, int, int]], eyes: np.ndarray,
+                  latency: float = 0.0) -> FrameResult:
+        """Record the frame's result and move on to the next frame."""
+        result = FrameResult(self.frame_index, now, faces, driver_face, eyes,
+                             self.eyes_closed, self.monitored, latency)
+        self.frame_index += 1
+        return result
+
+    def update(self, analysis: FrameAnalysis, now: float, latency: float = 0.0) -> FrameResult:
+        """
+        Fold a frame's analysis into the stream state.
+
+        Args:
+            analysis: Result of FrameAnalyzer.analyze for the stream's next frame
+            now: Time of the frame in seconds
+            latency: Processing time of the frame in seconds
+
+        Returns:
+            The frame's result
+        """
+        self.observe(analysis.tracked, analysis.closed, now)
+        self.check_alert(now)
+        return self.end_frame(now, analysis.faces, analysis.driver_face, analysis.eyes, latency)
@@ -10,8 +10,18 @@ CAMERA_INDEX = 0
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 480
 FPS_TARGET = 30
+CAPTURE_FORMAT = "auto"             # "bgr", "luma" (Y plane only) or "auto" (luma when headless)
 
 # Detection parameters
+# "pyramid" shares one per-frame pyramid between the cascades; it matches
+# "cascade" but is slower (single-scale calls per level), so it is not a speed-up
+DETECTION_MODE = "cascade"          # "cascade", "pyramid" or "tiled"
+PYRAMID_MAX_LEVELS = 32             # Cap on pyramid levels built per frame
+TILE_SIZE = 640                     # Tile edge in "tiled" mode (high-resolution cameras)
+TILE_OVERLAP = 160                  # Tile overlap, also the largest face searched in tiles
+TILE_COARSE_SCALE = 0.25            # Downscale of the full-frame pass for larger faces (0 = off)
+TILE_NMS_IOU = 0.3                  # Overlap above which duplicate face boxes are merged
+TILE_WORKERS = 0                    # Tile worker threads (0 = one per CPU)
 FACE_SCALE_FACTOR = 1.1
 FACE_MIN_NEIGHBORS = 5
 FACE_MIN_SIZE = (30, 30)
@@ -20,24 +30,119 @@ EYE_SCALE_FACTOR = 1.1
 EYE_MIN_NEIGHBORS = 5
 EYE_MIN_SIZE = (20, 20)
 
-# Eye analysis parameters
+# Frame-difference gate: reuse the last detection while nothing moves
+MOTION_GATE_ENABLED = False
+MOTION_GATE_FRAME_THRESHOLD = 3.0   # Mean abs difference of the downsampled frame
+MOTION_GATE_EYE_THRESHOLD = 6.0     # Mean abs difference inside the eye windows
+MOTION_GATE_DOWNSAMPLE_SIZE = (80, 60)
+MOTION_GATE_REFRESH_INTERVAL = 15   # Full detection at least every N frames
+
+# Multiple faces: which one is the driver, and how often passengers are analysed
+FACE_SELECTION = "largest"          # "largest", "seat_region" or "tracking"
+SEAT_REGION = (0.0, 0.0, 1.0, 1.0)  # Driver seat as normalised (x, y, w, h)
+FACE_TRACK_IOU = 0.3                # Overlap needed to continue a face track
+FACE_TRACK_MAX_MISSED = 10          # Frames a lost face track is kept
+SECONDARY_FACE_INTERVAL = 0         # Analyse other faces every N frames (0 = never)
+MAX_SECONDARY_FACES = 1             # Other faces analysed per frame at most
+
+# Eye analysis parameters (measured on the eye region resampled to EYE_CANONICAL_SIZE)
+# The ratio minimums are the old 100 dark / 30 edge pixel minimums converted
+# at a 40 px eye: 100 / 40**2, and 30 * 32 / 40 / 32**2 (edge pixels scale
+# with the eye's width, not its area)
+EYE_CANONICAL_SIZE = (32, 32)       # (width, height) every eye region is resampled to
 THRESHOLD_VALUE = 50
-BLACK_PIXELS_MIN = 100
+DARK_RATIO_MIN = 0.0625             # Share of pixels darker than THRESHOLD_VALUE
 CANNY_LOW_THRESHOLD = 100
 CANNY_HIGH_THRESHOLD = 200
-EDGE_PIXELS_MIN = 30
+EDGE_RATIO_MIN = 0.023              # Share of pixels on Canny edges
 EAR_THRESHOLD = 0.2
 
+# Lighting: "fixed" uses the levels above; "adaptive" equalises the face and
+# eye regions (CLAHE) and derives the levels from each eye region
+EYE_LIGHTING = "fixed"
+CLAHE_CLIP_LIMIT = 2.0
+CLAHE_TILE_GRID = (2, 2)
+ADAPTIVE_DARK_RATIO_MIN = 0.15      # Share of the eye region darker than its Otsu level
+ADAPTIVE_EDGE_RATIO_MIN = 0.165     # Share of the eye region on contrast-scaled Canny edges
+CANNY_CONTRAST_RATIO = 0.4          # Canny low threshold / 5th-95th percentile spread
+
+# Eye state cache: reuse decisions for near-identical eye crops
+EYE_CACHE_ENABLED = False
+EYE_CACHE_SIZE = 4096               # Entries kept (least recently used evicted)
+EYE_CACHE_HASH_SIZE = (16, 8)       # Eye crops are downsampled to this for the key
+EYE_CACHE_QUANTIZATION_BITS = 3     # Low bits dropped per pixel so noise maps to one key
+EYE_CACHE_FILE = None               # e.g. "data/logs/eye_cache.json" to persist across runs
+
+# Eyelid motion: optical-flow blink detection between full eye-state checks
+EYELID_FLOW_ENABLED = False
+EYELID_FLOW_STATIC_INTERVAL = 3     # Full detection and static eye checks every N frames
+EYELID_FLOW_WINDOW_SIZE = (16, 16)  # Eye windows are downsampled to this for the flow
+EYELID_FLOW_CLOSE_THRESHOLD = 0.1   # Lid travel (fraction of the eye window) of a closing
+EYELID_FLOW_OPEN_THRESHOLD = 0.1    # Lid travel of an opening
+EYELID_FLOW_STILL_LEVEL = 0.01      # Per-frame lid motion that ends a movement
+EYELID_FLOW_HOLD_FRAMES = 3         # Frames a flow closure cannot be overruled by a static check
+
+# Latency budget: degrade the pipeline when frames run over 1 / FPS_TARGET
+BUDGET_ENABLED = False
+BUDGET_DEGRADE_RATIO = 0.9          # Average latency / budget that steps the level down
+BUDGET_RECOVER_RATIO = 0.5          # Average latency / budget that steps the level back up
+BUDGET_DEGRADE_AFTER = 3            # Frames at a level before degrading further
+BUDGET_RECOVER_AFTER = 30           # Frames at a level before recovering
+BUDGET_SMOOTHING = 0.3              # Weight of the newest frame in the latency average
+BUDGET_MAX_LEVEL = 4                # Deepest level (0 full .. 4 reuse eye windows)
+BUDGET_REFRESH_INTERVAL = 5         # Full detection at least every N frames while boxes are reused
+BUDGET_LOW_RESOLUTION_SCALE = 0.5   # Frame scale for face detection at the low-resolution level
+
+# Metrics exporter: "host:port" serves HTTP GET /metrics (Prometheus text
+# format), a filesystem path a Unix stream socket writing the same text
+METRICS_ENABLED = False
+METRICS_ADDRESS = "127.0.0.1:9464"
+
+# OpenCV runtime tuning (tuning.py). OpenCV's own worker threads compete with
+# the detector's thread pools; with auto tuning a micro-benchmark picks the
+# settings for the host and worker count once and caches them
+CV_AUTO_TUNE = False
+CV_THREADS = 0                      # OpenCV worker threads (0 leaves OpenCV's setting alone)
+CV_USE_OPTIMIZED = True             # SSE/AVX code paths (cv2.setUseOptimized)
+CV_USE_OPENCL = False               # OpenCL (UMat) paths, off on hosts without a GPU
+CV_PIN_THREADS = False              # Pin detector worker threads to one core each
+CV_TUNING_CACHE = "data/logs/cv_tuning.json"
+CV_TUNING_FRAMES = 20               # Frames per candidate in the tuning benchmark
+
+# Session summary report (written when the detector shuts down)
+SESSION_REPORT_ENABLED = False
+SESSION_REPORT_DIR = "data/logs/sessions"
+SESSION_REPORT_FORMAT = "json"      # "json", "csv" (timeline only) or "both"
+SESSION_BIN_SECONDS = 60.0          # Initial timeline bin width, doubled as the session grows
+SESSION_MAX_BINS = 240              # Timeline bins kept at most
+SESSION_PERCLOS_WINDOW = 60.0       # Seconds per window of the PERCLOS histogram
+SESSION_MAX_ALERTS = 100            # Alerts listed individually in the report
+
 # Alert settings
 ALERT_THRESHOLD_SECONDS = 4.0
 ALERT_SOUND_ENABLED = True
 ALERT_SOUND_FILE = "beep.wav"
+ALERT_MIN_INTERVAL_SECONDS = 2.0    # Repeat alerts of the same level at most this often
+ALERT_CRITICAL_SECONDS = 8.0        # Closure duration that escalates to CRITICAL
+ALERT_QUEUE_SIZE = 64
+ALERT_LOG_FILE = None               # e.g. "data/logs/alerts.jsonl"
+ALERT_SOCKET_ADDRESS = None         # e.g. ("127.0.0.1", 5055) or "/tmp/drowsiness.sock"
 
 # UI settings
 DISPLAY_FPS = True
 DISPLAY_BLINK_COUNT = True
 DISPLAY_ALERTS = True
 SAVE_SCREENSHOTS = True
+RENDER_MODE = "every_n"             # "every_n", "snapshot" (headless) or "none"
+RENDER_INTERVAL = 1                 # Draw/display every Nth frame in "every_n" mode
+
+# Evidence capture (screenshots and alert clips, written in the background)
+EVIDENCE_CAPTURE_ENABLED = True
+EVIDENCE_PRE_SECONDS = 1.5          # Buffered footage before the alert
+EVIDENCE_POST_SECONDS = 1.5         # Footage recorded after the alert
+EVIDENCE_WRITER_WORKERS = 2
+EVIDENCE_MAX_JOBS = 16
+EVIDENCE_MAX_PENDING_MB = 256
 
 # Logging settings
 LOG_LEVEL = "INFO"
@@ -59,6 +164,7 @@ MODEL_PATHS = {
 # Data paths
 DATA_PATHS = {
     "screenshots": "data/screenshots",
+    "evidence": "data/evidence",
     "logs": "data/logs",
     "sounds": "data/sounds"
 }
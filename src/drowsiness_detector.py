@@ -14,12 +14,53 @@ Date: 2025
 import cv2
 import numpy as np
 import time
-import pygame
 import os
 import sys
-from typing import Tuple, Optional, List
+import threading
+from typing import Callable, Dict, Tuple, Optional, List
 import logging
 
+try:
+    from .alerts import AlertDispatcher, AudioSink, FileSink, SocketSink, parse_socket_address
+    from .analyzer import FrameAnalyzer, StreamState, create_driver_selector
+    from .capture import LiveSource
+    from .evidence import EvidenceRecorder, EvidenceWriter
+    from .eye_cache import EyeStateCache
+    from .eyelid_flow import EVENT_CLOSING, EyelidFlowDetector
+    from .eye_state import METHOD_COMBINED, METHOD_INTENSITY, contour_ratio
+    from .face_selection import DriverSelector, FaceTrack
+    from .latency_budget import (LEVEL_FULL, LEVEL_LOW_RESOLUTION, LEVEL_REUSE_EYES,
+                                 LEVEL_REUSE_FACE, LEVEL_SKIP_CONTOUR, LatencyBudget)
+    from .metrics import DetectorMetrics, MetricsServer
+    from .motion_gate import MotionGate
+    from .rendering import RenderPolicy
+    from .results import NO_BOXES, FrameResult
+    from .session_report import SessionSummary
+    from .settings import (CAPTURE_AUTO, CAPTURE_LUMA, ENV_CONFIG_FILE, ConfigWatcher,
+                           DetectorConfig, load_config)
+    from .tuning import TuningProfile, load_or_tune
+    from .utils import extract_luma, is_bgr, packed_yuyv
+except ImportError:
+    from alerts import AlertDispatcher, AudioSink, FileSink, SocketSink, parse_socket_address
+    from analyzer import FrameAnalyzer, StreamState, create_driver_selector
+    from capture import LiveSource
+    from evidence import EvidenceRecorder, EvidenceWriter
+    from eye_cache import EyeStateCache
+    from eyelid_flow import EVENT_CLOSING, EyelidFlowDetector
+    from eye_state import METHOD_COMBINED, METHOD_INTENSITY, contour_ratio
+    from face_selection import DriverSelector, FaceTrack
+    from latency_budget import (LEVEL_FULL, LEVEL_LOW_RESOLUTION, LEVEL_REUSE_EYES,
+                                LEVEL_REUSE_FACE, LEVEL_SKIP_CONTOUR, LatencyBudget)
+    from metrics import DetectorMetrics, MetricsServer
+    from motion_gate import MotionGate
+    from rendering import RenderPolicy
+    from results import NO_BOXES, FrameResult
+    from session_report import SessionSummary
+    from settings import (CAPTURE_AUTO, CAPTURE_LUMA, ENV_CONFIG_FILE, ConfigWatcher,
+                          DetectorConfig, load_config)
+    from tuning import TuningProfile, load_or_tune
+    from utils import extract_luma, is_bgr, packed_yuyv
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -30,112 +71,551 @@ class DrowsinessDetector:
     Main class for drowsiness detection using computer vision.
     """
     
-    def __init__(self, camera_index: int = 0, alert_threshold: float = 4.0):
+    def __init__(self, camera_index: Optional[int] = None,
+                 alert_threshold: Optional[float] = None,
+                 alert_dispatcher: Optional[AlertDispatcher] = None,
+                 stream_id: Optional[str] = None,
+                 render_policy: Optional[RenderPolicy] = None,
+                 evidence_writer: Optional[EvidenceWriter] = None,
+                 settings: Optional[DetectorConfig] = None,
+                 capture=None,
+                 clock: Optional[Callable[[], float]] = None):
         """
         Initialize the drowsiness detector.
         
         Args:
-            camera_index: Index of the camera to use
+            camera_index: Index of the camera to use (overrides settings)
             alert_threshold: Time threshold (seconds) before triggering alert
+                (overrides settings)
+            alert_dispatcher: Dispatcher used to deliver alerts; a default one
+                with the configured sinks is created if omitted
+            stream_id: Name of this stream in alerts (defaults to camera<index>)
+            render_policy: When to draw the overlay and show the window;
+                defaults to the render settings
+            evidence_writer: Background writer for screenshots and alert
+                clips; a default one is created if omitted
+            settings: Detector configuration; defaults to config.py values
+                with DROWSINESS_* environment overrides (see settings.py)
+            capture: Frame source, any capture.CaptureSource or object with
+                the cv2.VideoCapture interface; opens the camera if omitted
+            clock: Time source in seconds used for blink, closure and alert
+                timing; defaults to time.time (pass a simulated clock to run
+                faster than real time)
         """
-        self.camera_index = camera_index
-        self.alert_threshold = alert_threshold
+        settings = settings or load_config()
+        overrides = {}
+        if camera_index is not None:
+            overrides["camera"] = {"index": camera_index}
+        if alert_threshold is not None:
+            overrides["alerts"] = {"threshold_seconds": alert_threshold}
+        self.settings = settings.updated(overrides).validate()
+        self._pending_settings: Optional[DetectorConfig] = None
+        self._settings_lock = threading.Lock()
+        
+        self.camera_index = self.settings.camera.index
+        self.stream_id = stream_id or f"camera{self.camera_index}"
+        self.render_policy = render_policy or RenderPolicy(self.settings.render.mode,
+                                                           self.settings.render.interval)
+        
+        self.clock = clock or time.time
         
         # Initialize camera
-        self.cap = cv2.VideoCapture(camera_index)
+        self.cap = capture if capture is not None else LiveSource(self.camera_index)
         if not self.cap.isOpened():
-            raise RuntimeError(f"Could not open camera at index {camera_index}")
+            raise RuntimeError(f"Could not open camera at index {self.camera_index}")
         
         # Set camera properties
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        self.raw_capture = False
+        self._configure_camera()
+        
+        # OpenCV threading and code paths, before any cascade runs
+        self.tuning = self._create_tuning()
+        
+        # Haar cascades and the stateless detection and eye-state steps
+        self.analyzer = FrameAnalyzer(self.settings)
+        
+        # Alerts are delivered off the detection thread
+        self._own_alert_dispatcher = alert_dispatcher is None
+        self.alert_dispatcher = alert_dispatcher or self._create_alert_dispatcher()
+        self.alert_dispatcher.start()
+        
+        # Screenshots and alert clips are encoded and written off the detection thread
+        self._own_evidence_writer = evidence_writer is None
+        self.evidence_writer = evidence_writer or self._create_evidence_writer()
+        self.evidence_recorder = self._create_evidence_recorder()
+        
+        # Blink, closure and alert state, shared with the stream pool and pipeline;
+        # only the driver's face drives it
+        self.state = StreamState(self.stream_id, self._create_face_selector(),
+                                 self.settings.alerts.threshold_seconds, self.alert_dispatcher,
+                                 self.settings.eyelid_flow.hold_frames)
+        self.driver_face: Optional[Tuple[int, int, int, int]] = None
+        self.last_result: Optional[FrameResult] = None
+        self.last_faces: np.ndarray = NO_BOXES
+        self.last_eyes: np.ndarray = NO_BOXES
+        
+        # Cascade statistics (driver's face and eyes)
+        self.face_detections = 0
+        self.face_misses = 0
+        self.eye_detections = 0
+        self.eye_misses = 0
         
-        # Load Haar cascade classifiers
-        self.face_cascade = self._load_cascade('haarcascade_frontalface_default.xml')
-        self.eye_cascade = self._load_cascade('haarcascade_eye.xml')
+        # Optional change gate that skips detection on static frames, watching
+        # the last eye windows the cascade found
+        self.motion_gate = self._create_motion_gate()
+        self._gate_eyes: np.ndarray = NO_BOXES
         
-        # Initialize pygame mixer for alerts
-        pygame.mixer.init()
-        self.alert_sound = self._load_alert_sound()
+        # Optional cache of eye-state decisions for near-identical eye crops
+        self.eye_cache = self._create_eye_cache()
         
-        # State variables
-        self.blink_count = 0
-        self.last_blink_time = 0
-        self.eyes_closed_start = 0
-        self.eyes_closed = False
+        # Optional eyelid motion detector running between full detections
+        self.eyelid_flow = self._create_eyelid_flow()
+        self._flow_face: Optional[Tuple[int, int, int, int]] = None
+        self._frames_since_static = 0
+        
+        # Optional latency budget that degrades the pipeline when frames run late
+        self.budget = self._create_budget()
+        self.degradation_level = LEVEL_FULL
+        self._frames_since_detection = 0
+        
+        # Optional metrics, served to local scrapers
+        self.metrics: Optional[DetectorMetrics] = None
+        self.metrics_server: Optional[MetricsServer] = None
+        self._start_metrics()
+        
+        # Optional summary of the whole session, written on cleanup
+        self.session = self._create_session()
         
         # Performance metrics
         self.fps_counter = 0
-        self.fps_start_time = time.time()
+        self.fps_start_time = self.clock()
         self.current_fps = 0
+        self.stage_times: Dict[str, float] = {}  # Seconds spent per stage on the last frame
+        
+        self.last_luma: Optional[np.ndarray] = None
+        self.running = False
+        self._window_open = False
         
         logger.info("Drowsiness detector initialized successfully")
     
-    def _load_cascade(self, filename: str) -> cv2.CascadeClassifier:
-        """Load a Haar cascade classifier from the models directory."""
-        model_path = os.path.join(os.path.dirname(__file__), '..', 'models', filename)
-        if not os.path.exists(model_path):
-            raise FileNotFoundError(f"Cascade file not found: {model_path}")
+    def _configure_camera(self):
+        """Apply the camera resolution and capture format from the settings."""
+        camera = self.settings.camera
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, camera.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, camera.height)
         
-        cascade = cv2.CascadeClassifier(model_path)
-        if cascade.empty():
-            raise RuntimeError(f"Failed to load cascade: {filename}")
+        # Detection only needs luma. Ask the backend for raw YUYV frames
+        # so the Y plane can be used directly; backends that refuse keep
+        # delivering BGR and are converted as before.
+        luma = camera.capture_format == CAPTURE_LUMA or (
+            camera.capture_format == CAPTURE_AUTO and not self.render_policy.displays)
+        if luma:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'YUYV'))
+            self.raw_capture = bool(self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0))
+        else:
+            if self.raw_capture:
+                self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+            self.raw_capture = False
+        if self.raw_capture:
+            logger.info("Capturing raw frames, using the Y plane for detection")
+    
+    def _to_gray(self, frame: np.ndarray) -> np.ndarray:
+        """Return the luma plane of a captured frame."""
+        if not self.raw_capture:
+            return extract_luma(frame)
         
-        return cascade
+        camera = self.settings.camera
+        try:
+            return extract_luma(frame, camera.width, camera.height)
+        except ValueError as e:
+            # The backend accepted raw mode but delivers something else.
+            # Switch back to BGR; this one frame is treated as empty.
+            logger.warning(f"{e}; falling back to BGR capture")
+            self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+            self.raw_capture = False
+            return np.zeros((camera.height, camera.width), dtype=np.uint8)
+    
+    def _create_face_selector(self) -> DriverSelector:
+        """Create the driver selector from the face selection settings."""
+        return create_driver_selector(self.settings.faces)
+    
+    @property
+    def face_selector(self) -> DriverSelector:
+        return self.state.selector
+    
+    @property
+    def frame_index(self) -> int:
+        return self.state.frame_index
     
-    def _load_alert_sound(self) -> Optional[pygame.mixer.Sound]:
-        """Load alert sound file."""
+    @property
+    def blink_count(self) -> int:
+        return self.state.blink_count
+    
+    @property
+    def eyes_closed(self) -> bool:
+        return self.state.eyes_closed
+    
+    @property
+    def eyes_closed_start(self) -> float:
+        return self.state.eyes_closed_start
+    
+    @property
+    def eyes_tracked(self) -> bool:
+        return self.state.eyes_tracked
+    
+    @property
+    def eyes_monitored(self) -> bool:
+        """Whether the driver's eye state is currently observed (by detection or lid motion)."""
+        return self.state.monitored
+    
+    @property
+    def alert_threshold(self) -> float:
+        return self.state.alert_threshold
+    
+    def _create_motion_gate(self) -> Optional[MotionGate]:
+        """Create the frame-difference gate if enabled in the settings."""
+        gate = self.settings.motion_gate
+        if not gate.enabled:
+            return None
+        return MotionGate(frame_threshold=gate.frame_threshold,
+                          eye_threshold=gate.eye_threshold,
+                          downsample_size=gate.downsample_size,
+                          refresh_interval=gate.refresh_interval)
+    
+    def _create_eye_cache(self) -> Optional[EyeStateCache]:
+        """Create the eye-state cache if enabled, loading its file if present."""
+        cache_settings = self.settings.eye_cache
+        if not cache_settings.enabled:
+            return None
+        cache = EyeStateCache(max_entries=cache_settings.max_entries,
+                              hash_size=cache_settings.hash_size,
+                              quantization_bits=cache_settings.quantization_bits)
+        if cache_settings.file and os.path.exists(cache_settings.file):
+            try:
+                cache.load(cache_settings.file)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Could not load eye state cache {cache_settings.file}: {e}")
+        return cache
+    
+    def _save_eye_cache(self, path: Optional[str] = None):
+        """Persist the eye-state cache if a file is configured."""
+        path = path or self.settings.eye_cache.file
+        if self.eye_cache is None or not path:
+            return
         try:
-            # Try to load a default beep sound
-            sound_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'beep.wav')
-            if os.path.exists(sound_path):
-                return pygame.mixer.Sound(sound_path)
-            else:
-                logger.warning("Alert sound file not found, alerts will be visual only")
-                return None
-        except Exception as e:
-            logger.warning(f"Could not load alert sound: {e}")
+            self.eye_cache.save(path)
+        except OSError as e:
+            logger.error(f"Could not save eye state cache: {e}")
+    
+    def _create_eyelid_flow(self) -> Optional[EyelidFlowDetector]:
+        """Create the optical-flow eyelid detector if enabled in the settings."""
+        lid = self.settings.eyelid_flow
+        if not lid.enabled:
+            return None
+        return EyelidFlowDetector(window_size=lid.window_size,
+                                  close_threshold=lid.close_threshold,
+                                  open_threshold=lid.open_threshold,
+                                  still_level=lid.still_level)
+    
+    def _create_tuning(self) -> TuningProfile:
+        """
+        Apply the OpenCV tuning profile for a single detection thread.
+        
+        The default profile is not applied, so a host application's own
+        OpenCV settings survive creating a detector.
+        """
+        profile = load_or_tune(self.settings, workers=1)
+        if self.settings.tuning.auto or profile != TuningProfile():
+            profile.apply()
+            logger.info(f"OpenCV tuning: {profile.describe()}")
+        return profile
+    
+    def _create_budget(self) -> Optional[LatencyBudget]:
+        """Create the latency budget at the camera's target FPS if enabled."""
+        budget = self.settings.budget
+        if not budget.enabled:
+            return None
+        return LatencyBudget(target_fps=self.settings.camera.fps,
+                             degrade_ratio=budget.degrade_ratio,
+                             recover_ratio=budget.recover_ratio,
+                             degrade_after=budget.degrade_after,
+                             recover_after=budget.recover_after,
+                             smoothing=budget.smoothing,
+                             max_level=budget.max_level)
+    
+    def _start_metrics(self):
+        """Create the detector metrics and start the exporter if enabled."""
+        metrics = self.settings.metrics
+        if not metrics.enabled:
+            return
+        self.metrics = DetectorMetrics(self)
+        try:
+            self.metrics_server = MetricsServer(self.metrics.registry,
+                                                parse_socket_address(metrics.address)).start()
+        except OSError as e:
+            logger.error(f"Could not serve metrics on {metrics.address}: {e}")
+    
+    def _create_session(self) -> Optional[SessionSummary]:
+        """Create the session summary if enabled."""
+        if not self.settings.session.enabled:
+            return None
+        return SessionSummary.from_settings(self.stream_id, self.settings)
+    
+    def _write_session_report(self):
+        """Finish the session summary and write its report."""
+        if self.session is None or self.session.finished:
+            return
+        self.session.finish(frames_dropped=getattr(self.cap, "frames_dropped", 0))
+        session = self.settings.session
+        try:
+            for path in self.session.write(session.directory, session.format):
+                logger.info(f"Session report written to {path}")
+        except OSError as e:
+            logger.error(f"Could not write session report: {e}")
+    
+    def _stop_metrics(self):
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        self.metrics = None
+        self.metrics_server = None
+    
+    def _create_alert_dispatcher(self) -> AlertDispatcher:
+        """Create an alert dispatcher with the sinks enabled in the settings."""
+        alerts = self.settings.alerts
+        sinks = []
+        if alerts.sound_enabled:
+            sound_path = os.path.join(self.settings.paths.sounds, alerts.sound_file)
+            if not os.path.isabs(sound_path):
+                sound_path = os.path.join(os.path.dirname(__file__), '..', sound_path)
+            sinks.append(AudioSink(sound_path))
+        if alerts.log_file:
+            sinks.append(FileSink(alerts.log_file))
+        if alerts.socket_address:
+            sinks.append(SocketSink(parse_socket_address(alerts.socket_address)))
+        
+        return AlertDispatcher.from_settings(alerts, sinks)
+    
+    def _replace_alert_dispatcher(self):
+        """Rebuild the dispatcher for new sinks, keeping its rate limits and statistics."""
+        old = self.alert_dispatcher
+        dispatcher = self._create_alert_dispatcher()
+        # Alerts already queued still go out through the old sinks
+        old.stop()
+        dispatcher.take_over(old)
+        dispatcher.start()
+        self.alert_dispatcher = self.state.dispatcher = dispatcher
+    
+    def _create_evidence_writer(self) -> EvidenceWriter:
+        """Create the background writer for screenshots and alert clips."""
+        evidence = self.settings.evidence
+        return EvidenceWriter(
+            self.settings.paths.screenshots,
+            workers=evidence.writer_workers,
+            max_jobs=evidence.max_jobs,
+            max_pending_bytes=evidence.max_pending_mb * 1024 * 1024
+        )
+    
+    def _create_evidence_recorder(self) -> Optional[EvidenceRecorder]:
+        """Create the alert clip recorder at the camera's FPS if enabled."""
+        evidence = self.settings.evidence
+        if not evidence.enabled:
             return None
+        fps = self.settings.camera.fps
+        return EvidenceRecorder(
+            self.evidence_writer,
+            pre_frames=int(evidence.pre_seconds * fps),
+            post_frames=int(evidence.post_seconds * fps),
+            fps=fps,
+            directory=self.settings.paths.evidence
+        )
+    
+    def _apply_evidence_settings(self, old: DetectorConfig):
+        """Rebuild the evidence writer and recorder for changed evidence settings."""
+        new, previous = self.settings.evidence, old.evidence
+        sizing = ("writer_workers", "max_jobs", "max_pending_mb")
+        resize = any(getattr(new, name) != getattr(previous, name) for name in sizing)
+        if resize and not self._own_evidence_writer:
+            logger.warning("Evidence writer sizing takes effect on restart "
+                           "(the writer was supplied by the caller)")
+            resize = False
+        if not resize and new == previous and self.settings.camera.fps == old.camera.fps:
+            return
+        
+        # A clip being collected is written with the settings it started under
+        if self.evidence_recorder is not None:
+            self.evidence_recorder.flush()
+        if resize:
+            self.evidence_writer.stop()
+            self.evidence_writer = self._create_evidence_writer()
+        self.evidence_recorder = self._create_evidence_recorder()
+    
+    def apply_config(self, settings: DetectorConfig):
+        """
+        Swap in a new configuration without restarting the stream.
+        
+        Safe to call from any thread (e.g. a ConfigWatcher); the change takes
+        effect at the start of the next frame. Camera index and paths only
+        apply on restart; alert sinks and the evidence writer are rebuilt
+        unless they were supplied by the caller.
+        
+        Raises:
+            ValueError: If the configuration is invalid
+        """
+        settings = settings.validate()
+        with self._settings_lock:
+            self._pending_settings = settings
+    
+    def _apply_pending_settings(self):
+        """Apply a configuration queued by apply_config (detection thread only)."""
+        # Taken under the lock so a configuration queued meanwhile is not lost
+        with self._settings_lock:
+            settings, self._pending_settings = self._pending_settings, None
+        if settings is None:
+            return
+        old = self.settings
+        self.settings = settings
+        
+        if settings.camera.index != old.camera.index or settings.paths != old.paths:
+            logger.warning("Camera index and path changes take effect on restart")
+        if settings.camera != old.camera or settings.render != old.render:
+            self._configure_camera()
+        if settings.tuning != old.tuning:
+            self.tuning = self._create_tuning()
+        # Analyzers are immutable; the new one keeps the loaded cascades
+        self.analyzer.close()
+        self.analyzer = FrameAnalyzer(settings, self.analyzer.models)
+        if settings.faces != old.faces:
+            self.state.selector = self._create_face_selector()
+            self.driver_face = None
+        if settings.motion_gate != old.motion_gate:
+            self.motion_gate = self._create_motion_gate()
+        if settings.eye_cache != old.eye_cache:
+            self._save_eye_cache(old.eye_cache.file)
+            self.eye_cache = self._create_eye_cache()
+        if settings.eyelid_flow != old.eyelid_flow:
+            self.eyelid_flow = self._create_eyelid_flow()
+            self._flow_face = None
+            self.state.hold_frames = settings.eyelid_flow.hold_frames
+            self.state.flow_tracking = False
+        if settings.budget != old.budget or settings.camera.fps != old.camera.fps:
+            self.budget = self._create_budget()
+            self.degradation_level = LEVEL_FULL
+        if settings.metrics != old.metrics:
+            self._stop_metrics()
+            self._start_metrics()
+        if settings.session != old.session:
+            self._write_session_report()
+            self.session = self._create_session()
+        
+        self.state.alert_threshold = settings.alerts.threshold_seconds
+        sinks = ("queue_size", "sound_enabled", "sound_file", "log_file", "socket_address")
+        if any(getattr(settings.alerts, name) != getattr(old.alerts, name) for name in sinks):
+            if self._own_alert_dispatcher:
+                self._replace_alert_dispatcher()
+            else:
+                logger.warning("Alert sink changes take effect on restart "
+                               "(the dispatcher was supplied by the caller)")
+        self.alert_dispatcher.min_interval = settings.alerts.min_interval_seconds
+        self.alert_dispatcher.critical_after = settings.alerts.critical_seconds
+        self._apply_evidence_settings(old)
+        
+        if settings.render != old.render:
+            self.render_policy.update(settings.render.mode, settings.render.interval)
+        
+        logger.info("Configuration applied")
     
-    def _detect_face_and_eyes(self, frame: np.ndarray, gray: np.ndarray) -> Tuple[List, List]:
+    def _preprocess(self, luma: np.ndarray) -> np.ndarray:
+        """Filter the luma plane (a third of the work of blurring BGR)."""
+        return self.analyzer.preprocess(luma)
+    
+    def locate_eyes(self, frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
-        Detect faces and eyes in the frame.
+        Run preprocessing and detection on a frame without updating the
+        blink, closure or alert state (used for offline evaluation).
         
         Args:
-            frame: BGR color frame
-            gray: Grayscale frame
+            frame: Frame as returned by the camera (BGR, grayscale or raw YUV)
             
         Returns:
-            Tuple of (faces, eyes) detection results
+            Tuple of (preprocessed gray frame, faces, driver's eyes)
         """
-        # Detect faces
-        faces = self.face_cascade.detectMultiScale(
-            gray, 
-            scaleFactor=1.1, 
-            minNeighbors=5, 
-            minSize=(30, 30)
-        )
+        gray = self._preprocess(self._to_gray(frame))
+        faces, eyes = self._detect_face_and_eyes(frame, gray)
+        return gray, faces, eyes
+    
+    def _detect_faces(self, gray: np.ndarray) -> np.ndarray:
+        """Detect all faces in the preprocessed grayscale frame, as an (N, 4) array."""
+        scale = 1.0
+        if self.degradation_level >= LEVEL_LOW_RESOLUTION:
+            # Over budget: search a downscaled frame or skip the finest levels
+            scale = self.settings.budget.low_resolution_scale
+        return self.analyzer.detect_faces(gray, scale)
+    
+    def _detect_eyes(self, gray: np.ndarray, face: Tuple[int, int, int, int]) -> np.ndarray:
+        """Detect eyes in the upper half of one face, in full frame coordinates."""
+        return self.analyzer.detect_eyes(gray, face)
+    
+    def _detect_face_and_eyes(self, frame: np.ndarray,
+                              gray: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Detect faces, pick the driver and detect the driver's eyes.
         
-        eyes = []
-        for (x, y, w, h) in faces:
-            # Define region of interest for face (upper half where eyes are)
-            roi_gray = gray[y:y + int(h/2), x:x + w]
-            roi_color = frame[y:y + int(h/2), x:x + w]
-            
-            # Detect eyes in the face ROI
-            eyes_in_face = self.eye_cascade.detectMultiScale(
-                roi_gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(20, 20)
-            )
+        Eyes are only searched in the driver's face, plus on at most
+        ``faces.max_secondary`` other faces when they are due; those keep
+        their own eye state on their face track.
+        
+        Args:
+            frame: Captured frame
+            gray: Grayscale frame
             
-            # Convert eye coordinates to full frame coordinates
-            for (ex, ey, ew, eh) in eyes_in_face:
-                eyes.append((x + ex, y + ey, ew, eh))
+        Returns:
+            Tuple of (faces, eyes); the eyes belong to the driver's face
+        """
+        if self._reuse_face():
+            # Over budget: keep the previous boxes, refreshed every few frames
+            self._frames_since_detection += 1
+            if self.degradation_level >= LEVEL_REUSE_EYES and self.eyes_tracked:
+                return self.last_faces, self.last_eyes
+            return self.last_faces, self._detect_driver_eyes(gray, self.driver_face)
+        self._frames_since_detection = 0
+        
+        faces = self._detect_faces(gray)
+        height, width = gray.shape[:2]
+        driver = self.face_selector.select(faces, (width, height))
+        self.driver_face = None if driver is None else tuple(int(v) for v in faces[driver])
+        self.face_detections += 1
+        if driver is None:
+            self.face_misses += 1
+        
+        eyes = NO_BOXES if driver is None else self._detect_driver_eyes(gray, faces[driver])
+        
+        for index, track in self.face_selector.secondary_due(driver):
+            self._update_secondary_face(frame, gray, faces[index], track)
         
         return faces, eyes
     
+    def _detect_driver_eyes(self, gray: np.ndarray, face: Tuple[int, int, int, int]) -> np.ndarray:
+        """Detect the driver's eyes, counting runs that miss either eye."""
+        eyes = self._detect_eyes(gray, face)
+        self.eye_detections += 1
+        if len(eyes) < 2:
+            self.eye_misses += 1
+        return eyes
+    
+    def _reuse_face(self) -> bool:
+        """Whether the degradation level lets this frame keep the previous face box."""
+        return (self.degradation_level >= LEVEL_REUSE_FACE and self.driver_face is not None
+                and self._frames_since_detection + 1 < self.settings.budget.refresh_interval)
+    
+    def _update_secondary_face(self, frame: np.ndarray, gray: np.ndarray,
+                               face: Tuple[int, int, int, int], track: FaceTrack):
+        """Refresh the eye state of a face other than the driver's."""
+        eyes = self._detect_eyes(gray, face)
+        if len(eyes) < 2:
+            return
+        eyes_open = sum(self._analyze_eye_state(frame, gray, face, eye) for eye in eyes[:2])
+        track.update_eye_state(eyes_open, self.clock())
+    
     def _analyze_eye_state(self, frame: np.ndarray, gray: np.ndarray, 
                           face: Tuple[int, int, int, int], 
                           eye: Tuple[int, int, int, int]) -> bool:
@@ -151,78 +631,46 @@ class DrowsinessDetector:
         Returns:
             True if eye is open, False if closed
         """
-        fx, fy, fw, fh = face
-        ex, ey, ew, eh = eye
+        # Thresholding, Canny and EAR must all agree the eye is open; over
+        # budget the contour ratio is skipped
+        method = METHOD_INTENSITY if self.degradation_level >= LEVEL_SKIP_CONTOUR else METHOD_COMBINED
+        if self.eye_cache is None:
+            return self.analyzer.eye_open(gray, eye, method)
         
-        # Get eye ROI
+        ex, ey, ew, eh = eye
         eye_roi = gray[ey:ey + eh, ex:ex + ew]
-        
         if eye_roi.size == 0:
             return True
-        
-        # Method 1: Thresholding
-        _, thresh_eye = cv2.threshold(eye_roi, 50, 255, cv2.THRESH_BINARY)
-        black_pixels = thresh_eye.size - cv2.countNonZero(thresh_eye)
-        
-        # Method 2: Canny edge detection
-        canny_eye = cv2.Canny(eye_roi, 100, 200)
-        edge_pixels = cv2.countNonZero(canny_eye)
-        
-        # Method 3: Eye aspect ratio (EAR)
-        ear = self._calculate_eye_aspect_ratio(eye_roi)
-        
-        # Combine methods for decision
-        is_open = (
-            black_pixels > 100 and  # Threshold method
-            edge_pixels > 30 and    # Canny method
-            ear > 0.2               # EAR method
-        )
-        
-        return is_open
+        return self.eye_cache.lookup(eye_roi, self.settings.eye,
+                                     lambda roi: self.analyzer.roi_open(roi, method), method)
     
     def _calculate_eye_aspect_ratio(self, eye_roi: np.ndarray) -> float:
         """Calculate the Eye Aspect Ratio (EAR) for the given eye region."""
-        try:
-            # Find contours in the eye ROI
-            contours, _ = cv2.findContours(eye_roi, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            if not contours:
-                return 0.0
-            
-            # Get the largest contour (should be the eye)
-            largest_contour = max(contours, key=cv2.contourArea)
-            
-            # Calculate the convex hull
-            hull = cv2.convexHull(largest_contour)
-            
-            # Calculate area ratios
-            eye_area = cv2.contourArea(largest_contour)
-            hull_area = cv2.contourArea(hull)
-            
-            if hull_area == 0:
-                return 0.0
-            
-            return eye_area / hull_area
-        except Exception:
-            return 0.0
+        return contour_ratio(eye_roi)
     
     def _update_fps(self):
         """Update FPS counter."""
         self.fps_counter += 1
-        if time.time() - self.fps_start_time >= 1.0:
+        if self.clock() - self.fps_start_time >= 1.0:
             self.current_fps = self.fps_counter
             self.fps_counter = 0
-            self.fps_start_time = time.time()
+            self.fps_start_time = self.clock()
     
-    def _draw_ui(self, frame: np.ndarray, faces: List, eyes: List):
+    def _draw_ui(self, frame: np.ndarray, faces: np.ndarray, eyes: np.ndarray):
         """Draw UI elements on the frame."""
         # Draw face rectangles
-        for (x, y, w, h) in faces:
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-            cv2.putText(frame, 'Face', (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+        for face in faces:
+            x, y, w, h = (int(v) for v in face)
+            if (x, y, w, h) == self.driver_face:
+                label, color = 'Driver', (0, 255, 0)
+            else:
+                label, color = 'Face', (160, 160, 160)
+            cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
+            cv2.putText(frame, label, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
         
         # Draw eye rectangles
-        for (x, y, w, h) in eyes:
+        for eye in eyes:
+            x, y, w, h = (int(v) for v in eye)
             color = (0, 0, 255) if self.eyes_closed else (255, 0, 0)
             cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
             cv2.putText(frame, 'Eye', (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
@@ -235,85 +683,236 @@ class DrowsinessDetector:
         cv2.putText(frame, fps_text, (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
         
         # Draw alert if eyes are closed for too long
-        if self.eyes_closed and time.time() - self.eyes_closed_start > self.alert_threshold:
+        if self.eyes_closed and self.clock() - self.eyes_closed_start > self.alert_threshold:
             cv2.putText(frame, "ALERT! DROWSINESS DETECTED!", (10, 90), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 3)
     
-    def _trigger_alert(self):
-        """Trigger drowsiness alert."""
-        if self.alert_sound:
-            try:
-                self.alert_sound.play()
-            except Exception as e:
-                logger.error(f"Failed to play alert sound: {e}")
+    def _check_alert(self):
+        """Offer a due alert to the dispatcher; rate limiting and delivery happen off-thread."""
+        now = self.clock()
+        level = self.state.check_alert(now)
+        if level is None:
+            return
         
-        logger.warning("DROWSINESS ALERT TRIGGERED!")
+        # Evidence and the session report cover every alert that actually goes out
+        closed_duration = now - self.eyes_closed_start
+        if self.evidence_recorder is not None:
+            self.evidence_recorder.trigger(f"{self.stream_id}_{level.lower()}")
+        if self.session is not None:
+            self.session.record_alert(level, now, closed_duration)
+    
+    def process_frame(self, frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Run the detection pipeline on one captured frame and update the state.
+        
+        Only the luma plane is processed; colour is left untouched and only
+        used if the frame gets rendered.
+        
+        Args:
+            frame: Frame as returned by the camera (BGR, grayscale or raw YUV)
+            
+        Returns:
+            Tuple of (captured frame, faces, eyes)
+        """
+        if self._pending_settings is not None:
+            self._apply_pending_settings()
+        
+        stages = self.stage_times
+        start = time.perf_counter()
+        
+        luma = self._to_gray(frame)
+        self.last_luma = luma
+        
+        if self.evidence_recorder is not None:
+            self.evidence_recorder.add_frame(frame if is_bgr(frame) else luma, self.clock())
+        mark = time.perf_counter()
+        stages["capture"] = mark - start
+        
+        # Eyelid motion is measured on every frame, full detection only every few
+        flow = self.eyelid_flow
+        flow_time = 0.0
+        if flow is not None and flow.tracking:
+            self._apply_flow_event(flow.update(luma))
+            flow_time, mark = time.perf_counter() - mark, time.perf_counter()
+        static_due = (flow is None or not flow.tracking or
+                      self._frames_since_static + 1 >= self.settings.eyelid_flow.static_interval)
+        
+        # Static frames reuse the previous detection and eye state
+        if not static_due or (self.motion_gate is not None
+                              and not self.motion_gate.should_process(luma)):
+            faces, eyes = self.last_faces, self.last_eyes
+            stages["preprocess"] = stages["detect"] = 0.0
+            stages["eye_state"] = flow_time
+            self._frames_since_static += 1
+        else:
+            gray = self._preprocess(luma)
+            stages["preprocess"], mark = time.perf_counter() - mark, time.perf_counter()
+            
+            # Detect faces and eyes
+            faces, eyes = self._detect_face_and_eyes(frame, gray)
+            stages["detect"], mark = time.perf_counter() - mark, time.perf_counter()
+            
+            self._update_eye_state(frame, gray, faces, eyes)
+            
+            if flow is not None:
+                self._update_flow_windows(luma, eyes)
+            self._frames_since_static = 0
+            
+            if self.motion_gate is not None:
+                self._update_gate(luma, eyes)
+            self.last_faces, self.last_eyes = faces, eyes
+            stages["eye_state"] = time.perf_counter() - mark + flow_time
+        
+        # Check for drowsiness alert
+        self.state.flow_tracking = flow is not None and flow.tracking
+        self._check_alert()
+        stages["total"] = time.perf_counter() - start
+        
+        if self.budget is not None:
+            self.degradation_level = self.budget.record(stages["total"], self.clock())
+        if self.metrics is not None:
+            self.metrics.record_frame()
+        if self.session is not None:
+            self.session.record(self.clock(), self.eyes_closed, self.eyes_monitored, stages["total"])
+        self.last_result = self.state.end_frame(self.clock(), faces, self.driver_face, eyes,
+                                                stages["total"])
+        
+        # Update FPS
+        self._update_fps()
+        
+        return frame, faces, eyes
+    
+    def frame_result(self) -> FrameResult:
+        """
+        Compact record of the frame processed last, e.g. to append to a
+        DetectionBuffer in offline runs.
+        """
+        return self.last_result
+    
+    def _update_eye_state(self, frame: np.ndarray, gray: np.ndarray, faces: np.ndarray,
+                          eyes: np.ndarray):
+        """Update blink and closure state from a fresh detection."""
+        if self.driver_face is None or len(eyes) < 2:
+            self.state.observe(False, None, self.clock())
+            return
+        
+        # Check if both eyes are closed
+        eyes_open = 0
+        for eye in eyes[:2]:  # Check first two eyes
+            if self._analyze_eye_state(frame, gray, self.driver_face, eye):
+                eyes_open += 1
+        
+        # Update state (both eyes closed unless both are open)
+        if self.state.observe(True, eyes_open < 2, self.clock()):
+            logger.info(f"Blink detected! Count: {self.blink_count}")
+    
+    def _apply_flow_event(self, event: Optional[str]):
+        """Fuse an eyelid movement into the blink and closure state."""
+        if event is None:
+            return
+        if self.state.apply_flow_event(event == EVENT_CLOSING, self.clock()):
+            logger.info(f"Blink detected! Count: {self.blink_count}")
+    
+    def _update_flow_windows(self, luma: np.ndarray, eyes: np.ndarray):
+        """Re-anchor the eyelid flow windows after a full detection."""
+        flow = self.eyelid_flow
+        face = self.driver_face
+        if face is None:
+            flow.clear()
+        elif self.eyes_tracked:
+            flow.set_windows(eyes[:2], luma)
+        elif flow.tracking and self._flow_face is not None:
+            # The cascade misses closed eyes: keep watching where they were,
+            # moving the windows with the face
+            dx = (face[0] + face[2] // 2) - (self._flow_face[0] + self._flow_face[2] // 2)
+            dy = (face[1] + face[3] // 2) - (self._flow_face[1] + self._flow_face[3] // 2)
+            if dx or dy:
+                flow.shift_windows(dx, dy, luma)
+        self._flow_face = face
+    
+    def _update_gate(self, luma: np.ndarray, eyes: np.ndarray):
+        """Make the frame the motion gate's keyframe, keeping its eye windows."""
+        if self.driver_face is None:
+            self._gate_eyes = NO_BOXES
+        elif self.eyes_tracked:
+            self._gate_eyes = eyes[:2]
+        # Otherwise the cascade misses closed eyes: keep watching where they
+        # were, so the gate still sees them reopen
+        self.motion_gate.update(luma, self._gate_eyes)
+    
+    def _render_canvas(self, frame: np.ndarray) -> np.ndarray:
+        """Colour image to draw the UI on; grey only if the capture has no chroma."""
+        if is_bgr(frame):
+            return frame
+        camera = self.settings.camera
+        yuyv = packed_yuyv(frame, camera.width, camera.height)
+        if yuyv is not None:
+            return cv2.cvtColor(yuyv, cv2.COLOR_YUV2BGR_YUYV)
+        return cv2.cvtColor(self.last_luma, cv2.COLOR_GRAY2BGR)
+    
+    def request_snapshot(self):
+        """Render and save the next processed frame. Safe to call from any thread."""
+        self.render_policy.request_snapshot()
+    
+    def stop(self):
+        """Ask the detection loop to exit after the current frame."""
+        self.running = False
+    
+    def _save_snapshot(self, frame: np.ndarray) -> Optional[str]:
+        """Queue a rendered frame for writing to the screenshots directory."""
+        path = self.evidence_writer.submit_image(frame)
+        if path is None:
+            logger.warning("Screenshot dropped, evidence writer is busy")
+        return path
     
     def run(self):
         """Main detection loop."""
         logger.info("Starting drowsiness detection...")
-        logger.info("Press 'q' to quit, 's' to save screenshot")
+        if self.render_policy.displays:
+            logger.info("Press 'q' to quit, 's' to save screenshot")
+        else:
+            logger.info(f"Running headless (render mode: {self.render_policy.mode})")
         
+        self.running = True
         try:
-            while True:
+            while self.running:
                 ret, frame = self.cap.read()
                 if not ret:
                     logger.error("Failed to read frame from camera")
                     break
                 
-                # Preprocess frame
-                frame = cv2.medianBlur(frame, 5)
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                frame, faces, eyes = self.process_frame(frame)
                 
-                # Detect faces and eyes
-                faces, eyes = self._detect_face_and_eyes(frame, gray)
+                # Snapshots are rendered on a copy so the display is unaffected
+                if self.render_policy.take_snapshot_request():
+                    snapshot = self._render_canvas(frame).copy()
+                    self._draw_ui(snapshot, faces, eyes)
+                    self._save_snapshot(snapshot)
                 
-                # Analyze eye states
-                if faces.size > 0 and len(eyes) >= 2:
-                    # Check if both eyes are closed
-                    eyes_open = 0
-                    for eye in eyes[:2]:  # Check first two eyes
-                        if self._analyze_eye_state(frame, gray, faces[0], eye):
-                            eyes_open += 1
-                    
-                    # Update state
-                    if eyes_open < 2:  # Both eyes closed
-                        if not self.eyes_closed:
-                            self.eyes_closed = True
-                            self.eyes_closed_start = time.time()
-                            self.blink_count += 1
-                            logger.info(f"Blink detected! Count: {self.blink_count}")
-                    else:
-                        self.eyes_closed = False
-                    
-                    # Check for drowsiness alert
-                    if self.eyes_closed and time.time() - self.eyes_closed_start > self.alert_threshold:
-                        self._trigger_alert()
-                
-                # Update FPS
-                self._update_fps()
+                if not self.render_policy.should_display(self.frame_index):
+                    continue
                 
                 # Draw UI
-                self._draw_ui(frame, faces, eyes)
+                canvas = self._render_canvas(frame)
+                self._draw_ui(canvas, faces, eyes)
                 
                 # Display frame
-                cv2.imshow('Drowsiness Detection', frame)
+                cv2.imshow('Drowsiness Detection', canvas)
+                self._window_open = True
                 
                 # Handle key presses
                 key = cv2.waitKey(1) & 0xFF
                 if key == ord('q'):
                     break
                 elif key == ord('s'):
-                    timestamp = time.strftime("%Y%m%d_%H%M%S")
-                    filename = f"screenshot_{timestamp}.jpg"
-                    cv2.imwrite(filename, frame)
-                    logger.info(f"Screenshot saved: {filename}")
+                    self._save_snapshot(canvas)
         
         except KeyboardInterrupt:
             logger.info("Detection stopped by user")
         except Exception as e:
             logger.error(f"Error in detection loop: {e}")
         finally:
+            self.running = False
             self.cleanup()
     
     def cleanup(self):
@@ -321,16 +920,36 @@ class DrowsinessDetector:
         logger.info("Cleaning up...")
         if self.cap.isOpened():
             self.cap.release()
-        cv2.destroyAllWindows()
-        pygame.mixer.quit()
+        if self._window_open:
+            cv2.destroyAllWindows()
+            self._window_open = False
+        self.alert_dispatcher.stop()
+        self._stop_metrics()
+        self._write_session_report()
+        self.analyzer.close()
+        self._save_eye_cache()
+        if self.evidence_recorder is not None:
+            self.evidence_recorder.flush()
+        self.evidence_writer.stop()
         logger.info("Cleanup complete")
 
 
 def main():
     """Main entry point."""
     try:
-        detector = DrowsinessDetector(camera_index=0, alert_threshold=4.0)
-        detector.run()
+        # config.py defaults, DROWSINESS_CONFIG file and DROWSINESS_* overrides
+        settings = load_config()
+        detector = DrowsinessDetector(settings=settings)
+        
+        watcher = None
+        config_path = os.environ.get(ENV_CONFIG_FILE)
+        if config_path:
+            watcher = ConfigWatcher(config_path, detector.apply_config).start()
+        try:
+            detector.run()
+        finally:
+            if watcher is not None:
+                watcher.stop()
     except Exception as e:
         logger.error(f"Failed to start drowsiness detector: {e}")
         sys.exit(1)
@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+Blink accuracy evaluation for the Drowsiness Detection System
+=============================================================
+
+Runs the detector's eye-state pipeline over labelled open/closed images
+and labelled blink sequences, in parallel worker processes, and reports
+precision, recall and F1 for each eye-state method (threshold, Canny,
+contour ratio and the combined rule) together with per-image latency.
+"Closed" is the positive class.
+
+A report can be saved as a baseline; later runs, e.g. with a faster
+detection configuration, are accepted only if no method loses more F1
+than the accuracy budget allows:
+
+    python src/evaluation.py --images "Image Data" --save-baseline data/logs/eval_baseline.json
+    python src/evaluation.py --images "Image Data" --config fast.json \\
+        --baseline data/logs/eval_baseline.json --max-f1-drop 0.02
+
+Image labels come from a ``labels.csv`` (``path,label``) in the image
+directory, from ``open``/``closed`` subdirectories, or from file names
+containing "open" or "close"; anything else is skipped.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    from .capture import BlinkTimeline, FrameListSource, SyntheticFaceSource, load_images
+    from .drowsiness_detector import DrowsinessDetector
+    from .eye_state import EYE_METHODS, method_open
+    from .settings import DetectorConfig, load_config
+    from .utils import extract_luma
+except ImportError:
+    from capture import BlinkTimeline, FrameListSource, SyntheticFaceSource, load_images
+    from drowsiness_detector import DrowsinessDetector
+    from eye_state import EYE_METHODS, method_open
+    from settings import DetectorConfig, load_config
+    from utils import extract_luma
+
+logger = logging.getLogger(__name__)
+
+LABEL_OPEN = "open"
+LABEL_CLOSED = "closed"
+LABELS = (LABEL_OPEN, LABEL_CLOSED)
+
+# How still images are analysed
+IMAGES_FACES = "faces"   # Detect the face and eyes, as the detector does
+IMAGES_EYES = "eyes"     # Each image is one eye crop
+IMAGES_AUTO = "auto"     # Faces, falling back to an eye crop if no face is found
+IMAGE_MODES = (IMAGES_FACES, IMAGES_EYES, IMAGES_AUTO)
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def label_from_name(name: str) -> Optional[str]:
+    """Eye state implied by a file or directory name, if any."""
+    lowered = name.lower()
+    if "close" in lowered:
+        return LABEL_CLOSED
+    if "open" in lowered:
+        return LABEL_OPEN
+    return None
+
+
+def load_labelled_images(root: str) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """
+    Collect labelled images below a directory.
+
+    Returns:
+        Tuple of ((path, label) pairs, paths skipped for lack of a label)
+    """
+    labels_file = os.path.join(root, "labels.csv")
+    if os.path.exists(labels_file):
+        items = []
+        with open(labels_file, newline="") as f:
+            for row in csv.reader(f):
+                if len(row) < 2 or row[1].strip().lower() not in LABELS:
+                    continue
+                items.append((os.path.join(root, row[0].strip()), row[1].strip().lower()))
+        return items, []
+
+    items, skipped = [], []
+    for directory, _, files in sorted(os.walk(root)):
+        folder_label = label_from_name(os.path.basename(directory)) if directory != root else None
+        for name in sorted(files):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            path = os.path.join(directory, name)
+            label = folder_label or label_from_name(os.path.splitext(name)[0])
+            if label is None:
+                skipped.append(path)
+            else:
+                items.append((path, label))
+    return items, skipped
+
+
+def synthetic_sequence(name: str = "synthetic", width: int = 320, height: int = 240,
+                       fps: float = 10.0, duration: float = 20.0,
+                       blink_period: float = 3.0, blink_duration: float = 0.3,
+                       microsleeps: Sequence[Tuple[float, float]] = ((12.0, 2.0),),
+                       noise: float = 2.0, seed: int = 0) -> Dict:
+    """Specification of a synthetic blink sequence (picklable, for the workers)."""
+    return {"type": "synthetic", "name": name, "width": width, "height": height,
+            "fps": fps, "duration": duration, "blink_period": blink_period,
+            "blink_duration": blink_duration, "microsleeps": [list(m) for m in microsleeps],
+            "noise": noise, "seed": seed}
+
+
+def directory_sequence(path: str, fps: float = 30.0) -> Dict:
+    """Specification of a recorded sequence: frames plus a labels.csv (frame,label)."""
+    return {"type": "directory", "name": os.path.basename(os.path.normpath(path)),
+            "path": path, "fps": fps}
+
+
+def _open_sequence(spec: Dict) -> Tuple[object, List[bool]]:
+    """Build the capture source and per-frame ground truth (True = closed)."""
+    if spec["type"] == "synthetic":
+        timeline = BlinkTimeline.periodic(spec["blink_period"], spec["blink_duration"],
+                                          total=spec["duration"], seed=spec["seed"])
+        for start, duration in spec["microsleeps"]:
+            timeline.add(start, duration)
+        source = SyntheticFaceSource(spec["width"], spec["height"], spec["fps"],
+                                     timeline=timeline, duration=spec["duration"],
+                                     noise=spec["noise"], seed=spec["seed"])
+        count = int(round(spec["duration"] * spec["fps"]))
+        return source, [source.eyes_closed_at_frame(i) for i in range(count)]
+
+    labels: Dict[str, str] = {}
+    with open(os.path.join(spec["path"], "labels.csv"), newline="") as f:
+        for row in csv.reader(f):
+            if len(row) >= 2 and row[1].strip().lower() in LABELS:
+                labels[row[0].strip()] = row[1].strip().lower()
+    names = sorted(labels)
+    frames = load_images([os.path.join(spec["path"], name) for name in names])
+    if len(frames) != len(names):
+        raise ValueError(f"Unreadable frames in sequence {spec['path']}")
+    return (FrameListSource(frames, spec["fps"], loop=False),
+            [labels[name] == LABEL_CLOSED for name in names])
+
+
+# Per-process detector, created once by the pool initializer
+_worker_detector: Optional[DrowsinessDetector] = None
+_worker_options: Dict = {}
+
+
+def _init_worker(settings_dict: Dict, options: Dict) -> None:
+    global _worker_detector, _worker_options
+    settings = DetectorConfig.from_dict(settings_dict).headless().updated({
+        "motion_gate": {"enabled": False},
+        # Workers must not bind the metrics port, write session reports or re-tune OpenCV
+        "metrics": {"enabled": False},
+        "session": {"enabled": False},
+        "tuning": {"auto": False},
+    })
+    camera = settings.camera
+    placeholder = np.zeros((camera.height, camera.width, 3), dtype=np.uint8)
+    _worker_detector = DrowsinessDetector(settings=settings,
+                                          capture=FrameListSource([placeholder]),
+                                          stream_id=f"eval{os.getpid()}")
+    _worker_options = options
+
+
+def _classify(frame: np.ndarray, mode: str = IMAGES_FACES) -> Tuple[int, int, Dict[str, bool],
+                                                                   Dict[str, float], float]:
+    """
+    Run detection and every eye-state method on one frame.
+
+    Returns:
+        Tuple of (eyes found, eyes required, closed prediction per method,
+        seconds per method, detection seconds)
+    """
+    detector = _worker_detector
+    params = detector.settings.eye
+
+    start = time.perf_counter()
+    faces: List = []
+    if mode != IMAGES_EYES:
+        gray, faces, eyes = detector.locate_eyes(frame)
+        eyes = eyes[:2]
+        required = 2
+    if mode == IMAGES_EYES or (mode == IMAGES_AUTO and len(faces) == 0):
+        gray = extract_luma(frame)
+        eyes = [(0, 0, gray.shape[1], gray.shape[0])]
+        required = 1
+    detect_time = time.perf_counter() - start
+
+    predictions: Dict[str, bool] = {}
+    timings: Dict[str, float] = {}
+    missing_closed = _worker_options.get("missing_eyes") == LABEL_CLOSED
+    for method in EYE_METHODS:
+        start = time.perf_counter()
+        if len(eyes) < required:
+            # Without eyes the detector has nothing to judge; by default it
+            # keeps its state, which for a still image means "open"
+            predictions[method] = missing_closed
+        else:
+            eyes_open = sum(method_open(gray[y:y + h, x:x + w], params, method)
+                            for (x, y, w, h) in eyes)
+            predictions[method] = eyes_open < required
+        timings[method] = time.perf_counter() - start
+    return len(eyes), required, predictions, timings, detect_time
+
+
+def _evaluate_images(items: Sequence[Tuple[str, str]]) -> List[Dict]:
+    """Worker task: classify a chunk of labelled images."""
+    results = []
+    for path, label in items:
+        frame = cv2.imread(path)
+        if frame is None:
+            logger.warning(f"Skipping unreadable image: {path}")
+            continue
+        eyes, required, predictions, timings, detect_time = _classify(
+            frame, _worker_options["image_mode"])
+        results.append({"path": path, "closed": label == LABEL_CLOSED,
+                        "undetected": eyes < required,
+                        "predictions": predictions, "method_seconds": timings,
+                        "detect_seconds": detect_time})
+    return results
+
+
+def _evaluate_sequence(spec: Dict) -> Dict:
+    """Worker task: classify every frame of a labelled sequence."""
+    source, truth = _open_sequence(spec)
+    predictions: Dict[str, List[bool]] = {method: [] for method in EYE_METHODS}
+    detect_times = []
+    undetected = 0
+    for _ in truth:
+        ret, frame = source.read()
+        if not ret:
+            break
+        eyes, required, frame_predictions, _, detect_time = _classify(frame)
+        undetected += eyes < required
+        detect_times.append(detect_time)
+        for method, closed in frame_predictions.items():
+            predictions[method].append(closed)
+    return {"name": spec["name"], "fps": source.fps, "truth": truth[:len(detect_times)],
+            "predictions": predictions, "undetected": undetected,
+            "detect_seconds": detect_times}
+
+
+def confusion_scores(truth: Sequence[bool], predicted: Sequence[bool]) -> Dict[str, float]:
+    """Precision, recall, F1 and accuracy with closed (True) as the positive class."""
+    truth = np.asarray(truth, dtype=bool)
+    predicted = np.asarray(predicted, dtype=bool)
+    tp = int(np.sum(truth & predicted))
+    fp = int(np.sum(~truth & predicted))
+    fn = int(np.sum(truth & ~predicted))
+    tn = int(np.sum(~truth & ~predicted))
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    accuracy = (tp + tn) / len(truth) if len(truth) else 0.0
+    return {"tp": tp, "fp": fp, "fn": fn, "tn": tn, "precision": round(precision, 4),
+            "recall": round(recall, 4), "f1": round(f1, 4), "accuracy": round(accuracy, 4)}
+
+
+def closure_events(closed: Sequence[bool]) -> List[int]:
+    """Frame indices at which the eyes go from open to closed."""
+    closed = np.asarray(closed, dtype=bool)
+    if closed.size == 0:
+        return []
+    onsets = np.flatnonzero(closed[1:] & ~closed[:-1]) + 1
+    return ([0] if closed[0] else []) + onsets.tolist()
+
+
+def event_scores(truth: Sequence[bool], predicted: Sequence[bool], tolerance: int) -> Dict[str, float]:
+    """Blink onset precision/recall/F1; onsets match within ``tolerance`` frames."""
+    true_events = closure_events(truth)
+    predicted_events = closure_events(predicted)
+    matched = 0
+    used = set()
+    for onset in true_events:
+        for i, candidate in enumerate(predicted_events):
+            if i not in used and abs(candidate - onset) <= tolerance:
+                used.add(i)
+                matched += 1
+                break
+    precision = matched / len(predicted_events) if predicted_events else 0.0
+    recall = matched / len(true_events) if true_events else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"blinks_true": len(true_events), "blinks_detected": len(predicted_events),
+            "blink_precision": round(precision, 4), "blink_recall": round(recall, 4),
+            "blink_f1": round(f1, 4)}
+
+
+def _latency_ms(seconds: Sequence[float]) -> Dict[str, float]:
+    if not seconds:
+        return {"mean_ms": 0.0, "p95_ms": 0.0}
+    values = np.asarray(seconds) * 1000.0
+    return {"mean_ms": round(float(values.mean()), 3),
+            "p95_ms": round(float(np.percentile(values, 95)), 3)}
+
+
+def evaluate(images: Sequence[Tuple[str, str]] = (), sequences: Sequence[Dict] = (),
+             settings: Optional[DetectorConfig] = None, workers: int = 1,
+             image_mode: str = IMAGES_AUTO, missing_eyes: str = LABEL_OPEN,
+             blink_tolerance: float = 0.3) -> Dict:
+    """
+    Evaluate every eye-state method on labelled images and sequences.
+
+    Args:
+        images: (path, label) pairs
+        sequences: Sequence specifications (synthetic_sequence / directory_sequence)
+        settings: Detector configuration under test
+        workers: Worker processes; 1 evaluates in this process
+        image_mode: IMAGES_FACES, IMAGES_EYES or IMAGES_AUTO
+        missing_eyes: Prediction when fewer eyes than needed are found
+            (LABEL_OPEN matches the detector, which then keeps its state)
+        blink_tolerance: Seconds within which a detected blink onset
+            matches a labelled one
+
+    Returns:
+        Report with per-method scores and latencies
+    """
+    if missing_eyes not in LABELS:
+        raise ValueError(f"missing_eyes must be one of {LABELS}")
+    if image_mode not in IMAGE_MODES:
+        raise ValueError(f"image_mode must be one of {IMAGE_MODES}")
+    settings = (settings or load_config()).validate()
+    initargs = (settings.to_dict(), {"image_mode": image_mode, "missing_eyes": missing_eyes})
+
+    images = list(images)
+    chunk = max(1, len(images) // (workers * 4) or 1)
+    chunks = [images[i:i + chunk] for i in range(0, len(images), chunk)]
+
+    start = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=initargs) as pool:
+            image_futures = [pool.submit(_evaluate_images, c) for c in chunks]
+            sequence_futures = [pool.submit(_evaluate_sequence, s) for s in sequences]
+            image_results = [r for f in image_futures for r in f.result()]
+            sequence_results = [f.result() for f in sequence_futures]
+    else:
+        _init_worker(*initargs)
+        try:
+            image_results = [r for c in chunks for r in _evaluate_images(c)]
+            sequence_results = [_evaluate_sequence(s) for s in sequences]
+        finally:
+            _worker_detector.cleanup()
+    wall_time = time.perf_counter() - start
+
+    report: Dict = {"settings": settings.to_dict(), "wall_seconds": round(wall_time, 3),
+                    "workers": workers}
+
+    if image_results:
+        truth = [r["closed"] for r in image_results]
+        methods = {}
+        for method in EYE_METHODS:
+            scores = confusion_scores(truth, [r["predictions"][method] for r in image_results])
+            scores["latency"] = _latency_ms([r["method_seconds"][method] for r in image_results])
+            methods[method] = scores
+        report["images"] = {
+            "count": len(image_results),
+            "closed": sum(truth),
+            "undetected": sum(r["undetected"] for r in image_results),
+            "detect_latency": _latency_ms([r["detect_seconds"] for r in image_results]),
+            "methods": methods,
+        }
+
+    if sequence_results:
+        methods = {}
+        for method in EYE_METHODS:
+            truth = [t for r in sequence_results for t in r["truth"]]
+            predicted = [p for r in sequence_results for p in r["predictions"][method]]
+            scores = confusion_scores(truth, predicted)
+            events = [event_scores(r["truth"], r["predictions"][method],
+                                   int(round(blink_tolerance * r["fps"])))
+                      for r in sequence_results]
+            true_blinks = sum(e["blinks_true"] for e in events)
+            detected = sum(e["blinks_detected"] for e in events)
+            matched_recall = sum(e["blink_recall"] * e["blinks_true"] for e in events)
+            recall = matched_recall / true_blinks if true_blinks else 0.0
+            precision = matched_recall / detected if detected else 0.0
+            f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+            scores.update(blinks_true=true_blinks, blinks_detected=detected,
+                          blink_precision=round(precision, 4), blink_recall=round(recall, 4),
+                          blink_f1=round(f1, 4))
+            methods[method] = scores
+        report["sequences"] = {
+            "count": len(sequence_results),
+            "frames": sum(len(r["truth"]) for r in sequence_results),
+            "undetected": sum(r["undetected"] for r in sequence_results),
+            "detect_latency": _latency_ms([t for r in sequence_results for t in r["detect_seconds"]]),
+            "methods": methods,
+        }
+    return report
+
+
+def check_budget(report: Dict, baseline: Dict, max_f1_drop: float = 0.02,
+                 max_latency_ratio: Optional[float] = None) -> List[str]:
+    """
+    Compare a report with a baseline report.
+
+    Args:
+        report: Report of the candidate configuration
+        baseline: Report of the reference configuration
+        max_f1_drop: Largest acceptable F1 loss of any method (absolute)
+        max_latency_ratio: Optional limit on candidate / baseline mean
+            detection latency
+
+    Returns:
+        Budget violations; empty if the candidate is acceptable
+    """
+    violations = []
+    for section, keys in (("images", ("f1",)), ("sequences", ("f1", "blink_f1"))):
+        if section not in baseline:
+            continue
+        if section not in report:
+            violations.append(f"{section}: missing from the report")
+            continue
+        for method, reference in baseline[section]["methods"].items():
+            scores = report[section]["methods"].get(method)
+            if scores is None:
+                violations.append(f"{section}.{method}: missing from the report")
+                continue
+            for key in keys:
+                drop = reference[key] - scores[key]
+                if drop > max_f1_drop:
+                    violations.append(f"{section}.{method}.{key} dropped {drop:.3f} "
+                                      f"({reference[key]:.3f} -> {scores[key]:.3f}, "
+                                      f"budget {max_f1_drop})")
+        if max_latency_ratio is not None:
+            before = baseline[section]["detect_latency"]["mean_ms"]
+            after = report[section]["detect_latency"]["mean_ms"]
+            if before > 0 and after / before > max_latency_ratio:
+                violations.append(f"{section} detection latency x{after / before:.2f} "
+                                  f"(limit x{max_latency_ratio})")
+    return violations
+
+
+def format_report(report: Dict) -> str:
+    """Human-readable table of the per-method scores."""
+    lines = []
+    for section in ("images", "sequences"):
+        if section not in report:
+            continue
+        data = report[section]
+        count = data["count"] if section == "images" else data["frames"]
+        unit = "images" if section == "images" else "frames"
+        lines.append(f"{section}: {count} {unit}, {data['undetected']} without eyes, "
+                     f"detection {data['detect_latency']['mean_ms']:.1f} ms mean")
+        header = f"  {'method':<14}{'precision':>10}{'recall':>8}{'F1':>8}"
+        if section == "sequences":
+            header += f"{'blink F1':>10}"
+        else:
+            header += f"{'ms/eye':>8}"
+        lines.append(header)
+        for method, s in data["methods"].items():
+            line = f"  {method:<14}{s['precision']:>10.3f}{s['recall']:>8.3f}{s['f1']:>8.3f}"
+            if section == "sequences":
+                line += f"{s['blink_f1']:>10.3f}"
+            else:
+                line += f"{s['latency']['mean_ms']:>8.3f}"
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def main():
+    """Command line entry point; exits non-zero if the accuracy budget is exceeded."""
+    parser = argparse.ArgumentParser(description="Evaluate blink detection accuracy")
+    parser.add_argument("--images", nargs="*", default=[],
+                        help="Directories of labelled open/closed images")
+    parser.add_argument("--image-mode", choices=IMAGE_MODES, default=IMAGES_AUTO,
+                        help="faces: detect face and eyes; eyes: images are eye crops; "
+                             "auto: eye crop when no face is found")
+    parser.add_argument("--sequences", nargs="*", default=[],
+                        help="Directories of sequence frames with a labels.csv")
+    parser.add_argument("--sequence-fps", type=float, default=30.0)
+    parser.add_argument("--synthetic", type=int, default=1,
+                        help="Number of synthetic blink sequences (0 to disable)")
+    parser.add_argument("--config", help="JSON configuration under test (default: current config)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--missing-eyes", choices=LABELS, default=LABEL_OPEN,
+                        help="Prediction when the eyes cannot be found")
+    parser.add_argument("--output", help="Write the report as JSON")
+    parser.add_argument("--save-baseline", help="Write the report as the new baseline")
+    parser.add_argument("--baseline", help="Baseline report to compare against")
+    parser.add_argument("--max-f1-drop", type=float, default=0.02)
+    parser.add_argument("--max-latency-ratio", type=float, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    images: List[Tuple[str, str]] = []
+    for root in args.images:
+        found, skipped = load_labelled_images(root)
+        images.extend(found)
+        if skipped:
+            logger.info(f"{len(skipped)} unlabelled images skipped in {root}")
+    sequences = [directory_sequence(p, args.sequence_fps) for p in args.sequences]
+    sequences += [synthetic_sequence(f"synthetic{i}", seed=i) for i in range(args.synthetic)]
+    if not images and not sequences:
+        parser.error("Nothing to evaluate")
+
+    report = evaluate(images, sequences, settings=load_config(args.config),
+                      workers=max(1, args.workers), image_mode=args.image_mode,
+                      missing_eyes=args.missing_eyes)
+    print(format_report(report))
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            violations = check_budget(report, json.load(f), args.max_f1_drop,
+                                      args.max_latency_ratio)
+        for violation in violations:
+            logger.error(f"Accuracy budget exceeded: {violation}")
+        if violations:
+            return 1
+        logger.info("Within the accuracy budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
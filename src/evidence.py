@@ -0,0 +1,316 @@
+"""
+Evidence capture for the Drowsiness Detection System
+====================================================
+
+Screenshots and short alert clips are encoded and written by a background
+worker pool. Recent frames are kept in a preallocated ring buffer so a clip
+can include the moments leading up to an alert. Memory is bounded and a
+full queue rejects new work instead of stalling the detection loop.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    from .utils import create_directories, unique_filename
+except ImportError:
+    from utils import create_directories, unique_filename
+
+logger = logging.getLogger(__name__)
+
+
+class FrameRingBuffer:
+    """
+    Fixed-capacity ring buffer of recent frames.
+
+    Storage is allocated once, on the first frame, and frames are copied
+    into it, so steady-state operation does not allocate.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("Ring buffer capacity must be at least 1")
+        self.capacity = capacity
+        self._frames: Optional[np.ndarray] = None
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def push(self, frame: np.ndarray, timestamp: float) -> None:
+        """Copy a frame into the buffer, overwriting the oldest one."""
+        if self._frames is None or self._frames.shape[1:] != frame.shape:
+            self._frames = np.empty((self.capacity,) + frame.shape, dtype=frame.dtype)
+            self._count = 0
+            self._next = 0
+
+        np.copyto(self._frames[self._next], frame)
+        self._timestamps[self._next] = timestamp
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def latest(self, n: Optional[int] = None) -> Tuple[List[np.ndarray], List[float]]:
+        """
+        Return copies of the most recent frames, oldest first.
+
+        Args:
+            n: Number of frames to return (defaults to all buffered frames)
+
+        Returns:
+            Tuple of (frames, timestamps)
+        """
+        n = self._count if n is None else min(n, self._count)
+        start = (self._next - n) % self.capacity
+        indices = [(start + i) % self.capacity for i in range(n)]
+        return ([self._frames[i].copy() for i in indices],
+                [float(self._timestamps[i]) for i in indices])
+
+
+class EvidenceWriter:
+    """
+    Background pool that encodes and writes screenshots and clips.
+
+    Jobs are held in a bounded queue and the encoded-but-unwritten frames
+    are capped at ``max_pending_bytes``. When either limit is reached,
+    ``submit_*`` returns False and the job is counted as dropped.
+
+    Ownership of frames passed to ``submit_*`` moves to the writer; callers
+    must not modify them afterwards.
+    """
+
+    def __init__(self, directory: str, workers: int = 2, max_jobs: int = 16,
+                 max_pending_bytes: int = 256 * 1024 * 1024, jpeg_quality: int = 90):
+        self.directory = directory
+        self.max_pending_bytes = max_pending_bytes
+        self.jpeg_quality = jpeg_quality
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_jobs)
+        self._lock = threading.Lock()
+        self._pending_bytes = 0
+        self._num_workers = max(1, workers)
+        self._workers: List[threading.Thread] = []
+        self._started = False
+        self._known_directories = set()
+
+        # Statistics
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        """Start the worker threads (idempotent)."""
+        if self._started:
+            return
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"evidence-writer-{i}", daemon=True)
+            for i in range(self._num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+        self._started = True
+
+    @property
+    def pending_bytes(self) -> int:
+        """Size of frames queued but not yet written."""
+        return self._pending_bytes
+
+    def _path_for(self, directory: Optional[str], prefix: str, extension: str) -> str:
+        directory = directory or self.directory
+        if directory not in self._known_directories:
+            create_directories([directory])
+            self._known_directories.add(directory)
+        return os.path.join(directory, unique_filename(prefix, extension))
+
+    def submit_image(self, frame: np.ndarray, prefix: str = "screenshot",
+                     directory: Optional[str] = None) -> Optional[str]:
+        """
+        Queue a single frame to be written as JPEG.
+
+        Args:
+            frame: Frame to write
+            prefix: Filename prefix
+            directory: Target directory (defaults to the writer's directory)
+
+        Returns:
+            Path the image will be written to, or None if the job was dropped
+        """
+        path = self._path_for(directory, prefix, "jpg")
+        if self._enqueue(("image", path, [frame], None), frame.nbytes):
+            return path
+        return None
+
+    def submit_clip(self, frames: List[np.ndarray], fps: float, prefix: str = "evidence",
+                    directory: Optional[str] = None) -> Optional[str]:
+        """
+        Queue a list of frames to be written as an MJPG video clip.
+
+        Args:
+            frames: Frames of the clip, oldest first
+            fps: Playback frame rate
+            prefix: Filename prefix
+            directory: Target directory (defaults to the writer's directory)
+
+        Returns:
+            Path the clip will be written to, or None if the job was dropped
+        """
+        if not frames:
+            return None
+        path = self._path_for(directory, prefix, "avi")
+        nbytes = sum(f.nbytes for f in frames)
+        if self._enqueue(("clip", path, frames, fps), nbytes):
+            return path
+        return None
+
+    def _enqueue(self, job: Tuple, nbytes: int) -> bool:
+        if not self._started:
+            self.start()
+
+        with self._lock:
+            if self._pending_bytes + nbytes > self.max_pending_bytes:
+                self.dropped += 1
+                return False
+            self._pending_bytes += nbytes
+
+        try:
+            self._queue.put_nowait(job + (nbytes,))
+        except queue.Full:
+            with self._lock:
+                self._pending_bytes -= nbytes
+                self.dropped += 1
+            return False
+        return True
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+
+            kind, path, frames, fps, nbytes = job
+            ok = False
+            try:
+                if kind == "image":
+                    ok = cv2.imwrite(path, frames[0],
+                                     [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+                else:
+                    ok = self._write_clip(path, frames, fps)
+            except Exception as e:
+                logger.error(f"Failed to write evidence {path}: {e}")
+
+            if ok:
+                logger.info(f"Evidence saved: {path}")
+            else:
+                logger.error(f"Failed to write evidence: {path}")
+
+            with self._lock:
+                self._pending_bytes -= nbytes
+                if ok:
+                    self.written += 1
+                else:
+                    self.failed += 1
+
+    def _write_clip(self, path: str, frames: List[np.ndarray], fps: float) -> bool:
+        height, width = frames[0].shape[:2]
+        is_color = frames[0].ndim == 3
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps,
+                                 (width, height), is_color)
+        if not writer.isOpened():
+            return False
+        try:
+            for frame in frames:
+                writer.write(frame)
+        finally:
+            writer.release()
+        return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write out queued jobs and stop the workers."""
+        if not self._started:
+            return
+        deadline = time.time() + timeout
+        for _ in self._workers:
+            try:
+                self._queue.put(None, timeout=max(0.0, deadline - time.time()))
+            except queue.Full:
+                logger.warning("Evidence queue still full on shutdown")
+                break
+        for worker in self._workers:
+            worker.join(max(0.0, deadline - time.time()))
+        self._workers = []
+        self._started = False
+
+
+class EvidenceRecorder:
+    """
+    Capture a pre/post clip around every alert.
+
+    Every frame is pushed into a ring buffer. ``trigger`` snapshots the
+    ``pre_frames`` most recent frames, the next ``post_frames`` frames are
+    appended, and the clip is handed to the writer. Triggers that arrive
+    while a clip is still being collected are merged into it.
+    """
+
+    def __init__(self, writer: EvidenceWriter, pre_frames: int = 45,
+                 post_frames: int = 45, fps: float = 30.0,
+                 directory: Optional[str] = None):
+        self.writer = writer
+        self.directory = directory
+        self.post_frames = post_frames
+        self.fps = fps
+        self.ring = FrameRingBuffer(max(1, pre_frames))
+
+        self._clip: Optional[List[np.ndarray]] = None
+        self._remaining = 0
+        self._prefix = "evidence"
+
+        # Statistics
+        self.clips_submitted = 0
+
+    @property
+    def recording(self) -> bool:
+        """Whether a clip is currently collecting post-alert frames."""
+        return self._clip is not None
+
+    def add_frame(self, frame: np.ndarray, timestamp: float) -> None:
+        """Record a frame; call once per captured frame."""
+        if self._clip is not None:
+            self._clip.append(frame.copy())
+            self._remaining -= 1
+            if self._remaining <= 0:
+                self._finish()
+        self.ring.push(frame, timestamp)
+
+    def trigger(self, label: str = "evidence") -> None:
+        """Start an evidence clip from the buffered frames."""
+        if self._clip is not None:
+            return
+        if len(self.ring) == 0 and self.post_frames <= 0:
+            # No frames before or after the alert: there is no clip to write
+            return
+        self._clip, _ = self.ring.latest()
+        self._remaining = self.post_frames
+        self._prefix = label
+        if self._remaining <= 0:
+            self._finish()
+
+    def _finish(self) -> None:
+        clip, self._clip = self._clip, None
+        if self.writer.submit_clip(clip, self.fps, prefix=self._prefix,
+                                   directory=self.directory):
+            self.clips_submitted += 1
+        else:
+            logger.warning("Evidence writer busy, alert clip dropped")
+
+    def flush(self) -> None:
+        """Submit a partially collected clip, e.g. on shutdown."""
+        if self._clip is not None:
+            self._finish()
@@ -0,0 +1,174 @@
+"""
+Eye state result cache for the Drowsiness Detection System
+==========================================================
+
+Consecutive eye crops of a still driver are nearly identical, and offline
+re-analysis runs the same footage through many alert configurations. The
+cache remembers eye-state decisions keyed by a perceptual hash of the eye
+region (downsampled and coarsely quantised, so sensor noise maps to the
+same key) together with the eye analysis parameters.
+
+Entries are evicted least recently used first. The cache can be saved to
+and loaded from a JSON file so repeated offline runs skip the analysis.
+"""
+
+import json
+import logging
+import os
+from collections import OrderedDict
+from dataclasses import astuple
+from typing import Callable, Hashable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_FILE_VERSION = 2
+
+
+class EyeStateCache:
+    """
+    Bounded LRU cache of eye-state decisions.
+
+    Args:
+        max_entries: Entries kept before the least recently used is evicted
+        hash_size: (width, height) the eye region is downsampled to
+        quantization_bits: Low bits dropped from each downsampled pixel;
+            higher values tolerate more noise but merge more distinct crops
+    """
+
+    def __init__(self, max_entries: int = 4096, hash_size: Tuple[int, int] = (16, 8),
+                 quantization_bits: int = 3):
+        if max_entries < 1:
+            raise ValueError("Cache size must be at least 1")
+        if not 0 <= quantization_bits < 8:
+            raise ValueError("Quantization bits must be in 0..7")
+
+        self.max_entries = max_entries
+        self.hash_size = tuple(hash_size)
+        self.quantization_bits = quantization_bits
+
+        self._entries: "OrderedDict[Hashable, bool]" = OrderedDict()
+        self._small = np.empty((self.hash_size[1], self.hash_size[0]), dtype=np.uint8)
+        self._params: Optional[object] = None
+        self._params_key: Tuple = ()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def key(self, eye_roi: np.ndarray, params, method: str = "") -> Hashable:
+        """
+        Cache key of a grayscale eye region under the given parameters.
+
+        The crop size is left out: eyes are analysed after resampling to
+        a canonical size, so the same eye at any crop size shares a key.
+        """
+        if params is not self._params:
+            self._params = params
+            self._params_key = astuple(params)
+        cv2.resize(eye_roi, self.hash_size, dst=self._small, interpolation=cv2.INTER_AREA)
+        if self.quantization_bits:
+            np.right_shift(self._small, self.quantization_bits, out=self._small)
+        return (self._params_key, method, self._small.tobytes())
+
+    def get(self, key: Hashable) -> Optional[bool]:
+        """Cached decision for a key, or None (counts as a hit or a miss)."""
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: bool) -> None:
+        """Store a decision, evicting the least recently used entry if full."""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def lookup(self, eye_roi: np.ndarray, params, analyze: Callable[[np.ndarray], bool],
+               method: str = "") -> bool:
+        """
+        Return the cached decision for an eye region, analysing it on a miss.
+
+        Args:
+            eye_roi: Grayscale eye region
+            params: Eye analysis settings the decision depends on
+            analyze: Called with the region on a cache miss
+            method: Name of the decision rule, if several share the cache
+        """
+        key = self.key(eye_roi, params, method)
+        value = self.get(key)
+        if value is None:
+            value = bool(analyze(eye_roi))
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_rate": round(self.hit_rate, 4)}
+
+    def save(self, path: str) -> None:
+        """Write the entries, least recently used first, to a JSON file."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        entries = [[list(params), method, digest.hex(), value]
+                   for (params, method, digest), value in self._entries.items()]
+        data = {"version": _FILE_VERSION, "hash_size": list(self.hash_size),
+                "quantization_bits": self.quantization_bits, "entries": entries}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+        logger.info(f"Saved {len(entries)} eye state cache entries to {path}")
+
+    def load(self, path: str) -> int:
+        """
+        Add the entries of a file written by ``save``.
+
+        Files written with a different hash size or quantisation are ignored,
+        since their keys would never match.
+
+        Returns:
+            Number of entries loaded
+        """
+        with open(path) as f:
+            data = json.load(f)
+        if (data.get("version") != _FILE_VERSION
+                or tuple(data.get("hash_size", ())) != self.hash_size
+                or data.get("quantization_bits") != self.quantization_bits):
+            logger.warning(f"Ignoring eye state cache {path}: written with other settings")
+            return 0
+
+        for params, method, digest, value in data["entries"]:
+            key = (tuple(_as_tuple(v) for v in params), method, bytes.fromhex(digest))
+            self.put(key, bool(value))
+        loaded = len(data["entries"])
+        logger.info(f"Loaded {loaded} eye state cache entries from {path}")
+        return loaded
+
+
+def _as_tuple(value):
+    """JSON turns tuple parameters into lists; turn them back so keys match."""
+    if isinstance(value, list):
+        return tuple(_as_tuple(v) for v in value)
+    return value
@@ -0,0 +1,208 @@
+"""
+Eye state analysis for the Drowsiness Detection System
+======================================================
+
+The three measurements taken on an eye region (share of dark pixels after
+thresholding, share of Canny edge pixels, and the contour-to-hull area
+ratio) and the decision rules built on them. The detector uses the combined
+rule; the evaluation engine scores each rule on its own.
+
+Every eye region is first resampled to a small canonical size, so the same
+eye gives the same ratios whether the driver sits close to the camera or
+far from it, and the cost per eye does not depend on the face size.
+
+With fixed lighting the dark level and Canny thresholds are the values of
+the eye analysis settings. Adaptive lighting first equalises the eye region
+with CLAHE and derives them from the region itself: the dark level by
+Otsu's method and the Canny thresholds from the spread between the 5th and
+95th intensity percentiles. Only the face and eye regions are normalised,
+never the full frame.
+"""
+
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+METHOD_THRESHOLD = "threshold"
+METHOD_CANNY = "canny"
+METHOD_CONTOUR = "contour_ratio"
+METHOD_COMBINED = "combined"
+EYE_METHODS = (METHOD_THRESHOLD, METHOD_CANNY, METHOD_CONTOUR, METHOD_COMBINED)
+# Threshold and Canny without the contour ratio, used when frames run over budget
+METHOD_INTENSITY = "intensity"
+
+LIGHTING_FIXED = "fixed"
+LIGHTING_ADAPTIVE = "adaptive"
+LIGHTING_MODES = (LIGHTING_FIXED, LIGHTING_ADAPTIVE)
+
+
+class EyeMeasurement:
+    """Measurements of one eye region, each a ratio in 0..1."""
+
+    __slots__ = ("dark_ratio", "edge_ratio", "contour_ratio")
+
+    def __init__(self, dark_ratio: float, edge_ratio: float, contour_ratio: float):
+        self.dark_ratio = dark_ratio
+        self.edge_ratio = edge_ratio
+        self.contour_ratio = contour_ratio
+
+
+def canonical_eye(eye_roi: np.ndarray, params, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Resample an eye region to the canonical size.
+
+    Args:
+        eye_roi: Grayscale eye region of any size
+        params: Eye analysis settings (settings.EyeAnalysisSettings)
+        out: Optional preallocated buffer of the canonical shape; it is
+            overwritten and returned, so callers must not keep the result
+
+    Returns:
+        The canonical eye region
+    """
+    width, height = params.canonical_size
+    if out is not None and out.shape != (height, width):
+        out = None
+    return cv2.resize(eye_roi, (width, height), dst=out, interpolation=cv2.INTER_AREA)
+
+
+def contour_ratio(eye_roi: np.ndarray) -> float:
+    """
+    Area of the largest contour over the area of its convex hull.
+
+    This is the detector's "eye aspect ratio" (EAR) measurement.
+    """
+    try:
+        # Find contours in the eye ROI
+        contours, _ = cv2.findContours(eye_roi, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        if not contours:
+            return 0.0
+
+        # Get the largest contour (should be the eye)
+        largest_contour = max(contours, key=cv2.contourArea)
+
+        # Calculate area ratios
+        eye_area = cv2.contourArea(largest_contour)
+        hull_area = cv2.contourArea(cv2.convexHull(largest_contour))
+
+        if hull_area == 0:
+            return 0.0
+
+        return eye_area / hull_area
+    except Exception:
+        return 0.0
+
+
+def dark_pixel_ratio(eye_roi: np.ndarray, params) -> float:
+    """Share of pixels darker than the threshold (pupil and lashes)."""
+    _, thresh_eye = cv2.threshold(eye_roi, params.threshold_value, 255, cv2.THRESH_BINARY)
+    return 1.0 - cv2.countNonZero(thresh_eye) / thresh_eye.size
+
+
+def edge_pixel_ratio(eye_roi: np.ndarray, params) -> float:
+    """Share of Canny edge pixels (iris and lid outlines)."""
+    return cv2.countNonZero(cv2.Canny(eye_roi, params.canny_low_threshold,
+                                      params.canny_high_threshold)) / eye_roi.size
+
+
+@lru_cache(maxsize=8)
+def _clahe(clip_limit: float, tile_grid: Tuple[int, int]):
+    return cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tuple(tile_grid))
+
+
+def normalize_roi(eye_roi: np.ndarray, params) -> np.ndarray:
+    """Equalise the contrast of an eye region with CLAHE."""
+    return _clahe(params.clahe_clip_limit, tuple(params.clahe_tile_grid)).apply(eye_roi)
+
+
+def dark_mask(normalized_roi: np.ndarray) -> np.ndarray:
+    """Pixels darker than the region's Otsu level (pupil, iris and lashes) as 255."""
+    _, mask = cv2.threshold(normalized_roi, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    return mask
+
+
+def adaptive_edge_ratio(normalized_roi: np.ndarray, params) -> float:
+    """Share of Canny edge pixels with thresholds proportional to the region's contrast."""
+    darkest, brightest = np.percentile(normalized_roi, (5, 95))
+    low = params.canny_contrast_ratio * float(brightest - darkest)
+    return cv2.countNonZero(cv2.Canny(normalized_roi, low, 2 * low)) / normalized_roi.size
+
+
+def measure_eye(eye_roi: np.ndarray, params, out: Optional[np.ndarray] = None) -> EyeMeasurement:
+    """
+    Take every measurement on a grayscale eye region.
+
+    Args:
+        eye_roi: Grayscale eye region of any size
+        params: Eye analysis settings (settings.EyeAnalysisSettings); its
+            ``lighting`` selects fixed or adaptive thresholds
+        out: Optional preallocated buffer for the canonical eye region
+    """
+    eye = canonical_eye(eye_roi, params, out)
+    if params.lighting == LIGHTING_ADAPTIVE:
+        normalized = normalize_roi(eye, params)
+        mask = dark_mask(normalized)
+        return EyeMeasurement(cv2.countNonZero(mask) / mask.size,
+                              adaptive_edge_ratio(normalized, params),
+                              contour_ratio(mask))
+    return EyeMeasurement(dark_pixel_ratio(eye, params),
+                          edge_pixel_ratio(eye, params),
+                          contour_ratio(eye))
+
+
+_RULES: Dict[str, Callable[[EyeMeasurement, object], bool]] = {
+    METHOD_THRESHOLD: lambda m, p: m.dark_ratio > p.dark_ratio_min,
+    METHOD_CANNY: lambda m, p: m.edge_ratio > p.edge_ratio_min,
+    METHOD_CONTOUR: lambda m, p: m.contour_ratio > p.ear_threshold,
+}
+
+_ADAPTIVE_RULES: Dict[str, Callable[[EyeMeasurement, object], bool]] = {
+    METHOD_THRESHOLD: lambda m, p: m.dark_ratio > p.adaptive_dark_ratio_min,
+    METHOD_CANNY: lambda m, p: m.edge_ratio > p.adaptive_edge_ratio_min,
+    METHOD_CONTOUR: lambda m, p: m.contour_ratio > p.ear_threshold,
+}
+
+
+def eye_open(measurement: EyeMeasurement, params, method: str = METHOD_COMBINED) -> bool:
+    """
+    Decide whether an eye is open.
+
+    Args:
+        measurement: Measurements of the eye region
+        params: Eye analysis settings
+        method: One of EYE_METHODS or METHOD_INTENSITY; the combined rule
+            requires all three, the intensity rule threshold and Canny
+
+    Raises:
+        ValueError: If the method is unknown
+    """
+    rules = _ADAPTIVE_RULES if params.lighting == LIGHTING_ADAPTIVE else _RULES
+    if method == METHOD_COMBINED:
+        return all(rule(measurement, params) for rule in rules.values())
+    if method == METHOD_INTENSITY:
+        return (rules[METHOD_THRESHOLD](measurement, params)
+                and rules[METHOD_CANNY](measurement, params))
+    try:
+        return rules[method](measurement, params)
+    except KeyError:
+        raise ValueError(f"Unknown eye state method {method!r}, expected one of {EYE_METHODS}")
+
+
+def method_open(eye_roi: np.ndarray, params, method: str,
+                out: Optional[np.ndarray] = None) -> bool:
+    """Decide whether an eye is open, taking only the measurements the method needs."""
+    if params.lighting == LIGHTING_ADAPTIVE or method not in (*_RULES, METHOD_INTENSITY):
+        # Normalisation dominates the cost, so measure everything once
+        return eye_open(measure_eye(eye_roi, params, out), params, method)
+    eye = canonical_eye(eye_roi, params, out)
+    if method == METHOD_INTENSITY:
+        return (dark_pixel_ratio(eye, params) > params.dark_ratio_min
+                and edge_pixel_ratio(eye, params) > params.edge_ratio_min)
+    if method == METHOD_THRESHOLD:
+        return dark_pixel_ratio(eye, params) > params.dark_ratio_min
+    if method == METHOD_CANNY:
+        return edge_pixel_ratio(eye, params) > params.edge_ratio_min
+    return contour_ratio(eye) > params.ear_threshold
@@ -0,0 +1,164 @@
+"""
+Eyelid motion blink detector for the Drowsiness Detection System
+================================================================
+
+The static eye-state checks judge each frame on its own and depend on fixed
+intensity thresholds. Eyelid motion is a cheaper and lighting-independent
+cue: while the lid closes the eye window shows a burst of downward optical
+flow, and an upward burst while it reopens.
+
+The detector keeps the last known eye windows, downsamples each to a few
+hundred pixels and computes coarse dense (Farneback) flow between
+consecutive frames. Vertical flow in the middle band of the window, minus
+the flow of the band above the eye (head motion), is accumulated over a
+movement; a movement that travels far enough is reported as a closing or
+opening event. Because the windows are kept when the eye cascade loses a
+closed eye, the closure is still observed while the eye is shut.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+EVENT_CLOSING = "closing"
+EVENT_OPENING = "opening"
+
+
+class EyelidFlowDetector:
+    """
+    Detect eyelid closing and opening movements from optical flow.
+
+    Args:
+        window_size: (width, height) each eye window is downsampled to
+        close_threshold: Downward lid travel, as a fraction of the window
+            height, that counts as a closing movement
+        open_threshold: Upward lid travel that counts as an opening movement
+        still_level: Per-frame motion below which a movement has ended
+    """
+
+    def __init__(self, window_size: Tuple[int, int] = (16, 16), close_threshold: float = 0.1,
+                 open_threshold: float = 0.1, still_level: float = 0.01):
+        if min(window_size) < 8:
+            raise ValueError("Flow windows must be at least 8x8 pixels")
+
+        self.window_size = tuple(window_size)
+        self.close_threshold = close_threshold
+        self.open_threshold = open_threshold
+        self.still_level = still_level
+
+        self._windows: List[Tuple[int, int, int, int]] = []
+        self._previous: List[np.ndarray] = []
+        self._current: List[np.ndarray] = []
+        height = self.window_size[1]
+        self._reference_rows = slice(0, max(1, height // 6))
+        self._lid_rows = slice(height // 4, height - height // 4)
+
+        self._travel = 0.0
+        self._reported = False
+
+        # Statistics
+        self.closing_events = 0
+        self.opening_events = 0
+        self.last_motion = 0.0
+
+    @property
+    def tracking(self) -> bool:
+        """Whether eye windows are being observed."""
+        return bool(self._windows)
+
+    @property
+    def windows(self) -> List[Tuple[int, int, int, int]]:
+        return list(self._windows)
+
+    def set_windows(self, eyes: Sequence[Tuple[int, int, int, int]], gray: np.ndarray) -> None:
+        """
+        Observe new eye windows, starting from the given frame.
+
+        Args:
+            eyes: Eye boxes (x, y, w, h); an empty sequence stops tracking
+            gray: Grayscale frame the boxes were found in
+        """
+        height, width = gray.shape[:2]
+        windows = []
+        for x, y, w, h in eyes:
+            x0, y0 = max(int(x), 0), max(int(y), 0)
+            x1, y1 = min(int(x + w), width), min(int(y + h), height)
+            if x1 - x0 >= 4 and y1 - y0 >= 4:
+                windows.append((x0, y0, x1 - x0, y1 - y0))
+        if not windows:
+            self.clear()
+            return
+        # A movement in progress carries over: the new reference is the same frame
+        self._windows = windows
+        self._previous = [self._crop(gray, window, None) for window in windows]
+        self._current = [np.empty_like(crop) for crop in self._previous]
+
+    def shift_windows(self, dx: int, dy: int, gray: np.ndarray) -> None:
+        """Move the windows with the head, e.g. by the displacement of the face box."""
+        self.set_windows([(x + dx, y + dy, w, h) for x, y, w, h in self._windows], gray)
+
+    def clear(self) -> None:
+        """Stop tracking, e.g. when the face is lost."""
+        self._windows = []
+        self._previous = []
+        self._current = []
+        self._travel = 0.0
+        self._reported = False
+
+    def _crop(self, gray: np.ndarray, window: Tuple[int, int, int, int],
+              out: Optional[np.ndarray]) -> np.ndarray:
+        x, y, w, h = window
+        return cv2.resize(gray[y:y + h, x:x + w], self.window_size, dst=out,
+                          interpolation=cv2.INTER_AREA)
+
+    def _lid_motion(self, previous: np.ndarray, current: np.ndarray) -> float:
+        """Downward lid motion between two crops, as a fraction of the window height."""
+        flow = cv2.calcOpticalFlowFarneback(previous, current, None, 0.5, 2, 7, 3, 5, 1.1, 0)
+        vertical = flow[..., 1]
+        head = float(vertical[self._reference_rows].mean())
+        return (float(vertical[self._lid_rows].mean()) - head) / self.window_size[1]
+
+    def update(self, gray: np.ndarray) -> Optional[str]:
+        """
+        Measure lid motion on a new frame.
+
+        Args:
+            gray: Grayscale frame, same geometry as the one given to set_windows
+
+        Returns:
+            EVENT_CLOSING or EVENT_OPENING when a movement completes its
+            travel, otherwise None
+        """
+        if not self._windows:
+            return None
+
+        motions = []
+        for i, window in enumerate(self._windows):
+            self._crop(gray, window, self._current[i])
+            motions.append(self._lid_motion(self._previous[i], self._current[i]))
+        self._previous, self._current = self._current, self._previous
+        motion = float(np.mean(motions))
+        self.last_motion = motion
+
+        if abs(motion) < self.still_level:
+            self._travel = 0.0
+            self._reported = False
+            return None
+        if self._travel * motion < 0:
+            # Direction reversed: a new movement starts
+            self._travel = 0.0
+            self._reported = False
+        self._travel += motion
+
+        if self._reported:
+            return None
+        if self._travel >= self.close_threshold:
+            self._reported = True
+            self.closing_events += 1
+            return EVENT_CLOSING
+        if self._travel <= -self.open_threshold:
+            self._reported = True
+            self.opening_events += 1
+            return EVENT_OPENING
+        return None
@@ -0,0 +1,204 @@
+"""
+Driver selection for the Drowsiness Detection System
+====================================================
+
+Passengers in view must not corrupt the driver's eye state, and each extra
+face must not cost a full eye-cascade pass every frame. ``DriverSelector``
+tracks faces across frames, picks the driver (largest face, a configured
+seat region, or the face continuing the previous driver track) and
+schedules a bounded number of secondary faces for occasional analysis.
+"""
+
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SELECT_LARGEST = "largest"
+SELECT_SEAT_REGION = "seat_region"
+SELECT_TRACKING = "tracking"
+SELECTION_STRATEGIES = (SELECT_LARGEST, SELECT_SEAT_REGION, SELECT_TRACKING)
+
+
+def box_iou(box: Sequence[int], boxes: np.ndarray) -> np.ndarray:
+    """Intersection over union of one (x, y, w, h) box against an (N, 4) array."""
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    x, y, w, h = (float(v) for v in box)
+    ix = np.clip(np.minimum(x + w, boxes[:, 0] + boxes[:, 2]) - np.maximum(x, boxes[:, 0]), 0, None)
+    iy = np.clip(np.minimum(y + h, boxes[:, 1] + boxes[:, 3]) - np.maximum(y, boxes[:, 1]), 0, None)
+    inter = ix * iy
+    union = w * h + boxes[:, 2] * boxes[:, 3] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+class FaceTrack:
+    """Identity and eye state of one face followed across frames."""
+
+    __slots__ = ("track_id", "box", "last_seen", "missed", "eyes_closed",
+                 "eyes_closed_start", "blink_count", "last_analyzed")
+
+    def __init__(self, track_id: int, box: Tuple[int, int, int, int], frame_index: int):
+        self.track_id = track_id
+        self.box = box
+        self.last_seen = frame_index
+        self.missed = 0
+        self.eyes_closed = False
+        self.eyes_closed_start = 0.0
+        self.blink_count = 0
+        self.last_analyzed = -1
+
+    def update_eye_state(self, eyes_open: int, timestamp: Optional[float] = None) -> None:
+        """Record the number of open eyes (out of two) seen for this face."""
+        if eyes_open < 2:
+            if not self.eyes_closed:
+                self.eyes_closed = True
+                self.eyes_closed_start = time.time() if timestamp is None else timestamp
+                self.blink_count += 1
+        else:
+            self.eyes_closed = False
+
+
+class DriverSelector:
+    """
+    Pick the driver among detected faces and keep per-face tracks.
+
+    Args:
+        strategy: SELECT_LARGEST, SELECT_SEAT_REGION or SELECT_TRACKING
+        seat_region: Normalised (x, y, w, h) region of the driver's seat;
+            used by SELECT_SEAT_REGION and to seed SELECT_TRACKING
+        iou_threshold: Minimum overlap for a face to continue a track
+        max_missed: Frames a track survives without a matching face
+        secondary_interval: Analyse each secondary face every N frames
+            (0 disables secondary analysis)
+        max_secondary: Upper bound on secondary faces analysed per frame
+        max_tracks: Upper bound on tracks kept alive
+    """
+
+    def __init__(self, strategy: str = SELECT_LARGEST,
+                 seat_region: Tuple[float, float, float, float] = (0.0, 0.0, 1.0, 1.0),
+                 iou_threshold: float = 0.3, max_missed: int = 10,
+                 secondary_interval: int = 0, max_secondary: int = 1,
+                 max_tracks: int = 8):
+        if strategy not in SELECTION_STRATEGIES:
+            raise ValueError(f"Unknown driver selection strategy {strategy!r}, "
+                             f"expected one of {SELECTION_STRATEGIES}")
+        self.strategy = strategy
+        self.seat_region = seat_region
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.secondary_interval = secondary_interval
+        self.max_secondary = max_secondary
+        self.max_tracks = max_tracks
+
+        self.tracks: List[FaceTrack] = []
+        self.driver_track: Optional[FaceTrack] = None
+        self._assigned: List[FaceTrack] = []
+        self._next_id = 0
+        self._frame_index = 0
+
+    def _match_tracks(self, faces: np.ndarray) -> List[FaceTrack]:
+        """Assign every face to a track (greedy by IoU), creating new ones as needed."""
+        assigned: List[Optional[FaceTrack]] = [None] * len(faces)
+        free = list(self.tracks)
+
+        if len(faces) and free:
+            ious = np.stack([box_iou(track.box, faces) for track in free])
+            while ious.size and ious.max() >= self.iou_threshold:
+                t, f = np.unravel_index(int(ious.argmax()), ious.shape)
+                assigned[f] = free[t]
+                ious[t, :] = -1
+                ious[:, f] = -1
+
+        matched = set()
+        for f, track in enumerate(assigned):
+            box = tuple(int(v) for v in faces[f])
+            if track is None:
+                track = FaceTrack(self._next_id, box, self._frame_index)
+                self._next_id += 1
+                self.tracks.append(track)
+                assigned[f] = track
+            track.box = box
+            track.last_seen = self._frame_index
+            track.missed = 0
+            matched.add(id(track))
+
+        for track in self.tracks:
+            if id(track) not in matched:
+                track.missed += 1
+        self.tracks = [t for t in self.tracks if t.missed <= self.max_missed]
+        if len(self.tracks) > self.max_tracks:
+            self.tracks.sort(key=lambda t: t.last_seen, reverse=True)
+            self.tracks = self.tracks[:self.max_tracks]
+        if self.driver_track is not None and self.driver_track not in self.tracks:
+            self.driver_track = None
+        return assigned
+
+    def _in_seat(self, face: Sequence[int], frame_size: Tuple[int, int]) -> bool:
+        width, height = frame_size
+        x, y, w, h = face
+        cx, cy = (x + w / 2) / width, (y + h / 2) / height
+        sx, sy, sw, sh = self.seat_region
+        return sx <= cx <= sx + sw and sy <= cy <= sy + sh
+
+    def select(self, faces: Sequence, frame_size: Tuple[int, int]) -> Optional[int]:
+        """
+        Choose the driver's face for this frame.
+
+        Args:
+            faces: Detected (x, y, w, h) faces
+            frame_size: (width, height) of the frame
+
+        Returns:
+            Index of the driver's face in ``faces``, or None if there is none
+        """
+        self._frame_index += 1
+        faces = np.asarray(faces, dtype=np.int32).reshape(-1, 4)
+        tracks = self._assigned = self._match_tracks(faces)
+        if len(faces) == 0:
+            return None
+
+        areas = faces[:, 2] * faces[:, 3]
+        candidates = list(range(len(faces)))
+        if self.strategy in (SELECT_SEAT_REGION, SELECT_TRACKING):
+            candidates = [i for i in candidates if self._in_seat(faces[i], frame_size)]
+
+        if self.strategy == SELECT_TRACKING and self.driver_track is not None:
+            for i, track in enumerate(tracks):
+                if track is self.driver_track:
+                    return i
+            # A missed detection is not a new driver: wait until the track expires
+            return None
+
+        if not candidates:
+            return None
+
+        driver = max(candidates, key=lambda i: areas[i])
+        self.driver_track = tracks[driver]
+        return driver
+
+    def secondary_due(self, driver: Optional[int]) -> List[Tuple[int, FaceTrack]]:
+        """
+        Secondary faces from the last ``select`` call to analyse on this frame.
+
+        Faces not analysed for the longest time go first; at most
+        ``max_secondary`` are returned, so cost stays bounded however many
+        people are in view.
+
+        Returns:
+            (face index, track) pairs
+        """
+        if self.secondary_interval <= 0 or self.max_secondary <= 0:
+            return []
+
+        due = []
+        for i, track in enumerate(self._assigned):
+            if i == driver:
+                continue
+            if self._frame_index - track.last_analyzed >= self.secondary_interval:
+                due.append((i, track))
+
+        due.sort(key=lambda item: item[1].last_analyzed)
+        due = due[:self.max_secondary]
+        for _, track in due:
+            track.last_analyzed = self._frame_index
+        return due
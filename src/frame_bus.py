@@ -0,0 +1,358 @@
+"""
+Shared-memory frame bus for the Drowsiness Detection System
+===========================================================
+
+One capture process owns the camera and publishes every frame into a ring
+of fixed-size slots in a ``multiprocessing.shared_memory`` block. Any
+number of reader processes (detector workers, a recorder, a dashboard
+preview) attach to the block by name and read frames in place; frames are
+never pickled or sent through pipes.
+
+Each slot carries the sequence number of the frame it holds. The writer
+marks a slot as being written before copying into it and publishes the new
+sequence number afterwards, so a reader that sees the same sequence number
+before and after reading knows the frame was not overwritten meanwhile.
+"""
+
+import logging
+import sys
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+try:
+    from .capture import CaptureSource
+except ImportError:
+    from capture import CaptureSource
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = 0x46524D42  # "FRMB"
+_HEADER_FIELDS = 8   # magic, slots, height, width, channels, latest sequence, closed, reserved
+_WRITING = -1        # Slot state while the writer is copying into it
+_EMPTY = -2          # Slot state before the first write
+
+
+class _Layout:
+    """Numpy views over the regions of a frame bus block."""
+
+    def __init__(self, buf, slots: int, height: int, width: int, channels: int):
+        header_bytes = _HEADER_FIELDS * 8
+        meta_bytes = slots * 16
+        self.header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=buf)
+        self.states = np.ndarray((slots,), dtype=np.int64, buffer=buf, offset=header_bytes)
+        self.timestamps = np.ndarray((slots,), dtype=np.float64, buffer=buf,
+                                     offset=header_bytes + slots * 8)
+        shape = (slots, height, width, channels) if channels > 1 else (slots, height, width)
+        self.frames = np.ndarray(shape, dtype=np.uint8, buffer=buf,
+                                 offset=header_bytes + meta_bytes)
+
+    @staticmethod
+    def size(slots: int, height: int, width: int, channels: int) -> int:
+        return _HEADER_FIELDS * 8 + slots * 16 + slots * height * width * channels
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing block without letting this process unlink it on exit."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        # Before 3.13 every attaching process registers the block with its
+        # resource tracker, which would destroy it when the reader exits
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+class FrameBusWriter:
+    """
+    Create a frame bus and publish frames into it.
+
+    Args:
+        name: Shared memory name readers attach to (None picks a unique one)
+        width: Frame width
+        height: Frame height
+        channels: 3 for BGR, 1 for luma, 2 for packed YUYV
+        slots: Number of frames kept; a reader more than ``slots - 1``
+            frames behind loses frames
+    """
+
+    def __init__(self, name: Optional[str], width: int, height: int,
+                 channels: int = 3, slots: int = 8):
+        if slots < 2:
+            raise ValueError("A frame bus needs at least two slots")
+        if width <= 0 or height <= 0 or channels not in (1, 2, 3, 4):
+            raise ValueError("Invalid frame geometry")
+
+        self.shm = shared_memory.SharedMemory(
+            name=name, create=True, size=_Layout.size(slots, height, width, channels))
+        self.name = self.shm.name
+        self.slots = slots
+        self.shape = (height, width, channels) if channels > 1 else (height, width)
+
+        self._layout = _Layout(self.shm.buf, slots, height, width, channels)
+        self._layout.states[:] = _EMPTY
+        self._layout.header[:] = (_MAGIC, slots, height, width, channels, -1, 0, 0)
+        self.sequence = -1
+
+    def write(self, frame: np.ndarray, timestamp: Optional[float] = None) -> int:
+        """
+        Publish a frame.
+
+        Returns:
+            The frame's sequence number
+
+        Raises:
+            ValueError: If the frame does not match the bus geometry
+        """
+        if frame.shape != self.shape or frame.dtype != np.uint8:
+            raise ValueError(f"Frame of shape {frame.shape} ({frame.dtype}) does not fit "
+                             f"bus slots of shape {self.shape} (uint8)")
+        layout = self._layout
+        sequence = self.sequence + 1
+        slot = sequence % self.slots
+
+        layout.states[slot] = _WRITING
+        np.copyto(layout.frames[slot], frame)
+        layout.timestamps[slot] = time.time() if timestamp is None else timestamp
+        layout.states[slot] = sequence
+        layout.header[5] = sequence
+
+        self.sequence = sequence
+        return sequence
+
+    def close(self) -> None:
+        """Mark the bus closed for readers and destroy the shared memory."""
+        if self.shm is None:
+            return
+        self._layout.header[6] = 1
+        del self._layout
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+        self.shm = None
+
+    def __enter__(self) -> "FrameBusWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class FrameBusReader:
+    """
+    Attach to a frame bus created by a FrameBusWriter, in any process.
+
+    Args:
+        name: Name of the bus (``FrameBusWriter.name``)
+    """
+
+    def __init__(self, name: str):
+        self.shm = _attach(name)
+        self.name = name
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=self.shm.buf)
+        if header[0] != _MAGIC:
+            self.shm.close()
+            raise ValueError(f"Shared memory {name!r} is not a frame bus")
+        slots, height, width, channels = (int(v) for v in header[1:5])
+        del header
+
+        self.slots = slots
+        self.shape = (height, width, channels) if channels > 1 else (height, width)
+        self._layout = _Layout(self.shm.buf, slots, height, width, channels)
+        self.last_sequence = -1
+
+        # Statistics
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.torn_reads = 0
+
+    @property
+    def latest_sequence(self) -> int:
+        """Sequence number of the newest published frame (-1 if none yet)."""
+        return int(self._layout.header[5])
+
+    @property
+    def closed(self) -> bool:
+        """Whether the writer has closed the bus."""
+        return bool(self._layout.header[6])
+
+    def view(self, sequence: int) -> Optional[np.ndarray]:
+        """
+        Zero-copy view of a frame, or None if its slot holds another frame.
+
+        The slot is reused ``slots`` frames later; call ``is_current``
+        after using the view to confirm it was not overwritten meanwhile.
+        """
+        slot = sequence % self.slots
+        if self._layout.states[slot] != sequence:
+            return None
+        return self._layout.frames[slot]
+
+    def is_current(self, sequence: int) -> bool:
+        """Whether the slot of ``sequence`` still holds that frame."""
+        return self._layout.states[sequence % self.slots] == sequence
+
+    def timestamp(self, sequence: int) -> float:
+        return float(self._layout.timestamps[sequence % self.slots])
+
+    def read_into(self, out: np.ndarray, sequence: int) -> bool:
+        """
+        Copy a frame into ``out``.
+
+        Returns:
+            False if the frame was overwritten before or during the copy
+        """
+        frame = self.view(sequence)
+        if frame is None:
+            return False
+        np.copyto(out, frame)
+        if not self.is_current(sequence):
+            self.torn_reads += 1
+            return False
+        return True
+
+    def next_sequence(self, latest: bool = False) -> Optional[int]:
+        """
+        Choose the next frame to read.
+
+        Frames skipped on the way are counted in ``frames_dropped`` by
+        ``read`` once the chosen frame has been copied, so a retried read
+        does not count them twice.
+
+        Args:
+            latest: Skip straight to the newest frame (live consumers such as
+                the detector); otherwise frames are taken in order and only
+                those already overwritten are skipped (recorders)
+
+        Returns:
+            A sequence number, or None if no new frame has been published
+        """
+        newest = self.latest_sequence
+        if newest <= self.last_sequence:
+            return None
+        if latest:
+            sequence = newest
+        else:
+            sequence = max(self.last_sequence + 1, newest - self.slots + 2)
+        return sequence
+
+    def read(self, latest: bool = False, timeout: Optional[float] = None,
+             out: Optional[np.ndarray] = None) -> Tuple[Optional[int], Optional[np.ndarray]]:
+        """
+        Wait for the next frame and copy it out.
+
+        Args:
+            latest: See ``next_sequence``
+            timeout: Seconds to wait for a frame (None waits until the bus closes)
+            out: Buffer to copy into; a new array is allocated if omitted
+
+        Returns:
+            Tuple of (sequence, frame), or (None, None) on timeout or close
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if out is None:
+            out = np.empty(self.shape, dtype=np.uint8)
+        while True:
+            sequence = self.next_sequence(latest)
+            if sequence is not None:
+                if self.read_into(out, sequence):
+                    self.frames_dropped += sequence - self.last_sequence - 1
+                    self.last_sequence = sequence
+                    self.frames_read += 1
+                    return sequence, out
+                # Overwritten while copying: the writer lapped us, try again
+                continue
+            if self.closed or (deadline is not None and time.monotonic() >= deadline):
+                return None, None
+            time.sleep(0.001)
+
+    def close(self) -> None:
+        """Detach from the bus (the writer owns and destroys it)."""
+        if self.shm is None:
+            return
+        del self._layout
+        self.shm.close()
+        self.shm = None
+
+    def __enter__(self) -> "FrameBusReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class FrameBusCapture(CaptureSource):
+    """
+    Capture source reading from a frame bus, for ``DrowsinessDetector(capture=...)``.
+
+    Each ``read`` copies the newest frame once into a new array, so the
+    detector never races the writer and a frame kept by a consumer (a
+    pipeline stage, a snapshot waiting to be encoded) is never overwritten
+    by a later read.
+
+    Args:
+        name: Name of the bus
+        latest: Skip to the newest frame (live detection) instead of reading
+            every frame in order
+        timeout: Seconds ``read`` waits for a frame before reporting failure
+    """
+
+    def __init__(self, name: str, latest: bool = True, timeout: float = 2.0):
+        self.reader = FrameBusReader(name)
+        height, width = self.reader.shape[:2]
+        super().__init__(width, height)
+        self.latest = latest
+        self.timeout = timeout
+
+    def isOpened(self) -> bool:
+        return self.reader.shm is not None
+
+    @property
+    def frames_dropped(self) -> int:
+        """Frames published but never read (skipped to stay on the newest)."""
+        return self.reader.frames_dropped
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        sequence, frame = self.reader.read(self.latest, self.timeout)
+        if sequence is None:
+            return False, None
+        self.position += 1
+        return True, frame
+
+    def release(self) -> None:
+        self.reader.close()
+
+
+def publish(source, writer: FrameBusWriter, max_frames: Optional[int] = None,
+            stop_event=None) -> int:
+    """
+    Capture loop of the bus owner: read frames from a source and publish them.
+
+    Args:
+        source: Capture source (or cv2.VideoCapture)
+        writer: Bus to publish into
+        max_frames: Stop after this many frames
+        stop_event: Optional threading/multiprocessing Event ending the loop
+
+    Returns:
+        Number of frames published
+    """
+    published = 0
+    while max_frames is None or published < max_frames:
+        if stop_event is not None and stop_event.is_set():
+            break
+        ret, frame = source.read()
+        if not ret:
+            logger.info("Capture source ended, stopping frame bus publisher")
+            break
+        writer.write(frame)
+        published += 1
+    return published
@@ -0,0 +1,133 @@
+"""
+Per-frame latency budget for the Drowsiness Detection System
+============================================================
+
+Each frame has a time budget of one frame interval at the target FPS. When
+frames keep running over budget (many or large faces, CPU contention) the
+pipeline steps down through degradation levels instead of falling behind
+the camera; once there is headroom again it steps back up.
+
+The levels are cumulative, each one adds a saving to those before it:
+
+1. skip the contour ("EAR") eye-state method,
+2. reuse the previous face box instead of running the face cascade,
+3. detect faces at a lower resolution when they are re-detected,
+4. skip the eye cascade and reuse the previous eye windows.
+
+Reused boxes are refreshed by a full detection every few frames, so a
+moving driver is not lost at the higher levels.
+"""
+
+from typing import Dict, List, Optional
+
+LEVEL_FULL = 0
+LEVEL_SKIP_CONTOUR = 1
+LEVEL_REUSE_FACE = 2
+LEVEL_LOW_RESOLUTION = 3
+LEVEL_REUSE_EYES = 4
+LEVEL_NAMES = ("full", "skip_contour", "reuse_face", "low_resolution", "reuse_eyes")
+
+
+class LatencyBudget:
+    """
+    Choose the degradation level from the measured frame latency.
+
+    The latency is smoothed with an exponential moving average. The level
+    steps down when the average exceeds ``degrade_ratio`` of the budget and
+    back up when it stays below ``recover_ratio``; a minimum number of
+    frames at each level keeps it from oscillating.
+
+    Args:
+        target_fps: Frame rate to keep up with; the budget is 1 / target_fps
+        degrade_ratio: Share of the budget above which the level steps down
+        recover_ratio: Share of the budget below which the level steps up
+        degrade_after: Frames to stay at a level before stepping further down
+        recover_after: Frames to stay at a level before stepping back up
+        smoothing: Weight of the newest frame in the latency average
+        max_level: Deepest degradation level allowed
+    """
+
+    def __init__(self, target_fps: float = 30.0, degrade_ratio: float = 0.9,
+                 recover_ratio: float = 0.5, degrade_after: int = 3,
+                 recover_after: int = 30, smoothing: float = 0.3,
+                 max_level: int = LEVEL_REUSE_EYES):
+        if target_fps <= 0:
+            raise ValueError("Target FPS must be positive")
+        if not 0 < recover_ratio < degrade_ratio:
+            raise ValueError("Recover ratio must be positive and below the degrade ratio")
+        if not LEVEL_FULL <= max_level <= LEVEL_REUSE_EYES:
+            raise ValueError(f"Max level must be in {LEVEL_FULL}..{LEVEL_REUSE_EYES}")
+
+        self.budget = 1.0 / target_fps
+        self.degrade_ratio = degrade_ratio
+        self.recover_ratio = recover_ratio
+        self.degrade_after = degrade_after
+        self.recover_after = recover_after
+        self.smoothing = smoothing
+        self.max_level = max_level
+
+        self.level = LEVEL_FULL
+        self.average_latency: Optional[float] = None
+        self._frames_at_level = 0
+        self._last_time: Optional[float] = None
+
+        # Statistics
+        self.time_in_level: List[float] = [0.0] * len(LEVEL_NAMES)
+        self.frames_in_level: List[int] = [0] * len(LEVEL_NAMES)
+        self.level_changes = 0
+        self.over_budget = 0
+
+    @property
+    def level_name(self) -> str:
+        return LEVEL_NAMES[self.level]
+
+    def record(self, latency: float, now: float) -> int:
+        """
+        Account for a processed frame and pick the level for the next one.
+
+        Args:
+            latency: Processing time of the frame in seconds
+            now: Current time (detector clock); the interval since the last
+                frame counts towards the time spent in the current level
+
+        Returns:
+            The degradation level for the next frame
+        """
+        if self._last_time is not None:
+            self.time_in_level[self.level] += max(0.0, now - self._last_time)
+        self._last_time = now
+        self.frames_in_level[self.level] += 1
+        self._frames_at_level += 1
+        if latency > self.budget:
+            self.over_budget += 1
+
+        if self.average_latency is None:
+            self.average_latency = latency
+        else:
+            self.average_latency += self.smoothing * (latency - self.average_latency)
+
+        if (self.average_latency > self.degrade_ratio * self.budget
+                and self.level < self.max_level and self._frames_at_level >= self.degrade_after):
+            self._set_level(self.level + 1)
+        elif (self.average_latency < self.recover_ratio * self.budget
+              and self.level > LEVEL_FULL and self._frames_at_level >= self.recover_after):
+            self._set_level(self.level - 1)
+        return self.level
+
+    def _set_level(self, level: int) -> None:
+        self.level = level
+        self._frames_at_level = 0
+        self.level_changes += 1
+
+    def stats(self) -> Dict:
+        """Current level and the time and frames spent in each level."""
+        return {
+            "level": self.level,
+            "level_name": self.level_name,
+            "budget_ms": round(self.budget * 1000.0, 3),
+            "average_latency_ms": round((self.average_latency or 0.0) * 1000.0, 3),
+            "level_changes": self.level_changes,
+            "over_budget": self.over_budget,
+            "time_in_level_s": {name: round(t, 3) for name, t in zip(LEVEL_NAMES, self.time_in_level)},
+            "frames_in_level": dict(zip(LEVEL_NAMES, self.frames_in_level)),
+        }
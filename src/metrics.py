@@ -0,0 +1,407 @@
+"""
+Metrics for the Drowsiness Detection System
+===========================================
+
+A small counter/gauge/histogram registry rendered in the Prometheus text
+exposition format, and a local exporter serving it over HTTP
+(``GET /metrics``) or a Unix stream socket, so a scraper on the unit can
+collect it without any external service.
+
+Values the detector already keeps (frame and blink counts, FPS, alert
+statistics) are read when the metrics are scraped, so they cost nothing per
+frame; only the per-stage latency histograms are updated on every frame.
+"""
+
+import bisect
+import logging
+import math
+import os
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+try:
+    from .latency_budget import LEVEL_NAMES
+except ImportError:
+    from latency_budget import LEVEL_NAMES
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+STAGES = ("capture", "preprocess", "detect", "eye_state", "total")
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Sample:
+    """One labelled value of a counter or gauge, optionally read from a callable."""
+
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the value from ``function`` at scrape time instead."""
+        self.function = function
+
+    def get(self) -> float:
+        return float(self.function()) if self.function is not None else self.value
+
+
+class _HistogramSample:
+    """Bucket counts of one labelled histogram."""
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        # Only the detection thread observes; a scrape may see one
+        # observation in the buckets before the sum, which is harmless
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Metric:
+    """
+    A metric family: one sample per combination of label values.
+
+    Args:
+        name: Metric name
+        help: Description shown in the exposition
+        labelnames: Names of the labels, if any
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._samples: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._samples[()] = self._new_sample()
+
+    def _new_sample(self):
+        return _Sample()
+
+    def labels(self, *values: str):
+        """The sample for the given label values, created on first use."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        key = tuple(str(v) for v in values)
+        sample = self._samples.get(key)
+        if sample is None:
+            sample = self._samples[key] = self._new_sample()
+        return sample
+
+    def _unlabelled(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels {self.labelnames}; use labels()")
+        return self._samples[()]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape(self.help)}", f"# TYPE {self.name} {self.kind}"]
+        for key, sample in list(self._samples.items()):
+            lines.extend(self._render_sample(key, sample))
+        return lines
+
+    def _render_sample(self, key, sample) -> List[str]:
+        try:
+            value = sample.get()
+        except Exception as e:
+            logger.debug(f"Metric {self.name} not collected: {e}")
+            return []
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(Metric):
+    """A monotonically increasing count."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        self._unlabelled().inc(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._unlabelled().set_function(function)
+
+    def get(self) -> float:
+        return self._unlabelled().get()
+
+
+class Gauge(Metric):
+    """A value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float) -> None:
+        self._unlabelled().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled().inc(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._unlabelled().set_function(function)
+
+    def get(self) -> float:
+        return self._unlabelled().get()
+
+
+class Histogram(Metric):
+    """
+    Observations counted into cumulative buckets.
+
+    Args:
+        buckets: Upper bounds of the buckets; +Inf is added implicitly
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(sorted(float(b) for b in buckets if not math.isinf(b)))
+        if not self.bounds:
+            raise ValueError("A histogram needs at least one finite bucket")
+        super().__init__(name, help, labelnames)
+
+    def _new_sample(self):
+        return _HistogramSample(self.bounds)
+
+    def observe(self, value: float) -> None:
+        self._unlabelled().observe(value)
+
+    def _render_sample(self, key, sample) -> List[str]:
+        counts, total = list(sample.counts), sample.sum
+        names = self.labelnames + ("le",)
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + (math.inf,), counts):
+            cumulative += count
+            labels = _format_labels(names, key + (_format_value(bound),))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """A set of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _ratio(numerator: Callable[[], float], denominator: Callable[[], float]) -> Callable[[], float]:
+    def value() -> float:
+        total = denominator()
+        return numerator() / total if total else 0.0
+    return value
+
+
+def _budget_level(detector, attribute: str, level: int) -> Callable[[], float]:
+    """Read one level of a latency budget statistic; 0 while the budget is disabled."""
+    def value() -> float:
+        budget = detector.budget
+        return getattr(budget, attribute)[level] if budget is not None else 0
+    return value
+
+
+class DetectorMetrics:
+    """
+    Performance and fatigue metrics of one detector.
+
+    Args:
+        detector: The DrowsinessDetector to observe
+        registry: Registry to add the metrics to (a new one by default)
+        buckets: Latency histogram buckets in seconds
+    """
+
+    def __init__(self, detector, registry: Optional[MetricsRegistry] = None,
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.detector = detector
+        self.registry = registry if registry is not None else MetricsRegistry()
+        r = self.registry
+        d = detector
+
+        latency = r.histogram("drowsiness_stage_latency_seconds",
+                              "Processing time per pipeline stage", ("stage",), buckets)
+        self._stages = [(stage, latency.labels(stage)) for stage in STAGES]
+
+        r.counter("drowsiness_frames_total", "Frames processed").set_function(
+            lambda: d.frame_index)
+        r.counter("drowsiness_frames_dropped_total",
+                  "Frames lost before processing (capture source)").set_function(
+            lambda: getattr(d.cap, "frames_dropped", 0))
+        r.gauge("drowsiness_fps", "Frames processed in the last second").set_function(
+            lambda: d.current_fps)
+
+        r.counter("drowsiness_face_detections_total",
+                  "Frames on which the face cascade ran").set_function(lambda: d.face_detections)
+        r.gauge("drowsiness_face_found_ratio",
+                "Share of face detections that found the driver").set_function(
+            _ratio(lambda: d.face_detections - d.face_misses, lambda: d.face_detections))
+        misses = r.gauge("drowsiness_cascade_miss_ratio",
+                         "Share of cascade runs that found nothing usable", ("cascade",))
+        misses.labels("face").set_function(_ratio(lambda: d.face_misses, lambda: d.face_detections))
+        misses.labels("eye").set_function(_ratio(lambda: d.eye_misses, lambda: d.eye_detections))
+
+        r.counter("drowsiness_blinks_total", "Eye closures counted").set_function(
+            lambda: d.blink_count)
+        r.gauge("drowsiness_eyes_closed", "1 while the driver's eyes are closed").set_function(
+            lambda: int(d.eyes_closed))
+        alerts = r.counter("drowsiness_alerts_total", "Alerts by outcome", ("outcome",))
+        alerts.labels("dispatched").set_function(lambda: d.alert_dispatcher.dispatched)
+        alerts.labels("suppressed").set_function(lambda: d.alert_dispatcher.suppressed)
+        alerts.labels("dropped").set_function(lambda: d.alert_dispatcher.dropped)
+
+        r.gauge("drowsiness_degradation_level",
+                "Latency budget degradation level (0 = full pipeline)").set_function(
+            lambda: d.degradation_level)
+        seconds = r.counter("drowsiness_degradation_seconds_total",
+                            "Time spent at each degradation level", ("level",))
+        frames = r.counter("drowsiness_degradation_frames_total",
+                           "Frames processed at each degradation level", ("level",))
+        for level, name in enumerate(LEVEL_NAMES):
+            seconds.labels(name).set_function(_budget_level(d, "time_in_level", level))
+            frames.labels(name).set_function(_budget_level(d, "frames_in_level", level))
+
+    def record_frame(self) -> None:
+        """Observe the stage latencies of the frame just processed."""
+        times = self.detector.stage_times
+        for stage, histogram in self._stages:
+            histogram.observe(times.get(stage, 0.0))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _UnixMetricsHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.wfile.write(self.server.registry.render().encode("utf-8"))
+
+
+class _UnixMetricsServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class MetricsServer:
+    """
+    Serve a registry to local scrapers on a background thread.
+
+    Args:
+        registry: Metrics to serve
+        address: (host, port) for HTTP (port 0 picks a free port), or the
+            path of a Unix stream socket that writes the exposition to every
+            connection
+    """
+
+    def __init__(self, registry: MetricsRegistry, address: Union[Tuple[str, int], str]):
+        self.registry = registry
+        self.address = address
+        self._server: Optional[socketserver.BaseServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "MetricsServer":
+        if isinstance(self.address, str):
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+            server = _UnixMetricsServer(self.address, _UnixMetricsHandler)
+        else:
+            server = ThreadingHTTPServer(self.address, _MetricsHandler)
+            server.daemon_threads = True
+            self.address = server.server_address[:2]
+        server.registry = self.registry
+        self._server = server
+        self._thread = threading.Thread(target=server.serve_forever, name="metrics-server",
+                                        daemon=True)
+        self._thread.start()
+        logger.info(f"Serving metrics on {self.address}")
+        return self
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+        self._server = None
+        self._thread = None
@@ -0,0 +1,118 @@
+"""
+Frame-difference gate for the Drowsiness Detection System
+=========================================================
+
+Drivers are often nearly still for long stretches. The gate compares each
+frame against the last fully analysed one (the keyframe) on a small
+downsampled copy and inside the last known eye windows. While neither has
+changed beyond its threshold, the previous face/eye boxes and eye state
+are reused and the cascades are skipped.
+
+Eye windows are checked separately and at full resolution because a blink
+changes only a few hundred pixels, far too few to move the whole-frame score.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Decide whether a frame needs the full detection pipeline.
+
+    Args:
+        frame_threshold: Mean absolute difference (0-255) of the downsampled
+            frame above which the frame is processed
+        eye_threshold: Mean absolute difference inside any eye window above
+            which the frame is processed
+        downsample_size: (width, height) of the copy used for the frame score
+        refresh_interval: Process at least every this many frames, whatever
+            the scores say
+    """
+
+    def __init__(self, frame_threshold: float = 3.0, eye_threshold: float = 6.0,
+                 downsample_size: Tuple[int, int] = (80, 60),
+                 refresh_interval: int = 15):
+        if refresh_interval < 1:
+            raise ValueError("Refresh interval must be at least 1")
+
+        self.frame_threshold = frame_threshold
+        self.eye_threshold = eye_threshold
+        self.downsample_size = downsample_size
+        self.refresh_interval = refresh_interval
+
+        self._small = np.empty((downsample_size[1], downsample_size[0]), dtype=np.uint8)
+        self._reference: Optional[np.ndarray] = None
+        self._eye_boxes: List[Tuple[int, int, int, int]] = []
+        self._eye_crops: List[np.ndarray] = []
+        self._since_refresh = 0
+
+        # Statistics
+        self.processed = 0
+        self.skipped = 0
+        self.last_frame_score = 0.0
+        self.last_eye_score = 0.0
+
+    @property
+    def skip_ratio(self) -> float:
+        """Fraction of frames for which detection was skipped."""
+        total = self.processed + self.skipped
+        return self.skipped / total if total else 0.0
+
+    def reset(self) -> None:
+        """Drop the keyframe so the next frame is always processed."""
+        self._reference = None
+
+    def should_process(self, gray: np.ndarray) -> bool:
+        """
+        Score a grayscale frame against the keyframe.
+
+        Returns:
+            True if the frame must go through detection; the caller must
+            then call ``update``. False means the previous results still hold.
+        """
+        cv2.resize(gray, self.downsample_size, dst=self._small, interpolation=cv2.INTER_AREA)
+
+        if self._reference is None or self._since_refresh + 1 >= self.refresh_interval:
+            return self._process()
+
+        self.last_frame_score = cv2.norm(self._small, self._reference, cv2.NORM_L1) / self._small.size
+        if self.last_frame_score > self.frame_threshold:
+            return self._process()
+
+        self.last_eye_score = 0.0
+        for (x, y, w, h), crop in zip(self._eye_boxes, self._eye_crops):
+            window = gray[y:y + h, x:x + w]
+            if window.shape != crop.shape:
+                return self._process()
+            score = cv2.norm(window, crop, cv2.NORM_L1) / max(crop.size, 1)
+            self.last_eye_score = max(self.last_eye_score, score)
+            if score > self.eye_threshold:
+                return self._process()
+
+        self._since_refresh += 1
+        self.skipped += 1
+        return False
+
+    def _process(self) -> bool:
+        self.processed += 1
+        return True
+
+    def update(self, gray: np.ndarray, eyes: Sequence[Tuple[int, int, int, int]]) -> None:
+        """Make the frame just processed the new keyframe."""
+        if self._reference is None:
+            self._reference = np.empty_like(self._small)
+        np.copyto(self._reference, self._small)
+
+        height, width = gray.shape[:2]
+        self._eye_boxes = []
+        self._eye_crops = []
+        for (x, y, w, h) in eyes:
+            x, y = max(int(x), 0), max(int(y), 0)
+            w, h = min(int(w), width - x), min(int(h), height - y)
+            if w > 0 and h > 0:
+                self._eye_boxes.append((x, y, w, h))
+                self._eye_crops.append(gray[y:y + h, x:x + w].copy())
+        self._since_refresh = 0
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Two-stage pipelined executor for the Drowsiness Detection System
+================================================================
+
+Within one stream the face search on frame N+1 does not depend on the eye
+analysis of frame N. ``PipelinedStream`` runs preprocessing and face
+detection (stage 1) on worker threads and driver selection, eye detection,
+the eye-state checks and the state update (stage 2) on the calling
+thread, so on a multi-core box consecutive frames overlap. Stage 1 results
+are consumed strictly in frame order, so the results are those of running
+``FrameAnalyzer.analyze`` frame by frame.
+
+Face detection is the larger half (roughly 2.5x the eye stage at 640x480),
+so with a single stage 1 worker the pipeline is bounded by the face
+cascade. Stage 1 may therefore run on several workers at once: frames do
+not depend on each other until driver selection, which happens in stage 2.
+
+In pyramid mode each thread builds the pyramid itself: stage 1 overwrites
+its levels with the next frame while stage 2 still needs the current one.
+
+Run as a script it compares sequential and pipelined throughput:
+
+    python src/pipeline.py --seconds 10
+"""
+
+import argparse
+import collections
+import contextlib
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    from .alerts import AlertDispatcher
+    from .analyzer import FrameAnalyzer, StreamState
+    from .capture import BlinkTimeline, CaptureSource, FrameListSource, SyntheticFaceSource
+    from .results import DetectionBuffer
+    from .settings import DetectorConfig, load_config
+    from .tuning import TuningProfile, worker_initializer
+    from .utils import extract_luma
+except ImportError:
+    from alerts import AlertDispatcher
+    from analyzer import FrameAnalyzer, StreamState
+    from capture import BlinkTimeline, CaptureSource, FrameListSource, SyntheticFaceSource
+    from results import DetectionBuffer
+    from settings import DetectorConfig, load_config
+    from tuning import TuningProfile, worker_initializer
+    from utils import extract_luma
+
+logger = logging.getLogger(__name__)
+
+
+def _default_state(stream_id: str, analyzer: FrameAnalyzer) -> StreamState:
+    """Stream state with a dispatcher without sinks, so alerts follow the detector's rules."""
+    return StreamState.from_settings(stream_id, analyzer.settings,
+                                     AlertDispatcher.from_settings(analyzer.settings.alerts))
+
+
+@contextlib.contextmanager
+def _dispatching(dispatcher: Optional[AlertDispatcher]):
+    """Run a dispatcher of our own (if any) while the stream is processed."""
+    if dispatcher is None:
+        yield
+        return
+    dispatcher.start()
+    try:
+        yield
+    finally:
+        dispatcher.stop()
+
+
+def default_detect_workers() -> int:
+    """Stage 1 workers for this machine: the cores left beside stage 2, at most 3."""
+    return max(1, min(3, (os.cpu_count() or 2) - 1))
+
+
+class PipelinedStream:
+    """
+    Process one stream with face detection running ahead of eye analysis.
+
+    Frame times are taken from the source's frame rate (frame ``i`` is at
+    ``i / fps``), as in the stream pool.
+
+    Args:
+        analyzer: Analyzer shared by both stages
+        source: Frames to process; processing stops when it runs out
+        state: Stream state to update; created from the analyzer's
+            settings if omitted, with a dispatcher without sinks (alerts
+            are logged) running during ``run``
+        detect_workers: Threads running stage 1 (defaults to the cores
+            left beside stage 2, at most 3)
+        depth: Frames in flight in stage 1 (defaults to one more than
+            ``detect_workers``)
+        profile: OpenCV tuning applied when the pipeline runs; pins the
+            stage 1 workers if it says so. OpenCV is left alone if omitted
+    """
+
+    def __init__(self, analyzer: FrameAnalyzer, source: CaptureSource,
+                 state: Optional[StreamState] = None, detect_workers: Optional[int] = None,
+                 depth: Optional[int] = None, profile: Optional[TuningProfile] = None):
+        self.analyzer = analyzer
+        self.source = source
+        self._own_state = state is None
+        self.state = state or _default_state("pipeline", analyzer)
+        self.detect_workers = detect_workers or default_detect_workers()
+        self.depth = depth or self.detect_workers + 1
+        if self.depth < 1:
+            raise ValueError("Pipeline depth must be at least 1")
+        self.profile = profile
+        self.results = DetectionBuffer()
+
+        # Statistics: busy seconds per stage
+        self.stage_times: Dict[str, float] = {"detect_faces": 0.0, "analyze_eyes": 0.0}
+
+    def _detect(self, frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray, float]:
+        """Stage 1: preprocess a frame and detect its faces."""
+        start = time.perf_counter()
+        gray = self.analyzer.preprocess(extract_luma(frame))
+        faces = self.analyzer.detect_faces(gray)
+        return gray, faces, time.perf_counter() - start
+
+    def run(self, max_frames: Optional[int] = None) -> DetectionBuffer:
+        """
+        Process the stream until the source ends.
+
+        Args:
+            max_frames: Stop after this many frames
+
+        Returns:
+            Per-frame results, in frame order
+
+        Raises:
+            Whatever a stage raised, after the pipeline has stopped
+        """
+        fps = self.source.fps
+        in_flight: collections.deque = collections.deque()
+        submitted = 0
+        exhausted = False
+        initializer = None
+        if self.profile is not None:
+            self.profile.apply()
+            initializer = worker_initializer(self.profile)
+        own_dispatcher = self.state.dispatcher if self._own_state else None
+        with _dispatching(own_dispatcher), ThreadPoolExecutor(
+                max_workers=self.detect_workers, thread_name_prefix="pipeline-detect",
+                initializer=initializer) as executor:
+            try:
+                while True:
+                    # Keep stage 1 ahead of stage 2 by up to ``depth`` frames
+                    while (not exhausted and len(in_flight) < self.depth
+                           and (max_frames is None or submitted < max_frames)):
+                        ret, frame = self.source.read()
+                        if not ret:
+                            exhausted = True
+                            break
+                        in_flight.append(executor.submit(self._detect, frame))
+                        submitted += 1
+                    if not in_flight:
+                        break
+
+                    gray, faces, detect_time = in_flight.popleft().result()
+                    self.stage_times["detect_faces"] += detect_time
+                    start = time.perf_counter()
+                    analysis = self.analyzer.analyze_faces(gray, faces, self.state.selector)
+                    now = self.state.frame_index / fps
+                    elapsed = time.perf_counter() - start
+                    self.stage_times["analyze_eyes"] += elapsed
+                    self.results.append(self.state.update(analysis, now, detect_time + elapsed))
+            finally:
+                for future in in_flight:
+                    future.cancel()
+        return self.results
+
+
+def run_sequential(analyzer: FrameAnalyzer, source: CaptureSource,
+                   state: Optional[StreamState] = None) -> DetectionBuffer:
+    """Process a stream frame by frame on the calling thread (the pipeline's reference)."""
+    own_dispatcher = None
+    if state is None:
+        state = _default_state("sequential", analyzer)
+        own_dispatcher = state.dispatcher
+    results = DetectionBuffer()
+    with _dispatching(own_dispatcher):
+        while True:
+            ret, frame = source.read()
+            if not ret:
+                return results
+            start = time.perf_counter()
+            analysis = analyzer.analyze(extract_luma(frame), state.selector)
+            results.append(state.update(analysis, state.frame_index / source.fps,
+                                        time.perf_counter() - start))
+
+
+def benchmark(settings: DetectorConfig, frames: Sequence[np.ndarray],
+              detect_workers: Optional[int] = None, cv_threads: Optional[int] = 1) -> List[Dict]:
+    """
+    Compare sequential and pipelined throughput on one stream.
+
+    OpenCV's own threading is set to ``cv_threads`` during the run so the
+    speedup measured is that of the pipeline.
+
+    Args:
+        settings: Detector configuration
+        frames: Frames of the stream
+        detect_workers: Stage 1 workers of the pipeline (default for this machine)
+        cv_threads: OpenCV thread count during the run (None leaves it alone)
+
+    Returns:
+        One dict per executor with frames, seconds, fps and speedup
+    """
+    previous_threads = cv2.getNumThreads()
+    if cv_threads is not None:
+        cv2.setNumThreads(cv_threads)
+    try:
+        analyzer = FrameAnalyzer(settings)
+        rows: List[Dict] = []
+        for name in ("sequential", "pipelined"):
+            source = FrameListSource(frames, loop=False)
+            start = time.perf_counter()
+            if name == "sequential":
+                results = run_sequential(analyzer, source)
+            else:
+                results = PipelinedStream(analyzer, source, detect_workers=detect_workers).run()
+            seconds = time.perf_counter() - start
+            fps = len(results) / seconds
+            rows.append({
+                "executor": name,
+                "frames": len(results),
+                "seconds": round(seconds, 3),
+                "fps": round(fps, 1),
+                "speedup": round(fps / rows[0]["fps"], 2) if rows else 1.0,
+            })
+    finally:
+        cv2.setNumThreads(previous_threads)
+    return rows
+
+
+def main():
+    """Command line entry point: print sequential and pipelined throughput."""
+    parser = argparse.ArgumentParser(description="Benchmark the two-stage pipelined executor")
+    parser.add_argument("--seconds", type=float, default=5.0,
+                        help="Seconds of synthetic video to process")
+    parser.add_argument("--fps", type=float, default=30.0, help="Frame rate of the synthetic video")
+    parser.add_argument("--detect-workers", type=int, default=None,
+                        help="Face detection workers (default: free cores, at most 3)")
+    parser.add_argument("--cv-threads", type=int, default=1,
+                        help="OpenCV internal threads during the benchmark")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    settings = load_config()
+    camera = settings.camera
+    source = SyntheticFaceSource(camera.width, camera.height, args.fps,
+                                 timeline=BlinkTimeline.periodic(2.0, total=args.seconds),
+                                 sway=0.02, noise=2.0)
+    frames = [source.render(i) for i in range(int(args.seconds * args.fps))]
+
+    logger.info(f"{len(frames)} frames, {os.cpu_count()} CPUs")
+    for row in benchmark(settings, frames, args.detect_workers, args.cv_threads):
+        print(f"{row['executor']:<11} frames={row['frames']:<6} seconds={row['seconds']:<8} "
+              f"fps={row['fps']:<8} speedup={row['speedup']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
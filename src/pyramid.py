@@ -0,0 +1,199 @@
+"""
+Shared image pyramid detection for the Drowsiness Detection System
+==================================================================
+
+``detectMultiScale`` normally builds its own pyramid for the face cascade
+and another one for every face ROI searched by the eye cascade. Here one
+grayscale pyramid is built per frame into reusable buffers; both cascades
+scan its levels at their native window size and eye search reads views of
+the same levels instead of resampling face ROIs.
+
+This is not a speed-up: the single-scale calls per level cost more than
+detectMultiScale's own pyramid saves, and on the synthetic driver the mode
+runs 6-19% slower than plain cascade detection.
+"""
+
+import math
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    from .results import NO_BOXES
+except ImportError:
+    from results import NO_BOXES
+
+# Same clustering tolerance detectMultiScale uses internally
+GROUP_EPS = 0.2
+
+# detectMultiScale scans with a 2 px stride, or 1 px from a scale of 2 on.
+# A single-scale call always uses 2 px, so on coarse levels the odd
+# positions are covered by scanning views shifted by one pixel.
+COARSE_OFFSETS = ((0, 0),)
+FINE_OFFSETS = ((0, 0), (1, 0), (0, 1), (1, 1))
+
+# Rows and columns of zeros below and right of every level. A single-scale
+# call splits its rows into stripes and can drop the last window row of a
+# small image; scanning into the margin (and discarding the windows that
+# reach it) covers every position detectMultiScale would scan.
+LEVEL_MARGIN = 2
+
+
+class ImagePyramid:
+    """
+    Grayscale image pyramid with reusable level buffers.
+
+    Levels follow the scales ``detectMultiScale`` would use: level ``k`` is
+    the frame resized by ``scale_factor ** k`` (accumulated in single
+    precision) with ``INTER_LINEAR_EXACT``. Buffers are only reallocated
+    when the input frame size changes.
+
+    Args:
+        scale_factor: Size ratio between consecutive levels
+        max_levels: Upper bound on the number of levels built per frame
+        min_size: Smallest level size (width, height) worth building
+    """
+
+    def __init__(self, scale_factor: float = 1.1, max_levels: int = 32,
+                 min_size: Tuple[int, int] = (20, 20)):
+        if scale_factor <= 1.0:
+            raise ValueError("Pyramid scale factor must be greater than 1")
+        if max_levels < 1:
+            raise ValueError("Pyramid must have at least one level")
+
+        self.scale_factor = scale_factor
+        self.max_levels = max_levels
+        self.min_size = min_size
+
+        self.levels: List[np.ndarray] = []
+        self.scales: List[float] = []
+        self._buffers: List[np.ndarray] = []
+        self._base_shape: Optional[Tuple[int, int]] = None
+
+    def _allocate(self, shape: Tuple[int, int]) -> None:
+        height, width = shape
+        self._buffers = []
+        self.scales = []
+        factor = 1.0
+        for _ in range(self.max_levels):
+            scale = float(np.float32(factor))
+            level_w = int(round(width / scale))
+            level_h = int(round(height / scale))
+            if level_w < self.min_size[0] or level_h < self.min_size[1]:
+                break
+            self._buffers.append(np.zeros((level_h + LEVEL_MARGIN, level_w + LEVEL_MARGIN),
+                                          dtype=np.uint8))
+            self.scales.append(scale)
+            factor *= self.scale_factor
+        self._base_shape = shape
+
+    def build(self, gray: np.ndarray) -> List[np.ndarray]:
+        """
+        Build the pyramid for a grayscale frame.
+
+        Level 0 is the frame itself (it is also copied into its padded
+        buffer for scanning); every other level is resampled from the frame
+        into a preallocated buffer. Resampling from the frame rather than
+        from the previous level avoids blur piling up over dozens of
+        levels, which costs detections.
+
+        Returns:
+            List of pyramid levels, largest first
+        """
+        if gray.shape != self._base_shape:
+            self._allocate(gray.shape)
+
+        self.levels = [gray]
+        height, width = gray.shape
+        self._buffers[0][:height, :width] = gray
+        for buffer in self._buffers[1:]:
+            level = buffer[:-LEVEL_MARGIN, :-LEVEL_MARGIN]
+            cv2.resize(gray, (level.shape[1], level.shape[0]), dst=level,
+                       interpolation=cv2.INTER_LINEAR_EXACT)
+            self.levels.append(level)
+        return self.levels
+
+    def padded(self, k: int) -> np.ndarray:
+        """Level ``k`` followed by ``LEVEL_MARGIN`` rows and columns of zeros."""
+        return self._buffers[k]
+
+    def level_range(self, window: Tuple[int, int], min_size: Tuple[int, int],
+                    max_size: Optional[Tuple[int, int]] = None) -> range:
+        """
+        Levels on which a detector with the given native window finds
+        objects between ``min_size`` and ``max_size`` (base-frame pixels),
+        sized as ``detectMultiScale`` sizes its windows.
+        """
+        sizes = [(int(round(window[0] * s)), int(round(window[1] * s))) for s in self.scales]
+        first = next((k for k, (w, h) in enumerate(sizes)
+                      if w >= min_size[0] and h >= min_size[1]), len(sizes))
+        last = len(sizes)
+        if max_size is not None:
+            last = next((k for k, (w, h) in enumerate(sizes)
+                         if w > max_size[0] or h > max_size[1]), len(sizes))
+        return range(first, max(first, last))
+
+
+def detect_on_levels(cascade: cv2.CascadeClassifier, pyramid: ImagePyramid,
+                     levels: range, min_neighbors: int,
+                     roi: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+    """
+    Run a cascade at its native window size on a set of pyramid levels.
+
+    Each level is scanned on the grid ``detectMultiScale`` uses at that
+    scale (every window position that fits, 2 px stride below scale 2 and
+    1 px from there on); hits are mapped back to base-frame coordinates
+    with the level's window size, clipped to the searched region and
+    grouped once over all levels, as ``detectMultiScale`` groups its own
+    scales.
+
+    Args:
+        cascade: Loaded cascade classifier
+        pyramid: Pyramid already built for the current frame
+        levels: Level indices to scan
+        min_neighbors: Grouping threshold, as in ``detectMultiScale``
+        roi: Optional (x, y, w, h) region in base-frame coordinates; each
+            level is scanned through a view of that region
+
+    Returns:
+        Array of (x, y, w, h) boxes in base-frame coordinates, shape (N, 4)
+    """
+    window = cascade.getOriginalWindowSize()
+    height, width = pyramid.levels[0].shape[:2]
+    rx, ry, rw, rh = roi if roi is not None else (0, 0, width, height)
+    candidates = []
+
+    for k in levels:
+        scale = pyramid.scales[k]
+        level_h, level_w = pyramid.levels[k].shape[:2]
+        x0, y0 = int(rx / scale), int(ry / scale)
+        x1 = min(level_w, int(math.ceil((rx + rw) / scale)))
+        y1 = min(level_h, int(math.ceil((ry + rh) / scale)))
+        if x1 - x0 < window[0] or y1 - y0 < window[1]:
+            continue
+        view = pyramid.padded(k)[y0:y1 + LEVEL_MARGIN, x0:x1 + LEVEL_MARGIN]
+        size = np.array([int(round(window[0] * scale)), int(round(window[1] * scale))])
+
+        for dx, dy in (FINE_OFFSETS if scale >= 2.0 else COARSE_OFFSETS):
+            hits = cascade.detectMultiScale(view[dy:, dx:], scaleFactor=2.0, minNeighbors=0,
+                                            minSize=window, maxSize=window)
+            if len(hits) == 0:
+                continue
+            origin = np.asarray(hits, dtype=np.int64)[:, :2] + (x0 + dx, y0 + dy)
+            # Windows reaching into the margin lie outside the level
+            origin = origin[(origin[:, 0] + window[0] <= x1) & (origin[:, 1] + window[1] <= y1)]
+            corner = np.round(origin * scale).astype(np.int64)
+            boxes = np.column_stack([corner, np.minimum(size, (rx + rw, ry + rh) - corner)])
+            candidates.append(boxes.astype(np.int32))
+
+    if not candidates:
+        return NO_BOXES
+    candidates = np.concatenate(candidates)
+
+    if min_neighbors > 0:
+        grouped, _ = cv2.groupRectangles(candidates, min_neighbors, GROUP_EPS)
+        if len(grouped) == 0:
+            return NO_BOXES
+        return np.asarray(grouped, dtype=np.int32).reshape(-1, 4)
+    return candidates
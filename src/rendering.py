@@ -0,0 +1,59 @@
+"""
+Render policy for the Drowsiness Detection System
+=================================================
+
+Decides on which frames the UI overlay is drawn and whether a display
+window is used at all, so headless units skip every drawing and GUI call.
+"""
+
+import threading
+
+RENDER_NONE = "none"          # Never draw, never open a window
+RENDER_EVERY_N = "every_n"    # Draw and display every Nth frame
+RENDER_SNAPSHOT = "snapshot"  # Headless; draw only when a snapshot is requested
+RENDER_MODES = (RENDER_NONE, RENDER_EVERY_N, RENDER_SNAPSHOT)
+
+
+class RenderPolicy:
+    """
+    Frame rendering policy.
+
+    Args:
+        mode: One of RENDER_NONE, RENDER_EVERY_N or RENDER_SNAPSHOT
+        interval: For RENDER_EVERY_N, draw every ``interval`` frames
+    """
+
+    def __init__(self, mode: str = RENDER_EVERY_N, interval: int = 1):
+        self._snapshot_requested = threading.Event()
+        self.update(mode, interval)
+
+    def update(self, mode: str, interval: int) -> None:
+        """Change the mode and interval, e.g. on a configuration reload."""
+        if mode not in RENDER_MODES:
+            raise ValueError(f"Unknown render mode {mode!r}, expected one of {RENDER_MODES}")
+        if interval < 1:
+            raise ValueError("Render interval must be at least 1")
+
+        self.mode = mode
+        self.interval = interval
+
+    @property
+    def displays(self) -> bool:
+        """Whether frames are shown in a window (requires highgui)."""
+        return self.mode == RENDER_EVERY_N
+
+    def should_display(self, frame_index: int) -> bool:
+        """Whether the frame with the given index is drawn and displayed."""
+        return self.displays and frame_index % self.interval == 0
+
+    def request_snapshot(self) -> None:
+        """Ask for the next frame to be rendered and saved. Thread-safe."""
+        if self.mode != RENDER_NONE:
+            self._snapshot_requested.set()
+
+    def take_snapshot_request(self) -> bool:
+        """Return True (once) if a snapshot has been requested."""
+        if self._snapshot_requested.is_set():
+            self._snapshot_requested.clear()
+            return True
+        return False
@@ -0,0 +1,229 @@
+"""
+Detection results for the Drowsiness Detection System
+=====================================================
+
+Compact result types for the detection pipeline. Boxes are (N, 4) int32
+arrays of (x, y, w, h) rows, so coordinate transforms apply to every box
+at once. ``FrameResult`` holds the outcome of one frame; ``DetectionBuffer``
+keeps many frames column by column in NumPy arrays, which takes a few
+dozen bytes per frame instead of the hundreds a list of per-frame tuples,
+lists and arrays costs in offline runs over millions of frames.
+"""
+
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+NO_BOXES = np.empty((0, 4), dtype=np.int32)
+NO_BOXES.flags.writeable = False
+
+# Bits of DetectionBuffer.flags
+FLAG_CLOSED = 1
+FLAG_MONITORED = 2
+FLAG_DRIVER = 4
+
+
+def as_boxes(boxes) -> np.ndarray:
+    """
+    Boxes as an (N, 4) int32 array.
+
+    Args:
+        boxes: ``detectMultiScale`` output (an array, or an empty tuple when
+            nothing was found) or any sequence of (x, y, w, h)
+
+    Returns:
+        Array of shape (N, 4)
+    """
+    if len(boxes) == 0:
+        return NO_BOXES
+    return np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+
+
+def offset_boxes(boxes, dx: int, dy: int) -> np.ndarray:
+    """Move boxes from ROI to frame coordinates, given the ROI origin (dx, dy)."""
+    boxes = as_boxes(boxes)
+    if len(boxes) == 0:
+        return boxes
+    return boxes + np.array([dx, dy, 0, 0], dtype=np.int32)
+
+
+def scale_boxes(boxes, scale: float) -> np.ndarray:
+    """Boxes found on a resized image, in the coordinates of the original."""
+    boxes = as_boxes(boxes)
+    if len(boxes) == 0:
+        return boxes
+    return np.round(boxes * scale).astype(np.int32)
+
+
+class FrameResult:
+    """
+    Outcome of processing one frame.
+
+    Args:
+        frame_index: Index of the frame in the stream
+        timestamp: Detector clock time of the frame
+        faces: All face boxes, shape (N, 4)
+        driver_face: Driver's face box, or None when no driver was picked
+        eyes: Driver's eye boxes, shape (M, 4)
+        closed: Eye closure state after the frame
+        monitored: Whether the eye state was observed on the frame (both
+            eyes found, or their lids followed by the eyelid flow)
+        latency: Processing time of the frame in seconds
+    """
+
+    __slots__ = ("frame_index", "timestamp", "faces", "driver_face", "eyes",
+                 "closed", "monitored", "latency")
+
+    def __init__(self, frame_index: int, timestamp: float, faces: np.ndarray,
+                 driver_face: Optional[Tuple[int, int, int, int]], eyes: np.ndarray,
+                 closed: bool, monitored: bool, latency: float = 0.0):
+        self.frame_index = frame_index
+        self.timestamp = timestamp
+        self.faces = faces
+        self.driver_face = driver_face
+        self.eyes = eyes
+        self.closed = closed
+        self.monitored = monitored
+        self.latency = latency
+
+    def __repr__(self) -> str:
+        return (f"FrameResult(frame_index={self.frame_index}, timestamp={self.timestamp:.3f}, "
+                f"faces={len(self.faces)}, driver_face={self.driver_face}, eyes={len(self.eyes)}, "
+                f"closed={self.closed}, monitored={self.monitored})")
+
+
+class DetectionBuffer:
+    """
+    Per-frame results of a stream, stored as NumPy columns.
+
+    Only the driver's face and its first two eyes are kept; other faces
+    are counted (up to 255). Boxes are stored as int16, missing ones as -1,
+    which takes 42 bytes per frame. The columns grow by doubling, like a
+    list, so appending is amortised O(1).
+
+    Args:
+        capacity: Frames to allocate room for up front
+    """
+
+    EYES = 2
+    _COLUMNS = ("frame_index", "timestamp", "driver_face", "eyes", "face_count",
+                "flags", "latency")
+
+    def __init__(self, capacity: int = 1024):
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1")
+        self._size = 0
+        self.frame_index = np.empty(capacity, dtype=np.uint32)
+        self.timestamp = np.empty(capacity, dtype=np.float64)
+        self.driver_face = np.empty((capacity, 4), dtype=np.int16)
+        self.eyes = np.empty((capacity, self.EYES, 4), dtype=np.int16)
+        self.face_count = np.empty(capacity, dtype=np.uint8)
+        self.flags = np.empty(capacity, dtype=np.uint8)
+        self.latency = np.empty(capacity, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self.frame_index)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes allocated for all columns."""
+        return sum(getattr(self, name).nbytes for name in self._COLUMNS)
+
+    def _grow(self) -> None:
+        capacity = self.capacity * 2
+        for name in self._COLUMNS:
+            column = getattr(self, name)
+            grown = np.empty((capacity,) + column.shape[1:], dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+
+    def append(self, result: FrameResult) -> None:
+        """Store one frame's result."""
+        if self._size == self.capacity:
+            self._grow()
+        i = self._size
+        self.frame_index[i] = result.frame_index
+        self.timestamp[i] = result.timestamp
+        self.face_count[i] = min(len(result.faces), 255)
+        self.latency[i] = result.latency
+
+        flags = (FLAG_CLOSED if result.closed else 0) | (FLAG_MONITORED if result.monitored else 0)
+        if result.driver_face is not None:
+            self.driver_face[i] = result.driver_face
+            flags |= FLAG_DRIVER
+        else:
+            self.driver_face[i] = -1
+        self.flags[i] = flags
+
+        eyes = result.eyes[:self.EYES]
+        self.eyes[i, :len(eyes)] = eyes
+        self.eyes[i, len(eyes):] = -1
+        self._size += 1
+
+    def __getitem__(self, index: int) -> FrameResult:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("Frame index out of range")
+        flags = int(self.flags[index])
+        driver_face = None
+        faces = NO_BOXES
+        if flags & FLAG_DRIVER:
+            driver_face = tuple(int(v) for v in self.driver_face[index])
+            faces = self.driver_face[index:index + 1].astype(np.int32)
+        eyes = self.eyes[index]
+        return FrameResult(
+            int(self.frame_index[index]), float(self.timestamp[index]), faces, driver_face,
+            eyes[eyes[:, 2] >= 0].astype(np.int32), bool(flags & FLAG_CLOSED),
+            bool(flags & FLAG_MONITORED), float(self.latency[index])
+        )
+
+    # Column views of the stored frames
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.timestamp[:self._size]
+
+    @property
+    def closed(self) -> np.ndarray:
+        return (self.flags[:self._size] & FLAG_CLOSED).astype(bool)
+
+    @property
+    def monitored(self) -> np.ndarray:
+        return (self.flags[:self._size] & FLAG_MONITORED).astype(bool)
+
+    @property
+    def driver_faces(self) -> np.ndarray:
+        """Driver's face box per frame, shape (N, 4); -1 where there was none."""
+        return self.driver_face[:self._size]
+
+    @property
+    def eye_boxes(self) -> np.ndarray:
+        """First two eye boxes per frame, shape (N, 2, 4); -1 where missing."""
+        return self.eyes[:self._size]
+
+    @property
+    def latencies(self) -> np.ndarray:
+        return self.latency[:self._size]
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez_compressed(path, **{name: getattr(self, name)[:self._size]
+                                     for name in self._COLUMNS})
+
+    @classmethod
+    def load(cls, path: str) -> "DetectionBuffer":
+        with np.load(path) as data:
+            buffer = cls(max(1, len(data["frame_index"])))
+            for name in cls._COLUMNS:
+                column = data[name]
+                getattr(buffer, name)[:len(column)] = column
+            buffer._size = len(data["frame_index"])
+        return buffer
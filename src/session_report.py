@@ -0,0 +1,562 @@
+#!/usr/bin/env python3
+"""
+Session summary reports for the Drowsiness Detection System
+===========================================================
+
+``SessionSummary`` folds the detector's per-frame results into a report for
+the shift: blinks and blink rate over time, closure durations and the
+longest closure, a PERCLOS histogram, the alert timeline, and processing
+FPS, latency and dropped frames.
+
+Memory does not grow with the session. Scalars are kept as running
+statistics (Welford), durations and latencies in fixed histogram bins,
+and the timeline in at most ``max_bins`` time bins: when a session
+outgrows them, neighbouring bins are merged and the bin width doubles.
+Only the first ``max_alerts`` alerts are listed individually; all of them
+are counted in the timeline.
+
+Reports are written as JSON (everything, mergeable) or CSV (the timeline,
+one row per bin). Reports of sharded offline runs merge into one:
+
+    python src/session_report.py shard0.json shard1.json -o shift.json --csv shift.csv
+"""
+
+import argparse
+import bisect
+import csv
+import json
+import logging
+import math
+import os
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    from .metrics import LATENCY_BUCKETS
+    from .results import DetectionBuffer, FrameResult
+except ImportError:
+    from metrics import LATENCY_BUCKETS
+    from results import DetectionBuffer, FrameResult
+
+logger = logging.getLogger(__name__)
+
+REPORT_JSON = "json"
+REPORT_CSV = "csv"
+REPORT_BOTH = "both"
+REPORT_FORMATS = (REPORT_JSON, REPORT_CSV, REPORT_BOTH)
+
+CLOSURE_BUCKETS = (0.1, 0.2, 0.3, 0.5, 1.0, 2.0, 4.0, 8.0)  # Closure duration bounds (s)
+PERCLOS_BINS = 20                                            # 5% wide PERCLOS bins
+
+# Counts kept per time bin
+TIMELINE_FIELDS = ("frames", "monitored", "closed", "blinks", "alerts")
+_FRAMES, _MONITORED, _CLOSED, _BLINKS, _ALERTS = range(len(TIMELINE_FIELDS))
+
+
+class RunningStats:
+    """Count, mean, standard deviation, minimum and maximum of a stream of values."""
+
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "RunningStats") -> None:
+        """Combine with the statistics of another stream (Chan et al.)."""
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        if not self.count:
+            return {"count": 0, "mean": 0.0, "std": 0.0, "min": 0.0, "max": 0.0}
+        return {"count": self.count, "mean": self.mean, "std": self.std,
+                "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, float]) -> "RunningStats":
+        stats = cls()
+        if data["count"]:
+            stats.count = int(data["count"])
+            stats.mean = float(data["mean"])
+            stats.m2 = float(data["std"]) ** 2 * stats.count
+            stats.min = float(data["min"])
+            stats.max = float(data["max"])
+        return stats
+
+
+def _halve(counts: np.ndarray, first: int) -> np.ndarray:
+    """Counts of bins starting at absolute index ``first``, merged in aligned pairs."""
+    index = (first + np.arange(len(counts))) // 2 - first // 2
+    halved = np.zeros((int(index[-1]) + 1, counts.shape[1]), dtype=np.int64)
+    np.add.at(halved, index, counts)
+    return halved
+
+
+class TimeBins:
+    """
+    Event counts over time in at most ``max_bins`` bins.
+
+    Bins are aligned to multiples of their width from time zero, so bins of
+    different runs line up. A bin width is ``bin_seconds`` times a power of
+    two; when the covered span no longer fits, pairs of bins are merged.
+
+    Args:
+        bin_seconds: Initial bin width
+        max_bins: Bins kept at most
+    """
+
+    def __init__(self, bin_seconds: float, max_bins: int):
+        if bin_seconds <= 0 or max_bins < 2:
+            raise ValueError("Time bins need a positive width and at least two bins")
+        self.bin_seconds = bin_seconds
+        self.max_bins = max_bins
+        self.width = bin_seconds
+        self.first: Optional[int] = None  # Absolute index of counts[0]
+        self.used = 0
+        self.counts = np.zeros((max_bins, len(TIMELINE_FIELDS)), dtype=np.int64)
+
+    def _coarsen(self) -> None:
+        """Merge pairs of bins, doubling the width."""
+        counts = _halve(self.counts[:self.used], self.first)
+        self.counts = np.zeros_like(self.counts)
+        self.counts[:len(counts)] = counts
+        self.first //= 2
+        self.used = len(counts)
+        self.width *= 2
+
+    def _include(self, low: int, high: int) -> None:
+        """Make room for absolute bins ``low..high`` at the current width."""
+        if self.first is None:
+            while high - low >= self.max_bins:
+                low, high = low // 2, high // 2
+                self.width *= 2
+            self.first, self.used = low, high - low + 1
+            return
+        while max(high, self.first + self.used - 1) - min(low, self.first) >= self.max_bins:
+            self._coarsen()
+            low, high = low // 2, high // 2
+        if low < self.first:
+            shift = self.first - low
+            self.counts[shift:shift + self.used] = self.counts[:self.used].copy()
+            self.counts[:shift] = 0
+            self.first, self.used = low, self.used + shift
+        self.used = max(self.used, high - self.first + 1)
+
+    def add(self, timestamp: float, field: int, count: int = 1) -> None:
+        index = math.floor(timestamp / self.width)
+        if self.first is None or not self.first <= index < self.first + self.used:
+            self._include(index, index)
+            index = math.floor(timestamp / self.width)
+        self.counts[index - self.first, field] += count
+
+    def merge(self, other: "TimeBins") -> None:
+        if other.bin_seconds != self.bin_seconds:
+            raise ValueError("Cannot merge timelines with different bin widths")
+        if other.first is None:
+            return
+        counts, first, width = other.counts[:other.used], other.first, other.width
+        while self.width < width:
+            if self.first is None:
+                self.width *= 2
+            else:
+                self._coarsen()
+        while width < self.width:
+            counts, first, width = _halve(counts, first), first // 2, width * 2
+        self._include(first, first + len(counts) - 1)
+        # Including the other span may have coarsened this timeline again
+        while width < self.width:
+            counts, first, width = _halve(counts, first), first // 2, width * 2
+        start = first - self.first
+        self.counts[start:start + len(counts)] += counts
+
+    def rows(self) -> List[Dict[str, float]]:
+        """One dict per bin with its start time and counts."""
+        if self.first is None:
+            return []
+        return [{"start": (self.first + i) * self.width,
+                 **{name: int(value) for name, value in zip(TIMELINE_FIELDS, self.counts[i])}}
+                for i in range(self.used)]
+
+    def to_dict(self) -> Dict:
+        return {"bin_seconds": self.bin_seconds, "max_bins": self.max_bins,
+                "width": self.width, "first": self.first,
+                "counts": self.counts[:self.used].tolist()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TimeBins":
+        bins = cls(data["bin_seconds"], data["max_bins"])
+        bins.width = data["width"]
+        if data["first"] is not None:
+            counts = np.asarray(data["counts"], dtype=np.int64).reshape(-1, len(TIMELINE_FIELDS))
+            bins.first, bins.used = int(data["first"]), len(counts)
+            bins.counts[:bins.used] = counts
+        return bins
+
+
+def _bucket(bounds: Sequence[float], value: float) -> int:
+    """Index of the histogram bucket holding ``value`` (the last one is open-ended)."""
+    return bisect.bisect_left(bounds, value)
+
+
+class SessionSummary:
+    """
+    Streaming summary of one driver's session.
+
+    Feed it every processed frame in time order with ``record`` (or
+    ``record_result`` / ``record_buffer``), call ``finish`` at the end of
+    the session and write or merge the report.
+
+    Blinks and closures are derived from the closed flag the way the
+    detector counts them: each closure is one blink. Alerts are not
+    re-derived; the detector reports each alert its dispatcher accepted
+    with ``record_alert``, so rate limiting and escalation are reflected.
+
+    Args:
+        stream_id: Driver or camera the session belongs to
+        bin_seconds: Initial width of the timeline bins
+        max_bins: Timeline bins kept at most
+        perclos_window: Length of the windows the PERCLOS histogram is
+            built from, in seconds
+        max_alerts: Alerts listed individually in the timeline
+    """
+
+    def __init__(self, stream_id: str = "", bin_seconds: float = 60.0, max_bins: int = 240,
+                 perclos_window: float = 60.0, max_alerts: int = 100):
+        if perclos_window <= 0 or max_alerts < 0:
+            raise ValueError("Invalid session summary settings")
+        self.stream_id = stream_id
+        self.perclos_window = perclos_window
+        self.max_alerts = max_alerts
+        self.timeline = TimeBins(bin_seconds, max_bins)
+
+        # Statistics
+        self.frames = 0
+        self.frames_dropped = 0
+        self.monitored_frames = 0
+        self.closed_frames = 0
+        self.blinks = 0
+        self.alerts = 0
+        self.start: Optional[float] = None
+        self.end: Optional[float] = None
+        self.duration = 0.0  # Seconds covered, summed over merged shards
+        self.shards = 1
+        self.latency = RunningStats()
+        self.latency_histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.closures = RunningStats()
+        self.closure_histogram = [0] * (len(CLOSURE_BUCKETS) + 1)
+        self.perclos_histogram = [0] * PERCLOS_BINS
+        self.alert_timeline: List[Dict[str, float]] = []
+
+        # Open closure and PERCLOS window
+        self._closure_start: Optional[float] = None
+        self._window: Optional[int] = None
+        self._window_monitored = 0
+        self._window_closed = 0
+        self.finished = False
+
+    @classmethod
+    def from_settings(cls, stream_id: str, settings) -> "SessionSummary":
+        session = settings.session
+        return cls(stream_id, session.bin_seconds, session.max_bins, session.perclos_window,
+                   session.max_alerts)
+
+    def record(self, timestamp: float, closed: bool, monitored: bool, latency: float = 0.0) -> None:
+        """
+        Add one processed frame.
+
+        Args:
+            timestamp: Frame time in seconds
+            closed: Whether the driver's eyes are closed (held while not monitored)
+            monitored: Whether the eye state was observed on this frame
+            latency: Processing time of the frame in seconds
+        """
+        if self.start is None:
+            self.start = timestamp
+        self.end = timestamp
+        self.frames += 1
+        self.latency.add(latency)
+        self.latency_histogram[_bucket(LATENCY_BUCKETS, latency)] += 1
+        timeline = self.timeline
+        timeline.add(timestamp, _FRAMES)
+
+        window = math.floor(timestamp / self.perclos_window)
+        if window != self._window:
+            self._close_window()
+            self._window = window
+        if monitored:
+            self.monitored_frames += 1
+            self._window_monitored += 1
+            timeline.add(timestamp, _MONITORED)
+            if closed:
+                self.closed_frames += 1
+                self._window_closed += 1
+                timeline.add(timestamp, _CLOSED)
+
+        if closed:
+            if self._closure_start is None:
+                self._closure_start = timestamp
+                self.blinks += 1
+                timeline.add(timestamp, _BLINKS)
+        elif self._closure_start is not None:
+            self._close_closure(timestamp)
+
+    def record_alert(self, level: str, timestamp: float, closed_seconds: float) -> None:
+        """
+        Add an alert the detector sent.
+
+        Args:
+            level: Alert level (WARNING or CRITICAL)
+            timestamp: Time the alert was sent
+            closed_seconds: How long the eyes had been closed at that time
+        """
+        self.alerts += 1
+        self.timeline.add(timestamp, _ALERTS)
+        if len(self.alert_timeline) < self.max_alerts:
+            self.alert_timeline.append({"time": timestamp, "level": level,
+                                        "closed_seconds": closed_seconds})
+
+    def record_result(self, result: FrameResult) -> None:
+        self.record(result.timestamp, result.closed, result.monitored, result.latency)
+
+    def record_buffer(self, buffer: DetectionBuffer) -> None:
+        """Add every frame of an offline run's results."""
+        for timestamp, closed, monitored, latency in zip(
+                buffer.timestamps.tolist(), buffer.closed.tolist(),
+                buffer.monitored.tolist(), buffer.latencies.tolist()):
+            self.record(timestamp, closed, monitored, latency)
+
+    def _close_closure(self, end: float) -> None:
+        duration = end - self._closure_start
+        self.closures.add(duration)
+        self.closure_histogram[_bucket(CLOSURE_BUCKETS, duration)] += 1
+        self._closure_start = None
+
+    def _close_window(self) -> None:
+        if self._window_monitored:
+            perclos = self._window_closed / self._window_monitored
+            self.perclos_histogram[min(int(perclos * PERCLOS_BINS), PERCLOS_BINS - 1)] += 1
+        self._window_monitored = self._window_closed = 0
+
+    def finish(self, frames_dropped: int = 0) -> "SessionSummary":
+        """
+        End the session: close the open closure and PERCLOS window.
+
+        Args:
+            frames_dropped: Frames the capture source lost during the session
+
+        Returns:
+            The summary itself, for chaining
+        """
+        if self.finished:
+            return self
+        if self._closure_start is not None:
+            self._close_closure(self.end)
+        self._close_window()
+        self._window = None
+        self.frames_dropped += frames_dropped
+        if self.start is not None:
+            self.duration += self.end - self.start
+        self.finished = True
+        return self
+
+    def merge(self, other: "SessionSummary") -> "SessionSummary":
+        """
+        Add the summary of another shard of the session.
+
+        Both summaries must be finished. A closure or PERCLOS window cut
+        by a shard boundary counts once per shard.
+
+        Raises:
+            ValueError: If a summary is unfinished or the bins do not match
+        """
+        if not (self.finished and other.finished):
+            raise ValueError("Only finished session summaries can be merged")
+        if other.perclos_window != self.perclos_window:
+            raise ValueError("Cannot merge summaries with different PERCLOS windows")
+        self.timeline.merge(other.timeline)
+        if other.start is not None:
+            self.start = other.start if self.start is None else min(self.start, other.start)
+            self.end = other.end if self.end is None else max(self.end, other.end)
+        for name in ("frames", "frames_dropped", "monitored_frames", "closed_frames",
+                     "blinks", "alerts", "duration", "shards"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.latency.merge(other.latency)
+        self.closures.merge(other.closures)
+        for mine, theirs in ((self.latency_histogram, other.latency_histogram),
+                             (self.closure_histogram, other.closure_histogram),
+                             (self.perclos_histogram, other.perclos_histogram)):
+            for i, count in enumerate(theirs):
+                mine[i] += count
+        alerts = sorted(self.alert_timeline + other.alert_timeline, key=lambda a: a["time"])
+        self.alert_timeline = alerts[:self.max_alerts]
+        if not self.stream_id:
+            self.stream_id = other.stream_id
+        return self
+
+    def to_dict(self) -> Dict:
+        """The report: derived figures first, then the mergeable counts."""
+        minutes = self.duration / 60.0
+        timeline = []
+        for row in self.timeline.rows():
+            row["perclos"] = row["closed"] / row["monitored"] if row["monitored"] else None
+            row["blinks_per_minute"] = row["blinks"] * 60.0 / self.timeline.width
+            timeline.append(row)
+        total_frames = self.frames + self.frames_dropped
+        return {
+            "stream_id": self.stream_id,
+            "start": self.start,
+            "end": self.end,
+            "duration_seconds": self.duration,
+            "shards": self.shards,
+            "frames": self.frames,
+            "frames_dropped": self.frames_dropped,
+            "drop_ratio": self.frames_dropped / total_frames if total_frames else 0.0,
+            "fps": self.frames / self.duration if self.duration else 0.0,
+            "processing_fps": 1.0 / self.latency.mean if self.latency.mean else 0.0,
+            "latency_seconds": self.latency.to_dict(),
+            "latency_histogram": {"bounds": list(LATENCY_BUCKETS),
+                                  "counts": list(self.latency_histogram)},
+            "blinks": self.blinks,
+            "blinks_per_minute": self.blinks / minutes if minutes else 0.0,
+            "monitored_ratio": self.monitored_frames / self.frames if self.frames else 0.0,
+            "perclos": self.closed_frames / self.monitored_frames if self.monitored_frames else 0.0,
+            "perclos_histogram": {"window_seconds": self.perclos_window,
+                                  "counts": list(self.perclos_histogram)},
+            "longest_closure_seconds": self.closures.max if self.closures.count else 0.0,
+            "closure_seconds": self.closures.to_dict(),
+            "closure_histogram": {"bounds": list(CLOSURE_BUCKETS),
+                                  "counts": list(self.closure_histogram)},
+            "alerts": self.alerts,
+            "alert_timeline": [dict(alert) for alert in self.alert_timeline],
+            "alerts_listed_max": self.max_alerts,
+            "monitored_frames": self.monitored_frames,
+            "closed_frames": self.closed_frames,
+            "timeline": {"bin_seconds": self.timeline.width, "bins": timeline},
+            "timeline_state": self.timeline.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SessionSummary":
+        """Rebuild a finished summary from its report, e.g. to merge shards."""
+        timeline = TimeBins.from_dict(data["timeline_state"])
+        summary = cls(data["stream_id"], timeline.bin_seconds, timeline.max_bins,
+                      data["perclos_histogram"]["window_seconds"], data["alerts_listed_max"])
+        summary.timeline = timeline
+        for name in ("frames", "frames_dropped", "monitored_frames", "closed_frames",
+                     "blinks", "alerts", "shards"):
+            setattr(summary, name, int(data[name]))
+        summary.start, summary.end = data["start"], data["end"]
+        summary.duration = float(data["duration_seconds"])
+        summary.latency = RunningStats.from_dict(data["latency_seconds"])
+        summary.closures = RunningStats.from_dict(data["closure_seconds"])
+        summary.latency_histogram = list(data["latency_histogram"]["counts"])
+        summary.closure_histogram = list(data["closure_histogram"]["counts"])
+        summary.perclos_histogram = list(data["perclos_histogram"]["counts"])
+        summary.alert_timeline = [dict(alert) for alert in data["alert_timeline"]]
+        summary.finished = True
+        return summary
+
+    def write_json(self, path: str) -> str:
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    def write_csv(self, path: str) -> str:
+        """Write the timeline, one row per bin."""
+        columns = ["start", *TIMELINE_FIELDS, "perclos", "blinks_per_minute"]
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(self.to_dict()["timeline"]["bins"])
+        return path
+
+    def write(self, directory: str, report_format: str = REPORT_JSON) -> List[str]:
+        """
+        Write the report into a directory, named after the stream and start time.
+
+        Returns:
+            Paths of the files written
+        """
+        if report_format not in REPORT_FORMATS:
+            raise ValueError(f"Report format must be one of {REPORT_FORMATS}")
+        os.makedirs(directory, exist_ok=True)
+        started = time.strftime("%Y%m%d_%H%M%S", time.localtime(self.start or 0))
+        base = os.path.join(directory, f"session_{self.stream_id or 'stream'}_{started}")
+        paths = []
+        if report_format in (REPORT_JSON, REPORT_BOTH):
+            paths.append(self.write_json(base + ".json"))
+        if report_format in (REPORT_CSV, REPORT_BOTH):
+            paths.append(self.write_csv(base + ".csv"))
+        return paths
+
+
+def load_report(path: str) -> SessionSummary:
+    """Read a JSON report written by ``SessionSummary.write_json``."""
+    with open(path) as f:
+        return SessionSummary.from_dict(json.load(f))
+
+
+def merge_reports(summaries: Iterable[SessionSummary]) -> SessionSummary:
+    """
+    Merge the summaries of several shards into one.
+
+    Raises:
+        ValueError: If there is nothing to merge or the summaries do not match
+    """
+    summaries = list(summaries)
+    if not summaries:
+        raise ValueError("No session summaries to merge")
+    merged = SessionSummary.from_dict(summaries[0].to_dict())
+    for summary in summaries[1:]:
+        merged.merge(summary)
+    return merged
+
+
+def main():
+    """Command line entry point: merge JSON reports of sharded runs."""
+    parser = argparse.ArgumentParser(description="Merge session summary reports")
+    parser.add_argument("reports", nargs="+", help="JSON reports to merge")
+    parser.add_argument("-o", "--output", required=True, help="Merged JSON report")
+    parser.add_argument("--csv", default=None, help="Also write the merged timeline as CSV")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    merged = merge_reports(load_report(path) for path in args.reports)
+    merged.write_json(args.output)
+    if args.csv:
+        merged.write_csv(args.csv)
+    report = merged.to_dict()
+    logger.info(f"{report['shards']} shards, {report['frames']} frames, {report['blinks']} blinks, "
+                f"{report['alerts']} alerts, PERCLOS {report['perclos']:.3f}, "
+                f"longest closure {report['longest_closure_seconds']:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
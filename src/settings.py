@@ -0,0 +1,594 @@
+"""
+Typed runtime configuration for the Drowsiness Detection System
+===============================================================
+
+``DetectorConfig`` groups every tunable of the detector into validated
+sections whose defaults come from ``config.py``. A configuration can be
+loaded from a JSON file, overridden from environment variables and
+swapped into a running detector without restarting its stream.
+
+Environment overrides use the ``DROWSINESS_`` prefix with ``__`` between
+section and field, e.g. ``DROWSINESS_DETECTION__FACE_MIN_NEIGHBORS=3``.
+``DROWSINESS_CONFIG`` names a JSON file to load first.
+"""
+
+import json
+import logging
+import os
+import threading
+from dataclasses import asdict, dataclass, field, fields, replace
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, get_type_hints
+
+try:
+    from . import config
+    from .eye_state import LIGHTING_MODES
+    from .face_selection import SELECTION_STRATEGIES
+    from .rendering import RENDER_MODES, RENDER_NONE
+    from .session_report import REPORT_FORMATS
+except ImportError:
+    import config
+    from eye_state import LIGHTING_MODES
+    from face_selection import SELECTION_STRATEGIES
+    from rendering import RENDER_MODES, RENDER_NONE
+    from session_report import REPORT_FORMATS
+
+logger = logging.getLogger(__name__)
+
+ENV_PREFIX = "DROWSINESS_"
+ENV_CONFIG_FILE = "DROWSINESS_CONFIG"
+
+# Capture formats
+CAPTURE_AUTO = "auto"
+CAPTURE_BGR = "bgr"
+CAPTURE_LUMA = "luma"
+CAPTURE_FORMATS = (CAPTURE_AUTO, CAPTURE_BGR, CAPTURE_LUMA)
+
+# Face/eye detection strategies
+DETECTION_CASCADE = "cascade"
+DETECTION_PYRAMID = "pyramid"
+DETECTION_TILED = "tiled"
+DETECTION_MODES = (DETECTION_CASCADE, DETECTION_PYRAMID, DETECTION_TILED)
+
+# Project root, used to resolve relative model paths
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _socket_address_default() -> Optional[str]:
+    address = config.ALERT_SOCKET_ADDRESS
+    if isinstance(address, tuple):
+        return f"{address[0]}:{address[1]}"
+    return address
+
+
+@dataclass
+class CameraSettings:
+    """Capture device settings."""
+    index: int = config.CAMERA_INDEX
+    width: int = config.FRAME_WIDTH
+    height: int = config.FRAME_HEIGHT
+    fps: int = config.FPS_TARGET
+    capture_format: str = config.CAPTURE_FORMAT
+
+
+@dataclass
+class DetectionSettings:
+    """Face and eye cascade parameters."""
+    mode: str = config.DETECTION_MODE
+    face_scale_factor: float = config.FACE_SCALE_FACTOR
+    face_min_neighbors: int = config.FACE_MIN_NEIGHBORS
+    face_min_size: Tuple[int, int] = config.FACE_MIN_SIZE
+    eye_scale_factor: float = config.EYE_SCALE_FACTOR
+    eye_min_neighbors: int = config.EYE_MIN_NEIGHBORS
+    eye_min_size: Tuple[int, int] = config.EYE_MIN_SIZE
+    pyramid_max_levels: int = config.PYRAMID_MAX_LEVELS
+    tile_size: int = config.TILE_SIZE
+    tile_overlap: int = config.TILE_OVERLAP
+    tile_coarse_scale: float = config.TILE_COARSE_SCALE
+    tile_nms_iou: float = config.TILE_NMS_IOU
+    tile_workers: int = config.TILE_WORKERS
+
+
+@dataclass
+class MotionGateSettings:
+    """Frame-difference gate that skips detection on static frames."""
+    enabled: bool = config.MOTION_GATE_ENABLED
+    frame_threshold: float = config.MOTION_GATE_FRAME_THRESHOLD
+    eye_threshold: float = config.MOTION_GATE_EYE_THRESHOLD
+    downsample_size: Tuple[int, int] = config.MOTION_GATE_DOWNSAMPLE_SIZE
+    refresh_interval: int = config.MOTION_GATE_REFRESH_INTERVAL
+
+
+@dataclass
+class FaceSelectionSettings:
+    """Driver selection among several faces and secondary face analysis."""
+    strategy: str = config.FACE_SELECTION
+    seat_region: Tuple[float, float, float, float] = config.SEAT_REGION
+    track_iou: float = config.FACE_TRACK_IOU
+    track_max_missed: int = config.FACE_TRACK_MAX_MISSED
+    secondary_interval: int = config.SECONDARY_FACE_INTERVAL
+    max_secondary: int = config.MAX_SECONDARY_FACES
+
+
+@dataclass
+class EyeAnalysisSettings:
+    """Thresholds used to decide whether an eye is open."""
+    canonical_size: Tuple[int, int] = config.EYE_CANONICAL_SIZE
+    threshold_value: int = config.THRESHOLD_VALUE
+    dark_ratio_min: float = config.DARK_RATIO_MIN
+    canny_low_threshold: int = config.CANNY_LOW_THRESHOLD
+    canny_high_threshold: int = config.CANNY_HIGH_THRESHOLD
+    edge_ratio_min: float = config.EDGE_RATIO_MIN
+    ear_threshold: float = config.EAR_THRESHOLD
+    lighting: str = config.EYE_LIGHTING
+    clahe_clip_limit: float = config.CLAHE_CLIP_LIMIT
+    clahe_tile_grid: Tuple[int, int] = config.CLAHE_TILE_GRID
+    adaptive_dark_ratio_min: float = config.ADAPTIVE_DARK_RATIO_MIN
+    adaptive_edge_ratio_min: float = config.ADAPTIVE_EDGE_RATIO_MIN
+    canny_contrast_ratio: float = config.CANNY_CONTRAST_RATIO
+
+
+@dataclass
+class EyeCacheSettings:
+    """Cache of eye-state decisions keyed by eye crop content."""
+    enabled: bool = config.EYE_CACHE_ENABLED
+    max_entries: int = config.EYE_CACHE_SIZE
+    hash_size: Tuple[int, int] = config.EYE_CACHE_HASH_SIZE
+    quantization_bits: int = config.EYE_CACHE_QUANTIZATION_BITS
+    file: Optional[str] = config.EYE_CACHE_FILE
+
+
+@dataclass
+class EyelidFlowSettings:
+    """Optical-flow eyelid motion detection between static eye-state checks."""
+    enabled: bool = config.EYELID_FLOW_ENABLED
+    static_interval: int = config.EYELID_FLOW_STATIC_INTERVAL
+    window_size: Tuple[int, int] = config.EYELID_FLOW_WINDOW_SIZE
+    close_threshold: float = config.EYELID_FLOW_CLOSE_THRESHOLD
+    open_threshold: float = config.EYELID_FLOW_OPEN_THRESHOLD
+    still_level: float = config.EYELID_FLOW_STILL_LEVEL
+    hold_frames: int = config.EYELID_FLOW_HOLD_FRAMES
+
+
+@dataclass
+class BudgetSettings:
+    """Per-frame latency budget with graceful degradation (latency_budget.py)."""
+    enabled: bool = config.BUDGET_ENABLED
+    degrade_ratio: float = config.BUDGET_DEGRADE_RATIO
+    recover_ratio: float = config.BUDGET_RECOVER_RATIO
+    degrade_after: int = config.BUDGET_DEGRADE_AFTER
+    recover_after: int = config.BUDGET_RECOVER_AFTER
+    smoothing: float = config.BUDGET_SMOOTHING
+    max_level: int = config.BUDGET_MAX_LEVEL
+    refresh_interval: int = config.BUDGET_REFRESH_INTERVAL
+    low_resolution_scale: float = config.BUDGET_LOW_RESOLUTION_SCALE
+
+
+@dataclass
+class MetricsSettings:
+    """Local metrics exporter (metrics.py)."""
+    enabled: bool = config.METRICS_ENABLED
+    address: str = config.METRICS_ADDRESS
+
+
+@dataclass
+class TuningSettings:
+    """OpenCV threading and code path tuning (tuning.py)."""
+    auto: bool = config.CV_AUTO_TUNE
+    cv_threads: int = config.CV_THREADS
+    optimized: bool = config.CV_USE_OPTIMIZED
+    opencl: bool = config.CV_USE_OPENCL
+    pin_threads: bool = config.CV_PIN_THREADS
+    cache_file: str = config.CV_TUNING_CACHE
+    benchmark_frames: int = config.CV_TUNING_FRAMES
+
+
+@dataclass
+class SessionReportSettings:
+    """Per-session summary report (session_report.py)."""
+    enabled: bool = config.SESSION_REPORT_ENABLED
+    directory: str = config.SESSION_REPORT_DIR
+    format: str = config.SESSION_REPORT_FORMAT
+    bin_seconds: float = config.SESSION_BIN_SECONDS
+    max_bins: int = config.SESSION_MAX_BINS
+    perclos_window: float = config.SESSION_PERCLOS_WINDOW
+    max_alerts: int = config.SESSION_MAX_ALERTS
+
+
+@dataclass
+class PreprocessingSettings:
+    """Frame filters, matching the arguments of utils.apply_preprocessing."""
+    enable_median_blur: bool = config.ENABLE_MEDIAN_BLUR
+    median_kernel_size: int = config.MEDIAN_BLUR_KERNEL_SIZE
+    enable_gaussian_blur: bool = config.ENABLE_GAUSSIAN_BLUR
+    gaussian_kernel_size: Tuple[int, int] = config.GAUSSIAN_BLUR_KERNEL_SIZE
+
+
+@dataclass
+class AlertSettings:
+    """Alert timing and sinks."""
+    threshold_seconds: float = config.ALERT_THRESHOLD_SECONDS
+    critical_seconds: float = config.ALERT_CRITICAL_SECONDS
+    min_interval_seconds: float = config.ALERT_MIN_INTERVAL_SECONDS
+    queue_size: int = config.ALERT_QUEUE_SIZE
+    sound_enabled: bool = config.ALERT_SOUND_ENABLED
+    sound_file: str = config.ALERT_SOUND_FILE
+    log_file: Optional[str] = config.ALERT_LOG_FILE
+    socket_address: Optional[str] = field(default_factory=_socket_address_default)
+
+
+@dataclass
+class RenderSettings:
+    """When the overlay is drawn and displayed."""
+    mode: str = config.RENDER_MODE
+    interval: int = config.RENDER_INTERVAL
+
+
+@dataclass
+class EvidenceSettings:
+    """Background screenshot and alert clip capture."""
+    enabled: bool = config.EVIDENCE_CAPTURE_ENABLED
+    pre_seconds: float = config.EVIDENCE_PRE_SECONDS
+    post_seconds: float = config.EVIDENCE_POST_SECONDS
+    writer_workers: int = config.EVIDENCE_WRITER_WORKERS
+    max_jobs: int = config.EVIDENCE_MAX_JOBS
+    max_pending_mb: int = config.EVIDENCE_MAX_PENDING_MB
+
+
+@dataclass
+class PathSettings:
+    """Model and data locations."""
+    face_cascade: str = config.MODEL_PATHS["face_cascade"]
+    eye_cascade: str = config.MODEL_PATHS["eye_cascade"]
+    screenshots: str = config.DATA_PATHS["screenshots"]
+    evidence: str = config.DATA_PATHS["evidence"]
+    logs: str = config.DATA_PATHS["logs"]
+    sounds: str = config.DATA_PATHS["sounds"]
+
+    def model_path(self, name: str) -> str:
+        """Absolute path of a model, resolving relative paths from the project root."""
+        path = getattr(self, name)
+        return path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+
+
+@dataclass
+class DetectorConfig:
+    """Complete, validated detector configuration."""
+    camera: CameraSettings = field(default_factory=CameraSettings)
+    detection: DetectionSettings = field(default_factory=DetectionSettings)
+    motion_gate: MotionGateSettings = field(default_factory=MotionGateSettings)
+    faces: FaceSelectionSettings = field(default_factory=FaceSelectionSettings)
+    eye: EyeAnalysisSettings = field(default_factory=EyeAnalysisSettings)
+    eye_cache: EyeCacheSettings = field(default_factory=EyeCacheSettings)
+    eyelid_flow: EyelidFlowSettings = field(default_factory=EyelidFlowSettings)
+    budget: BudgetSettings = field(default_factory=BudgetSettings)
+    metrics: MetricsSettings = field(default_factory=MetricsSettings)
+    tuning: TuningSettings = field(default_factory=TuningSettings)
+    session: SessionReportSettings = field(default_factory=SessionReportSettings)
+    preprocessing: PreprocessingSettings = field(default_factory=PreprocessingSettings)
+    alerts: AlertSettings = field(default_factory=AlertSettings)
+    render: RenderSettings = field(default_factory=RenderSettings)
+    evidence: EvidenceSettings = field(default_factory=EvidenceSettings)
+    paths: PathSettings = field(default_factory=PathSettings)
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Return the configuration as nested plain dictionaries."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Mapping[str, Any]]) -> "DetectorConfig":
+        """Build a configuration from nested dictionaries; missing keys keep defaults."""
+        return cls().updated(data)
+
+    def updated(self, data: Mapping[str, Mapping[str, Any]]) -> "DetectorConfig":
+        """
+        Return a copy with the given section values replaced.
+
+        Raises:
+            ValueError: If a section or field is unknown or a value has the wrong type
+        """
+        sections = {f.name: f for f in fields(self)}
+        changes = {}
+        for section_name, values in data.items():
+            if section_name not in sections:
+                raise ValueError(f"Unknown config section: {section_name}")
+            section = getattr(self, section_name)
+            hints = get_type_hints(type(section))
+            section_changes = {}
+            for key, value in values.items():
+                if key not in hints:
+                    raise ValueError(f"Unknown config field: {section_name}.{key}")
+                section_changes[key] = _coerce(value, hints[key], f"{section_name}.{key}")
+            changes[section_name] = replace(section, **section_changes)
+        return replace(self, **changes)
+
+    def headless(self, keep_evidence: bool = False) -> "DetectorConfig":
+        """
+        Return a copy that runs without a window and without alert output.
+
+        Offline runs (evaluation, sweeps, soaks) and tests use it: nothing is
+        drawn, and alerts are still raised and counted but not played,
+        logged or sent.
+
+        Args:
+            keep_evidence: Leave evidence capture as configured instead of
+                switching it off
+        """
+        overrides: Dict[str, Dict[str, Any]] = {
+            "render": {"mode": RENDER_NONE},
+            "alerts": {"sound_enabled": False, "log_file": None, "socket_address": None},
+        }
+        if not keep_evidence:
+            overrides["evidence"] = {"enabled": False}
+        return self.updated(overrides)
+
+    def validate(self) -> "DetectorConfig":
+        """
+        Check every value for consistency.
+
+        Returns:
+            The configuration itself, for chaining
+
+        Raises:
+            ValueError: Listing every invalid setting
+        """
+        errors: List[str] = []
+
+        def check(condition: bool, message: str) -> None:
+            if not condition:
+                errors.append(message)
+
+        cam, det, eye, pre = self.camera, self.detection, self.eye, self.preprocessing
+        check(cam.index >= 0, "camera.index must be >= 0")
+        check(cam.width > 0 and cam.height > 0, "camera.width/height must be positive")
+        check(cam.fps > 0, "camera.fps must be positive")
+        check(cam.capture_format in CAPTURE_FORMATS,
+              f"camera.capture_format must be one of {CAPTURE_FORMATS}")
+
+        check(det.mode in DETECTION_MODES, f"detection.mode must be one of {DETECTION_MODES}")
+        if det.mode == DETECTION_TILED:
+            check(max(det.face_min_size) <= det.tile_overlap < det.tile_size,
+                  "detection.tile_overlap must be between the face minimum size and detection.tile_size")
+            check(0 <= det.tile_coarse_scale < 1, "detection.tile_coarse_scale must be in [0, 1)")
+            check(0 < det.tile_nms_iou <= 1, "detection.tile_nms_iou must be in (0, 1]")
+            check(det.tile_workers >= 0, "detection.tile_workers must be >= 0")
+        check(det.face_scale_factor > 1.0, "detection.face_scale_factor must be > 1")
+        check(det.eye_scale_factor > 1.0, "detection.eye_scale_factor must be > 1")
+        check(det.face_min_neighbors >= 0, "detection.face_min_neighbors must be >= 0")
+        check(det.eye_min_neighbors >= 0, "detection.eye_min_neighbors must be >= 0")
+        check(min(det.face_min_size) > 0, "detection.face_min_size must be positive")
+        check(min(det.eye_min_size) > 0, "detection.eye_min_size must be positive")
+        check(det.pyramid_max_levels >= 1, "detection.pyramid_max_levels must be >= 1")
+
+        gate = self.motion_gate
+        check(gate.frame_threshold >= 0 and gate.eye_threshold >= 0,
+              "motion_gate thresholds must be >= 0")
+        check(min(gate.downsample_size) > 0, "motion_gate.downsample_size must be positive")
+        check(gate.refresh_interval >= 1, "motion_gate.refresh_interval must be >= 1")
+
+        faces = self.faces
+        check(faces.strategy in SELECTION_STRATEGIES,
+              f"faces.strategy must be one of {SELECTION_STRATEGIES}")
+        sx, sy, sw, sh = faces.seat_region
+        check(sw > 0 and sh > 0 and 0 <= sx and 0 <= sy and sx + sw <= 1 and sy + sh <= 1,
+              "faces.seat_region must be a normalised (x, y, w, h) box inside 0..1")
+        check(0.0 < faces.track_iou <= 1.0, "faces.track_iou must be in (0, 1]")
+        check(faces.track_max_missed >= 0, "faces.track_max_missed must be >= 0")
+        check(faces.secondary_interval >= 0, "faces.secondary_interval must be >= 0")
+        check(faces.max_secondary >= 0, "faces.max_secondary must be >= 0")
+
+        check(min(eye.canonical_size) >= 8, "eye.canonical_size must be at least 8x8")
+        check(0 <= eye.threshold_value <= 255, "eye.threshold_value must be in 0..255")
+        check(0 <= eye.canny_low_threshold <= eye.canny_high_threshold,
+              "eye.canny_low_threshold must be between 0 and canny_high_threshold")
+        check(0.0 <= eye.dark_ratio_min <= 1.0, "eye.dark_ratio_min must be in 0..1")
+        check(0.0 <= eye.edge_ratio_min <= 1.0, "eye.edge_ratio_min must be in 0..1")
+        check(0.0 <= eye.ear_threshold <= 1.0, "eye.ear_threshold must be in 0..1")
+        check(eye.lighting in LIGHTING_MODES, f"eye.lighting must be one of {LIGHTING_MODES}")
+        check(eye.clahe_clip_limit > 0, "eye.clahe_clip_limit must be positive")
+        check(min(eye.clahe_tile_grid) >= 1, "eye.clahe_tile_grid must be at least 1x1")
+        check(0.0 <= eye.adaptive_dark_ratio_min <= 1.0 and 0.0 <= eye.adaptive_edge_ratio_min <= 1.0,
+              "eye.adaptive_dark_ratio_min/adaptive_edge_ratio_min must be in 0..1")
+        check(eye.canny_contrast_ratio > 0, "eye.canny_contrast_ratio must be positive")
+
+        cache = self.eye_cache
+        check(cache.max_entries >= 1, "eye_cache.max_entries must be >= 1")
+        check(min(cache.hash_size) > 0, "eye_cache.hash_size must be positive")
+        check(0 <= cache.quantization_bits < 8, "eye_cache.quantization_bits must be in 0..7")
+
+        lid = self.eyelid_flow
+        check(lid.static_interval >= 1, "eyelid_flow.static_interval must be >= 1")
+        check(min(lid.window_size) >= 8, "eyelid_flow.window_size must be at least 8x8")
+        check(lid.close_threshold > 0 and lid.open_threshold > 0,
+              "eyelid_flow thresholds must be positive")
+        check(lid.still_level >= 0, "eyelid_flow.still_level must be >= 0")
+        check(lid.hold_frames >= 0, "eyelid_flow.hold_frames must be >= 0")
+
+        budget = self.budget
+        check(0 < budget.recover_ratio < budget.degrade_ratio,
+              "budget.recover_ratio must be positive and below budget.degrade_ratio")
+        check(budget.degrade_after >= 1 and budget.recover_after >= 1,
+              "budget.degrade_after/recover_after must be >= 1")
+        check(0 < budget.smoothing <= 1, "budget.smoothing must be in (0, 1]")
+        check(0 <= budget.max_level <= 4, "budget.max_level must be in 0..4")
+        check(budget.refresh_interval >= 1, "budget.refresh_interval must be >= 1")
+        check(0 < budget.low_resolution_scale <= 1, "budget.low_resolution_scale must be in (0, 1]")
+
+        check(bool(self.metrics.address), "metrics.address must not be empty")
+
+        check(self.tuning.cv_threads >= 0, "tuning.cv_threads must be >= 0")
+        check(self.tuning.benchmark_frames >= 1, "tuning.benchmark_frames must be >= 1")
+
+        session = self.session
+        check(session.format in REPORT_FORMATS, f"session.format must be one of {REPORT_FORMATS}")
+        check(session.bin_seconds > 0, "session.bin_seconds must be positive")
+        check(session.max_bins >= 2, "session.max_bins must be >= 2")
+        check(session.perclos_window > 0, "session.perclos_window must be positive")
+        check(session.max_alerts >= 0, "session.max_alerts must be >= 0")
+
+        check(pre.median_kernel_size >= 3 and pre.median_kernel_size % 2 == 1,
+              "preprocessing.median_kernel_size must be odd and >= 3")
+        check(all(k > 0 and k % 2 == 1 for k in pre.gaussian_kernel_size),
+              "preprocessing.gaussian_kernel_size must be odd and positive")
+
+        al = self.alerts
+        check(al.threshold_seconds > 0, "alerts.threshold_seconds must be positive")
+        check(al.critical_seconds >= al.threshold_seconds,
+              "alerts.critical_seconds must be >= alerts.threshold_seconds")
+        check(al.min_interval_seconds >= 0, "alerts.min_interval_seconds must be >= 0")
+        check(al.queue_size > 0, "alerts.queue_size must be positive")
+
+        check(self.render.mode in RENDER_MODES, f"render.mode must be one of {RENDER_MODES}")
+        check(self.render.interval >= 1, "render.interval must be >= 1")
+
+        ev = self.evidence
+        check(ev.pre_seconds >= 0 and ev.post_seconds >= 0,
+              "evidence.pre_seconds/post_seconds must be >= 0")
+        check(ev.writer_workers >= 1, "evidence.writer_workers must be >= 1")
+        check(ev.max_jobs >= 1, "evidence.max_jobs must be >= 1")
+        check(ev.max_pending_mb > 0, "evidence.max_pending_mb must be positive")
+
+        if errors:
+            raise ValueError("Invalid configuration: " + "; ".join(errors))
+        return self
+
+
+def _coerce(value: Any, hint: Any, name: str) -> Any:
+    """Convert a JSON or environment value to the annotated field type."""
+    args = getattr(hint, "__args__", None) or ()
+    if type(None) in args:
+        if value is None or (isinstance(value, str) and value.strip().lower() in ("", "none", "null")):
+            return None
+        hint = next(a for a in args if a is not type(None))
+        args = getattr(hint, "__args__", None) or ()
+
+    try:
+        if getattr(hint, "__origin__", None) is tuple:
+            if isinstance(value, str):
+                value = [v for v in value.replace("x", ",").split(",") if v.strip()]
+            items = tuple(args[0](v) for v in value)
+            if len(items) != len(args):
+                raise ValueError(f"expected {len(args)} values")
+            return items
+        if hint is bool:
+            if isinstance(value, str):
+                lowered = value.strip().lower()
+                if lowered in ("1", "true", "yes", "on"):
+                    return True
+                if lowered in ("0", "false", "no", "off"):
+                    return False
+                raise ValueError("expected a boolean")
+            return bool(value)
+        if hint is int and isinstance(value, float) and not value.is_integer():
+            raise ValueError("expected an integer")
+        return hint(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid value {value!r} for {name}: {e}")
+
+
+def config_from_env(base: DetectorConfig, env: Mapping[str, str]) -> DetectorConfig:
+    """Apply ``DROWSINESS_SECTION__FIELD`` environment overrides to a configuration."""
+    overrides: Dict[str, Dict[str, str]] = {}
+    for key, value in env.items():
+        if not key.startswith(ENV_PREFIX) or key == ENV_CONFIG_FILE:
+            continue
+        section, sep, name = key[len(ENV_PREFIX):].lower().partition("__")
+        if not sep:
+            continue
+        overrides.setdefault(section, {})[name] = value
+    return base.updated(overrides)
+
+
+def load_config(path: Optional[str] = None,
+                env: Optional[Mapping[str, str]] = None) -> DetectorConfig:
+    """
+    Load and validate a configuration.
+
+    Defaults come from config.py, then the JSON file (``path`` or the
+    ``DROWSINESS_CONFIG`` variable) is applied, then environment overrides.
+
+    Args:
+        path: Optional JSON configuration file
+        env: Environment mapping, defaults to os.environ
+
+    Returns:
+        Validated DetectorConfig
+
+    Raises:
+        ValueError: If the configuration is invalid
+        FileNotFoundError: If the configuration file does not exist
+    """
+    env = os.environ if env is None else env
+    path = path or env.get(ENV_CONFIG_FILE)
+
+    settings = DetectorConfig()
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            settings = settings.updated(json.load(f))
+    settings = config_from_env(settings, env)
+    return settings.validate()
+
+
+class ConfigWatcher:
+    """
+    Reload a configuration file when it changes.
+
+    Invalid files are logged and ignored, so a typo never takes down a
+    running detector; the previous configuration stays in effect.
+
+    Args:
+        path: JSON configuration file to watch
+        callback: Called with each new, validated DetectorConfig
+        interval: Polling interval in seconds
+        env: Environment overrides applied on every reload
+    """
+
+    def __init__(self, path: str, callback: Callable[[DetectorConfig], None],
+                 interval: float = 2.0, env: Optional[Mapping[str, str]] = None):
+        self.path = path
+        self.callback = callback
+        self.interval = interval
+        self.env = env
+        self._mtime = self._current_mtime()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _current_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def check(self) -> bool:
+        """Reload the file if it changed. Returns True if a new config was applied."""
+        mtime = self._current_mtime()
+        if mtime is None or mtime == self._mtime:
+            return False
+        self._mtime = mtime
+
+        try:
+            settings = load_config(self.path, self.env)
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring invalid configuration in {self.path}: {e}")
+            return False
+
+        logger.info(f"Configuration reloaded from {self.path}")
+        self.callback(settings)
+        return True
+
+    def start(self) -> "ConfigWatcher":
+        """Poll the file on a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def stop(self) -> None:
+        """Stop polling."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Soak test harness for the Drowsiness Detection System
+=====================================================
+
+Drives the full per-frame pipeline of ``DrowsinessDetector`` headless on
+replayed images or a synthetic blinking face for hours of simulated time.
+The detector runs on a simulated clock advanced by one frame period per
+frame, so a 12 hour shift takes only as long as the frames take to process.
+
+At every sample interval the harness records process RSS, Python object
+and thread counts, per-stage latency percentiles and event rates. The
+samples are written as a CSV time series, and the run fails if memory or
+object counts keep growing or if latency drifts upwards.
+
+Usage:
+    python src/soak.py --hours 12 --images data/replay --output data/logs/soak
+"""
+
+import argparse
+import csv
+import gc
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    from .capture import BlinkTimeline, CaptureSource, ImageDirectorySource, SyntheticFaceSource
+    from .drowsiness_detector import DrowsinessDetector
+    from .settings import DetectorConfig, load_config
+except ImportError:
+    from capture import BlinkTimeline, CaptureSource, ImageDirectorySource, SyntheticFaceSource
+    from drowsiness_detector import DrowsinessDetector
+    from settings import DetectorConfig, load_config
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("capture", "preprocess", "detect", "eye_state", "total")
+
+
+class SimulatedClock:
+    """Manually advanced clock, used in place of time.time."""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def read_rss_mb() -> float:
+    """Current resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # Peak rather than current RSS, still enough to catch a leak
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _slope_per_hour(times: Sequence[float], values: Sequence[float]) -> float:
+    """Least-squares slope of ``values`` over ``times`` (seconds), per hour."""
+    if len(times) < 2 or max(times) == min(times):
+        return 0.0
+    return float(np.polyfit(np.asarray(times), np.asarray(values, dtype=np.float64), 1)[0]) * 3600.0
+
+
+class SoakMonitor:
+    """
+    Sample resource usage and latency of a running detector.
+
+    Args:
+        detector: The detector being soaked
+        sample_interval: Simulated seconds between samples
+    """
+
+    def __init__(self, detector: DrowsinessDetector, sample_interval: float = 60.0):
+        self.detector = detector
+        self.sample_interval = sample_interval
+        self.samples: List[Dict[str, float]] = []
+
+        self._latencies: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self._last_sample_time: Optional[float] = None
+        self._last_counts: Dict[str, int] = {}
+        self._wall_start = time.perf_counter()
+
+    def record_frame(self) -> None:
+        """Collect the stage timings of the frame just processed."""
+        for stage in STAGES:
+            self._latencies[stage].append(self.detector.stage_times.get(stage, 0.0))
+
+    def _event_counts(self) -> Dict[str, int]:
+        detector = self.detector
+        counts = {
+            "frames": detector.frame_index,
+            "blinks": detector.blink_count,
+            "alerts_dispatched": detector.alert_dispatcher.dispatched,
+            "alerts_suppressed": detector.alert_dispatcher.suppressed,
+            "alerts_dropped": detector.alert_dispatcher.dropped,
+            "evidence_written": detector.evidence_writer.written,
+            "evidence_dropped": detector.evidence_writer.dropped,
+        }
+        if detector.motion_gate is not None:
+            counts["gate_skipped"] = detector.motion_gate.skipped
+        if detector.budget is not None:
+            counts["budget_level_changes"] = detector.budget.level_changes
+        return counts
+
+    def maybe_sample(self, sim_time: float) -> bool:
+        """Take a sample if a sample interval has passed; returns True if sampled."""
+        if self._last_sample_time is None:
+            self._last_sample_time = sim_time
+            self._last_counts = self._event_counts()
+            return False
+        if sim_time - self._last_sample_time < self.sample_interval:
+            return False
+        self.sample(sim_time)
+        return True
+
+    def sample(self, sim_time: float) -> Dict[str, float]:
+        """Record one sample of the time series."""
+        elapsed = max(sim_time - (self._last_sample_time or 0.0), 1e-9)
+        counts = self._event_counts()
+
+        row: Dict[str, float] = {
+            "sim_time_s": round(sim_time, 3),
+            "wall_time_s": round(time.perf_counter() - self._wall_start, 3),
+            "rss_mb": round(read_rss_mb(), 2),
+            "py_objects": len(gc.get_objects()),
+            "threads": threading.active_count(),
+        }
+        for stage, values in self._latencies.items():
+            if values:
+                p50, p95 = np.percentile(values, (50, 95))
+            else:
+                p50 = p95 = 0.0
+            row[f"{stage}_p50_ms"] = round(p50 * 1000.0, 3)
+            row[f"{stage}_p95_ms"] = round(p95 * 1000.0, 3)
+            values.clear()
+        for name, value in counts.items():
+            delta = value - self._last_counts.get(name, 0)
+            row[f"{name}_per_min"] = round(delta * 60.0 / elapsed, 3)
+        row["frames"] = counts["frames"]
+        row["blinks"] = counts["blinks"]
+        if self.detector.budget is not None:
+            row["degradation_level"] = self.detector.degradation_level
+
+        self.samples.append(row)
+        self._last_sample_time = sim_time
+        self._last_counts = counts
+        return row
+
+    def write_csv(self, path: str) -> None:
+        """Write the samples as a CSV time series."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not self.samples:
+            return
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(self.samples[0].keys()))
+            writer.writeheader()
+            writer.writerows(self.samples)
+
+
+def evaluate(samples: Sequence[Dict[str, float]], warmup_fraction: float = 0.2,
+             max_rss_growth_mb_per_hour: float = 5.0,
+             max_object_growth_per_hour: float = 5000.0,
+             max_latency_drift: float = 1.5,
+             max_threads: int = 32) -> Dict:
+    """
+    Check a soak time series for leaks and drift.
+
+    Samples in the first ``warmup_fraction`` of the run (caches, pools and
+    pyramids filling up) are ignored. Growth is the least-squares slope over
+    the remaining samples, latency drift the ratio of the p95 total latency
+    in the last quarter to that in the first quarter.
+
+    Returns:
+        Report with ``passed`` and a list of ``failures``
+    """
+    failures: List[str] = []
+    steady = list(samples)[int(len(samples) * warmup_fraction):]
+    report: Dict = {"samples": len(samples), "steady_samples": len(steady)}
+
+    if len(steady) < 4:
+        report.update(passed=False, failures=["Not enough samples after warm-up to judge drift"])
+        return report
+
+    times = [s["sim_time_s"] for s in steady]
+    rss_slope = _slope_per_hour(times, [s["rss_mb"] for s in steady])
+    object_slope = _slope_per_hour(times, [s["py_objects"] for s in steady])
+
+    quarter = max(len(steady) // 4, 1)
+    first = float(np.median([s["total_p95_ms"] for s in steady[:quarter]]))
+    last = float(np.median([s["total_p95_ms"] for s in steady[-quarter:]]))
+    latency_ratio = last / first if first > 0 else 1.0
+    peak_threads = max(s["threads"] for s in samples)
+
+    report.update(rss_growth_mb_per_hour=round(rss_slope, 3),
+                  object_growth_per_hour=round(object_slope, 1),
+                  latency_p95_first_ms=round(first, 3),
+                  latency_p95_last_ms=round(last, 3),
+                  latency_drift=round(latency_ratio, 3),
+                  peak_threads=peak_threads)
+
+    if rss_slope > max_rss_growth_mb_per_hour:
+        failures.append(f"RSS grows {rss_slope:.2f} MB/h (limit {max_rss_growth_mb_per_hour})")
+    if object_slope > max_object_growth_per_hour:
+        failures.append(f"Python objects grow {object_slope:.0f}/h "
+                        f"(limit {max_object_growth_per_hour:.0f})")
+    if latency_ratio > max_latency_drift:
+        failures.append(f"p95 latency drifted x{latency_ratio:.2f} "
+                        f"({first:.2f} -> {last:.2f} ms, limit x{max_latency_drift})")
+    if peak_threads > max_threads:
+        failures.append(f"{peak_threads} threads alive (limit {max_threads})")
+
+    report.update(passed=not failures, failures=failures)
+    return report
+
+
+def soak_settings(base: Optional[DetectorConfig] = None,
+                  output_dir: Optional[str] = None) -> DetectorConfig:
+    """Headless, silent variant of a configuration for soaking."""
+    settings = (base or DetectorConfig()).headless(keep_evidence=True)
+    if output_dir:
+        settings = settings.updated({"paths": {
+            "evidence": os.path.join(output_dir, "evidence"),
+            "screenshots": os.path.join(output_dir, "screenshots")}})
+    return settings
+
+
+def run_soak(source: CaptureSource, duration: float, fps: Optional[float] = None,
+             sample_interval: float = 60.0, settings: Optional[DetectorConfig] = None,
+             output_dir: Optional[str] = None, **limits) -> Dict:
+    """
+    Soak the detector on a looping capture source for ``duration`` simulated seconds.
+
+    Args:
+        source: Frame source; must not run out before ``duration``
+        duration: Simulated run time in seconds
+        fps: Simulated frame rate, defaults to the source's; the clock
+            advances 1/fps per frame
+        sample_interval: Simulated seconds between samples
+        settings: Detector configuration (made headless and silent)
+        output_dir: Where the time series, report and evidence go
+        **limits: Thresholds passed on to ``evaluate``
+
+    Returns:
+        The evaluation report, including the samples
+    """
+    clock = SimulatedClock(start=time.time())
+    detector = DrowsinessDetector(settings=soak_settings(settings, output_dir),
+                                  capture=source, clock=clock,
+                                  stream_id="soak")
+    monitor = SoakMonitor(detector, sample_interval)
+    start = clock()
+    fps = fps or source.fps
+    frame_period = 1.0 / fps
+    total_frames = int(duration * fps)
+
+    try:
+        monitor.maybe_sample(0.0)
+        for _ in range(total_frames):
+            ret, frame = detector.cap.read()
+            if not ret:
+                logger.warning("Capture source ran out of frames, ending the soak early")
+                break
+            detector.process_frame(frame)
+            monitor.record_frame()
+            clock.advance(frame_period)
+            if monitor.maybe_sample(clock() - start):
+                row = monitor.samples[-1]
+                logger.info(f"t={row['sim_time_s'] / 3600.0:.2f}h rss={row['rss_mb']}MB "
+                            f"objects={row['py_objects']} p95={row['total_p95_ms']}ms")
+    finally:
+        detector.cleanup()
+
+    report = evaluate(monitor.samples, **limits)
+    report["simulated_seconds"] = round(clock() - start, 3)
+    report["wall_seconds"] = monitor.samples[-1]["wall_time_s"] if monitor.samples else 0.0
+
+    if output_dir:
+        monitor.write_csv(os.path.join(output_dir, "soak_timeseries.csv"))
+        with open(os.path.join(output_dir, "soak_report.json"), "w") as f:
+            json.dump(report, f, indent=2)
+    report["timeseries"] = monitor.samples
+    return report
+
+
+def main():
+    """Command line entry point; exits non-zero if the soak fails."""
+    parser = argparse.ArgumentParser(description="Soak test the drowsiness detector")
+    parser.add_argument("--hours", type=float, default=1.0, help="Simulated hours to run")
+    parser.add_argument("--fps", type=float, default=30.0, help="Simulated frame rate")
+    parser.add_argument("--images", nargs="*", default=[],
+                        help="Image files or directories to replay "
+                             "(default: synthetic face blinking every 4s)")
+    parser.add_argument("--sample-interval", type=float, default=60.0,
+                        help="Simulated seconds between samples")
+    parser.add_argument("--output", default=os.path.join("data", "logs", "soak"),
+                        help="Directory for the time series and report")
+    parser.add_argument("--max-rss-growth", type=float, default=5.0, help="MB per hour")
+    parser.add_argument("--max-object-growth", type=float, default=5000.0, help="Objects per hour")
+    parser.add_argument("--max-latency-drift", type=float, default=1.5,
+                        help="Allowed ratio of late to early p95 latency")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    settings = load_config()
+    camera = settings.camera
+    duration = args.hours * 3600.0
+    if args.images:
+        try:
+            source = ImageDirectorySource(args.images, (camera.width, camera.height), args.fps)
+        except FileNotFoundError as e:
+            parser.error(str(e))
+    else:
+        # Regular blinks plus a microsleep every ten minutes to exercise alerts
+        timeline = BlinkTimeline.periodic(4.0, total=duration)
+        for start in np.arange(300.0, duration, 600.0):
+            timeline.add(float(start), 6.0)
+        source = SyntheticFaceSource(camera.width, camera.height, args.fps,
+                                     timeline=timeline, sway=0.02, noise=2.0)
+
+    report = run_soak(source, duration, fps=args.fps,
+                      sample_interval=args.sample_interval, settings=settings,
+                      output_dir=args.output,
+                      max_rss_growth_mb_per_hour=args.max_rss_growth,
+                      max_object_growth_per_hour=args.max_object_growth,
+                      max_latency_drift=args.max_latency_drift)
+
+    logger.info(f"Simulated {report['simulated_seconds'] / 3600.0:.2f}h "
+                f"in {report['wall_seconds']:.0f}s wall time")
+    if report["passed"]:
+        logger.info("Soak passed")
+        return 0
+    for failure in report["failures"]:
+        logger.error(f"Soak failed: {failure}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
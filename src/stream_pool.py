@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Multi-stream thread pool for the Drowsiness Detection System
+============================================================
+
+Processes frames from several streams at once in a single process. All
+workers share one ``FrameAnalyzer`` (one set of models); each stream keeps
+its own ``StreamState`` and its frames are processed in order, a chunk at
+a time, so streams interleave when there are more of them than workers.
+Alerts go through one ``AlertDispatcher`` keyed by stream id, with the
+same rules as in the detector.
+
+Run as a script it benchmarks throughput against the number of workers:
+
+    python src/stream_pool.py --streams 4 --workers 1 2 4 --seconds 10
+"""
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence
+
+import cv2
+import numpy as np
+
+try:
+    from .alerts import AlertDispatcher
+    from .analyzer import FrameAnalyzer, StreamState
+    from .capture import BlinkTimeline, CaptureSource, FrameListSource, SyntheticFaceSource
+    from .results import DetectionBuffer
+    from .settings import DetectorConfig, load_config
+    from .tuning import TuningProfile, worker_initializer
+    from .utils import extract_luma
+except ImportError:
+    from alerts import AlertDispatcher
+    from analyzer import FrameAnalyzer, StreamState
+    from capture import BlinkTimeline, CaptureSource, FrameListSource, SyntheticFaceSource
+    from results import DetectionBuffer
+    from settings import DetectorConfig, load_config
+    from tuning import TuningProfile, worker_initializer
+    from utils import extract_luma
+
+logger = logging.getLogger(__name__)
+
+
+class _Stream:
+    """A source with its state and results; only one worker holds it at a time."""
+
+    __slots__ = ("source", "state", "results", "fps", "done")
+
+    def __init__(self, source: CaptureSource, state: StreamState):
+        self.source = source
+        self.state = state
+        self.results = DetectionBuffer()
+        self.fps = source.fps
+        self.done = False
+
+
+class StreamPool:
+    """
+    Analyse several streams on a pool of worker threads.
+
+    Frame times are taken from each source's frame rate (frame ``i`` is at
+    ``i / fps``), so results do not depend on scheduling.
+
+    Args:
+        analyzer: Shared analyzer; its settings also configure every stream
+        workers: Worker threads (defaults to the number of CPUs)
+        chunk_size: Frames a worker processes from one stream before
+            moving on to the next stream
+        profile: OpenCV tuning applied when the pool runs, e.g. from
+            ``load_or_tune(settings, workers)``; OpenCV is left alone if omitted
+        dispatcher: Dispatcher the streams' alerts are offered to; one
+            without sinks (alerts are logged) runs during ``run`` if omitted
+    """
+
+    def __init__(self, analyzer: FrameAnalyzer, workers: Optional[int] = None,
+                 chunk_size: int = 8, profile: Optional[TuningProfile] = None,
+                 dispatcher: Optional[AlertDispatcher] = None):
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be at least 1")
+        self.analyzer = analyzer
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.profile = profile
+        self._own_dispatcher = dispatcher is None
+        self.dispatcher = dispatcher or AlertDispatcher.from_settings(analyzer.settings.alerts)
+        self.streams: Dict[str, _Stream] = {}
+
+        # Statistics
+        self.frames_processed = 0
+        self._lock = threading.Lock()
+
+    def add_stream(self, stream_id: str, source: CaptureSource) -> StreamState:
+        """Register a source; returns its state, which the pool updates."""
+        if stream_id in self.streams:
+            raise ValueError(f"Duplicate stream id: {stream_id}")
+        state = StreamState.from_settings(stream_id, self.analyzer.settings, self.dispatcher)
+        self.streams[stream_id] = _Stream(source, state)
+        return state
+
+    def _process_chunk(self, stream: _Stream, max_frames: Optional[int]) -> int:
+        """Process the stream's next frames; marks it done when it runs out."""
+        processed = 0
+        for _ in range(self.chunk_size):
+            if max_frames is not None and len(stream.results) >= max_frames:
+                stream.done = True
+                break
+            ret, frame = stream.source.read()
+            if not ret:
+                stream.done = True
+                break
+            start = time.perf_counter()
+            analysis = self.analyzer.analyze(extract_luma(frame), stream.state.selector)
+            now = stream.state.frame_index / stream.fps
+            stream.results.append(stream.state.update(analysis, now, time.perf_counter() - start))
+            processed += 1
+        with self._lock:
+            self.frames_processed += processed
+        return processed
+
+    def run(self, max_frames: Optional[int] = None) -> Dict[str, DetectionBuffer]:
+        """
+        Process every stream until its source ends.
+
+        Args:
+            max_frames: Stop each stream after this many frames
+
+        Returns:
+            Per-frame results of each stream, by stream id
+        """
+        initializer = None
+        if self.profile is not None:
+            self.profile.apply()
+            initializer = worker_initializer(self.profile)
+        self.dispatcher.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="stream-pool",
+                                    initializer=initializer) as executor:
+                pending = {executor.submit(self._process_chunk, stream, max_frames): stream
+                           for stream in self.streams.values() if not stream.done}
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stream = pending.pop(future)
+                        future.result()
+                        if not stream.done:
+                            pending[executor.submit(self._process_chunk, stream,
+                                                    max_frames)] = stream
+        finally:
+            if self._own_dispatcher:
+                self.dispatcher.stop()
+        return {stream_id: stream.results for stream_id, stream in self.streams.items()}
+
+
+def benchmark(settings: DetectorConfig, frames: Sequence[np.ndarray], streams: int,
+              worker_counts: Sequence[int], cv_threads: Optional[int] = 1) -> List[Dict]:
+    """
+    Measure pool throughput for different numbers of workers.
+
+    Every stream replays the same frames once. OpenCV's own threading is
+    set to ``cv_threads`` during the run so the scaling measured is that
+    of the pool rather than of ``detectMultiScale``'s internal workers.
+
+    Args:
+        settings: Detector configuration
+        frames: Frames each stream replays
+        streams: Number of concurrent streams
+        worker_counts: Worker counts to measure, the first one is the baseline
+        cv_threads: OpenCV thread count during the run (None leaves it alone)
+
+    Returns:
+        One dict per worker count with frames, seconds, fps and speedup
+    """
+    previous_threads = cv2.getNumThreads()
+    if cv_threads is not None:
+        cv2.setNumThreads(cv_threads)
+    try:
+        analyzer = FrameAnalyzer(settings)
+        rows: List[Dict] = []
+        for workers in worker_counts:
+            pool = StreamPool(analyzer, workers)
+            for i in range(streams):
+                pool.add_stream(f"stream{i}", FrameListSource(frames, loop=False))
+            start = time.perf_counter()
+            pool.run()
+            seconds = time.perf_counter() - start
+            fps = pool.frames_processed / seconds
+            rows.append({
+                "workers": workers,
+                "frames": pool.frames_processed,
+                "seconds": round(seconds, 3),
+                "fps": round(fps, 1),
+                "speedup": round(fps / rows[0]["fps"], 2) if rows else 1.0,
+            })
+    finally:
+        cv2.setNumThreads(previous_threads)
+    return rows
+
+
+def main():
+    """Command line entry point: print throughput against the number of workers."""
+    parser = argparse.ArgumentParser(description="Benchmark multi-stream detection on a thread pool")
+    parser.add_argument("--streams", type=int, default=4, help="Concurrent streams")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, os.cpu_count() or 1}),
+                        help="Worker counts to measure; the first is the baseline")
+    parser.add_argument("--seconds", type=float, default=5.0,
+                        help="Seconds of synthetic video per stream")
+    parser.add_argument("--fps", type=float, default=30.0, help="Frame rate of the synthetic video")
+    parser.add_argument("--cv-threads", type=int, default=1,
+                        help="OpenCV internal threads during the benchmark")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    settings = load_config()
+    camera = settings.camera
+    source = SyntheticFaceSource(camera.width, camera.height, args.fps,
+                                 timeline=BlinkTimeline.periodic(2.0, total=args.seconds),
+                                 sway=0.02, noise=2.0)
+    frames = [source.render(i) for i in range(int(args.seconds * args.fps))]
+
+    logger.info(f"{args.streams} streams of {len(frames)} frames, {os.cpu_count()} CPUs")
+    for row in benchmark(settings, frames, args.streams, args.workers, args.cv_threads):
+        print(f"workers={row['workers']:<3} frames={row['frames']:<6} "
+              f"seconds={row['seconds']:<8} fps={row['fps']:<8} speedup={row['speedup']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Alert policy sweep for the Drowsiness Detection System
+======================================================
+
+Alert behaviour depends only on the per-frame eye-state stream and its
+timestamps. The sweep runs the detector over a recording once, keeps that
+stream, and then evaluates a whole grid of temporal rules on it with numpy:
+the closure alert threshold, blink debouncing and PERCLOS (fraction of time
+the eyes are closed over a sliding window). Each configuration reports its
+blink, alert and PERCLOS alert counts and timings.
+
+    python src/sweep.py --video drive.mp4 --save-stream data/logs/drive_stream.npz \\
+        --thresholds 2 3 4 5 --debounce 0 0.1 0.2 --output data/logs/sweep.csv
+    python src/sweep.py --stream data/logs/drive_stream.npz --thresholds 1.5 2.5
+
+Closure alerts follow the detector and AlertDispatcher exactly: an alert
+fires once the eyes have been closed longer than the threshold on a frame
+where they are tracked, repeats at most every ``min_interval`` seconds and
+escalates to CRITICAL after ``critical_after`` seconds.
+"""
+
+import argparse
+import csv
+import itertools
+import logging
+import os
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from .capture import (BlinkTimeline, CaptureSource, ImageDirectorySource,
+                          SyntheticFaceSource, VideoFileSource)
+    from .drowsiness_detector import DrowsinessDetector
+    from .results import DetectionBuffer
+    from .settings import DetectorConfig, load_config
+    from .soak import SimulatedClock
+except ImportError:
+    from capture import (BlinkTimeline, CaptureSource, ImageDirectorySource,
+                         SyntheticFaceSource, VideoFileSource)
+    from drowsiness_detector import DrowsinessDetector
+    from results import DetectionBuffer
+    from settings import DetectorConfig, load_config
+    from soak import SimulatedClock
+
+logger = logging.getLogger(__name__)
+
+# Default grid
+ALERT_THRESHOLDS = (2.0, 3.0, 4.0, 5.0)
+DEBOUNCE_SECONDS = (0.0, 0.1, 0.2)
+PERCLOS_WINDOWS = (60.0,)
+PERCLOS_THRESHOLDS = (0.15, 0.3)
+
+
+class EyeStateStream:
+    """
+    Per-frame eye state of a recording, as the detector saw it.
+
+    Args:
+        timestamps: Frame times in seconds
+        closed: Detector closed state after each frame (kept while the eyes
+            are not tracked, as in the detector)
+        tracked: Whether the eye state was observed on the frame (both eyes
+            found, or their lids followed by the eyelid flow)
+        fps: Nominal frame rate, used for the length of the last frame
+    """
+
+    def __init__(self, timestamps: Sequence[float], closed: Sequence[bool],
+                 tracked: Sequence[bool], fps: float):
+        self.timestamps = np.asarray(timestamps, dtype=np.float64)
+        self.closed = np.asarray(closed, dtype=bool)
+        self.tracked = np.asarray(tracked, dtype=bool)
+        self.fps = float(fps)
+        if not (len(self.timestamps) == len(self.closed) == len(self.tracked)):
+            raise ValueError("Stream arrays must have the same length")
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def frame_durations(self) -> np.ndarray:
+        """Seconds each frame's state holds for."""
+        if len(self) == 0:
+            return np.zeros(0)
+        return np.append(np.diff(self.timestamps), 1.0 / self.fps)
+
+    @property
+    def duration(self) -> float:
+        return float(self.frame_durations.sum())
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez_compressed(path, timestamps=self.timestamps, closed=self.closed,
+                            tracked=self.tracked, fps=self.fps)
+
+    @classmethod
+    def load(cls, path: str) -> "EyeStateStream":
+        with np.load(path) as data:
+            return cls(data["timestamps"], data["closed"], data["tracked"], float(data["fps"]))
+
+
+def record_stream(source: CaptureSource, settings: Optional[DetectorConfig] = None,
+                  fps: Optional[float] = None, max_frames: Optional[int] = None) -> EyeStateStream:
+    """
+    Run the detector over a source once and keep its eye-state stream.
+
+    Args:
+        source: Frames to analyse; recording stops when it runs out
+        settings: Detector configuration (run headless and silent)
+        fps: Frame rate of the recording, defaults to the source's
+        max_frames: Stop after this many frames
+
+    Returns:
+        The stream, with timestamps starting at 0
+
+    Raises:
+        ValueError: If neither ``fps`` nor the source gives a positive frame rate
+    """
+    fps = fps or source.fps
+    if not fps or fps <= 0:
+        raise ValueError("The recording's frame rate is unknown; pass a positive fps")
+    settings = (settings or DetectorConfig()).headless()
+    clock = SimulatedClock()
+    detector = DrowsinessDetector(settings=settings, capture=source, clock=clock,
+                                  stream_id="sweep")
+    results = DetectionBuffer()
+    start = time.perf_counter()
+    try:
+        while max_frames is None or len(results) < max_frames:
+            ret, frame = detector.cap.read()
+            if not ret:
+                break
+            detector.process_frame(frame)
+            results.append(detector.frame_result())
+            clock.advance(1.0 / fps)
+    finally:
+        detector.cleanup()
+    logger.info(f"Recorded {len(results)} frames in {time.perf_counter() - start:.1f}s")
+    return EyeStateStream(results.timestamps, results.closed, results.monitored, fps)
+
+
+def closure_runs(closed: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start and end (exclusive) frame indices of every closed stretch."""
+    padded = np.concatenate(([False], closed, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return edges[0::2], edges[1::2]
+
+
+def _episode_alerts(times: np.ndarray, elapsed: np.ndarray, min_interval: float,
+                    critical_after: float) -> Tuple[int, int]:
+    """
+    Alerts the dispatcher lets through during one closure.
+
+    Args:
+        times: Times of the frames that would raise an alert
+        elapsed: Closure duration at those frames (increasing)
+
+    Returns:
+        Tuple of (warnings, criticals)
+    """
+    warnings = criticals = 0
+    critical_from = int(np.searchsorted(elapsed, critical_after, "left"))
+    i = 0
+    while i < len(times):
+        if i >= critical_from:
+            criticals += 1
+        else:
+            warnings += 1
+        next_i = int(np.searchsorted(times, times[i] + min_interval, "left"))
+        if i < critical_from < next_i:
+            # Escalation bypasses the rate limit
+            next_i = critical_from
+        i = max(next_i, i + 1)
+    return warnings, criticals
+
+
+def closure_alerts(stream: EyeStateStream, thresholds: Iterable[float],
+                   min_interval: float, critical_after: float) -> Dict[float, Dict]:
+    """
+    Closure alerts for each alert threshold.
+
+    Returns:
+        Per threshold: closures alerted, total warnings and criticals, and
+        the time and delay (from closure start) of each first alert
+    """
+    starts, _ = closure_runs(stream.closed)
+    times = stream.timestamps
+    eligible = np.flatnonzero(stream.closed & stream.tracked)
+    run_of = np.searchsorted(starts, eligible, "right") - 1
+    elapsed = times[eligible] - times[starts[run_of]] if len(eligible) else np.zeros(0)
+
+    results = {}
+    for threshold in thresholds:
+        mask = elapsed > threshold
+        alert_runs = run_of[mask]
+        alert_times = times[eligible[mask]]
+        alert_elapsed = elapsed[mask]
+        runs, first = np.unique(alert_runs, return_index=True)
+        warnings = criticals = 0
+        for lo, hi in zip(first, np.append(first[1:], len(alert_runs))):
+            w, c = _episode_alerts(alert_times[lo:hi], alert_elapsed[lo:hi],
+                                   min_interval, critical_after)
+            warnings += w
+            criticals += c
+        results[threshold] = {
+            "closure_alerts": len(runs),
+            "warnings": warnings,
+            "criticals": criticals,
+            "alert_times": alert_times[first].round(3).tolist(),
+            "alert_delays": alert_elapsed[first].round(3).tolist(),
+        }
+    return results
+
+
+def debounced_closed(stream: EyeStateStream, debounce: float) -> np.ndarray:
+    """Closed state with closures shorter than ``debounce`` seconds removed."""
+    closed = stream.closed.copy()
+    if debounce <= 0 or len(stream) == 0:
+        return closed
+    starts, ends = closure_runs(closed)
+    ends_at = np.append(stream.timestamps[1:], stream.timestamps[-1] + 1.0 / stream.fps)
+    durations = ends_at[ends - 1] - stream.timestamps[starts]
+    short = durations < debounce - 1e-9
+    for start, end in zip(starts[short], ends[short]):
+        closed[start:end] = False
+    return closed
+
+
+def perclos(stream: EyeStateStream, closed: np.ndarray, window: float) -> np.ndarray:
+    """
+    Fraction of the last ``window`` seconds the eyes were closed, per frame.
+
+    Frames before the first full window are NaN.
+    """
+    durations = stream.frame_durations
+    elapsed = np.concatenate(([0.0], np.cumsum(durations)))
+    closed_time = np.concatenate(([0.0], np.cumsum(durations * closed)))
+    end = elapsed[1:]
+    begin = np.searchsorted(elapsed, end - window, "left")
+    span = end - elapsed[begin]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        values = (closed_time[1:] - closed_time[begin]) / span
+    values[end < window - 1e-9] = np.nan
+    return values
+
+
+def sweep(stream: EyeStateStream, thresholds: Sequence[float] = ALERT_THRESHOLDS,
+          debounces: Sequence[float] = DEBOUNCE_SECONDS,
+          perclos_windows: Sequence[float] = PERCLOS_WINDOWS,
+          perclos_thresholds: Sequence[float] = PERCLOS_THRESHOLDS,
+          min_interval: float = 2.0, critical_after: float = 8.0) -> List[Dict]:
+    """
+    Evaluate every combination of the temporal rules on one stream.
+
+    Args:
+        stream: Eye-state stream from ``record_stream``
+        thresholds: Closure alert thresholds in seconds
+        debounces: Shortest closure counted as a blink (and in PERCLOS)
+        perclos_windows: PERCLOS window lengths in seconds
+        perclos_thresholds: PERCLOS fractions that raise an alert
+        min_interval: Alert rate limit (AlertDispatcher.min_interval)
+        critical_after: Closure duration escalating to CRITICAL
+
+    Returns:
+        One result per configuration
+    """
+    minutes = stream.duration / 60.0
+    closures = closure_alerts(stream, thresholds, min_interval, critical_after)
+
+    blinks: Dict[float, int] = {}
+    perclos_results: Dict[Tuple[float, float, float], Dict] = {}
+    for debounce in debounces:
+        closed = debounced_closed(stream, debounce)
+        blinks[debounce] = len(closure_runs(closed)[0])
+        for window in perclos_windows:
+            values = perclos(stream, closed, window)
+            finite = values[np.isfinite(values)]
+            for level in perclos_thresholds:
+                above = np.nan_to_num(values, nan=0.0) >= level
+                onsets = closure_runs(above)[0]
+                perclos_results[debounce, window, level] = {
+                    "perclos_alerts": len(onsets),
+                    "perclos_alert_times": stream.timestamps[onsets].round(3).tolist(),
+                    "perclos_max": round(float(finite.max()), 4) if finite.size else 0.0,
+                }
+
+    results = []
+    for threshold, debounce, window, level in itertools.product(
+            thresholds, debounces, perclos_windows, perclos_thresholds):
+        closure = closures[threshold]
+        delays = closure["alert_delays"]
+        result = {
+            "alert_threshold": threshold,
+            "debounce": debounce,
+            "perclos_window": window,
+            "perclos_threshold": level,
+            "blinks": blinks[debounce],
+            "blinks_per_minute": round(blinks[debounce] / minutes, 3) if minutes else 0.0,
+            "closure_alerts": closure["closure_alerts"],
+            "warnings": closure["warnings"],
+            "criticals": closure["criticals"],
+            "mean_alert_delay": round(float(np.mean(delays)), 3) if delays else None,
+            "alert_times": closure["alert_times"],
+        }
+        result.update(perclos_results[debounce, window, level])
+        results.append(result)
+    return results
+
+
+def write_csv(results: List[Dict], path: str) -> None:
+    """Write sweep results, one row per configuration; time lists are space-separated."""
+    if not results:
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0]))
+        writer.writeheader()
+        for result in results:
+            writer.writerow({k: " ".join(map(str, v)) if isinstance(v, list) else v
+                             for k, v in result.items()})
+
+
+def format_results(results: List[Dict]) -> str:
+    """Human-readable table of the sweep results."""
+    lines = [f"{'threshold':>9}{'debounce':>9}{'window':>8}{'perclos':>8}{'blinks':>8}"
+             f"{'alerts':>8}{'warn':>6}{'crit':>6}{'delay':>7}{'perclos':>9}"]
+    for r in results:
+        delay = f"{r['mean_alert_delay']:.2f}" if r["mean_alert_delay"] is not None else "-"
+        lines.append(f"{r['alert_threshold']:>9.2f}{r['debounce']:>9.2f}{r['perclos_window']:>8.0f}"
+                     f"{r['perclos_threshold']:>8.2f}{r['blinks']:>8}{r['closure_alerts']:>8}"
+                     f"{r['warnings']:>6}{r['criticals']:>6}{delay:>7}{r['perclos_alerts']:>9}")
+    return "\n".join(lines)
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Sweep alert policies over one recording")
+    source_group = parser.add_mutually_exclusive_group()
+    source_group.add_argument("--video", help="Recording to analyse")
+    source_group.add_argument("--images", nargs="*", help="Frames to analyse, in order")
+    source_group.add_argument("--stream", help="Eye-state stream saved by --save-stream")
+    parser.add_argument("--fps", type=float, default=None,
+                        help="Frame rate of the recording (default: the source's)")
+    parser.add_argument("--minutes", type=float, default=10.0,
+                        help="Length of the synthetic recording used without a source")
+    parser.add_argument("--config", help="Detector configuration JSON")
+    parser.add_argument("--save-stream", help="Keep the eye-state stream for later sweeps")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=list(ALERT_THRESHOLDS))
+    parser.add_argument("--debounce", type=float, nargs="+", default=list(DEBOUNCE_SECONDS))
+    parser.add_argument("--perclos-windows", type=float, nargs="+", default=list(PERCLOS_WINDOWS))
+    parser.add_argument("--perclos-thresholds", type=float, nargs="+",
+                        default=list(PERCLOS_THRESHOLDS))
+    parser.add_argument("--output", help="Write the results as CSV")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    settings = load_config(args.config)
+
+    if args.stream:
+        stream = EyeStateStream.load(args.stream)
+    else:
+        camera = settings.camera
+        if args.video:
+            source = VideoFileSource(args.video, loop=False)
+        elif args.images:
+            source = ImageDirectorySource(args.images, (camera.width, camera.height),
+                                          args.fps or camera.fps, loop=False)
+        else:
+            duration = args.minutes * 60.0
+            timeline = BlinkTimeline.periodic(4.0, total=duration, jitter=1.0, seed=0)
+            for start in np.arange(120.0, duration, 300.0):
+                timeline.add(float(start), 6.0)
+            source = SyntheticFaceSource(camera.width, camera.height, args.fps or camera.fps,
+                                         timeline=timeline, duration=duration)
+        try:
+            stream = record_stream(source, settings, fps=args.fps)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.save_stream:
+            stream.save(args.save_stream)
+
+    start = time.perf_counter()
+    results = sweep(stream, args.thresholds, args.debounce, args.perclos_windows,
+                    args.perclos_thresholds, settings.alerts.min_interval_seconds,
+                    settings.alerts.critical_seconds)
+    logger.info(f"Evaluated {len(results)} configurations on {len(stream)} frames "
+                f"in {time.perf_counter() - start:.3f}s")
+    print(format_results(results))
+    if args.output:
+        write_csv(results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
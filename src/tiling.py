@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Tile-parallel face detection for the Drowsiness Detection System
+================================================================
+
+A single ``detectMultiScale`` call on a 1920x1080 wide-angle cabin frame
+scans every scale over the whole frame on one core. ``TiledFaceDetector``
+splits the search in two:
+
+- a fine pass over overlapping tiles, run in parallel on worker threads,
+  for faces from the minimum size up to the tile overlap. Any such face
+  lies wholly inside at least one tile;
+- a coarse pass on a downscaled copy of the frame for faces larger than
+  the overlap, which are cheap to find at low resolution.
+
+Faces found twice where tiles overlap, or by both passes, are merged by
+non-maximum suppression.
+
+Run as a script it compares full-frame and tiled detection on synthetic
+1080p frames:
+
+    python src/tiling.py --width 1920 --height 1080 --workers 1 4 8
+"""
+
+import argparse
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    from .capture import BlinkTimeline, SyntheticFaceSource
+    from .results import NO_BOXES, as_boxes, offset_boxes, scale_boxes
+    from .settings import load_config
+except ImportError:
+    from capture import BlinkTimeline, SyntheticFaceSource
+    from results import NO_BOXES, as_boxes, offset_boxes, scale_boxes
+    from settings import load_config
+
+logger = logging.getLogger(__name__)
+
+
+def tile_grid(width: int, height: int, tile_size: int,
+              overlap: int) -> List[Tuple[int, int, int, int]]:
+    """
+    Overlapping tiles covering a frame.
+
+    Along each axis the fewest tiles of at most ``tile_size`` pixels are
+    spread evenly and made just large enough for neighbours to overlap by
+    ``overlap`` pixels, so every box up to that size lies inside one tile
+    and as little of the frame as possible is scanned twice.
+
+    Returns:
+        List of (x, y, w, h) tiles
+    """
+    if overlap >= tile_size:
+        raise ValueError("Tile overlap must be smaller than the tile size")
+
+    def spans(length: int) -> Tuple[List[int], int]:
+        if length <= tile_size:
+            return [0], length
+        count = math.ceil((length - overlap) / (tile_size - overlap))
+        size = math.ceil((length + (count - 1) * overlap) / count)
+        return [round(i * (length - size) / (count - 1)) for i in range(count)], size
+
+    xs, tw = spans(width)
+    ys, th = spans(height)
+    return [(x, y, tw, th) for y in ys for x in xs]
+
+
+def non_max_suppression(boxes: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """
+    Keep the largest of every group of overlapping boxes.
+
+    Cascades give no confidence, so boxes are ranked by area: where a face
+    is found in two tiles, or by both passes, the boxes nearly coincide
+    and the larger one is kept.
+
+    Args:
+        boxes: (N, 4) array of (x, y, w, h)
+        iou_threshold: Boxes overlapping a kept box by more than this
+            intersection over union are dropped
+
+    Returns:
+        The kept boxes, largest first
+    """
+    if len(boxes) < 2:
+        return boxes
+    boxes = as_boxes(boxes)
+    x1, y1 = boxes[:, 0].astype(np.float64), boxes[:, 1].astype(np.float64)
+    x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+    area = (x2 - x1) * (y2 - y1)
+    order = np.argsort(-area, kind="stable")
+    keep = []
+    while len(order):
+        i, rest = order[0], order[1:]
+        keep.append(i)
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / (area[i] + area[rest] - inter)
+        order = rest[iou <= iou_threshold]
+    return boxes[keep]
+
+
+class TiledFaceDetector:
+    """
+    Face detection over parallel overlapping tiles plus a coarse full-frame pass.
+
+    Safe to call from several threads; the tiles of concurrent frames share
+    the worker pool.
+
+    Args:
+        cascade: Returns the face cascade of the calling thread (cascade
+            objects must not be shared between threads)
+        window: Native window size of the face cascade
+        scale_factor: ``detectMultiScale`` scale step
+        min_neighbors: ``detectMultiScale`` grouping threshold
+        min_size: Smallest face to find
+        tile_size: Tile edge in pixels
+        overlap: Overlap of neighbouring tiles; also the largest face the
+            tiles search for
+        coarse_scale: Downscale factor of the coarse pass for larger faces
+            (0 skips it)
+        nms_iou: Overlap above which duplicate boxes are merged
+        workers: Tile worker threads (defaults to the number of CPUs)
+    """
+
+    def __init__(self, cascade: Callable[[], cv2.CascadeClassifier], window: Tuple[int, int],
+                 scale_factor: float = 1.1, min_neighbors: int = 5,
+                 min_size: Tuple[int, int] = (30, 30), tile_size: int = 640, overlap: int = 160,
+                 coarse_scale: float = 0.25, nms_iou: float = 0.3,
+                 workers: Optional[int] = None):
+        if overlap < max(min_size) or overlap >= tile_size:
+            raise ValueError("Tile overlap must hold the minimum face size and be below the tile size")
+        self.cascade = cascade
+        self.window = window
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.coarse_scale = coarse_scale
+        self.nms_iou = nms_iou
+        self.workers = workers or os.cpu_count() or 1
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @classmethod
+    def from_settings(cls, detection, cascade: Callable[[], cv2.CascadeClassifier],
+                      window: Tuple[int, int]) -> "TiledFaceDetector":
+        return cls(cascade, window, detection.face_scale_factor, detection.face_min_neighbors,
+                   detection.face_min_size, detection.tile_size, detection.tile_overlap,
+                   detection.tile_coarse_scale, detection.tile_nms_iou,
+                   detection.tile_workers or None)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix="face-tiles")
+            return self._executor
+
+    def _detect_tile(self, gray: np.ndarray, tile: Tuple[int, int, int, int]) -> np.ndarray:
+        x, y, w, h = tile
+        faces = self.cascade().detectMultiScale(
+            gray[y:y + h, x:x + w],
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=self.min_size,
+            maxSize=(self.overlap, self.overlap)
+        )
+        return offset_boxes(faces, x, y)
+
+    def _detect_coarse(self, gray: np.ndarray) -> np.ndarray:
+        """Faces larger than the tile overlap, on a downscaled frame."""
+        scale = self.coarse_scale
+        height, width = gray.shape[:2]
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        small = getattr(self._local, "coarse", None)
+        if small is None or small.shape != (size[1], size[0]):
+            small = self._local.coarse = np.empty((size[1], size[0]), dtype=np.uint8)
+        cv2.resize(gray, size, dst=small, interpolation=cv2.INTER_AREA)
+
+        min_size = tuple(max(w, int(self.overlap * scale)) for w in self.window)
+        if min_size[0] > size[0] or min_size[1] > size[1]:
+            return NO_BOXES
+        faces = self.cascade().detectMultiScale(
+            small,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=min_size
+        )
+        return scale_boxes(faces, 1.0 / scale)
+
+    def detect(self, gray: np.ndarray) -> np.ndarray:
+        """
+        Detect all faces in a preprocessed grayscale frame.
+
+        The coarse pass runs on the calling thread while the tiles are
+        searched by the workers.
+
+        Returns:
+            Face boxes in frame coordinates, shape (N, 4)
+        """
+        height, width = gray.shape[:2]
+        tiles = tile_grid(width, height, self.tile_size, self.overlap)
+        if len(tiles) == 1 or self.workers == 1:
+            found = [self._detect_tile(gray, tile) for tile in tiles]
+        else:
+            futures = [self._pool().submit(self._detect_tile, gray, tile) for tile in tiles]
+            found = None
+        coarse = self._detect_coarse(gray) if self.coarse_scale > 0 else NO_BOXES
+        if found is None:
+            found = [future.result() for future in futures]
+        found.append(coarse)
+        return non_max_suppression(np.concatenate(found), self.nms_iou)
+
+    def close(self) -> None:
+        """Stop the tile workers."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def cabin_frame(width: int, height: int, faces: Sequence[Tuple[int, int]],
+                face_height: int = 240) -> np.ndarray:
+    """
+    Wide-angle grayscale cabin frame with small synthetic faces.
+
+    Args:
+        width: Frame width
+        height: Frame height
+        faces: Top-left corners of the faces
+        face_height: Height of each synthetic face image (the face itself
+            is about 0.7 of it)
+    """
+    source = SyntheticFaceSource(face_height * 4 // 3, face_height, color=False,
+                                 timeline=BlinkTimeline([]))
+    face = source.render(0)
+    frame = np.full((height, width), 70, np.uint8)
+    fh, fw = face.shape
+    for x, y in faces:
+        frame[y:y + fh, x:x + fw] = face[:height - y, :width - x]
+    return frame
+
+
+def benchmark(detection, models, frames: Sequence[np.ndarray],
+              worker_counts: Sequence[int] = (1, 2, 4), cv_threads: Optional[int] = 1) -> List[Dict]:
+    """
+    Compare full-frame and tiled face detection.
+
+    Args:
+        detection: Detection settings (tile size, overlap, cascade parameters)
+        models: ModelSet providing the face cascade
+        frames: Preprocessed grayscale frames
+        worker_counts: Tile worker counts to measure
+        cv_threads: OpenCV thread count during the run (None leaves it alone)
+
+    Returns:
+        One dict per configuration with faces, fps and speedup
+    """
+    previous_threads = cv2.getNumThreads()
+    if cv_threads is not None:
+        cv2.setNumThreads(cv_threads)
+    rows: List[Dict] = []
+    try:
+        configurations = [("full-frame", 0)] + [("tiled", workers) for workers in worker_counts]
+        for name, workers in configurations:
+            tiler = None
+            if workers:
+                tiler = TiledFaceDetector.from_settings(detection, lambda: models.face_cascade,
+                                                        models.face_window)
+                tiler.workers = workers
+            faces = 0
+            start = time.perf_counter()
+            for gray in frames:
+                if tiler is None:
+                    found = models.face_cascade.detectMultiScale(
+                        gray, scaleFactor=detection.face_scale_factor,
+                        minNeighbors=detection.face_min_neighbors,
+                        minSize=detection.face_min_size)
+                else:
+                    found = tiler.detect(gray)
+                faces += len(found)
+            seconds = time.perf_counter() - start
+            if tiler is not None:
+                tiler.close()
+            fps = len(frames) / seconds
+            rows.append({
+                "detector": name,
+                "workers": workers or 1,
+                "faces": faces,
+                "fps": round(fps, 1),
+                "speedup": round(fps / rows[0]["fps"], 2) if rows else 1.0,
+            })
+    finally:
+        cv2.setNumThreads(previous_threads)
+    return rows
+
+
+def main():
+    """Command line entry point: print full-frame and tiled detection throughput."""
+    # The analyzer builds its tiled detector from this module
+    try:
+        from .analyzer import ModelSet
+    except ImportError:
+        from analyzer import ModelSet
+
+    parser = argparse.ArgumentParser(description="Benchmark tile-parallel face detection")
+    parser.add_argument("--width", type=int, default=1920, help="Frame width")
+    parser.add_argument("--height", type=int, default=1080, help="Frame height")
+    parser.add_argument("--frames", type=int, default=10, help="Frames to process")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4],
+                        help="Tile worker counts to measure")
+    parser.add_argument("--cv-threads", type=int, default=1,
+                        help="OpenCV internal threads during the benchmark")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    settings = load_config()
+    # Driver and passenger seats of a wide-angle cabin view
+    frame = cabin_frame(args.width, args.height,
+                        [(args.width // 5, args.height // 3), (args.width * 3 // 5, args.height // 3)])
+    frames = [frame] * args.frames
+
+    logger.info(f"{args.frames} frames of {args.width}x{args.height}, {os.cpu_count()} CPUs")
+    for row in benchmark(settings.detection, ModelSet.from_settings(settings), frames,
+                         args.workers, args.cv_threads):
+        print(f"{row['detector']:<11} workers={row['workers']:<3} faces={row['faces']:<5} "
+              f"fps={row['fps']:<8} speedup={row['speedup']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
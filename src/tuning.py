@@ -0,0 +1,252 @@
+"""
+OpenCV runtime tuning for the Drowsiness Detection System
+=========================================================
+
+OpenCV parallelises ``detectMultiScale`` over its own worker threads. With
+several detector workers in one process (stream pool, pipelined executor)
+those threads oversubscribe the cores and cost throughput. A
+``TuningProfile`` sets OpenCV's thread count, its optimised (SSE/AVX) code
+paths and OpenCL use, and says whether detector workers are pinned to a
+core each.
+
+``cv2.setNumThreads`` is process-wide, so "per worker" tuning means picking
+the thread count for the number of workers the process runs. With auto
+tuning a short micro-benchmark on synthetic frames measures the candidate
+profiles for the host and worker count at startup and caches the winner
+on disk, keyed by the host (architecture, CPU count, OpenCV version).
+
+OpenCL (UMat) paths stay off unless enabled: on hosts without a GPU they
+only add copies.
+"""
+
+import itertools
+import json
+import logging
+import os
+import platform
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    from .analyzer import FrameAnalyzer, create_driver_selector
+    from .capture import BlinkTimeline, SyntheticFaceSource
+    from .settings import DetectorConfig, TuningSettings
+except ImportError:
+    from analyzer import FrameAnalyzer, create_driver_selector
+    from capture import BlinkTimeline, SyntheticFaceSource
+    from settings import DetectorConfig, TuningSettings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TuningProfile:
+    """OpenCV runtime settings; ``cv_threads`` 0 leaves OpenCV's thread count alone."""
+    cv_threads: int = 0
+    optimized: bool = True
+    opencl: bool = False
+    pin_threads: bool = False
+
+    @classmethod
+    def from_settings(cls, tuning: TuningSettings) -> "TuningProfile":
+        return cls(tuning.cv_threads, tuning.optimized, tuning.opencl, tuning.pin_threads)
+
+    def apply(self) -> None:
+        """Apply the OpenCV settings to the process."""
+        if self.cv_threads > 0:
+            cv2.setNumThreads(self.cv_threads)
+        cv2.setUseOptimized(self.optimized)
+        cv2.ocl.setUseOpenCL(self.opencl and cv2.ocl.haveOpenCL())
+
+    def describe(self) -> str:
+        threads = self.cv_threads or "default"
+        return (f"cv_threads={threads} optimized={self.optimized} "
+                f"opencl={self.opencl} pin_threads={self.pin_threads}")
+
+
+def pin_current_thread(index: int) -> bool:
+    """
+    Pin the calling thread to one of the CPUs the process may use.
+
+    Args:
+        index: Worker number; workers are spread over the CPUs round robin
+
+    Returns:
+        True if the thread was pinned (Linux only)
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return False
+    cpus = sorted(os.sched_getaffinity(0))
+    try:
+        # On Linux pid 0 is the calling thread
+        os.sched_setaffinity(0, {cpus[index % len(cpus)]})
+    except OSError as e:
+        logger.warning(f"Could not pin worker thread: {e}")
+        return False
+    return True
+
+
+def worker_initializer(profile: TuningProfile) -> Optional[Callable[[], None]]:
+    """ThreadPoolExecutor initializer pinning each new worker to the next CPU, if enabled."""
+    if not profile.pin_threads:
+        return None
+    counter = itertools.count()
+    lock = threading.Lock()
+
+    def initialize() -> None:
+        with lock:
+            index = next(counter)
+        pin_current_thread(index)
+
+    return initialize
+
+
+def host_key(workers: int, frame_size: Tuple[int, int]) -> str:
+    """Cache key of a tuning result: host, OpenCV build, worker count and frame size."""
+    return (f"{platform.machine()}-{os.cpu_count()}cpu-opencv{cv2.__version__}"
+            f"-{workers}w-{frame_size[0]}x{frame_size[1]}")
+
+
+def candidate_profiles(workers: int, tuning: TuningSettings) -> List[TuningProfile]:
+    """
+    Profiles worth measuring for a worker count.
+
+    OpenCV threads range from one per worker to all cores; the optimised
+    code paths are always measured against the plain ones, OpenCL only if
+    it is enabled and available.
+    """
+    cores = os.cpu_count() or 1
+    thread_counts = sorted({1, max(1, cores // max(1, workers)), cores})
+    opencl = [False, True] if tuning.opencl and cv2.ocl.haveOpenCL() else [False]
+    return [TuningProfile(threads, optimized, use_cl, tuning.pin_threads)
+            for threads in thread_counts
+            for optimized in (True, False)
+            for use_cl in opencl]
+
+
+def measure(settings: DetectorConfig, frames: Sequence[np.ndarray], workers: int,
+            profile: TuningProfile) -> float:
+    """
+    Frames per second of the full analysis with a profile applied.
+
+    Every worker analyses all frames as its own stream, the way the stream
+    pool runs them.
+    """
+    profile.apply()
+    analyzer = FrameAnalyzer(settings)
+
+    def stream(frame_count: int) -> int:
+        selector = create_driver_selector(settings.faces)
+        for frame in frames[:frame_count]:
+            analyzer.analyze(frame, selector)
+        return frame_count
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers,
+                                initializer=worker_initializer(profile)) as executor:
+            # A warm-up frame per worker loads its cascades
+            list(executor.map(stream, [1] * workers))
+            start = time.perf_counter()
+            processed = sum(executor.map(stream, [len(frames)] * workers))
+    finally:
+        # Tiled detection keeps a worker pool of its own
+        analyzer.close()
+    return processed / (time.perf_counter() - start)
+
+
+def synthetic_frames(settings: DetectorConfig, count: int) -> List[np.ndarray]:
+    """Luma frames of a swaying synthetic face at the camera resolution."""
+    camera = settings.camera
+    source = SyntheticFaceSource(camera.width, camera.height, camera.fps,
+                                 timeline=BlinkTimeline([(0.1, 0.2)]),
+                                 sway=0.02, noise=2.0, color=False)
+    return [source.render(i) for i in range(count)]
+
+
+def tune(settings: DetectorConfig, workers: int = 1,
+         frames: Optional[Sequence[np.ndarray]] = None) -> Tuple[TuningProfile, List[Dict]]:
+    """
+    Measure every candidate profile and pick the fastest.
+
+    Args:
+        settings: Detector configuration to measure with
+        workers: Detector worker threads the profile is for
+        frames: Luma frames to analyse; synthetic ones at the camera
+            resolution by default
+
+    Returns:
+        Tuple of (best profile, one dict per candidate with its fps)
+    """
+    frames = frames if frames is not None else synthetic_frames(
+        settings, settings.tuning.benchmark_frames)
+    previous = (cv2.getNumThreads(), cv2.useOptimized(), cv2.ocl.useOpenCL())
+    rows: List[Dict] = []
+    try:
+        for profile in candidate_profiles(workers, settings.tuning):
+            fps = measure(settings, frames, workers, profile)
+            rows.append({**asdict(profile), "fps": round(fps, 2)})
+    finally:
+        cv2.setNumThreads(previous[0])
+        cv2.setUseOptimized(previous[1])
+        cv2.ocl.setUseOpenCL(previous[2])
+    best = max(rows, key=lambda row: row["fps"])
+    profile = TuningProfile(**{k: v for k, v in best.items() if k != "fps"})
+    return profile, rows
+
+
+def _read_cache(path: str) -> Dict[str, Dict]:
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable tuning cache {path}: {e}")
+        return {}
+
+
+def load_or_tune(settings: DetectorConfig, workers: int = 1) -> TuningProfile:
+    """
+    Tuning profile for this host and worker count.
+
+    With ``tuning.auto`` off the profile comes straight from the settings.
+    Otherwise a cached result for the host is used, or the micro-benchmark
+    runs once and its result is written to ``tuning.cache_file``.
+    """
+    tuning = settings.tuning
+    if not tuning.auto:
+        return TuningProfile.from_settings(tuning)
+
+    camera = settings.camera
+    key = host_key(workers, (camera.width, camera.height))
+    cache = _read_cache(tuning.cache_file) if tuning.cache_file else {}
+    if key in cache:
+        try:
+            return TuningProfile(**cache[key])
+        except TypeError:
+            logger.warning(f"Ignoring stale tuning cache entry {key}")
+
+    start = time.perf_counter()
+    profile, rows = tune(settings, workers)
+    logger.info(f"Tuned OpenCV for {key} in {time.perf_counter() - start:.1f}s: {profile.describe()}")
+    for row in rows:
+        logger.debug(f"Tuning candidate {row}")
+
+    if tuning.cache_file:
+        cache[key] = asdict(profile)
+        try:
+            directory = os.path.dirname(tuning.cache_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tuning.cache_file, "w") as f:
+                json.dump(cache, f, indent=2, sort_keys=True)
+        except OSError as e:
+            logger.warning(f"Could not write tuning cache {tuning.cache_file}: {e}")
+    return profile
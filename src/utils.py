@@ -7,6 +7,7 @@ This module contains helper functions used throughout the system.
 
 import cv2
 import numpy as np
+import itertools
 import os
 import time
 from typing import Tuple, Optional, List
@@ -14,6 +15,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Process-wide sequence number that keeps generated filenames unique
+_filename_counter = itertools.count()
+
 
 def create_directories(paths: List[str]) -> None:
     """
@@ -59,17 +63,93 @@ def apply_preprocessing(frame: np.ndarray,
     Returns:
         Preprocessed frame
     """
-    processed_frame = frame.copy()
+    processed_frame = frame
     
+    # The filters return new arrays, so the input is only copied when no
+    # filter runs
     if enable_median_blur:
         processed_frame = cv2.medianBlur(processed_frame, median_kernel_size)
     
     if enable_gaussian_blur:
         processed_frame = cv2.GaussianBlur(processed_frame, gaussian_kernel_size, 0)
     
+    if processed_frame is frame:
+        processed_frame = frame.copy()
+    
     return processed_frame
 
 
+def is_bgr(frame: np.ndarray) -> bool:
+    """Return True if the frame is a 3-channel (BGR) image."""
+    return frame.ndim == 3 and frame.shape[2] == 3
+
+
+def packed_yuyv(frame: np.ndarray, width: Optional[int] = None,
+                height: Optional[int] = None) -> Optional[np.ndarray]:
+    """
+    View a raw frame as packed YUYV (H x W x 2), if that is its layout.
+    
+    Args:
+        frame: Frame as returned by cv2.VideoCapture.read
+        width: Expected frame width, needed for flat buffers
+        height: Expected frame height, needed for flat buffers
+        
+    Returns:
+        The H x W x 2 view, or None for any other layout
+    """
+    if frame.ndim == 3 and frame.shape[2] == 2:
+        return frame
+    if (frame.ndim == 2 and frame.shape[0] == 1 and width is not None and height is not None
+            and frame.size == width * height * 2):
+        return frame.reshape(height, width, 2)
+    return None
+
+
+def extract_luma(frame: np.ndarray, width: Optional[int] = None,
+                 height: Optional[int] = None) -> np.ndarray:
+    """
+    Get the luma (grayscale) plane of a captured frame, without conversion
+    where the capture already provides it.
+    
+    Supported layouts: grayscale, single channel, packed YUYV (H x W x 2 or a
+    flat buffer when width/height are given), planar YUV 4:2:0
+    (H * 3/2 x W, with height given), encoded MJPEG buffers and BGR.
+    
+    Args:
+        frame: Frame as returned by cv2.VideoCapture.read
+        width: Expected frame width, needed for flat/planar buffers
+        height: Expected frame height, needed for flat/planar buffers
+        
+    Returns:
+        Grayscale image; a view into the input when possible
+        
+    Raises:
+        ValueError: If the layout is not recognised
+    """
+    if frame.ndim == 3 and frame.shape[2] == 3:
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if frame.ndim == 3 and frame.shape[2] == 1:
+        return frame[:, :, 0]
+    if frame.ndim == 3 and frame.shape[2] == 2:
+        # Packed YUYV: Y is every other byte
+        return frame[:, :, 0]
+    if frame.ndim == 2 and height is not None and frame.shape == (height * 3 // 2, width):
+        # Planar YUV 4:2:0 (I420/NV12): the Y plane comes first
+        return frame[:height]
+    if frame.ndim == 2 and frame.shape[0] > 1:
+        return frame
+    
+    flat = frame.reshape(-1)
+    if width is not None and height is not None and flat.size == width * height * 2:
+        return flat.reshape(height, width, 2)[:, :, 0]
+    
+    # Some backends hand back the compressed buffer when conversion is off
+    decoded = cv2.imdecode(flat, cv2.IMREAD_GRAYSCALE)
+    if decoded is None:
+        raise ValueError(f"Unrecognised frame layout: shape {frame.shape}")
+    return decoded
+
+
 def calculate_fps(frame_count: int, start_time: float) -> Tuple[int, float]:
     """
     Calculate current FPS.
@@ -119,6 +199,23 @@ def draw_text_with_background(img: np.ndarray, text: str, position: Tuple[int, i
     cv2.putText(img, text, position, font, font_scale, color, thickness)
 
 
+def unique_filename(prefix: str, extension: str) -> str:
+    """
+    Build a timestamped filename that is unique within the process.
+    
+    Args:
+        prefix: Filename prefix
+        extension: File extension without the dot
+        
+    Returns:
+        Filename such as ``prefix_20250101_120000_123_0007.jpg``
+    """
+    now = time.time()
+    timestamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(now))
+    millis = int((now % 1) * 1000)
+    return f"{prefix}_{timestamp}_{millis:03d}_{next(_filename_counter):04d}.{extension}"
+
+
 def save_screenshot(frame: np.ndarray, directory: str, prefix: str = "screenshot") -> str:
     """
     Save a screenshot with timestamp.
@@ -131,9 +228,7 @@ def save_screenshot(frame: np.ndarray, directory: str, prefix: str = "screenshot
     Returns:
         Path to saved file
     """
-    timestamp = time.strftime("%Y%m%d_%H%M%S")
-    filename = f"{prefix}_{timestamp}.jpg"
-    filepath = os.path.join(directory, filename)
+    filepath = os.path.join(directory, unique_filename(prefix, "jpg"))
     
     try:
         cv2.imwrite(filepath, frame)
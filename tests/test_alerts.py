@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the alert dispatcher
+==============================
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import json
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from alerts import (AlertDispatcher, CallbackSink, FileSink,
+                    ALERT_WARNING, ALERT_CRITICAL)
+
+
+class TestAlertDispatcher(unittest.TestCase):
+    """Test cases for AlertDispatcher."""
+    
+    def setUp(self):
+        self.received = []
+        self.dispatcher = AlertDispatcher(sinks=[CallbackSink(self.received.append)],
+                                          min_interval=2.0, critical_after=8.0)
+        self.dispatcher.start()
+    
+    def tearDown(self):
+        self.dispatcher.stop()
+    
+    def test_rate_limiting(self):
+        """Alerts of the same level are deduplicated within the interval."""
+        # 30 FPS for one second of closure past the threshold
+        queued = [self.dispatcher.submit("cam0", 4.0 + i / 30, 100.0 + i / 30)
+                  for i in range(30)]
+        self.dispatcher.stop()
+        
+        self.assertEqual(sum(queued), 1)
+        self.assertEqual(len(self.received), 1)
+        self.assertEqual(self.dispatcher.suppressed, 29)
+    
+    def test_escalation_and_reset(self):
+        """Escalation bypasses the rate limit and reset re-arms the stream."""
+        self.assertTrue(self.dispatcher.submit("cam0", 4.5, 100.0))
+        self.assertTrue(self.dispatcher.submit("cam0", 8.5, 100.5))
+        self.assertFalse(self.dispatcher.submit("cam0", 8.6, 100.6))
+        self.assertTrue(self.dispatcher.submit("cam1", 4.5, 100.6))
+        
+        self.dispatcher.reset("cam0")
+        self.assertTrue(self.dispatcher.submit("cam0", 4.1, 101.0))
+        self.dispatcher.stop()
+        
+        levels = [(a.stream_id, a.level) for a in self.received]
+        self.assertEqual(levels, [("cam0", ALERT_WARNING), ("cam0", ALERT_CRITICAL),
+                                  ("cam1", ALERT_WARNING), ("cam0", ALERT_WARNING)])
+    
+    def test_dropped_alert_does_not_rate_limit(self):
+        """An alert lost to a full queue does not suppress the next one."""
+        dispatcher = AlertDispatcher(sinks=[], min_interval=2.0, max_queue=1)
+        self.assertTrue(dispatcher.submit("cam0", 4.0, 100.0))
+        self.assertFalse(dispatcher.submit("cam1", 4.0, 100.0))
+        self.assertEqual(dispatcher.dropped, 1)
+        
+        # Worker not started: drain the queue by hand
+        dispatcher._queue.get_nowait()
+        self.assertTrue(dispatcher.submit("cam1", 4.1, 100.1))
+        self.assertEqual(dispatcher.suppressed, 0)
+    
+    def test_failing_sink_does_not_stop_delivery(self):
+        """A raising sink is logged and the other sinks still get the alert."""
+        def broken(alert):
+            raise IOError("disk full")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "alerts.jsonl")
+            dispatcher = AlertDispatcher(sinks=[CallbackSink(broken), FileSink(path)])
+            dispatcher.start()
+            dispatcher.submit("cam0", 5.0, 100.0)
+            dispatcher.stop()
+            
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+        
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["level"], ALERT_WARNING)
+        self.assertEqual(dispatcher.dispatched, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for the frame analyzer and stream state
+=============================================
+"""
+
+import unittest
+import sys
+import os
+import threading
+import numpy as np
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from alerts import AlertDispatcher
+from analyzer import FrameAnalysis, FrameAnalyzer, ModelSet, StreamState
+from capture import BlinkTimeline, SyntheticFaceSource
+from face_selection import DriverSelector
+from results import NO_BOXES
+from settings import DetectorConfig
+from utils import extract_luma
+
+
+class TestFrameAnalyzer(unittest.TestCase):
+    """Test cases for FrameAnalyzer."""
+
+    @classmethod
+    def setUpClass(cls):
+        source = SyntheticFaceSource(320, 240, timeline=BlinkTimeline([(0.0, 10.0)]), noise=0)
+        cls.open_frame = extract_luma(SyntheticFaceSource(320, 240, noise=0).render(0))
+        cls.closed_frame = extract_luma(source.render(15))
+        cls.analyzer = FrameAnalyzer(DetectorConfig())
+
+    def test_analyze(self):
+        analysis = self.analyzer.analyze(self.open_frame, DriverSelector())
+        self.assertEqual(len(analysis.faces), 1)
+        self.assertTrue(analysis.tracked)
+        self.assertFalse(analysis.closed)
+        self.assertEqual(analysis.eyes_open, 2)
+
+        empty = self.analyzer.analyze(np.zeros_like(self.open_frame), DriverSelector())
+        self.assertIsNone(empty.driver_face)
+        self.assertFalse(empty.tracked)
+
+    def test_concurrent_calls_match_sequential(self):
+        """Threads sharing one analyzer get the same results as one thread."""
+        frames = [self.open_frame, self.closed_frame] * 3
+        expected = [self.analyzer.analyze(frame, DriverSelector()) for frame in frames]
+        results = [None] * len(frames)
+
+        def work(index):
+            results[index] = self.analyzer.analyze(frames[index], DriverSelector())
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(len(frames))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for got, want in zip(results, expected):
+            np.testing.assert_array_equal(got.faces, want.faces)
+            np.testing.assert_array_equal(got.eyes, want.eyes)
+            self.assertEqual(got.eyes_open, want.eyes_open)
+
+    def test_shared_models(self):
+        """A reconfigured analyzer reuses the model set; each thread gets its own cascades."""
+        analyzer = FrameAnalyzer(DetectorConfig().updated({"detection": {"mode": "pyramid"}}),
+                                 self.analyzer.models)
+        self.assertIs(analyzer.models, self.analyzer.models)
+        self.assertEqual(len(analyzer.analyze(self.open_frame, DriverSelector()).faces), 1)
+
+        cascades = []
+        thread = threading.Thread(target=lambda: cascades.append(analyzer.models.face_cascade))
+        thread.start()
+        thread.join()
+        self.assertIsNot(cascades[0], analyzer.models.face_cascade)
+        with self.assertRaises(FileNotFoundError):
+            ModelSet("missing.xml", "missing.xml")
+
+
+class TestStreamState(unittest.TestCase):
+    """Test cases for StreamState."""
+
+    def setUp(self):
+        self.dispatcher = AlertDispatcher(sinks=[], min_interval=2.0, critical_after=3.0)
+        self.face = (10, 10, 100, 100)
+        self.eyes = np.array([[20, 20, 10, 10], [60, 20, 10, 10]], dtype=np.int32)
+
+    def frame(self, eyes_open):
+        if eyes_open is None:
+            return FrameAnalysis(NO_BOXES, None, NO_BOXES, None)
+        return FrameAnalysis(np.array([self.face]), self.face, self.eyes, eyes_open)
+
+    def run_state(self, sequence, **kwargs):
+        state = StreamState("cab", DriverSelector(), 1.0, self.dispatcher, **kwargs)
+        levels = []
+        for i, eyes_open in enumerate(sequence):
+            result = state.update(self.frame(eyes_open), i * 0.5)
+            while not self.dispatcher._queue.empty():
+                levels.append((i * 0.5, self.dispatcher._queue.get_nowait().level))
+        return state, result, levels
+
+    def test_blinks_and_alerts(self):
+        state, result, levels = self.run_state([2, 0, None, 1, 2, 0, 0, 0, 0, 2])
+        self.assertEqual(state.blink_count, 2)
+        self.assertEqual(state.alert_count, 1)
+        self.assertEqual(levels, [(4.0, "WARNING")])
+        self.assertEqual(state.frame_index, 10)
+        self.assertFalse(result.closed)
+        self.assertTrue(result.monitored)
+
+    def test_alerts_follow_dispatcher(self):
+        """Alerts only on observed frames, rate limited and escalated by the dispatcher."""
+        state, result, levels = self.run_state([2, 0, None, None, None, 0, 0, 0, 0, 0, 0, 0])
+        self.assertEqual(levels, [(2.5, "WARNING"), (3.5, "CRITICAL"), (5.5, "CRITICAL")])
+        self.assertEqual(state.alert_count, 3)
+        self.assertEqual(self.dispatcher.suppressed, 4)
+        self.assertTrue(result.closed)
+
+        # Without a dispatcher closures are tracked but never alerted
+        state = StreamState("cab", DriverSelector(), 1.0)
+        for i, eyes_open in enumerate([0, 0, 0, 0]):
+            state.update(self.frame(eyes_open), i)
+        self.assertEqual((state.blink_count, state.alert_count), (1, 0))
+
+    def test_flow_events_hold_state(self):
+        """A lid movement outranks contradicting static verdicts for hold_frames frames."""
+        state = StreamState("cab", DriverSelector(), 1.0, self.dispatcher, hold_frames=2)
+        state.update(self.frame(2), 0.0)
+        self.assertTrue(state.apply_flow_event(True, 0.1))
+        state.update(self.frame(2), 0.1)
+        state.update(self.frame(2), 0.2)
+        self.assertTrue(state.eyes_closed)
+        state.update(self.frame(2), 0.3)
+        self.assertFalse(state.eyes_closed)
+        self.assertEqual(state.blink_count, 1)
+
+        # Lid motion keeps the state monitored while the cascade loses the eyes
+        state.flow_tracking = True
+        state.apply_flow_event(True, 1.0)
+        state.update(self.frame(None), 2.5)
+        self.assertEqual(state.alert_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
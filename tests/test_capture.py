@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Tests for the capture sources
+=============================
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import cv2
+import numpy as np
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from capture import (BlinkTimeline, FrameListSource, ImageDirectorySource,
+                     SyntheticFaceSource, VideoFileSource)
+from drowsiness_detector import DrowsinessDetector
+from settings import DetectorConfig
+
+MODELS = os.path.join(os.path.dirname(__file__), '..', 'models')
+
+
+class TestCaptureSources(unittest.TestCase):
+    """Test cases for the recorded capture sources."""
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.frames = [rng.randint(0, 256, (48, 64, 3)).astype(np.uint8) for _ in range(3)]
+
+    def test_frame_list_source(self):
+        """Frames are replayed in order, as copies, and looped."""
+        source = FrameListSource(self.frames, fps=10)
+        reads = [source.read()[1] for _ in range(4)]
+        self.assertTrue((reads[3] == self.frames[0]).all())
+        self.assertIsNot(reads[0], self.frames[0])
+        self.assertEqual(source.get(cv2.CAP_PROP_FRAME_WIDTH), 64)
+        self.assertEqual(source.get(cv2.CAP_PROP_FPS), 10)
+
+        once = FrameListSource(self.frames, loop=False)
+        for _ in range(3):
+            self.assertTrue(once.read()[0])
+        self.assertFalse(once.read()[0])
+
+    def test_image_directory_source(self):
+        """Images in a directory are loaded in name order and resized."""
+        with tempfile.TemporaryDirectory() as tmp:
+            for i, frame in enumerate(self.frames):
+                cv2.imwrite(os.path.join(tmp, f"frame_{i}.png"), frame)
+            source = ImageDirectorySource(tmp, size=(32, 24), loop=False)
+            self.assertEqual(len(source.frames), 3)
+            self.assertEqual(source.read()[1].shape, (24, 32, 3))
+
+            with self.assertRaises(FileNotFoundError):
+                ImageDirectorySource(os.path.join(tmp, "missing"))
+
+    def test_video_file_source(self):
+        """A written video is decoded back and can be looped."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "clip.avi")
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (64, 48))
+            for frame in self.frames:
+                writer.write(frame)
+            writer.release()
+
+            source = VideoFileSource(path, loop=True)
+            reads = [source.read()[0] for _ in range(5)]
+            source.release()
+        self.assertEqual(reads, [True] * 5)
+
+
+class TestSyntheticFace(unittest.TestCase):
+    """Test cases for the synthetic face source."""
+
+    def test_blink_timeline(self):
+        """Closure ramps in and out around each scripted blink."""
+        timeline = BlinkTimeline([(1.0, 0.2)], ramp=0.1)
+        self.assertEqual(timeline.closure_at(0.5), 0.0)
+        self.assertAlmostEqual(timeline.closure_at(0.95), 0.5)
+        self.assertEqual(timeline.closure_at(1.1), 1.0)
+        self.assertAlmostEqual(timeline.closure_at(1.25), 0.5)
+        self.assertFalse(timeline.is_closed(1.4))
+
+        periodic = BlinkTimeline.periodic(2.0, total=10.0).add(5.0, 3.0)
+        self.assertEqual(len(periodic.events), 5)
+        self.assertTrue(periodic.is_closed(7.5))
+
+    def test_blink_timeline_lookup(self):
+        """The indexed lookup matches a scan of every event, long closures included."""
+        timeline = BlinkTimeline.periodic(0.7, total=600.0, jitter=0.2, ramp=0.1)
+        timeline.add(100.0, 30.0).add(100.2, 0.5).add(400.0, 0.0)
+
+        def scan(t):
+            closure = 0.0
+            for start, duration in timeline.events:
+                end = start + duration
+                if start <= t <= end:
+                    return 1.0
+                if start - 0.1 <= t < start:
+                    closure = max(closure, 1.0 - (start - t) / 0.1)
+                elif end < t < end + 0.1:
+                    closure = max(closure, 1.0 - (t - end) / 0.1)
+            return closure
+
+        for t in np.linspace(-1.0, 601.0, 5000):
+            self.assertAlmostEqual(timeline.closure_at(t), scan(t), msg=t)
+
+    def test_stream(self):
+        """Frames follow the requested geometry, duration and determinism."""
+        source = SyntheticFaceSource(160, 120, fps=10, duration=1.0, noise=2.0)
+        frames = []
+        while True:
+            ret, frame = source.read()
+            if not ret:
+                break
+            frames.append(frame)
+        self.assertEqual(len(frames), 10)
+        self.assertEqual(frames[0].shape, (120, 160, 3))
+        again = SyntheticFaceSource(160, 120, fps=10, noise=2.0).read()[1]
+        self.assertTrue((again == frames[0]).all())
+
+    def test_cascades_see_synthetic_face(self):
+        """The Haar cascades find the face, and the eyes only while open."""
+        face_cascade = cv2.CascadeClassifier(os.path.join(MODELS, 'haarcascade_frontalface_default.xml'))
+        eye_cascade = cv2.CascadeClassifier(os.path.join(MODELS, 'haarcascade_eye.xml'))
+        source = SyntheticFaceSource(320, 240, fps=10, color=False,
+                                     timeline=BlinkTimeline([(1.0, 0.5)]))
+
+        for index in (0, 12):
+            gray = source.render(index)
+            faces = face_cascade.detectMultiScale(gray, 1.1, 5, minSize=(30, 30))
+            self.assertEqual(len(faces), 1)
+            x, y, w, h = faces[0]
+            eyes = eye_cascade.detectMultiScale(gray[y:y + h // 2, x:x + w], 1.1, 5,
+                                                minSize=(20, 20))
+            self.assertEqual(len(eyes), 0 if source.eyes_closed_at_frame(index) else 2)
+
+    def test_detector_runs_on_synthetic_source(self):
+        """The detector needs no camera when given a capture source."""
+        settings = DetectorConfig().headless()
+        source = SyntheticFaceSource(320, 240, fps=10)
+        detector = DrowsinessDetector(settings=settings, capture=source)
+        try:
+            ret, frame = detector.cap.read()
+            _, faces, eyes = detector.process_frame(frame)
+        finally:
+            detector.cleanup()
+        self.assertEqual(len(faces), 1)
+        self.assertEqual(len(eyes), 2)
+        self.assertIsNotNone(detector.driver_face)
+
+    def test_eyes_tracked_at_default_resolution(self):
+        """The synthetic face stays usable at the configured camera size and preprocessing."""
+        settings = DetectorConfig().headless()
+        camera = settings.camera
+        self.assertTrue(settings.preprocessing.enable_median_blur)
+        for width, height in ((camera.width, camera.height), (1280, 720)):
+            # No blink in the first 4s of the default timeline
+            source = SyntheticFaceSource(width, height, fps=10, sway=0.02, noise=2.0)
+            detector = DrowsinessDetector(settings=settings, capture=source)
+            tracked = []
+            try:
+                for _ in range(10):
+                    ret, frame = detector.cap.read()
+                    detector.process_frame(frame)
+                    tracked.append(detector.eyes_tracked)
+            finally:
+                detector.cleanup()
+            self.assertEqual(frame.shape, (height, width, 3))
+            self.assertTrue(all(tracked), (width, height))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -115,6 +115,64 @@ class TestUtils(unittest.TestCase):
         self.assertTrue(0 <= norm_coords[0] <= 1)
         self.assertTrue(0 <= norm_coords[1] <= 1)
 
+    
+    def test_extract_luma(self):
+        """Luma extraction takes the Y plane directly where possible."""
+        from utils import extract_luma
+        
+        y = np.random.randint(0, 255, (48, 64), dtype=np.uint8)
+        
+        # Packed YUYV, as delivered with CAP_PROP_CONVERT_RGB disabled
+        yuyv = np.dstack([y, np.full_like(y, 128)])
+        self.assertTrue(np.array_equal(extract_luma(yuyv), y))
+        self.assertTrue(np.array_equal(extract_luma(yuyv.reshape(1, -1), 64, 48), y))
+        
+        # Planar YUV 4:2:0
+        i420 = np.vstack([y, np.full((24, 64), 128, dtype=np.uint8)])
+        self.assertTrue(np.array_equal(extract_luma(i420, 64, 48), y))
+        
+        # Grayscale passes through, BGR is converted
+        self.assertIs(extract_luma(y), y)
+        bgr = cv2.cvtColor(y, cv2.COLOR_GRAY2BGR)
+        self.assertTrue(np.array_equal(extract_luma(bgr), y))
+        
+        with self.assertRaises(ValueError):
+            extract_luma(np.zeros((1, 10), dtype=np.uint8))
+    
+    def test_packed_yuyv(self):
+        """Packed YUYV is recognised in both raw layouts, nothing else is."""
+        from utils import packed_yuyv
+        
+        yuyv = np.zeros((48, 64, 2), dtype=np.uint8)
+        self.assertIs(packed_yuyv(yuyv), yuyv)
+        self.assertEqual(packed_yuyv(yuyv.reshape(1, -1), 64, 48).shape, (48, 64, 2))
+        self.assertIsNone(packed_yuyv(yuyv.reshape(1, -1)))
+        self.assertIsNone(packed_yuyv(np.zeros((72, 64), dtype=np.uint8), 64, 48))
+    
+    def test_render_canvas_keeps_colour(self):
+        """Raw YUYV captures are drawn on in colour; luma-only captures in grey."""
+        from capture import FrameListSource
+        from settings import DetectorConfig
+        
+        bgr = np.zeros((240, 320, 3), dtype=np.uint8)
+        bgr[:] = (200, 60, 30)
+        yuyv = cv2.cvtColor(bgr, cv2.COLOR_BGR2YUV_YUYV)
+        settings = DetectorConfig().headless().updated({"camera": {"width": 320, "height": 240}})
+        detector = DrowsinessDetector(settings=settings, capture=FrameListSource([bgr]))
+        try:
+            detector.process_frame(yuyv)
+            canvas = detector._render_canvas(yuyv)
+            self.assertEqual(canvas.shape, bgr.shape)
+            self.assertTrue(np.all(np.abs(canvas.astype(int) - bgr) <= 3))
+            canvas = detector._render_canvas(yuyv.reshape(1, -1))
+            self.assertTrue(np.all(np.abs(canvas.astype(int) - bgr) <= 3))
+            
+            detector.process_frame(yuyv[:, :, 0].copy())
+            canvas = detector._render_canvas(yuyv[:, :, 0].copy())
+            self.assertTrue(np.array_equal(canvas[:, :, 0], canvas[:, :, 2]))
+        finally:
+            detector.cleanup()
+
 
 def run_tests():
     """Run all tests."""
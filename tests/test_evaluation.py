@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Tests for the blink accuracy evaluation engine
+==============================================
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import cv2
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from capture import BlinkTimeline, SyntheticFaceSource
+from evaluation import (IMAGES_EYES, LABEL_CLOSED, LABEL_OPEN, check_budget,
+                        closure_events, confusion_scores, evaluate, event_scores,
+                        load_labelled_images, synthetic_sequence)
+from eye_state import EYE_METHODS
+from settings import DetectorConfig
+
+
+class TestScoring(unittest.TestCase):
+    """Test cases for the scoring helpers."""
+
+    def test_confusion_scores(self):
+        """Closed is the positive class."""
+        scores = confusion_scores([True, True, False, False], [True, False, True, False])
+        self.assertEqual((scores["tp"], scores["fp"], scores["fn"], scores["tn"]), (1, 1, 1, 1))
+        self.assertEqual(scores["precision"], 0.5)
+        self.assertEqual(scores["f1"], 0.5)
+        self.assertEqual(confusion_scores([False], [False])["f1"], 0.0)
+
+    def test_blink_events(self):
+        """Blink onsets match within the tolerance, each at most once."""
+        truth = [False, True, True, False, False, False, True, False]
+        self.assertEqual(closure_events(truth), [1, 6])
+        scores = event_scores(truth, [False, False, True, False, True, False, False, False], 1)
+        self.assertEqual(scores["blinks_detected"], 2)
+        self.assertEqual(scores["blink_recall"], 0.5)
+        self.assertEqual(scores["blink_precision"], 0.5)
+
+    def test_check_budget(self):
+        """F1 losses beyond the budget are reported per method."""
+        def report(f1):
+            methods = {m: {"f1": f1} for m in EYE_METHODS}
+            return {"images": {"methods": methods, "detect_latency": {"mean_ms": 10.0}}}
+        self.assertEqual(check_budget(report(0.79), report(0.8), max_f1_drop=0.02), [])
+        violations = check_budget(report(0.7), report(0.8), max_f1_drop=0.02)
+        self.assertEqual(len(violations), len(EYE_METHODS))
+        self.assertEqual(check_budget({}, report(0.8)), ["images: missing from the report"])
+
+
+class TestEvaluation(unittest.TestCase):
+    """Test cases for the evaluation runs."""
+
+    def test_load_labelled_images(self):
+        """Labels come from folder names, file names or labels.csv."""
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "open"))
+            image = SyntheticFaceSource(40, 30).render(0)
+            for name in ("open/a.png", "closed eye.png", "tired.png"):
+                cv2.imwrite(os.path.join(tmp, name), image)
+            items, skipped = load_labelled_images(tmp)
+            self.assertEqual(sorted(label for _, label in items), [LABEL_CLOSED, LABEL_OPEN])
+            self.assertEqual([os.path.basename(p) for p in skipped], ["tired.png"])
+
+            with open(os.path.join(tmp, "labels.csv"), "w") as f:
+                f.write("tired.png,closed\nopen/a.png,open\nbad.png,maybe\n")
+            items, skipped = load_labelled_images(tmp)
+            self.assertEqual(len(items), 2)
+            self.assertEqual(skipped, [])
+
+    def test_evaluate_eye_crops_and_sequence(self):
+        """Crops and a synthetic sequence are scored for every method."""
+        source = SyntheticFaceSource(320, 240, color=False,
+                                     timeline=BlinkTimeline([(0.0, 1.0)]))
+        settings = DetectorConfig().updated({"camera": {"width": 320, "height": 240}})
+        with tempfile.TemporaryDirectory() as tmp:
+            items = []
+            for index, label in ((0, LABEL_CLOSED), (60, LABEL_OPEN)):
+                # Right eye region of the synthetic face
+                crop = source.render(index)[90:115, 166:211]
+                path = os.path.join(tmp, f"{label}.png")
+                cv2.imwrite(path, crop)
+                items.append((path, label))
+
+            report = evaluate(items, [synthetic_sequence(duration=2.0, fps=5)],
+                              settings=settings, image_mode=IMAGES_EYES)
+
+        images = report["images"]
+        self.assertEqual((images["count"], images["closed"], images["undetected"]), (2, 1, 0))
+        self.assertEqual(set(images["methods"]), set(EYE_METHODS))
+        self.assertGreater(images["methods"]["combined"]["latency"]["mean_ms"], 0)
+
+        sequences = report["sequences"]
+        self.assertEqual(sequences["frames"], 10)
+        self.assertIn("blink_f1", sequences["methods"]["threshold"])
+
+    def test_default_eye_thresholds(self):
+        """The default ratio minimums are the old pixel minimums at a 40 px eye."""
+        eye = DetectorConfig().eye
+        self.assertEqual(eye.dark_ratio_min, 100 / 40 ** 2)
+        self.assertAlmostEqual(eye.edge_ratio_min, 30 * 32 / 40 / 32 ** 2, places=3)
+
+        # and they read the synthetic driver's open eyes as open
+        settings = DetectorConfig().updated({"camera": {"width": 320, "height": 240}})
+        report = evaluate(sequences=[synthetic_sequence(duration=6.0, fps=5)],
+                          settings=settings, missing_eyes=LABEL_CLOSED)
+        for method in EYE_METHODS:
+            scores = report["sequences"]["methods"][method]
+            self.assertEqual(scores["fp"], 0, method)
+            self.assertEqual(scores["f1"], 1.0, method)
+
+    def test_worker_side_effects_are_off(self):
+        """Evaluation writes no session report or tuning cache and serves no metrics."""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_file = os.path.join(tmp, "cv_tuning.json")
+            settings = DetectorConfig().updated({
+                "camera": {"width": 320, "height": 240},
+                "metrics": {"enabled": True, "address": "127.0.0.1:0"},
+                "session": {"enabled": True, "directory": tmp},
+                "tuning": {"auto": True, "cache_file": cache_file},
+            })
+            evaluate(sequences=[synthetic_sequence(duration=0.4, fps=5)], settings=settings)
+            self.assertEqual(os.listdir(tmp), [])
+
+    def test_parallel_matches_serial(self):
+        """Worker processes give the same scores as the in-process run."""
+        sequences = [synthetic_sequence(f"s{i}", duration=1.0, fps=5, seed=i) for i in range(2)]
+        settings = DetectorConfig().updated({"camera": {"width": 320, "height": 240}})
+        serial = evaluate(sequences=sequences, settings=settings, workers=1)
+        parallel = evaluate(sequences=sequences, settings=settings, workers=2)
+        for method in EYE_METHODS:
+            for key in ("tp", "fp", "fn", "tn", "blinks_detected"):
+                self.assertEqual(serial["sequences"]["methods"][method][key],
+                                 parallel["sequences"]["methods"][method][key])
+
+
+if __name__ == '__main__':
+    unittest.main()
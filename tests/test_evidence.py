@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for evidence capture
+==========================
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+import numpy as np
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from evidence import EvidenceRecorder, EvidenceWriter, FrameRingBuffer
+from utils import unique_filename
+
+
+class TestFrameRingBuffer(unittest.TestCase):
+    """Test cases for FrameRingBuffer."""
+    
+    def test_keeps_latest_frames_in_order(self):
+        """Oldest frames are overwritten and returned oldest first."""
+        ring = FrameRingBuffer(3)
+        for i in range(5):
+            ring.push(np.full((4, 4), i, dtype=np.uint8), float(i))
+        
+        frames, timestamps = ring.latest()
+        self.assertEqual(len(ring), 3)
+        self.assertEqual(timestamps, [2.0, 3.0, 4.0])
+        self.assertEqual([int(f[0, 0]) for f in frames], [2, 3, 4])
+        
+        # Returned frames are copies
+        frames[0][:] = 99
+        self.assertEqual(int(ring.latest(3)[0][0][0, 0]), 2)
+
+
+class TestEvidenceWriter(unittest.TestCase):
+    """Test cases for EvidenceWriter and EvidenceRecorder."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_unique_names(self):
+        """Shots taken within the same second get distinct files."""
+        names = {unique_filename("screenshot", "jpg") for _ in range(100)}
+        self.assertEqual(len(names), 100)
+        
+        writer = EvidenceWriter(self.tmp.name)
+        paths = [writer.submit_image(self.frame.copy()) for _ in range(5)]
+        writer.stop()
+        
+        self.assertEqual(len(set(paths)), 5)
+        self.assertEqual(writer.written, 5)
+        self.assertTrue(all(os.path.exists(p) for p in paths))
+    
+    def test_backpressure(self):
+        """Jobs beyond the memory budget are dropped instead of blocking."""
+        writer = EvidenceWriter(self.tmp.name, max_pending_bytes=self.frame.nbytes * 2)
+        writer.submit_clip([self.frame.copy() for _ in range(2)], 30.0)
+        self.assertIsNone(writer.submit_clip([self.frame.copy() for _ in range(3)], 30.0))
+        writer.stop()
+        
+        self.assertEqual(writer.dropped, 1)
+        self.assertEqual(writer.pending_bytes, 0)
+    
+    def test_alert_clip(self):
+        """A trigger produces one clip of pre and post frames."""
+        writer = EvidenceWriter(self.tmp.name)
+        recorder = EvidenceRecorder(writer, pre_frames=5, post_frames=3, fps=10.0)
+        submitted = []
+        writer.submit_clip = lambda frames, fps, **kw: submitted.append(len(frames)) or "clip"
+        
+        for i in range(10):
+            recorder.add_frame(self.frame, float(i))
+        recorder.trigger()
+        recorder.trigger()  # merged into the clip being recorded
+        for i in range(10, 20):
+            recorder.add_frame(self.frame, float(i))
+        
+        self.assertEqual(submitted, [8])
+        self.assertFalse(recorder.recording)
+    
+    def test_empty_trigger_without_post_frames(self):
+        """Nothing buffered and no post frames: no clip and no busy-writer warning."""
+        writer = EvidenceWriter(self.tmp.name)
+        recorder = EvidenceRecorder(writer, pre_frames=5, post_frames=0, fps=10.0)
+        with mock.patch("evidence.logger") as log:
+            recorder.trigger()
+        writer.stop()
+        
+        log.warning.assert_not_called()
+        
+        self.assertFalse(recorder.recording)
+        self.assertEqual((recorder.clips_submitted, writer.dropped), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for the eye state result cache
+====================================
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from capture import FrameListSource, SyntheticFaceSource
+from drowsiness_detector import DrowsinessDetector
+from eye_cache import EyeStateCache
+from settings import DetectorConfig, EyeAnalysisSettings
+
+
+class TestEyeStateCache(unittest.TestCase):
+    """Test cases for EyeStateCache."""
+
+    def setUp(self):
+        # One value per hash cell, each in the middle of an 8-level quantisation bin
+        rng = np.random.RandomState(0)
+        cells = rng.randint(5, 25, (8, 16)) * 8 + 4
+        self.roi = np.kron(cells, np.ones((4, 3))).astype(np.uint8)
+        self.params = EyeAnalysisSettings()
+        self.calls = 0
+
+    def analyze(self, roi):
+        self.calls += 1
+        return True
+
+    def test_near_identical_crops_hit(self):
+        """Sensor-level noise maps to the same key; a real change does not."""
+        cache = EyeStateCache()
+        cache.lookup(self.roi, self.params, self.analyze)
+        noisy = np.clip(self.roi.astype(int) + np.random.RandomState(1).randint(-3, 4, self.roi.shape),
+                        0, 255).astype(np.uint8)
+        cache.lookup(noisy, self.params, self.analyze)
+        self.assertEqual(self.calls, 1)
+
+        closed = self.roi.copy()
+        closed[:12] = 30
+        cache.lookup(closed, self.params, self.analyze)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        self.assertAlmostEqual(cache.hit_rate, 1 / 3)
+
+    def test_parameters_are_part_of_the_key(self):
+        """Changing the eye analysis thresholds invalidates earlier decisions."""
+        cache = EyeStateCache()
+        cache.lookup(self.roi, self.params, self.analyze)
+        cache.lookup(self.roi, EyeAnalysisSettings(dark_ratio_min=0.1), self.analyze)
+        self.assertEqual(self.calls, 2)
+
+    def test_crop_size_is_not_part_of_the_key(self):
+        """The same eye at another crop size reuses the decision."""
+        cache = EyeStateCache()
+        cache.lookup(self.roi, self.params, self.analyze)
+        cache.lookup(np.kron(self.roi, np.ones((2, 2), dtype=np.uint8)), self.params, self.analyze)
+        self.assertEqual(self.calls, 1)
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted first."""
+        cache = EyeStateCache(max_entries=2)
+        keys = [cache.key(np.full((10, 10), v, dtype=np.uint8), self.params) for v in (0, 100, 200)]
+        cache.put(keys[0], True)
+        cache.put(keys[1], False)
+        self.assertTrue(cache.get(keys[0]))
+        cache.put(keys[2], True)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 1)
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertTrue(cache.get(keys[0]))
+
+    def test_save_and_load(self):
+        """Entries survive a round trip through the cache file."""
+        cache = EyeStateCache()
+        cache.lookup(self.roi, self.params, lambda roi: False)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.json")
+            cache.save(path)
+            restored = EyeStateCache()
+            self.assertEqual(restored.load(path), 1)
+            self.assertFalse(restored.lookup(self.roi, self.params, self.analyze))
+            self.assertEqual(self.calls, 0)
+            self.assertEqual(EyeStateCache(quantization_bits=2).load(path), 0)
+
+    def test_detector_reuses_decisions(self):
+        """A still face is analysed once; the cache file is written on cleanup."""
+        frame = SyntheticFaceSource(320, 240, noise=0).render(0)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "eye_cache.json")
+            settings = DetectorConfig().headless().updated({
+                "eye_cache": {"enabled": True, "file": path},
+            })
+            detector = DrowsinessDetector(settings=settings, capture=FrameListSource([frame]))
+            for _ in range(3):
+                detector.process_frame(frame.copy())
+            detector.cleanup()
+
+            cache = detector.eye_cache
+            self.assertEqual(cache.misses, 2)
+            self.assertEqual(cache.hits, 4)
+            self.assertTrue(os.path.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
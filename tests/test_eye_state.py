@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for the eye state methods
+===============================
+"""
+
+import unittest
+import sys
+import os
+import cv2
+import numpy as np
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from capture import BlinkTimeline, FrameListSource, SyntheticFaceSource
+from drowsiness_detector import DrowsinessDetector
+from eye_state import (EYE_METHODS, LIGHTING_ADAPTIVE, METHOD_COMBINED, canonical_eye,
+                       contour_ratio, eye_open, measure_eye, method_open)
+from settings import DetectorConfig, EyeAnalysisSettings
+
+# Eye boxes the cascade finds on the 320x240 synthetic face
+EYES = [(167, 79, 37, 37), (110, 79, 38, 38)]
+LIGHTING = {"dark": (0.3, 0), "bright": (1.0, 80), "flat": (0.3, 150)}
+
+
+def relight(gray, gain, offset):
+    return np.clip(gray.astype(float) * gain + offset, 0, 255).astype(np.uint8)
+
+
+class TestEyeState(unittest.TestCase):
+    """Test cases for eye state measurements and rules."""
+
+    def setUp(self):
+        self.params = EyeAnalysisSettings()
+        rng = np.random.RandomState(0)
+        self.rois = [rng.randint(0, 256, (30, 40)).astype(np.uint8),
+                     np.full((30, 40), 200, dtype=np.uint8)]
+
+    def test_method_open_matches_measurement(self):
+        """Single-method decisions agree with the shared measurement."""
+        for roi in self.rois:
+            measurement = measure_eye(roi, self.params)
+            for method in EYE_METHODS:
+                self.assertEqual(method_open(roi, self.params, method),
+                                 eye_open(measurement, self.params, method))
+
+    def test_combined_requires_all(self):
+        """The combined rule is open only if every method says open."""
+        for roi in self.rois:
+            measurement = measure_eye(roi, self.params)
+            expected = all(eye_open(measurement, self.params, m)
+                           for m in EYE_METHODS if m != METHOD_COMBINED)
+            self.assertEqual(eye_open(measurement, self.params), expected)
+        self.assertFalse(eye_open(measure_eye(self.rois[1], self.params), self.params))
+
+    def test_contour_ratio(self):
+        """A blank region has no contour; ratios stay within 0..1."""
+        self.assertEqual(contour_ratio(np.zeros((10, 10), dtype=np.uint8)), 0.0)
+        self.assertTrue(0.0 <= contour_ratio(self.rois[0]) <= 1.0)
+
+    def test_canonical_buffer(self):
+        """Regions of any size are resampled into the preallocated buffer."""
+        buffer = np.empty((32, 32), dtype=np.uint8)
+        for size in ((12, 9), (30, 40), (150, 120)):
+            roi = np.full(size, 90, dtype=np.uint8)
+            self.assertIs(canonical_eye(roi, self.params, buffer), buffer)
+            self.assertTrue((buffer == 90).all())
+        resized = canonical_eye(self.rois[0], EyeAnalysisSettings(canonical_size=(24, 16)), buffer)
+        self.assertEqual(resized.shape, (16, 24))
+
+    def test_scale_invariance(self):
+        """The same eye gives the same ratios close to and far from the camera."""
+        for index in (0, 20):
+            measurements = []
+            for width, height, scale in ((320, 240, 1), (640, 480, 2)):
+                source = SyntheticFaceSource(width, height, fps=10,
+                                             timeline=BlinkTimeline([(1.0, 2.0)]))
+                gray = cv2.cvtColor(source.render(index), cv2.COLOR_BGR2GRAY)
+                x, y, w, h = (v * scale for v in EYES[0])
+                measurements.append(measure_eye(gray[y:y + h, x:x + w], self.params))
+            near, far = measurements
+            self.assertAlmostEqual(near.dark_ratio, far.dark_ratio, delta=0.03)
+            self.assertAlmostEqual(near.edge_ratio, far.edge_ratio, delta=0.03)
+            self.assertEqual(eye_open(near, self.params), eye_open(far, self.params))
+            self.assertEqual(eye_open(near, self.params), index == 0)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            eye_open(measure_eye(self.rois[0], self.params), self.params, "blink")
+
+
+
+class TestAdaptiveLighting(unittest.TestCase):
+    """Test cases for the adaptive lighting thresholds."""
+
+    def setUp(self):
+        source = SyntheticFaceSource(320, 240, fps=10, timeline=BlinkTimeline([(1.0, 2.0)]))
+        self.frames = {state: cv2.cvtColor(source.render(index), cv2.COLOR_BGR2GRAY)
+                       for state, index in (("open", 0), ("closed", 20))}
+        self.fixed = EyeAnalysisSettings()
+        self.adaptive = EyeAnalysisSettings(lighting=LIGHTING_ADAPTIVE)
+
+    def test_classification_under_lighting_changes(self):
+        """Fixed thresholds misread open eyes in poor light; adaptive ones do not."""
+        for name, (gain, offset) in LIGHTING.items():
+            for state, gray in self.frames.items():
+                lit = relight(gray, gain, offset)
+                for x, y, w, h in EYES:
+                    roi = lit[y:y + h, x:x + w]
+                    self.assertEqual(eye_open(measure_eye(roi, self.adaptive), self.adaptive),
+                                     state == "open", f"{state} eye, {name}")
+            lit = relight(self.frames["open"], gain, offset)
+            x, y, w, h = EYES[0]
+            self.assertFalse(method_open(lit[y:y + h, x:x + w], self.fixed, METHOD_COMBINED), name)
+
+    def test_adaptive_rules_agree(self):
+        """Single-method decisions agree with the shared measurement."""
+        lit = relight(self.frames["open"], *LIGHTING["dark"])
+        x, y, w, h = EYES[1]
+        roi = lit[y:y + h, x:x + w]
+        measurement = measure_eye(roi, self.adaptive)
+        for method in EYE_METHODS:
+            self.assertEqual(method_open(roi, self.adaptive, method),
+                             eye_open(measurement, self.adaptive, method))
+
+    def test_detector_in_dim_light(self):
+        """Open eyes in a dim cabin are not reported as a closure."""
+        frame = cv2.cvtColor(relight(self.frames["open"], *LIGHTING["dark"]), cv2.COLOR_GRAY2BGR)
+        settings = DetectorConfig().headless().updated({
+            "eye": {"lighting": LIGHTING_ADAPTIVE},
+        })
+        detector = DrowsinessDetector(settings=settings, capture=FrameListSource([frame]))
+        detector.process_frame(frame.copy())
+        self.assertTrue(detector.eyes_tracked)
+        self.assertFalse(detector.eyes_closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
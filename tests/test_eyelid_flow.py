@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the eyelid motion blink detector
+==========================================
+"""
+
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from capture import BlinkTimeline, SyntheticFaceSource
+from drowsiness_detector import DrowsinessDetector
+from eyelid_flow import EVENT_CLOSING, EVENT_OPENING, EyelidFlowDetector
+from settings import DetectorConfig
+from soak import SimulatedClock
+
+# Eye boxes of the synthetic face at 320x240, as found by the eye cascade
+EYES = [(167, 79, 37, 37), (110, 79, 38, 38)]
+
+
+class TestEyelidFlowDetector(unittest.TestCase):
+    """Test cases for EyelidFlowDetector."""
+
+    def setUp(self):
+        timeline = BlinkTimeline([(1.0, 0.15), (2.0, 1.0)], ramp=0.1)
+        self.source = SyntheticFaceSource(320, 240, fps=30, timeline=timeline,
+                                          noise=2, color=False)
+        self.flow = EyelidFlowDetector()
+
+    def test_blink_and_microsleep_events(self):
+        """Each closure gives one closing and one opening event at the lid motion."""
+        self.flow.set_windows(EYES, self.source.render(0))
+        events = []
+        for i in range(1, 105):
+            event = self.flow.update(self.source.render(i))
+            if event is not None:
+                events.append((i, event))
+        self.assertEqual([e for _, e in events],
+                         [EVENT_CLOSING, EVENT_OPENING, EVENT_CLOSING, EVENT_OPENING])
+        self.assertTrue(27 <= events[0][0] <= 30)
+        self.assertTrue(57 <= events[2][0] <= 60)
+        self.assertEqual((self.flow.closing_events, self.flow.opening_events), (2, 2))
+
+    def test_head_motion_is_not_a_blink(self):
+        """The whole eye window moving down (a nod) gives no lid event."""
+        frame = self.source.render(0)
+        self.flow.set_windows(EYES, frame)
+        for shift in range(1, 9):
+            self.assertIsNone(self.flow.update(np.roll(frame, shift, axis=0)))
+
+    def test_windows(self):
+        """Windows are clipped to the frame and follow the head."""
+        frame = self.source.render(0)
+        self.flow.set_windows([(-5, 10, 20, 20), (318, 238, 5, 5)], frame)
+        self.assertEqual(self.flow.windows, [(0, 10, 15, 20)])
+        self.flow.shift_windows(3, -2, frame)
+        self.assertEqual(self.flow.windows, [(3, 8, 15, 20)])
+        self.flow.set_windows([], frame)
+        self.assertFalse(self.flow.tracking)
+        self.assertIsNone(self.flow.update(frame))
+
+
+class TestDetectorEyelidFlow(unittest.TestCase):
+    """Test cases for the fusion of lid motion into the detector state."""
+
+    def run_detector(self, flow_enabled):
+        timeline = BlinkTimeline([(1.0, 0.15), (2.0, 1.0)], ramp=0.1)
+        source = SyntheticFaceSource(320, 240, fps=30, timeline=timeline, duration=3.5, noise=2)
+        clock = SimulatedClock()
+        settings = DetectorConfig().headless().updated({
+            "alerts": {"threshold_seconds": 0.5},
+            "eyelid_flow": {"enabled": flow_enabled},
+        })
+        detector = DrowsinessDetector(settings=settings, capture=source, clock=clock)
+        closed = []
+        try:
+            while True:
+                ret, frame = detector.cap.read()
+                if not ret:
+                    break
+                detector.process_frame(frame)
+                closed.append(detector.eyes_closed)
+                clock.advance(1 / 30)
+        finally:
+            detector.cleanup()
+        return detector, closed
+
+    def test_flow_counts_blinks_the_cascade_misses(self):
+        """Closed eyes are lost by the cascade; lid motion still registers the closures."""
+        static, _ = self.run_detector(False)
+        # Without lid motion the shut eyes are untracked; the microsleep can only
+        # alert once the reopening lid is seen again, long after the threshold
+        self.assertLessEqual(static.alert_dispatcher.dispatched, 1)
+
+        detector, closed = self.run_detector(True)
+        self.assertEqual(detector.blink_count, 2)
+        self.assertTrue(all(closed[31:35]))
+        self.assertTrue(all(closed[62:90]))
+        self.assertFalse(any(closed[95:]))
+        # The microsleep outlasts the alert threshold while the lids are watched
+        self.assertEqual(detector.alert_dispatcher.dispatched, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
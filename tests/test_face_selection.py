@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Tests for driver selection
+==========================
+"""
+
+import unittest
+import sys
+import os
+from unittest import mock
+
+import numpy as np
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from capture import FrameListSource
+from drowsiness_detector import DrowsinessDetector
+from face_selection import (SELECT_LARGEST, SELECT_SEAT_REGION, SELECT_TRACKING,
+                            DriverSelector, box_iou)
+from settings import DetectorConfig
+from soak import SimulatedClock
+
+FRAME_SIZE = (640, 480)
+DRIVER = (60, 100, 160, 160)      # Left half of the frame
+PASSENGER = (400, 90, 200, 200)   # Right half, closer to the camera
+
+
+class TestDriverSelector(unittest.TestCase):
+    """Test cases for DriverSelector."""
+
+    def test_box_iou(self):
+        """IoU is 1 for identical boxes and 0 for disjoint ones."""
+        ious = box_iou(DRIVER, np.array([DRIVER, PASSENGER]))
+        self.assertAlmostEqual(ious[0], 1.0)
+        self.assertEqual(ious[1], 0.0)
+
+    def test_largest(self):
+        """The largest face is the driver."""
+        selector = DriverSelector(SELECT_LARGEST)
+        self.assertEqual(selector.select([DRIVER, PASSENGER], FRAME_SIZE), 1)
+        self.assertIsNone(selector.select([], FRAME_SIZE))
+
+    def test_seat_region(self):
+        """Only faces centred in the seat region can be the driver."""
+        selector = DriverSelector(SELECT_SEAT_REGION, seat_region=(0.0, 0.0, 0.5, 1.0))
+        self.assertEqual(selector.select([PASSENGER, DRIVER], FRAME_SIZE), 1)
+        self.assertIsNone(selector.select([PASSENGER], FRAME_SIZE))
+
+    def test_tracking_keeps_driver(self):
+        """A locked driver track survives a larger face appearing in the seat."""
+        selector = DriverSelector(SELECT_TRACKING)
+        self.assertEqual(selector.select([DRIVER], FRAME_SIZE), 0)
+        driver_id = selector.driver_track.track_id
+
+        moved = (DRIVER[0] + 8, DRIVER[1] + 4, DRIVER[2], DRIVER[3])
+        self.assertEqual(selector.select([PASSENGER, moved], FRAME_SIZE), 1)
+        self.assertEqual(selector.driver_track.track_id, driver_id)
+        self.assertEqual(len(selector.tracks), 2)
+
+    def test_missed_driver_is_not_replaced(self):
+        """A passenger is not promoted while the driver track waits out a missed detection."""
+        selector = DriverSelector(SELECT_TRACKING, max_missed=2)
+        selector.select([DRIVER], FRAME_SIZE)
+        driver_id = selector.driver_track.track_id
+
+        self.assertIsNone(selector.select([PASSENGER], FRAME_SIZE))
+        self.assertEqual(selector.driver_track.track_id, driver_id)
+        self.assertEqual(selector.select([PASSENGER, DRIVER], FRAME_SIZE), 1)
+        self.assertEqual(selector.driver_track.track_id, driver_id)
+
+        # Only once the track expires does the passenger take over
+        for _ in range(2):
+            self.assertIsNone(selector.select([PASSENGER], FRAME_SIZE))
+        self.assertEqual(selector.select([PASSENGER], FRAME_SIZE), 0)
+        self.assertNotEqual(selector.driver_track.track_id, driver_id)
+
+    def test_lost_tracks_expire(self):
+        """Tracks are dropped after max_missed frames without a match."""
+        selector = DriverSelector(SELECT_TRACKING, max_missed=2)
+        selector.select([DRIVER], FRAME_SIZE)
+        for _ in range(3):
+            selector.select([], FRAME_SIZE)
+        self.assertEqual(selector.tracks, [])
+        self.assertIsNone(selector.driver_track)
+        self.assertEqual(selector.select([PASSENGER], FRAME_SIZE), 0)
+
+    def test_secondary_faces_are_bounded(self):
+        """Secondary faces are analysed at most max_secondary per frame, each every N frames."""
+        faces = [DRIVER, PASSENGER, (300, 300, 60, 60), (500, 350, 50, 50)]
+        selector = DriverSelector(SELECT_LARGEST, secondary_interval=2, max_secondary=1)
+
+        analysed = []
+        for _ in range(6):
+            driver = selector.select(faces, FRAME_SIZE)
+            due = selector.secondary_due(driver)
+            self.assertLessEqual(len(due), 1)
+            self.assertNotIn(driver, [i for i, _ in due])
+            analysed.extend(i for i, _ in due)
+
+        self.assertEqual(sorted(set(analysed)), [0, 2, 3])
+
+    def test_secondary_eye_state(self):
+        """Each track keeps its own blink count."""
+        selector = DriverSelector(SELECT_LARGEST, secondary_interval=1)
+        selector.select([DRIVER, PASSENGER], FRAME_SIZE)
+        (_, track), = selector.secondary_due(1)
+        track.update_eye_state(0, timestamp=10.0)
+        track.update_eye_state(2, timestamp=10.2)
+        track.update_eye_state(1, timestamp=10.4)
+        self.assertEqual(track.blink_count, 2)
+        self.assertTrue(track.eyes_closed)
+        self.assertEqual(track.eyes_closed_start, 10.4)
+
+    def test_invalid_strategy(self):
+        """Unknown strategies are rejected."""
+        with self.assertRaises(ValueError):
+            DriverSelector("nearest")
+
+
+class TestDetectorSecondaryFaces(unittest.TestCase):
+    """Test cases for the detector's passenger eye state."""
+
+    def test_closures_use_detector_clock(self):
+        """Passenger closures are timed with the detector's clock, not the wall clock."""
+        clock = SimulatedClock(1000.0)
+        settings = DetectorConfig().headless()
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        detector = DrowsinessDetector(settings=settings, clock=clock,
+                                      capture=FrameListSource([frame]))
+        self.addCleanup(detector.cleanup)
+        selector = DriverSelector(SELECT_LARGEST, secondary_interval=1)
+        selector.select([DRIVER, PASSENGER], FRAME_SIZE)
+        (_, track), = selector.secondary_due(1)
+
+        eyes = np.array([[20, 40, 40, 30], [120, 40, 40, 30]])
+        with mock.patch.object(detector, "_detect_eyes", return_value=eyes), \
+                mock.patch.object(detector, "_analyze_eye_state", return_value=False):
+            detector._update_secondary_face(frame, frame[:, :, 0], PASSENGER, track)
+        self.assertTrue(track.eyes_closed)
+        self.assertEqual(track.eyes_closed_start, 1000.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
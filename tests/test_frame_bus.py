@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared-memory frame bus
+=====================================
+"""
+
+import unittest
+import sys
+import os
+import multiprocessing
+import numpy as np
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from capture import SyntheticFaceSource
+from drowsiness_detector import DrowsinessDetector
+from frame_bus import FrameBusCapture, FrameBusReader, FrameBusWriter, publish
+from settings import DetectorConfig
+
+
+def frame_for(sequence, shape=(24, 32, 3)):
+    return np.full(shape, sequence % 256, dtype=np.uint8)
+
+
+def _read_in_child(name, count, results):
+    """Reader process: return the checksums of ``count`` frames read in order."""
+    with FrameBusReader(name) as reader:
+        sums = []
+        while len(sums) < count:
+            sequence, frame = reader.read(timeout=5.0)
+            if sequence is None:
+                break
+            sums.append((sequence, int(frame[0, 0, 0])))
+        results.put((sums, reader.frames_dropped))
+
+
+class TestFrameBus(unittest.TestCase):
+    """Test cases for the frame bus."""
+
+    def setUp(self):
+        self.writer = FrameBusWriter(None, 32, 24, channels=3, slots=4)
+
+    def tearDown(self):
+        self.writer.close()
+
+    def test_write_and_read_in_order(self):
+        """A reader gets each frame once, in order, with its timestamp."""
+        reader = FrameBusReader(self.writer.name)
+        self.assertEqual(reader.read(timeout=0.01), (None, None))
+        for i in range(3):
+            self.writer.write(frame_for(i), timestamp=100.0 + i)
+
+        for i in range(3):
+            sequence, frame = reader.read(timeout=0.1)
+            self.assertEqual(sequence, i)
+            self.assertTrue((frame == i).all())
+            self.assertEqual(reader.timestamp(sequence), 100.0 + i)
+        self.assertEqual(reader.frames_dropped, 0)
+        reader.close()
+
+    def test_lapped_reader_skips_overwritten_frames(self):
+        """Frames overwritten before they are read are counted as dropped."""
+        reader = FrameBusReader(self.writer.name)
+        for i in range(10):
+            self.writer.write(frame_for(i))
+        sequence, frame = reader.read(timeout=0.1)
+        self.assertEqual(sequence, 7)
+        self.assertTrue((frame == 7).all())
+        self.assertEqual(reader.frames_dropped, 7)
+        self.assertIsNone(reader.view(0))
+
+        latest = FrameBusReader(self.writer.name)
+        self.assertEqual(latest.read(latest=True, timeout=0.1)[0], 9)
+        reader.close()
+        latest.close()
+
+    def test_torn_read_counts_drops_once(self):
+        """A read retried after being lapped counts the skipped frames once."""
+        reader = FrameBusReader(self.writer.name)
+        for i in range(5):
+            self.writer.write(frame_for(i))
+        read_into = reader.read_into
+
+        def lapped(out, sequence):
+            # The writer laps the reader during the first copy
+            if not reader.torn_reads:
+                self.writer.write(frame_for(5))
+                self.writer.write(frame_for(6))
+                reader.torn_reads += 1
+                return False
+            return read_into(out, sequence)
+
+        reader.read_into = lapped
+        sequence, frame = reader.read(timeout=0.1)
+        self.assertEqual(sequence, 4)
+        self.assertEqual(reader.frames_dropped, 4)
+        reader.close()
+
+    def test_zero_copy_view(self):
+        """Views alias the shared slot and detect reuse of the slot."""
+        reader = FrameBusReader(self.writer.name)
+        self.writer.write(frame_for(1))
+        view = reader.view(0)
+        self.assertTrue((view == 1).all())
+        for i in range(1, 5):
+            self.writer.write(frame_for(i + 10))
+        self.assertFalse(reader.is_current(0))
+        self.assertTrue((view == 14).all())
+        del view
+        reader.close()
+
+    def test_geometry_mismatch(self):
+        with self.assertRaises(ValueError):
+            self.writer.write(np.zeros((24, 32), dtype=np.uint8))
+
+    def test_reader_in_other_process(self):
+        """A reader process attaches by name and sees every frame."""
+        context = multiprocessing.get_context()
+        results = context.Queue()
+        child = context.Process(target=_read_in_child, args=(self.writer.name, 3, results))
+        child.start()
+        # Publish slowly enough that the reader cannot be lapped
+        for i in range(3):
+            self.writer.write(frame_for(i + 40))
+            child.join(0.05)
+        sums, dropped = results.get(timeout=10)
+        child.join(10)
+        self.assertEqual([s for _, s in sums], [40, 41, 42])
+        self.assertEqual(dropped, 0)
+
+    def test_detector_reads_from_bus(self):
+        """The detector takes a bus reader as its capture source."""
+        source = SyntheticFaceSource(320, 240, fps=10)
+        with FrameBusWriter(None, 320, 240) as writer:
+            publish(source, writer, max_frames=2)
+            settings = DetectorConfig().headless()
+            detector = DrowsinessDetector(settings=settings, capture=FrameBusCapture(writer.name))
+            try:
+                ret, frame = detector.cap.read()
+                _, faces, eyes = detector.process_frame(frame)
+            finally:
+                detector.cleanup()
+        self.assertTrue(ret)
+        self.assertEqual(detector.cap.reader.last_sequence, 1)
+        self.assertEqual(len(faces), 1)
+
+    def test_capture_frames_are_not_reused(self):
+        """Frames kept by a consumer survive later reads."""
+        self.writer.write(frame_for(1))
+        self.writer.write(frame_for(2))
+        capture = FrameBusCapture(self.writer.name, latest=False, timeout=0.1)
+        _, first = capture.read()
+        _, second = capture.read()
+        capture.release()
+        self.assertFalse(np.shares_memory(first, second))
+        self.assertTrue((first == 1).all())
+        self.assertTrue((second == 2).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
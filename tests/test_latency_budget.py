@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for the latency budget
+============================
+"""
+
+import unittest
+import sys
+import os
+import cv2
+import numpy as np
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from capture import FrameListSource, SyntheticFaceSource
+from drowsiness_detector import DrowsinessDetector
+from latency_budget import (LEVEL_FULL, LEVEL_LOW_RESOLUTION, LEVEL_REUSE_EYES,
+                            LEVEL_SKIP_CONTOUR, LatencyBudget)
+from settings import DetectorConfig
+from soak import SimulatedClock
+
+
+class TestLatencyBudget(unittest.TestCase):
+    """Test cases for LatencyBudget."""
+
+    def test_degrades_and_recovers(self):
+        """Sustained overruns step the level down one at a time; headroom steps it back up."""
+        budget = LatencyBudget(target_fps=20, degrade_after=2, recover_after=5, smoothing=1.0)
+        levels = [budget.record(0.08, i * 0.05) for i in range(12)]
+        self.assertEqual(levels[:4], [0, 1, 1, 2])
+        self.assertEqual(budget.level, LEVEL_REUSE_EYES)
+        self.assertEqual(budget.over_budget, 12)
+
+        levels = [budget.record(0.01, 0.6 + i * 0.05) for i in range(10)]
+        self.assertEqual(levels[4], LEVEL_LOW_RESOLUTION)
+        self.assertEqual(levels[9], LEVEL_LOW_RESOLUTION - 1)
+
+        stats = budget.stats()
+        self.assertEqual(stats["budget_ms"], 50.0)
+        self.assertEqual(sum(stats["frames_in_level"].values()), 22)
+        self.assertAlmostEqual(sum(stats["time_in_level_s"].values()), 21 * 0.05, places=6)
+        self.assertEqual(stats["level_changes"], 6)
+
+    def test_max_level_and_validation(self):
+        budget = LatencyBudget(target_fps=20, degrade_after=1, smoothing=1.0,
+                               max_level=LEVEL_SKIP_CONTOUR)
+        for i in range(5):
+            budget.record(1.0, i)
+        self.assertEqual(budget.level, LEVEL_SKIP_CONTOUR)
+        with self.assertRaises(ValueError):
+            LatencyBudget(recover_ratio=0.9, degrade_ratio=0.5)
+
+
+class TestDetectorBudget(unittest.TestCase):
+    """Test cases for the degradation levels in the detector."""
+
+    def make_detector(self, overrides):
+        self.frame = SyntheticFaceSource(320, 240, noise=0).render(0)
+        settings = DetectorConfig().headless().updated(overrides)
+        return DrowsinessDetector(settings=settings, capture=FrameListSource([self.frame]),
+                                  clock=SimulatedClock())
+
+    def test_low_resolution_faces(self):
+        """Faces found on the downscaled frame map back to full frame coordinates."""
+        detector = self.make_detector({})
+        gray = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
+        full = detector._detect_faces(gray)
+        detector.degradation_level = LEVEL_LOW_RESOLUTION
+        low = detector._detect_faces(gray)
+        self.assertEqual(len(full), 1)
+        self.assertEqual(len(low), 1)
+        np.testing.assert_allclose(low[0], full[0], atol=12)
+
+    def test_overloaded_detector_reuses_boxes(self):
+        """An impossible budget degrades to reusing boxes between refreshes; eyes stay tracked."""
+        detector = self.make_detector({
+            "camera": {"width": 320, "height": 240, "fps": 10000},
+            "budget": {"enabled": True, "degrade_after": 1, "refresh_interval": 4},
+        })
+        for _ in range(12):
+            detector.process_frame(self.frame.copy())
+            detector.clock.advance(0.1)
+        self.assertEqual(detector.degradation_level, LEVEL_REUSE_EYES)
+        self.assertTrue(detector.eyes_tracked)
+        self.assertFalse(detector.eyes_closed)
+
+        refreshes = 0
+        for _ in range(8):
+            detector.process_frame(self.frame.copy())
+            refreshes += detector._frames_since_detection == 0
+        self.assertEqual(refreshes, 2)
+        self.assertTrue(detector.eyes_tracked)
+
+        stats = detector.budget.stats()
+        self.assertEqual(stats["frames_in_level"]["full"], 1)
+        self.assertGreater(stats["time_in_level_s"]["reuse_eyes"], 0)
+        self.assertAlmostEqual(sum(stats["time_in_level_s"].values()), 1.2)
+
+    def test_disabled_by_default(self):
+        detector = self.make_detector({})
+        detector.process_frame(self.frame.copy())
+        self.assertIsNone(detector.budget)
+        self.assertEqual(detector.degradation_level, LEVEL_FULL)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tests for the metrics registry and exporter
+===========================================
+"""
+
+import unittest
+import sys
+import os
+import socket
+import tempfile
+import time
+import urllib.request
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from capture import FrameListSource, SyntheticFaceSource
+from drowsiness_detector import DrowsinessDetector
+from metrics import MetricsRegistry, MetricsServer
+from settings import DetectorConfig
+
+
+def parse(text):
+    """Exposition text as {sample name with labels: value}."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test cases for MetricsRegistry."""
+
+    def test_exposition_format(self):
+        """Counters, labelled gauges and cumulative histogram buckets render as Prometheus text."""
+        registry = MetricsRegistry()
+        frames = registry.counter("frames_total", "Frames")
+        frames.inc(3)
+        level = registry.gauge("level", "Level", ("unit",))
+        level.labels("cab").set(2)
+        level.labels("rear").set_function(lambda: 0.5)
+        latency = registry.histogram("latency_seconds", "Latency", buckets=(0.01, 0.1))
+        for value in (0.005, 0.05, 0.05, 3.0):
+            latency.observe(value)
+
+        text = registry.render()
+        self.assertIn("# TYPE frames_total counter", text)
+        self.assertIn("# TYPE latency_seconds histogram", text)
+        samples = parse(text)
+        self.assertEqual(samples["frames_total"], 3)
+        self.assertEqual(samples['level{unit="cab"}'], 2)
+        self.assertEqual(samples['level{unit="rear"}'], 0.5)
+        self.assertEqual(samples['latency_seconds_bucket{le="0.01"}'], 1)
+        self.assertEqual(samples['latency_seconds_bucket{le="0.1"}'], 3)
+        self.assertEqual(samples['latency_seconds_bucket{le="+Inf"}'], 4)
+        self.assertEqual(samples["latency_seconds_count"], 4)
+        self.assertAlmostEqual(samples["latency_seconds_sum"], 3.105)
+
+        with self.assertRaises(ValueError):
+            frames.inc(-1)
+        with self.assertRaises(ValueError):
+            registry.counter("frames_total", "Again")
+
+    def test_unix_socket(self):
+        """The Unix socket exporter writes the exposition to every connection."""
+        registry = MetricsRegistry()
+        registry.gauge("up", "Up").set(1)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "metrics.sock")
+            server = MetricsServer(registry, path).start()
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(path)
+                    data = b"".join(iter(lambda: sock.recv(4096), b""))
+            finally:
+                server.stop()
+            self.assertEqual(parse(data.decode())["up"], 1)
+            self.assertFalse(os.path.exists(path))
+
+
+class TestDetectorMetrics(unittest.TestCase):
+    """Test cases for the detector metrics endpoint."""
+
+    def setUp(self):
+        self.frame = SyntheticFaceSource(320, 240, noise=0).render(0)
+        settings = DetectorConfig().headless().updated({
+            "budget": {"enabled": True},
+            "metrics": {"enabled": True, "address": "127.0.0.1:0"},
+        })
+        self.detector = DrowsinessDetector(settings=settings,
+                                           capture=FrameListSource([self.frame]))
+
+    def tearDown(self):
+        self.detector.cleanup()
+
+    def test_http_endpoint(self):
+        """Frame, detection and latency metrics are scraped over HTTP."""
+        for _ in range(3):
+            self.detector.process_frame(self.frame.copy())
+        host, port = self.detector.metrics_server.address
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=5) as response:
+            self.assertTrue(response.headers["Content-Type"].startswith("text/plain"))
+            samples = parse(response.read().decode())
+
+        self.assertEqual(samples["drowsiness_frames_total"], 3)
+        self.assertEqual(samples["drowsiness_face_detections_total"], 3)
+        self.assertEqual(samples["drowsiness_face_found_ratio"], 1.0)
+        self.assertEqual(samples['drowsiness_cascade_miss_ratio{cascade="eye"}'], 0.0)
+        self.assertEqual(samples["drowsiness_blinks_total"], 0)
+        self.assertEqual(samples['drowsiness_alerts_total{outcome="dispatched"}'], 0)
+        self.assertEqual(samples['drowsiness_stage_latency_seconds_count{stage="total"}'], 3)
+        self.assertGreater(samples['drowsiness_stage_latency_seconds_sum{stage="detect"}'], 0)
+        self.assertEqual(samples['drowsiness_degradation_frames_total{level="full"}'], 3)
+        self.assertEqual(samples['drowsiness_degradation_frames_total{level="reuse_eyes"}'], 0)
+        self.assertAlmostEqual(samples['drowsiness_degradation_seconds_total{level="full"}'],
+                               self.detector.budget.time_in_level[0])
+
+    def test_collection_overhead(self):
+        """Recording a frame costs well under 1% of processing it."""
+        self.detector.process_frame(self.frame.copy())
+        frame_time = self.detector.stage_times["total"]
+        start = time.perf_counter()
+        for _ in range(1000):
+            self.detector.metrics.record_frame()
+        per_frame = (time.perf_counter() - start) / 1000
+        self.assertLess(per_frame, 0.01 * frame_time)
+
+
+if __name__ == '__main__':
+    unittest.main()
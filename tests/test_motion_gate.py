@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for the frame-difference gate
+===================================
+"""
+
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from capture import BlinkTimeline, SyntheticFaceSource
+from drowsiness_detector import DrowsinessDetector
+from motion_gate import MotionGate
+from settings import DetectorConfig
+from soak import SimulatedClock
+
+
+class TestMotionGate(unittest.TestCase):
+    """Test cases for MotionGate."""
+    
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.frame = rng.randint(60, 200, (240, 320)).astype(np.uint8)
+        self.eye = (100, 80, 30, 20)
+        self.gate = MotionGate(frame_threshold=3.0, eye_threshold=6.0, refresh_interval=10)
+        self.assertTrue(self.gate.should_process(self.frame))
+        self.gate.update(self.frame, [self.eye])
+    
+    def test_static_frames_are_skipped(self):
+        """Unchanged frames skip detection until the forced refresh."""
+        decisions = []
+        for _ in range(20):
+            process = self.gate.should_process(self.frame.copy())
+            if process:
+                self.gate.update(self.frame, [self.eye])
+            decisions.append(process)
+        
+        self.assertEqual(decisions[:9], [False] * 9)
+        self.assertTrue(decisions[9])
+        self.assertTrue(decisions[19])
+        self.assertEqual(sum(decisions), 2)
+        self.assertAlmostEqual(self.gate.skip_ratio, 18 / 21)
+    
+    def test_global_change_is_processed(self):
+        """A large change anywhere in the frame triggers detection."""
+        changed = self.frame.copy()
+        changed[:, :160] = 255
+        self.assertTrue(self.gate.should_process(changed))
+    
+    def test_blink_in_eye_window_is_processed(self):
+        """A small change confined to the eye window still triggers detection."""
+        blink = self.frame.copy()
+        x, y, w, h = self.eye
+        blink[y:y + h, x:x + w] = 20
+        self.assertTrue(self.gate.should_process(blink))
+        self.assertLess(self.gate.last_frame_score, self.gate.frame_threshold)
+        self.assertGreater(self.gate.last_eye_score, self.gate.eye_threshold)
+
+
+
+class TestDetectorMotionGate(unittest.TestCase):
+    """Test cases for the motion gate inside the detector."""
+    
+    def test_detector_sees_shut_eyes_reopen(self):
+        """The gate keeps watching the eye windows while the cascade misses the shut eyes."""
+        timeline = BlinkTimeline([(1.0, 1.0)], ramp=0.1)
+        source = SyntheticFaceSource(320, 240, fps=30, timeline=timeline, duration=3.0, noise=0)
+        clock = SimulatedClock()
+        settings = DetectorConfig().headless().updated({
+            "motion_gate": {"enabled": True},
+        })
+        detector = DrowsinessDetector(settings=settings, capture=source, clock=clock)
+        closed = []
+        try:
+            while True:
+                ret, frame = detector.cap.read()
+                if not ret:
+                    break
+                detector.process_frame(frame)
+                closed.append(detector.eyes_closed)
+                clock.advance(1 / 30)
+        finally:
+            detector.cleanup()
+        
+        self.assertTrue(all(closed[35:60]))
+        # Reopening is caught at once, not at the gate's next forced refresh
+        self.assertFalse(any(closed[66:]))
+        self.assertGreater(detector.motion_gate.skip_ratio, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
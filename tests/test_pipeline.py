@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for the two-stage pipelined executor
+==========================================
+"""
+
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from analyzer import FrameAnalyzer, StreamState
+from capture import BlinkTimeline, FrameListSource, SyntheticFaceSource
+from pipeline import PipelinedStream, benchmark, run_sequential
+from settings import DetectorConfig
+
+
+class TestPipelinedStream(unittest.TestCase):
+    """Test cases for PipelinedStream."""
+
+    @classmethod
+    def setUpClass(cls):
+        source = SyntheticFaceSource(320, 240, timeline=BlinkTimeline([(0.2, 0.2)]), noise=0)
+        cls.frames = [source.render(i) for i in range(24)]
+
+    def assert_same_results(self, settings, detect_workers):
+        analyzer = FrameAnalyzer(settings)
+        sequential = StreamState.from_settings("sequential", settings)
+        expected = run_sequential(analyzer, FrameListSource(self.frames, loop=False), sequential)
+        pipeline = PipelinedStream(analyzer, FrameListSource(self.frames, loop=False),
+                                   detect_workers=detect_workers)
+        results = pipeline.run()
+
+        self.assertEqual(len(results), len(self.frames))
+        np.testing.assert_array_equal(results.timestamps, expected.timestamps)
+        np.testing.assert_array_equal(results.closed, expected.closed)
+        np.testing.assert_array_equal(results.monitored, expected.monitored)
+        np.testing.assert_array_equal(results.driver_faces, expected.driver_faces)
+        np.testing.assert_array_equal(results.eye_boxes, expected.eye_boxes)
+        self.assertEqual(pipeline.state.blink_count, sequential.blink_count)
+        self.assertGreater(pipeline.stage_times["detect_faces"], 0)
+        self.assertGreater(pipeline.stage_times["analyze_eyes"], 0)
+        return pipeline.state.blink_count
+
+    def test_matches_sequential(self):
+        """In-order state updates give the sequential results with one or several detect workers."""
+        self.assertEqual(self.assert_same_results(DetectorConfig(), 1), 1)
+        self.assert_same_results(DetectorConfig(), 3)
+
+    def test_matches_sequential_pyramid(self):
+        self.assert_same_results(DetectorConfig().updated({"detection": {"mode": "pyramid"}}), 2)
+
+    def test_max_frames(self):
+        pipeline = PipelinedStream(FrameAnalyzer(DetectorConfig()), FrameListSource(self.frames[:3]),
+                                   detect_workers=2)
+        self.assertEqual(len(pipeline.run(max_frames=7)), 7)
+        with self.assertRaises(ValueError):
+            PipelinedStream(pipeline.analyzer, pipeline.source, depth=-1)
+
+    @unittest.skipUnless((os.cpu_count() or 1) >= 2, "needs at least two CPUs")
+    def test_speedup(self):
+        """Overlapping the stages processes a single stream clearly faster."""
+        rows = benchmark(DetectorConfig(), self.frames)
+        self.assertEqual(rows[1]["frames"], len(self.frames))
+        self.assertGreater(rows[1]["speedup"], 1.3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for shared pyramid detection
+==================================
+"""
+
+import unittest
+import sys
+import os
+import glob
+import shutil
+import subprocess
+import tempfile
+import numpy as np
+import cv2
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from analyzer import FrameAnalyzer, ModelSet
+from pyramid import ImagePyramid, detect_on_levels
+from settings import DetectorConfig
+
+IMAGE_ARCHIVE = os.path.join(os.path.dirname(__file__), '..', 'Image Data.rar')
+
+
+def extract_command(directory):
+    """Command unpacking the bundled test images into directory, if a RAR tool is installed."""
+    if shutil.which("bsdtar"):
+        return ["bsdtar", "-xf", IMAGE_ARCHIVE, "-C", directory]
+    if shutil.which("unrar"):
+        return ["unrar", "x", "-inul", IMAGE_ARCHIVE, directory + os.sep]
+    return None
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    return w * h / (aw * ah + bw * bh - w * h)
+
+
+class TestImagePyramid(unittest.TestCase):
+    """Test cases for ImagePyramid."""
+    
+    def setUp(self):
+        self.gray = np.random.randint(0, 255, (480, 640), dtype=np.uint8)
+    
+    def test_levels_and_buffer_reuse(self):
+        """Levels shrink by the scale factor and buffers are reused."""
+        pyramid = ImagePyramid(scale_factor=2.0, max_levels=10, min_size=(20, 20))
+        levels = pyramid.build(self.gray)
+        
+        self.assertIs(levels[0], self.gray)
+        self.assertEqual([lv.shape for lv in levels],
+                         [(480, 640), (240, 320), (120, 160), (60, 80), (30, 40)])
+        self.assertEqual(pyramid.scales, [1.0, 2.0, 4.0, 8.0, 16.0])
+        
+        buffers = [id(pyramid.padded(k)) for k in range(len(levels))]
+        levels = pyramid.build(self.gray.copy())
+        self.assertEqual([id(pyramid.padded(k)) for k in range(len(levels))], buffers)
+        self.assertTrue(all(np.shares_memory(level, pyramid.padded(k))
+                            for k, level in enumerate(levels) if k))
+    
+    def test_level_cap(self):
+        """No more than max_levels levels are built."""
+        pyramid = ImagePyramid(scale_factor=1.1, max_levels=4)
+        self.assertEqual(len(pyramid.build(self.gray)), 4)
+    
+    def test_level_range(self):
+        """Level ranges cover the requested object sizes."""
+        pyramid = ImagePyramid(scale_factor=2.0, max_levels=10)
+        pyramid.build(self.gray)
+        
+        self.assertEqual(pyramid.level_range((24, 24), (24, 24)), range(0, 5))
+        self.assertEqual(pyramid.level_range((24, 24), (48, 48), (100, 100)), range(1, 3))
+        self.assertEqual(len(pyramid.level_range((24, 24), (20, 20), (10, 10))), 0)
+    
+    def test_detect_on_blank_frame(self):
+        """A blank frame yields an empty (0, 4) box array."""
+        cascade_path = os.path.join(os.path.dirname(__file__), '..', 'models',
+                                    'haarcascade_frontalface_default.xml')
+        cascade = cv2.CascadeClassifier(cascade_path)
+        pyramid = ImagePyramid()
+        pyramid.build(np.zeros((120, 160), dtype=np.uint8))
+        
+        boxes = detect_on_levels(cascade, pyramid, pyramid.level_range((24, 24), (30, 30)),
+                                 min_neighbors=5, roi=(10, 10, 100, 80))
+        self.assertEqual(boxes.shape, (0, 4))
+
+
+@unittest.skipUnless(os.path.exists(IMAGE_ARCHIVE) and extract_command(tempfile.gettempdir()),
+                     "needs the bundled images and bsdtar or unrar")
+class TestCascadeParity(unittest.TestCase):
+    """Pyramid mode against detectMultiScale on the bundled images."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        subprocess.run(extract_command(cls.temp_dir.name), check=True)
+        paths = sorted(glob.glob(os.path.join(cls.temp_dir.name, '**', '*.jpg'), recursive=True))
+        cls.images = {os.path.basename(path): cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2GRAY)
+                      for path in paths}
+        cls.models = ModelSet.from_settings(DetectorConfig())
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.temp_dir.cleanup()
+    
+    def test_scans_the_cascade_grid(self):
+        """Ungrouped hits are those of detectMultiScale: same positions, sizes and clipping."""
+        cascade = self.models.face_cascade
+        expected_total = found_total = 0
+        for name, gray in self.images.items():
+            expected = set(map(tuple, np.asarray(cascade.detectMultiScale(
+                gray, scaleFactor=1.1, minNeighbors=0, minSize=(30, 30))).reshape(-1, 4).tolist()))
+            pyramid = ImagePyramid(scale_factor=1.1)
+            pyramid.build(gray)
+            found = set(map(tuple, detect_on_levels(
+                cascade, pyramid, pyramid.level_range((24, 24), (30, 30)), 0).tolist()))
+            expected_total += len(expected)
+            found_total += len(expected & found)
+            self.assertLessEqual(len(expected - found), 1, name)
+        self.assertGreater(expected_total, 300)
+        self.assertGreaterEqual(found_total / expected_total, 0.99)
+    
+    def test_matches_cascade_mode(self):
+        """Every image yields the faces cascade mode finds, in the same places."""
+        cascade = FrameAnalyzer(DetectorConfig(), self.models)
+        pyramid = FrameAnalyzer(DetectorConfig().updated({"detection": {"mode": "pyramid"}}),
+                                self.models)
+        with_faces = 0
+        for name, gray in self.images.items():
+            gray = cascade.preprocess(gray)
+            expected = cascade.detect_faces(gray)
+            faces = pyramid.detect_faces(gray)
+            self.assertEqual(len(faces), len(expected), name)
+            for face in expected:
+                self.assertGreater(max(iou(face, found) for found in faces), 0.9, name)
+            with_faces += len(expected) > 0
+        self.assertGreaterEqual(with_faces, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
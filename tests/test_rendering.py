@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Tests for the render policy
+===========================
+"""
+
+import unittest
+import sys
+import os
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from rendering import RenderPolicy, RENDER_NONE, RENDER_EVERY_N, RENDER_SNAPSHOT
+
+
+class TestRenderPolicy(unittest.TestCase):
+    """Test cases for RenderPolicy."""
+    
+    def test_every_n(self):
+        """Only every Nth frame is displayed."""
+        policy = RenderPolicy(RENDER_EVERY_N, interval=3)
+        shown = [i for i in range(1, 10) if policy.should_display(i)]
+        self.assertTrue(policy.displays)
+        self.assertEqual(shown, [3, 6, 9])
+    
+    def test_headless_modes(self):
+        """Headless modes never display; snapshots only render on request."""
+        snapshot = RenderPolicy(RENDER_SNAPSHOT)
+        self.assertFalse(snapshot.displays)
+        self.assertFalse(snapshot.should_display(1))
+        self.assertFalse(snapshot.take_snapshot_request())
+        snapshot.request_snapshot()
+        self.assertTrue(snapshot.take_snapshot_request())
+        self.assertFalse(snapshot.take_snapshot_request())
+        
+        none = RenderPolicy(RENDER_NONE)
+        none.request_snapshot()
+        self.assertFalse(none.take_snapshot_request())
+    
+    def test_invalid_mode(self):
+        """Unknown modes and intervals are rejected."""
+        with self.assertRaises(ValueError):
+            RenderPolicy("sometimes")
+        with self.assertRaises(ValueError):
+            RenderPolicy(RENDER_EVERY_N, interval=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for the detection result types
+====================================
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import tracemalloc
+import numpy as np
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from capture import FrameListSource, SyntheticFaceSource
+from drowsiness_detector import DrowsinessDetector
+from results import DetectionBuffer, FrameResult, as_boxes, offset_boxes, scale_boxes
+from settings import DetectorConfig
+from soak import SimulatedClock
+
+
+def make_result(i):
+    """A frame at the default 640x480 camera size."""
+    eyes = np.array([[300 + i % 7, 260, 56, 56], [390, 262, 57, 57]], dtype=np.int32)
+    return FrameResult(i, i / 30.0, np.array([[270, 200, 280, 280]], dtype=np.int32),
+                       (270, 200, 280, 280), eyes[:i % 3], i % 5 == 0, i % 3 == 2, 0.02)
+
+
+class TestBoxTransforms(unittest.TestCase):
+    """Test cases for the vectorised box helpers."""
+
+    def test_transforms(self):
+        self.assertEqual(as_boxes(()).shape, (0, 4))
+        boxes = as_boxes([(1, 2, 10, 10), (5, 6, 20, 20)])
+        self.assertEqual(boxes.dtype, np.int32)
+        np.testing.assert_array_equal(offset_boxes(boxes, 100, 50),
+                                      [[101, 52, 10, 10], [105, 56, 20, 20]])
+        np.testing.assert_array_equal(scale_boxes(boxes, 1.5), [[2, 3, 15, 15], [8, 9, 30, 30]])
+        self.assertEqual(offset_boxes((), 3, 4).shape, (0, 4))
+
+
+class TestDetectionBuffer(unittest.TestCase):
+    """Test cases for DetectionBuffer."""
+
+    def test_round_trip(self):
+        """Frames come back as stored, across growth and a save/load."""
+        buffer = DetectionBuffer(capacity=4)
+        for i in range(10):
+            buffer.append(make_result(i))
+        buffer.append(FrameResult(10, 1.0, as_boxes(()), None, as_boxes(()), True, False))
+        self.assertEqual(len(buffer), 11)
+        self.assertEqual(buffer.capacity, 16)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "results.npz")
+            buffer.save(path)
+            loaded = DetectionBuffer.load(path)
+
+        for stored in (buffer, loaded):
+            result = stored[5]
+            self.assertEqual(result.frame_index, 5)
+            self.assertEqual(result.driver_face, (270, 200, 280, 280))
+            np.testing.assert_array_equal(result.eyes, make_result(5).eyes)
+            self.assertTrue(result.closed)
+            self.assertTrue(result.monitored)
+            self.assertAlmostEqual(result.latency, 0.02, places=6)
+            self.assertIsNone(stored[-1].driver_face)
+            self.assertEqual(len(stored[-1].eyes), 0)
+            np.testing.assert_array_equal(stored.closed, [i % 5 == 0 for i in range(10)] + [True])
+            np.testing.assert_array_equal(stored.eye_boxes[1, 1], [-1, -1, -1, -1])
+        with self.assertRaises(IndexError):
+            buffer[11]
+
+    def test_memory_per_frame(self):
+        """Columns take an order of magnitude less memory than per-frame tuples and lists."""
+        frames = 5000
+        results = [make_result(i) for i in range(frames)]
+
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            stored = [(r.frame_index, r.timestamp, r.faces.copy(), r.driver_face,
+                       [tuple(int(v) for v in eye) for eye in r.eyes], r.closed, r.monitored,
+                       r.latency) for r in results]
+            per_tuple = (tracemalloc.get_traced_memory()[0] - before) / frames
+
+            before = tracemalloc.get_traced_memory()[0]
+            buffer = DetectionBuffer(capacity=frames)
+            for r in results:
+                buffer.append(r)
+            per_column = (tracemalloc.get_traced_memory()[0] - before) / frames
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(len(stored), len(buffer))
+        self.assertLess(per_column * 10, per_tuple)
+        self.assertLess(buffer.nbytes / frames, 64)
+
+
+class TestDetectorResults(unittest.TestCase):
+    """Test cases for the detector's per-frame results."""
+
+    def test_frame_result(self):
+        frame = SyntheticFaceSource(320, 240, noise=0).render(0)
+        settings = DetectorConfig().headless()
+        detector = DrowsinessDetector(settings=settings, capture=FrameListSource([frame]),
+                                      clock=SimulatedClock())
+        try:
+            _, faces, eyes = detector.process_frame(frame.copy())
+            result = detector.frame_result()
+        finally:
+            detector.cleanup()
+
+        self.assertEqual(faces.shape, (1, 4))
+        self.assertEqual(eyes.dtype, np.int32)
+        self.assertEqual(eyes.shape, (2, 4))
+        self.assertEqual(result.frame_index, 0)
+        self.assertEqual(result.driver_face, tuple(int(v) for v in faces[0]))
+        self.assertTrue(result.monitored)
+        self.assertFalse(result.closed)
+
+        buffer = DetectionBuffer()
+        buffer.append(result)
+        np.testing.assert_array_equal(buffer[0].eyes, eyes)
+
+
+if __name__ == '__main__':
+    unittest.main()
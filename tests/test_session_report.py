@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Tests for the session summary reports
+=====================================
+"""
+
+import unittest
+import sys
+import os
+import csv
+import json
+import tempfile
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from capture import BlinkTimeline, FrameListSource, SyntheticFaceSource
+from drowsiness_detector import DrowsinessDetector
+from results import NO_BOXES, DetectionBuffer, FrameResult
+from session_report import SessionSummary, TimeBins, load_report, merge_reports
+from settings import DetectorConfig
+from soak import SimulatedClock
+
+FPS = 30
+
+
+def shift_events(seconds):
+    """Frames of a shift: a 0.3s blink every 20s, one 3s closure at 100s, no eyes at 200-210s."""
+    for i in range(int(seconds * FPS)):
+        t = i / FPS
+        closed = t % 20 < 0.3 or 100 <= t < 103
+        monitored = not 200 <= t < 210
+        yield t, closed, monitored, 0.02 + 0.01 * (i % 3)
+
+
+# Alerts the dispatcher sent during the 3s closure: a warning, then an escalation
+ALERTS = [("WARNING", 101.0, 1.0), ("CRITICAL", 102.5, 2.5)]
+
+
+def summarize(events, **kwargs):
+    options = dict(bin_seconds=10.0, max_bins=64, perclos_window=30.0)
+    options.update(kwargs)
+    summary = SessionSummary("cab1", **options)
+    for event in events:
+        for level, time, closed_seconds in ALERTS:
+            if event[0] <= time < event[0] + 1 / FPS:
+                summary.record_alert(level, time, closed_seconds)
+        summary.record(*event)
+    return summary.finish()
+
+
+class TestSessionSummary(unittest.TestCase):
+    """Test cases for SessionSummary."""
+
+    def test_report(self):
+        report = summarize(shift_events(300)).to_dict()
+
+        self.assertEqual(report["frames"], 9000)
+        self.assertEqual(report["blinks"], 15)
+        self.assertAlmostEqual(report["blinks_per_minute"], 3.0, places=2)
+        self.assertEqual(report["alerts"], 2)
+        self.assertAlmostEqual(report["longest_closure_seconds"], 3.0)
+        self.assertEqual(report["alert_timeline"],
+                         [{"time": 101.0, "level": "WARNING", "closed_seconds": 1.0},
+                          {"time": 102.5, "level": "CRITICAL", "closed_seconds": 2.5}])
+        self.assertEqual(sum(report["closure_histogram"]["counts"]), 15)
+        self.assertEqual(sum(report["perclos_histogram"]["counts"]), 10)
+        self.assertAlmostEqual(report["monitored_ratio"], 290 / 300)
+        self.assertAlmostEqual(report["latency_seconds"]["mean"], 0.03)
+        self.assertAlmostEqual(report["processing_fps"], 1 / 0.03)
+        self.assertAlmostEqual(report["fps"], FPS, places=1)
+
+        bins = report["timeline"]["bins"]
+        self.assertEqual(len(bins), 30)
+        self.assertEqual(bins[10]["blinks"], 1)
+        self.assertEqual(bins[10]["alerts"], 2)
+        self.assertEqual(bins[20]["monitored"], 0)
+        self.assertIsNone(bins[20]["perclos"])
+
+    def test_constant_memory(self):
+        """A long session coarsens the timeline instead of growing it."""
+        summary = summarize(shift_events(600), max_bins=8)
+        bins = summary.to_dict()["timeline"]["bins"]
+        self.assertLessEqual(len(bins), 8)
+        self.assertEqual(summary.timeline.width, 80.0)
+        self.assertEqual(summary.timeline.counts.shape, (8, 5))
+        self.assertEqual(sum(row["frames"] for row in bins), 18000)
+        self.assertEqual(sum(row["blinks"] for row in bins), 30)
+
+        # Bins that would run off the front are made room for as well
+        bins = TimeBins(1.0, 4)
+        for t in (10.5, 9.5, 3.2):
+            bins.add(t, 0)
+        self.assertEqual([row["frames"] for row in bins.rows()], [1, 0, 2])
+        self.assertEqual(bins.width, 4.0)
+
+    def test_merge_shards(self):
+        """Merging shards of a session gives the report of the whole session."""
+        events = list(shift_events(300))
+        whole = summarize(events)
+        # Shard boundaries on PERCLOS window and closure boundaries
+        shards = [summarize(events[:2700]), summarize(events[2700:6000], max_bins=4),
+                  summarize(events[6000:])]
+        merged = merge_reports(shards).to_dict()
+        expected = whole.to_dict()
+
+        for key in ("frames", "blinks", "alerts", "monitored_frames", "closed_frames",
+                    "longest_closure_seconds", "perclos_histogram", "closure_histogram",
+                    "latency_histogram", "alert_timeline", "start", "end"):
+            self.assertEqual(merged[key], expected[key], key)
+        self.assertEqual(merged["shards"], 3)
+        for key in ("mean", "std", "min", "max"):
+            self.assertAlmostEqual(merged["latency_seconds"][key], expected["latency_seconds"][key])
+        # The coarsest shard sets the timeline width
+        self.assertEqual(merged["timeline"]["bin_seconds"], 40.0)
+        self.assertEqual(sum(row["blinks"] for row in merged["timeline"]["bins"]), 15)
+
+        with self.assertRaises(ValueError):
+            merge_reports([])
+        with self.assertRaises(ValueError):
+            whole.merge(SessionSummary("cab1"))
+
+    def test_write_and_load(self):
+        summary = summarize(shift_events(60))
+        with tempfile.TemporaryDirectory() as directory:
+            json_path, csv_path = summary.write(directory, "both")
+            self.assertTrue(os.path.basename(json_path).startswith("session_cab1_"))
+            loaded = load_report(json_path)
+            self.assertEqual(loaded.to_dict(), json.loads(json.dumps(summary.to_dict())))
+            with open(csv_path, newline="") as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual(len(rows), 6)
+            self.assertEqual(sum(int(row["blinks"]) for row in rows), 3)
+            with self.assertRaises(ValueError):
+                summary.write(directory, "xml")
+
+    def test_record_buffer(self):
+        buffer = DetectionBuffer()
+        for i, (t, closed, monitored, latency) in enumerate(shift_events(40)):
+            buffer.append(FrameResult(i, t, NO_BOXES, None, NO_BOXES, closed, monitored, latency))
+        summary = SessionSummary("offline")
+        summary.record_buffer(buffer)
+        self.assertEqual(summary.finish().blinks, 2)
+        self.assertEqual(summary.frames, 1200)
+        self.assertEqual(summary.alerts, 0)
+
+
+class TestDetectorSession(unittest.TestCase):
+    """The detector writes its session report on cleanup."""
+
+    def test_report_on_cleanup(self):
+        source = SyntheticFaceSource(320, 240, timeline=BlinkTimeline([(0.1, 0.2), (0.5, 0.2)]),
+                                     noise=0)
+        frames = [source.render(i) for i in range(30)]
+        clock = SimulatedClock(1000.0)
+        with tempfile.TemporaryDirectory() as directory:
+            settings = DetectorConfig().headless().updated({
+                "camera": {"width": 320, "height": 240},
+                "session": {"enabled": True, "directory": directory, "format": "json"},
+            })
+            detector = DrowsinessDetector(settings=settings, stream_id="cab7", clock=clock,
+                                          capture=FrameListSource(frames, loop=False))
+            for frame in frames:
+                detector.process_frame(frame)
+                clock.advance(1 / FPS)
+            detector.cleanup()
+
+            reports = os.listdir(directory)
+            self.assertEqual(len(reports), 1)
+            with open(os.path.join(directory, reports[0])) as f:
+                report = json.load(f)
+        self.assertEqual(report["stream_id"], "cab7")
+        self.assertEqual(report["frames"], 30)
+        self.assertEqual(report["blinks"], detector.blink_count)
+        self.assertGreaterEqual(report["blinks"], 1)
+        self.assertGreater(report["latency_seconds"]["mean"], 0)
+
+    def test_alerts_match_dispatcher(self):
+        """The report lists the alerts the dispatcher sent, no more."""
+        timeline = BlinkTimeline([(1.0, 2.5)], ramp=0.1)
+        source = SyntheticFaceSource(320, 240, timeline=timeline, noise=2)
+        frames = [source.render(i) for i in range(4 * FPS)]
+        for flow in (True, False):
+            clock = SimulatedClock(1000.0)
+            with tempfile.TemporaryDirectory() as directory:
+                settings = DetectorConfig().headless().updated({
+                    "camera": {"width": 320, "height": 240},
+                    "alerts": {"threshold_seconds": 0.5,
+                               "min_interval_seconds": 0.5, "critical_seconds": 1.5},
+                    "eyelid_flow": {"enabled": flow},
+                    "session": {"enabled": True, "directory": directory, "format": "json"},
+                })
+                detector = DrowsinessDetector(settings=settings, clock=clock,
+                                              capture=FrameListSource(frames, loop=False))
+                for frame in frames:
+                    detector.process_frame(frame)
+                    clock.advance(1 / FPS)
+                detector.cleanup()
+            summary = detector.session
+            dispatched = detector.alert_dispatcher.dispatched
+            self.assertEqual(summary.alerts, dispatched, flow)
+            levels = [alert["level"] for alert in summary.alert_timeline]
+            if flow:
+                # Rate limited to one alert per 0.5s, escalating once the closure passes 1.5s
+                self.assertGreaterEqual(summary.alerts, 2)
+                self.assertEqual(levels[0], "WARNING")
+                self.assertEqual(levels[-1], "CRITICAL")
+            else:
+                # Untracked shut eyes are not alerted on; only the frame where the
+                # closing lid is seen again can alert
+                self.assertLessEqual(summary.alerts, 1)
+                self.assertTrue(all(alert["closed_seconds"] > 2.4
+                                    for alert in summary.alert_timeline))
+
+
+if __name__ == '__main__':
+    unittest.main()
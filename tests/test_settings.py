@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Tests for the typed detector configuration
+==========================================
+"""
+
+import unittest
+import sys
+import os
+import json
+import tempfile
+import threading
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import config
+from alerts import FileSink
+from capture import FrameListSource, SyntheticFaceSource
+from drowsiness_detector import DrowsinessDetector
+from settings import ConfigWatcher, DetectorConfig, load_config
+
+
+class TestDetectorConfig(unittest.TestCase):
+    """Test cases for DetectorConfig loading and validation."""
+    
+    def test_defaults_follow_config_module(self):
+        """Defaults come from config.py and are valid."""
+        settings = load_config(env={})
+        self.assertEqual(settings.camera.width, config.FRAME_WIDTH)
+        self.assertEqual(settings.detection.face_min_size, config.FACE_MIN_SIZE)
+        self.assertEqual(settings.eye.threshold_value, config.THRESHOLD_VALUE)
+        self.assertEqual(settings.preprocessing.median_kernel_size,
+                         config.MEDIAN_BLUR_KERNEL_SIZE)
+    
+    def test_file_and_env_overrides(self):
+        """Environment overrides win over the file, and values are coerced."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "unit.json")
+            with open(path, "w") as f:
+                json.dump({"camera": {"width": 320, "height": 240},
+                           "eye": {"threshold_value": 60}}, f)
+            
+            settings = load_config(env={
+                "DROWSINESS_CONFIG": path,
+                "DROWSINESS_EYE__THRESHOLD_VALUE": "70",
+                "DROWSINESS_DETECTION__FACE_MIN_SIZE": "40x40",
+                "DROWSINESS_PREPROCESSING__ENABLE_MEDIAN_BLUR": "off",
+                "DROWSINESS_ALERTS__LOG_FILE": "none",
+            })
+        
+        self.assertEqual((settings.camera.width, settings.camera.height), (320, 240))
+        self.assertEqual(settings.eye.threshold_value, 70)
+        self.assertEqual(settings.detection.face_min_size, (40, 40))
+        self.assertFalse(settings.preprocessing.enable_median_blur)
+        self.assertIsNone(settings.alerts.log_file)
+    
+    def test_headless(self):
+        """The headless variant draws nothing and only counts alerts."""
+        base = DetectorConfig().updated({"alerts": {"log_file": "alerts.jsonl",
+                                                    "socket_address": "127.0.0.1:5055",
+                                                    "threshold_seconds": 0.5},
+                                         "evidence": {"enabled": True}})
+        settings = base.headless()
+        self.assertEqual(settings.render.mode, "none")
+        self.assertFalse(settings.alerts.sound_enabled)
+        self.assertIsNone(settings.alerts.log_file)
+        self.assertIsNone(settings.alerts.socket_address)
+        self.assertEqual(settings.alerts.threshold_seconds, 0.5)
+        self.assertFalse(settings.evidence.enabled)
+        self.assertTrue(base.headless(keep_evidence=True).evidence.enabled)
+    
+    def test_validation(self):
+        """Invalid and unknown settings are rejected with a readable message."""
+        bad = DetectorConfig.from_dict({"detection": {"face_scale_factor": 1.0},
+                                        "preprocessing": {"median_kernel_size": 4}})
+        with self.assertRaises(ValueError) as ctx:
+            bad.validate()
+        self.assertIn("face_scale_factor", str(ctx.exception))
+        self.assertIn("median_kernel_size", str(ctx.exception))
+        
+        with self.assertRaises(ValueError):
+            DetectorConfig.from_dict({"camera": {"zoom": 2}})
+        with self.assertRaises(ValueError):
+            DetectorConfig.from_dict({"camera": {"width": "wide"}})
+    
+    def test_watcher_reload(self):
+        """The watcher applies valid edits and ignores invalid ones."""
+        applied = []
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "unit.json")
+            with open(path, "w") as f:
+                json.dump({}, f)
+            watcher = ConfigWatcher(path, applied.append, env={})
+            
+            with open(path, "w") as f:
+                json.dump({"detection": {"face_min_neighbors": 3}}, f)
+            os.utime(path, (1, 1))
+            self.assertTrue(watcher.check())
+            self.assertFalse(watcher.check())
+            
+            with open(path, "w") as f:
+                json.dump({"detection": {"face_min_neighbors": -1}}, f)
+            os.utime(path, (2, 2))
+            self.assertFalse(watcher.check())
+        
+        self.assertEqual([s.detection.face_min_neighbors for s in applied], [3])
+
+
+class TestLiveReload(unittest.TestCase):
+    """Test cases for settings applied to a running detector."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.frame = SyntheticFaceSource(320, 240, noise=0).render(0)
+        self.settings = DetectorConfig().headless().updated({
+            "camera": {"width": 320, "height": 240},
+            "paths": {"screenshots": self.tmp.name, "evidence": self.tmp.name},
+        })
+        self.detector = DrowsinessDetector(settings=self.settings,
+                                           capture=FrameListSource([self.frame]))
+    
+    def tearDown(self):
+        self.detector.cleanup()
+        self.tmp.cleanup()
+    
+    def apply(self, changes):
+        self.settings = self.settings.updated(changes)
+        self.detector.apply_config(self.settings)
+        self.detector.process_frame(self.frame.copy())
+    
+    def test_concurrent_apply_keeps_latest(self):
+        """A configuration queued from another thread while frames run is never lost."""
+        configs = [self.settings.updated({"alerts": {"threshold_seconds": 1.0 + i / 100}})
+                   for i in range(200)]
+        
+        def watcher():
+            for settings in configs:
+                self.detector.apply_config(settings)
+        
+        thread = threading.Thread(target=watcher)
+        thread.start()
+        while thread.is_alive():
+            self.detector.process_frame(self.frame.copy())
+        thread.join()
+        self.detector.process_frame(self.frame.copy())
+        self.assertEqual(self.detector.settings, configs[-1])
+    
+    def test_alert_sinks_rebuilt(self):
+        """Sink and queue changes replace the dispatcher; rate limits and counts carry over."""
+        old = self.detector.alert_dispatcher
+        self.assertTrue(old.submit("cab", 5.0, 100.0))
+        log_file = os.path.join(self.tmp.name, "alerts.jsonl")
+        self.apply({"alerts": {"log_file": log_file, "queue_size": 8}})
+        
+        dispatcher = self.detector.alert_dispatcher
+        self.assertIsNot(dispatcher, old)
+        self.assertEqual([type(sink) for sink in dispatcher.sinks], [FileSink])
+        self.assertEqual(dispatcher._queue.maxsize, 8)
+        self.assertEqual(dispatcher.dispatched, 1)
+        self.assertFalse(dispatcher.submit("cab", 5.0, 101.0))
+        self.assertTrue(dispatcher.submit("cab", 5.0, 103.0))
+        dispatcher.stop()
+        with open(log_file) as f:
+            self.assertEqual(len(f.readlines()), 1)
+        
+        # Timing changes keep the dispatcher
+        self.apply({"alerts": {"min_interval_seconds": 5.0}})
+        self.assertIs(self.detector.alert_dispatcher, dispatcher)
+        self.assertEqual(dispatcher.min_interval, 5.0)
+    
+    def test_evidence_rebuilt(self):
+        """Evidence can be switched on and resized without a restart."""
+        self.assertIsNone(self.detector.evidence_recorder)
+        self.apply({"evidence": {"enabled": True, "pre_seconds": 1.0}})
+        recorder = self.detector.evidence_recorder
+        self.assertEqual(recorder.ring.capacity, 30)
+        self.assertIs(recorder.writer, self.detector.evidence_writer)
+        
+        writer = self.detector.evidence_writer
+        self.apply({"evidence": {"writer_workers": 1}})
+        self.assertIsNot(self.detector.evidence_writer, writer)
+        self.assertIs(self.detector.evidence_recorder.writer, self.detector.evidence_writer)
+        
+        self.apply({"evidence": {"enabled": False}})
+        self.assertIsNone(self.detector.evidence_recorder)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for the soak test harness
+===============================
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from capture import SyntheticFaceSource
+from soak import SimulatedClock, evaluate, run_soak
+
+
+def series(rss_growth=0.0, object_growth=0.0, latency_growth=0.0, hours=4, step=300):
+    """Synthetic soak samples with linear growth per hour."""
+    samples = []
+    for t in range(0, hours * 3600 + 1, step):
+        h = t / 3600.0
+        samples.append({"sim_time_s": t, "rss_mb": 100 + rss_growth * h,
+                        "py_objects": 30000 + object_growth * h,
+                        "total_p95_ms": 20 + latency_growth * h, "threads": 3})
+    return samples
+
+
+class TestSoak(unittest.TestCase):
+    """Test cases for the soak harness."""
+
+    def test_simulated_clock(self):
+        """The clock only moves when advanced."""
+        clock = SimulatedClock(10.0)
+        clock.advance(0.5)
+        self.assertEqual(clock(), 10.5)
+
+    def test_evaluate_flags_leaks_and_drift(self):
+        """Flat series pass; growing memory, objects or latency fail."""
+        self.assertTrue(evaluate(series())["passed"])
+        self.assertFalse(evaluate(series(rss_growth=20))["passed"])
+        self.assertFalse(evaluate(series(object_growth=50000))["passed"])
+        report = evaluate(series(latency_growth=10))
+        self.assertEqual(len(report["failures"]), 1)
+        self.assertIn("latency", report["failures"][0])
+        self.assertFalse(evaluate(series()[:3])["passed"])
+
+    def test_run_soak_writes_timeseries(self):
+        """A short run simulates the full duration and writes its results."""
+        with tempfile.TemporaryDirectory() as tmp:
+            source = SyntheticFaceSource(160, 120, fps=2)
+            report = run_soak(source, duration=40, sample_interval=2, output_dir=tmp)
+            self.assertTrue(os.path.exists(os.path.join(tmp, "soak_timeseries.csv")))
+            self.assertTrue(os.path.exists(os.path.join(tmp, "soak_report.json")))
+
+        self.assertEqual(report["simulated_seconds"], 40.0)
+        self.assertGreaterEqual(len(report["timeseries"]), 15)
+        self.assertEqual(report["timeseries"][-1]["frames"], 80)
+        self.assertIn("detect_p95_ms", report["timeseries"][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
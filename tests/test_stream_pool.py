@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for the multi-stream thread pool
+======================================
+"""
+
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from alerts import AlertDispatcher, CallbackSink
+from analyzer import FrameAnalyzer
+from capture import BlinkTimeline, FrameListSource, SyntheticFaceSource
+from drowsiness_detector import DrowsinessDetector
+from pipeline import run_sequential
+from settings import DetectorConfig
+from soak import SimulatedClock
+from stream_pool import StreamPool, benchmark
+
+
+def blink_frames(start, count=24):
+    source = SyntheticFaceSource(320, 240, timeline=BlinkTimeline([(start, 0.2)]), noise=0)
+    return [source.render(i) for i in range(count)]
+
+
+class TestStreamPool(unittest.TestCase):
+    """Test cases for StreamPool."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.analyzer = FrameAnalyzer(DetectorConfig())
+        cls.frames = {f"cab{i}": blink_frames(0.1 * (i + 1)) for i in range(3)}
+
+    def run_pool(self, workers):
+        pool = StreamPool(self.analyzer, workers, chunk_size=4)
+        states = {stream_id: pool.add_stream(stream_id, FrameListSource(frames, loop=False))
+                  for stream_id, frames in self.frames.items()}
+        return pool, states, pool.run()
+
+    def test_parallel_matches_sequential(self):
+        """Streams keep their own state and frame order whatever the number of workers."""
+        _, states, sequential = self.run_pool(1)
+        pool, parallel_states, parallel = self.run_pool(3)
+
+        self.assertEqual(pool.frames_processed, 72)
+        for stream_id in self.frames:
+            self.assertEqual(len(parallel[stream_id]), 24)
+            np.testing.assert_array_equal(parallel[stream_id].closed, sequential[stream_id].closed)
+            np.testing.assert_array_equal(parallel[stream_id].eye_boxes,
+                                          sequential[stream_id].eye_boxes)
+            self.assertEqual(parallel_states[stream_id].blink_count, 1)
+            self.assertEqual(states[stream_id].blink_count, 1)
+        # Each stream closes its eyes at its own time
+        first_closed = [int(np.argmax(parallel[stream_id].closed)) for stream_id in self.frames]
+        self.assertEqual(first_closed, sorted(set(first_closed)))
+
+        with self.assertRaises(ValueError):
+            pool.add_stream("cab0", FrameListSource(self.frames["cab0"]))
+
+    def test_max_frames(self):
+        pool = StreamPool(self.analyzer, 2, chunk_size=3)
+        pool.add_stream("looping", FrameListSource(self.frames["cab0"][:2]))
+        results = pool.run(max_frames=5)
+        self.assertEqual(len(results["looping"]), 5)
+        np.testing.assert_allclose(results["looping"].timestamps, np.arange(5) / 30.0)
+
+    def test_alerts_match_detector(self):
+        """The pool, the sequential runner and the detector raise the same alerts."""
+        settings = DetectorConfig().headless().updated({
+            "camera": {"width": 320, "height": 240},
+            "alerts": {"threshold_seconds": 0.2, "min_interval_seconds": 0.12,
+                       "critical_seconds": 0.6},
+        })
+        # A slow closure: half-shut eyes are still found, fully shut ones are not
+        timeline = BlinkTimeline([(1.0, 0.3)], ramp=0.6)
+        source = SyntheticFaceSource(320, 240, timeline=timeline, noise=2)
+        frames = [source.render(i) for i in range(60)]
+
+        def dispatcher(received):
+            sink = CallbackSink(lambda alert: received.append((alert.level,
+                                                               round(alert.timestamp, 3))))
+            return AlertDispatcher.from_settings(settings.alerts, [sink])
+
+        detector_alerts = []
+        clock = SimulatedClock(0.0)
+        detector = DrowsinessDetector(settings=settings, clock=clock, stream_id="cab",
+                                      alert_dispatcher=dispatcher(detector_alerts),
+                                      capture=FrameListSource(frames, loop=False))
+        for frame in frames:
+            detector.process_frame(frame)
+            clock.advance(1 / 30.0)
+        detector.cleanup()
+
+        pool_alerts = []
+        pool = StreamPool(FrameAnalyzer(settings), 1, dispatcher=dispatcher(pool_alerts))
+        state = pool.add_stream("cab", FrameListSource(frames, loop=False))
+        pool.run()
+        pool.dispatcher.stop()
+        sequential = run_sequential(FrameAnalyzer(settings), FrameListSource(frames, loop=False))
+
+        self.assertGreaterEqual(detector.blink_count, 1)
+        self.assertEqual(state.blink_count, detector.blink_count)
+        self.assertGreater(len(detector_alerts), 0)
+        self.assertEqual(pool_alerts, detector_alerts)
+        self.assertEqual(state.alert_count, len(detector_alerts))
+        np.testing.assert_array_equal(sequential.closed, pool.streams["cab"].results.closed)
+
+    @unittest.skipUnless((os.cpu_count() or 1) >= 2, "needs at least two CPUs")
+    def test_multi_core_scaling(self):
+        """Two workers process frames from two streams clearly faster than one."""
+        rows = benchmark(DetectorConfig(), self.frames["cab0"], streams=2, worker_counts=(1, 2))
+        self.assertEqual(rows[1]["frames"], 48)
+        self.assertGreater(rows[1]["speedup"], 1.4)
+
+
+if __name__ == '__main__':
+    unittest.main()
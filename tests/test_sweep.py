@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for the alert policy sweep
+================================
+"""
+
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from alerts import AlertDispatcher, ALERT_CRITICAL
+from capture import BlinkTimeline, FrameListSource, SyntheticFaceSource
+from settings import DetectorConfig
+from sweep import (EyeStateStream, closure_alerts, debounced_closed, perclos,
+                   record_stream, sweep)
+
+
+def make_stream(closures, duration=60.0, fps=10.0, untracked=()):
+    """Stream with the eyes closed during the given (start, length) stretches."""
+    times = np.arange(int(duration * fps)) / fps
+    closed = np.zeros(len(times), dtype=bool)
+    for start, length in closures:
+        closed[(times >= start) & (times < start + length)] = True
+    tracked = np.ones(len(times), dtype=bool)
+    for start, length in untracked:
+        tracked[(times >= start) & (times < start + length)] = False
+    return EyeStateStream(times, closed, tracked, fps)
+
+
+def replay_alerts(stream, threshold, min_interval, critical_after):
+    """Frame-by-frame replay of the detector's alert logic."""
+    dispatcher = AlertDispatcher(min_interval=min_interval, critical_after=critical_after)
+    warnings = criticals = 0
+    closed_start = None
+    for t, closed, tracked in zip(stream.timestamps, stream.closed, stream.tracked):
+        if closed and closed_start is None:
+            closed_start = t
+        elif not closed and closed_start is not None:
+            closed_start = None
+            dispatcher.reset("s")
+        if closed and tracked and t - closed_start > threshold:
+            if dispatcher.submit("s", t - closed_start, t):
+                if dispatcher.level_for(t - closed_start) == ALERT_CRITICAL:
+                    criticals += 1
+                else:
+                    warnings += 1
+    return warnings, criticals
+
+
+class TestSweep(unittest.TestCase):
+    """Test cases for the sweep rules."""
+
+    def setUp(self):
+        self.stream = make_stream([(5.0, 0.1), (10.0, 0.3), (20.0, 3.5), (40.0, 12.0)],
+                                  untracked=[(41.0, 1.5)])
+
+    def test_closure_alerts_match_dispatcher(self):
+        """The vectorised alerts equal a frame-by-frame replay of the detector."""
+        thresholds = (1.0, 3.0, 4.0, 9.0)
+        results = closure_alerts(self.stream, thresholds, min_interval=2.0, critical_after=8.0)
+        for threshold in thresholds:
+            expected = replay_alerts(self.stream, threshold, 2.0, 8.0)
+            self.assertEqual((results[threshold]["warnings"], results[threshold]["criticals"]),
+                             expected, f"threshold {threshold}")
+        self.assertEqual(results[3.0]["closure_alerts"], 2)
+        self.assertEqual(results[3.0]["alert_times"], [23.1, 43.1])
+        self.assertEqual(results[4.0]["closure_alerts"], 1)
+
+    def test_debounce_and_perclos(self):
+        """Short closures are dropped and PERCLOS covers the trailing window."""
+        self.assertEqual(debounced_closed(self.stream, 0.2).sum(), self.stream.closed.sum() - 1)
+        values = perclos(self.stream, self.stream.closed, 10.0)
+        self.assertTrue(np.isnan(values[:99]).all())
+        self.assertAlmostEqual(values[int(23.4 * 10)], 3.5 / 10.0)
+        self.assertAlmostEqual(values[int(51.9 * 10)], 1.0)
+
+    def test_grid(self):
+        """Every combination is reported once with its blink and alert counts."""
+        results = sweep(self.stream, thresholds=(2.0, 5.0), debounces=(0.0, 0.2),
+                        perclos_windows=(10.0,), perclos_thresholds=(0.3, 0.9))
+        self.assertEqual(len(results), 8)
+        by_key = {(r["alert_threshold"], r["debounce"], r["perclos_threshold"]): r
+                  for r in results}
+        self.assertEqual(by_key[2.0, 0.0, 0.3]["blinks"], 4)
+        self.assertEqual(by_key[2.0, 0.2, 0.3]["blinks"], 3)
+        self.assertEqual(by_key[2.0, 0.0, 0.3]["closure_alerts"], 2)
+        self.assertEqual(by_key[5.0, 0.0, 0.3]["closure_alerts"], 1)
+        self.assertEqual(by_key[2.0, 0.0, 0.3]["perclos_alerts"], 2)
+        self.assertEqual(by_key[2.0, 0.0, 0.9]["perclos_alerts"], 1)
+
+    def test_record_stream(self):
+        """The stream mirrors the detector frame by frame."""
+        source = SyntheticFaceSource(320, 240, fps=5, timeline=BlinkTimeline([(1.0, 1.6)]),
+                                     duration=3.0)
+        settings = DetectorConfig().updated({"camera": {"width": 320, "height": 240}})
+        stream = record_stream(source, settings)
+        self.assertEqual(len(stream), 15)
+        self.assertAlmostEqual(stream.timestamps[5], 1.0)
+        # The cascade loses closed eyes, so the microsleep shows up as untracked
+        self.assertTrue(stream.tracked[:5].all())
+        self.assertFalse(stream.tracked[6:13].any())
+
+        # A source without a frame rate needs one passed in
+        frames = FrameListSource([source.render(0)], 0, loop=False)
+        with self.assertRaises(ValueError):
+            record_stream(frames, settings)
+        self.assertEqual(len(record_stream(frames, settings, fps=5)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
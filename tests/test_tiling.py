@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for tile-parallel face detection
+======================================
+"""
+
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from analyzer import FrameAnalyzer, ModelSet
+from face_selection import DriverSelector
+from settings import DetectorConfig
+from tiling import TiledFaceDetector, benchmark, cabin_frame, non_max_suppression, tile_grid
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    return w * h / (aw * ah + bw * bh - w * h)
+
+
+class TestTileGeometry(unittest.TestCase):
+    """Test cases for the tile grid and box merging."""
+
+    def test_tiles_contain_every_small_box(self):
+        tiles = tile_grid(1920, 1080, 640, 160)
+        self.assertEqual(len(tiles), 8)
+        self.assertTrue(all(x + w <= 1920 and y + h <= 1080 for x, y, w, h in tiles))
+        self.assertIn((1320, 460, 600, 620), tiles)
+
+        rng = np.random.RandomState(0)
+        for _ in range(500):
+            size = rng.randint(30, 161)
+            x, y = rng.randint(0, 1920 - size), rng.randint(0, 1080 - size)
+            self.assertTrue(any(tx <= x and x + size <= tx + tw and ty <= y and y + size <= ty + th
+                                for tx, ty, tw, th in tiles), (x, y, size))
+
+        self.assertEqual(tile_grid(320, 240, 640, 160), [(0, 0, 320, 240)])
+        with self.assertRaises(ValueError):
+            tile_grid(1920, 1080, 160, 160)
+
+    def test_non_max_suppression(self):
+        boxes = np.array([[100, 100, 50, 50], [102, 101, 52, 52], [300, 100, 50, 50],
+                          [98, 99, 49, 49]], dtype=np.int32)
+        kept = non_max_suppression(boxes, 0.3)
+        self.assertEqual(kept.tolist(), [[102, 101, 52, 52], [300, 100, 50, 50]])
+        self.assertEqual(len(non_max_suppression(boxes[:0], 0.3)), 0)
+
+
+class TestTiledDetection(unittest.TestCase):
+    """Test cases for the tiled detection mode."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.models = ModelSet.from_settings(DetectorConfig())
+        # Small faces in the first tile, across the tile overlap and in the
+        # last column, and one face too large for the tiles
+        cls.frame = cabin_frame(1280, 720, [(40, 60), (470, 420), (1080, 60)], face_height=160)
+        cls.frame[300:540, 700:1020] = cabin_frame(320, 240, [(0, 0)], face_height=240)
+
+    def analyzer(self, **detection):
+        settings = DetectorConfig().updated({"detection": {"mode": "tiled", **detection}})
+        analyzer = FrameAnalyzer(settings, self.models)
+        self.addCleanup(analyzer.close)
+        return analyzer
+
+    def test_matches_full_frame(self):
+        """Tiles and the coarse pass find the faces a full-frame search finds, once each."""
+        cascade = FrameAnalyzer(DetectorConfig(), self.models)
+        gray = cascade.preprocess(self.frame)
+        expected = cascade.detect_faces(gray)
+        self.assertEqual(len(expected), 4)
+
+        faces = self.analyzer().detect_faces(gray)
+        self.assertEqual(len(faces), 4)
+        for face in expected:
+            self.assertGreater(max(iou(face, found) for found in faces), 0.6)
+
+    def test_parallel_matches_sequential(self):
+        gray = self.analyzer().preprocess(self.frame)
+        sequential = self.analyzer(tile_workers=1).detect_faces(gray)
+        parallel = self.analyzer(tile_workers=3).detect_faces(gray)
+        self.assertEqual(sorted(map(tuple, parallel.tolist())),
+                         sorted(map(tuple, sequential.tolist())))
+
+        # Without the coarse pass the tiles report no box above the overlap
+        small = self.analyzer(tile_coarse_scale=0.0).detect_faces(gray)
+        self.assertGreaterEqual(len(small), 3)
+        self.assertTrue(all(w <= 160 for _, _, w, _ in small.tolist()))
+
+    def test_analyze(self):
+        """The driver's eyes are analysed as in the other modes."""
+        analysis = self.analyzer().analyze(self.frame, DriverSelector())
+        self.assertIsNotNone(analysis.driver_face)
+        self.assertEqual(len(analysis.faces), 4)
+
+    def test_settings(self):
+        tiled = DetectorConfig().updated({"detection": {"mode": "tiled"}})
+        with self.assertRaises(ValueError):
+            tiled.updated({"detection": {"tile_overlap": 700}}).validate()
+        with self.assertRaises(ValueError):
+            tiled.updated({"detection": {"tile_overlap": 20}}).validate()
+        # Tile settings do not constrain the other modes
+        DetectorConfig().updated({"detection": {"face_min_size": [200, 200]}}).validate()
+        with self.assertRaises(ValueError):
+            TiledFaceDetector(lambda: None, (24, 24), overlap=640, tile_size=640)
+
+    @unittest.skipUnless((os.cpu_count() or 1) >= 4, "needs at least four CPUs")
+    def test_speedup(self):
+        """Tiles on four workers search a 1080p frame clearly faster than one full-frame call."""
+        frame = cabin_frame(1920, 1080, [(300, 360), (1000, 300), (1500, 700)], face_height=160)
+        rows = benchmark(DetectorConfig().detection, self.models, [frame] * 3, worker_counts=(4,))
+        self.assertEqual(rows[1]["faces"], rows[0]["faces"])
+        self.assertGreater(rows[1]["speedup"], 1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Tests for the OpenCV tuning profile
+===================================
+"""
+
+import unittest
+import sys
+import os
+import json
+import tempfile
+import threading
+from unittest import mock
+
+import cv2
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from analyzer import FrameAnalyzer
+from capture import FrameListSource, SyntheticFaceSource
+from drowsiness_detector import DrowsinessDetector
+from pipeline import PipelinedStream
+from settings import DetectorConfig
+from tuning import (TuningProfile, candidate_profiles, host_key, load_or_tune, measure,
+                    synthetic_frames, tune, worker_initializer)
+
+
+class TestTuningProfile(unittest.TestCase):
+    """Test cases for TuningProfile and its helpers."""
+
+    def setUp(self):
+        self.previous = (cv2.getNumThreads(), cv2.useOptimized(), cv2.ocl.useOpenCL())
+
+    def tearDown(self):
+        cv2.setNumThreads(self.previous[0])
+        cv2.setUseOptimized(self.previous[1])
+        cv2.ocl.setUseOpenCL(self.previous[2])
+
+    def test_apply(self):
+        TuningProfile(cv_threads=1, optimized=False).apply()
+        self.assertEqual(cv2.getNumThreads(), 1)
+        self.assertFalse(cv2.useOptimized())
+        self.assertFalse(cv2.ocl.useOpenCL())
+
+        # Zero threads leaves OpenCV's thread count alone
+        TuningProfile(cv_threads=0).apply()
+        self.assertEqual(cv2.getNumThreads(), 1)
+        self.assertTrue(cv2.useOptimized())
+
+    def test_detector_keeps_host_settings(self):
+        """A detector with the default profile leaves the host's OpenCV settings alone."""
+        frame = SyntheticFaceSource(320, 240, noise=0).render(0)
+        settings = DetectorConfig().headless()
+        cv2.setNumThreads(3)
+        cv2.setUseOptimized(False)
+        DrowsinessDetector(settings=settings, capture=FrameListSource([frame])).cleanup()
+        self.assertEqual(cv2.getNumThreads(), 3)
+        self.assertFalse(cv2.useOptimized())
+
+        settings = settings.updated({"tuning": {"cv_threads": 2}})
+        DrowsinessDetector(settings=settings, capture=FrameListSource([frame])).cleanup()
+        self.assertEqual(cv2.getNumThreads(), 2)
+        self.assertTrue(cv2.useOptimized())
+
+    def test_from_settings(self):
+        settings = DetectorConfig().updated({"tuning": {"cv_threads": 2, "pin_threads": True}})
+        profile = TuningProfile.from_settings(settings.tuning)
+        self.assertEqual(profile, TuningProfile(cv_threads=2, pin_threads=True))
+        self.assertIn("cv_threads=2", profile.describe())
+
+        with self.assertRaises(ValueError):
+            DetectorConfig().updated({"tuning": {"cv_threads": -1}}).validate()
+        with self.assertRaises(ValueError):
+            DetectorConfig().updated({"tuning": {"benchmark_frames": 0}}).validate()
+
+    def test_candidates(self):
+        tuning = DetectorConfig().tuning
+        profiles = candidate_profiles(2, tuning)
+        self.assertEqual(len(profiles), len(set(profiles)))
+        self.assertIn(TuningProfile(cv_threads=1), profiles)
+        self.assertIn(TuningProfile(cv_threads=1, optimized=False), profiles)
+        self.assertTrue(all(not profile.opencl for profile in profiles))
+
+    @unittest.skipUnless(hasattr(os, "sched_setaffinity"), "needs sched_setaffinity")
+    def test_pinned_workers(self):
+        """Pool workers are pinned to one CPU each; the calling thread is not."""
+        allowed = os.sched_getaffinity(0)
+        masks = []
+
+        def worker():
+            initialize()
+            masks.append(os.sched_getaffinity(0))
+
+        self.assertIsNone(worker_initializer(TuningProfile()))
+        initialize = worker_initializer(TuningProfile(pin_threads=True))
+        threads = [threading.Thread(target=worker) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([len(mask) for mask in masks], [1, 1])
+        self.assertTrue(all(mask <= allowed for mask in masks))
+        self.assertEqual(os.sched_getaffinity(0), allowed)
+
+    def test_pipeline_with_profile(self):
+        source = SyntheticFaceSource(320, 240, noise=0)
+        frames = [source.render(i) for i in range(4)]
+        profile = TuningProfile(cv_threads=1, pin_threads=True)
+        pipeline = PipelinedStream(FrameAnalyzer(DetectorConfig()), FrameListSource(frames, loop=False),
+                                   detect_workers=2, profile=profile)
+        self.assertEqual(len(pipeline.run()), 4)
+        self.assertEqual(cv2.getNumThreads(), 1)
+
+
+class TestAutoTuning(unittest.TestCase):
+    """Test cases for the start-up micro-benchmark and its cache."""
+
+    def setUp(self):
+        self.previous = (cv2.getNumThreads(), cv2.useOptimized(), cv2.ocl.useOpenCL())
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.temp_dir.name, "logs", "cv_tuning.json")
+        self.settings = DetectorConfig().updated({
+            "camera": {"width": 320, "height": 240},
+            "tuning": {"auto": True, "cache_file": self.cache_file, "benchmark_frames": 2},
+        })
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_tune_restores_opencv_state(self):
+        frames = synthetic_frames(self.settings, 2)
+        self.assertEqual(frames[0].shape, (240, 320))
+        profile, rows = tune(self.settings, workers=1, frames=frames)
+        self.assertEqual(len(rows), len(candidate_profiles(1, self.settings.tuning)))
+        self.assertTrue(all(row["fps"] > 0 for row in rows))
+        self.assertIn(profile, candidate_profiles(1, self.settings.tuning))
+        self.assertEqual((cv2.getNumThreads(), cv2.useOptimized(), cv2.ocl.useOpenCL()),
+                         self.previous)
+
+    def test_measure_closes_analyzer(self):
+        """The tile pool of a measured analyzer is shut down, even when analysis fails."""
+        settings = self.settings.updated({"detection": {"mode": "tiled"}})
+        frames = synthetic_frames(settings, 1)
+        with mock.patch.object(FrameAnalyzer, "close") as close:
+            self.assertGreater(measure(settings, frames, 1, TuningProfile()), 0)
+            self.assertEqual(close.call_count, 1)
+            with mock.patch.object(FrameAnalyzer, "analyze", side_effect=RuntimeError("boom")):
+                with self.assertRaises(RuntimeError):
+                    measure(settings, frames, 1, TuningProfile())
+            self.assertEqual(close.call_count, 2)
+
+    def test_cached_per_host(self):
+        """The benchmark runs once per host and worker count; later starts read the cache."""
+        self.assertEqual(load_or_tune(DetectorConfig()), TuningProfile())
+
+        profile = load_or_tune(self.settings)
+        with open(self.cache_file) as f:
+            cache = json.load(f)
+        key = host_key(1, (320, 240))
+        self.assertEqual(list(cache), [key])
+        self.assertEqual(TuningProfile(**cache[key]), profile)
+
+        # A planted entry proves the second call reads the cache instead of measuring
+        cache[key] = {"cv_threads": 7, "optimized": False, "opencl": False, "pin_threads": False}
+        with open(self.cache_file, "w") as f:
+            json.dump(cache, f)
+        self.assertEqual(load_or_tune(self.settings), TuningProfile(cv_threads=7, optimized=False))
+
+        load_or_tune(self.settings, workers=2)
+        with open(self.cache_file) as f:
+            self.assertEqual(set(json.load(f)), {key, host_key(2, (320, 240))})
+
+
+if __name__ == '__main__':
+    unittest.main()